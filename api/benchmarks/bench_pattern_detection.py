@@ -0,0 +1,153 @@
+"""Benchmark pattern detection: per-analysis regrouping vs. bucket rollup cube.
+
+Run from api/:
+    python -m benchmarks.bench_pattern_detection [--sizes 1000 10000 100000]
+
+"analyses" completed analyses are spread over 180 days and folded into the
+daily buckets the pattern_daily_counts trigger would have written ("buckets"),
+then into the per-key window rows pattern_window_counts returns ("keys"),
+which is what the API reads. The "legacy" column is the original single-key
+regrouping over every raw row, excluding the cost of reading them. "fold" is
+window_rows() in Python; in production that step runs in SQL. "cube" rolls
+the key rows up along the default hierarchies with settings.pattern_min_recent,
+and "speedup" is legacy / cube. Anomaly counts are shown for both detectors.
+"""
+
+import argparse
+import math
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+from config import settings
+from services.pattern_detection import PatternCube, parse_hierarchies, stored_dimensions, window_rows
+
+TODAY = date(2026, 6, 30)
+
+FAILURE_MODES = ["adhesive", "cohesive", "substrate", "mixed", "interfacial", "blistering", "cracking", "creep"]
+SUBSTRATES = [
+    "aluminum", "steel", "stainless steel", "abs", "polycarbonate", "glass", "nylon 6-6", "pp",
+    "carbon fiber", "copper", "pvc", "epdm", "acrylic", "fr-4", "galvanized steel", "titanium",
+]
+ROOT_CAUSES = ["surface_prep", "cure", "design", "material", "environment", "application", "unknown"]
+
+
+def _zipf(rng: random.Random, values: list, n: int, s: float = 1.1) -> list:
+    return rng.choices(values, weights=[1 / (i + 1) ** s for i in range(len(values))], k=n)
+
+
+def synthetic_analyses(n: int, seed: int = 13) -> list[dict]:
+    """Skewed like real traffic (a few materials and products dominate), plus three injected spikes."""
+    rng = random.Random(seed)
+    products = [f"product {i}" for i in range(150)]
+    columns = {
+        "failure_mode": _zipf(rng, FAILURE_MODES, n),
+        "substrate_a": _zipf(rng, SUBSTRATES, n),
+        "substrate_b": _zipf(rng, SUBSTRATES, n),
+        "material_product": _zipf(rng, products, n),
+        "root_cause_category": _zipf(rng, ROOT_CAUSES, n),
+    }
+    rows = [
+        {"id": str(uuid.uuid4()), **{k: v[i] for k, v in columns.items()}, "days_ago": rng.randint(0, 180)}
+        for i in range(n)
+    ]
+    for spike in range(3):
+        for _ in range(max(n // 500, 5)):
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "failure_mode": FAILURE_MODES[spike + 2],
+                "substrate_a": SUBSTRATES[spike + 5],
+                "substrate_b": SUBSTRATES[0],
+                "material_product": products[40 + spike],
+                "root_cause_category": ROOT_CAUSES[spike],
+                "days_ago": rng.randint(0, 20),
+            })
+    return rows
+
+
+def to_buckets(analyses: list[dict]) -> list[dict]:
+    """What the trigger accumulates: one row per finest-grain key and day."""
+    buckets: dict[tuple, dict] = {}
+    for a in analyses:
+        dims = (a["failure_mode"], a["substrate_a"], a["substrate_b"], a["material_product"], a["root_cause_category"])
+        key = (dims, a["days_ago"])
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = {
+                "pattern_key": "|".join(dims),
+                "bucket_date": TODAY - timedelta(days=a["days_ago"]),
+                "failure_mode": dims[0],
+                "substrate": dims[1],
+                "substrate_b": dims[2],
+                "product": dims[3],
+                "root_cause_category": dims[4],
+                "count": 0,
+                "analysis_ids": [],
+            }
+        b["count"] += 1
+        if len(b["analysis_ids"]) < 20:
+            b["analysis_ids"].insert(0, a["id"])
+    return list(buckets.values())
+
+
+def legacy_detect(analyses: list[dict]) -> int:
+    """The original detect_patterns grouping: one raw key, rebuilt from every analysis."""
+    recent = defaultdict(list)
+    monthly = defaultdict(lambda: [0, 0, 0, 0, 0])
+    for a in analyses:
+        key = f"{a['failure_mode']}|{a['substrate_a']}|{a['material_product']}"
+        if a["days_ago"] <= 30:
+            recent[key].append(a)
+        else:
+            monthly[key][min((a["days_ago"] - 31) // 30, 4)] += 1
+    flagged = 0
+    for key, items in recent.items():
+        hist = monthly.get(key, [0, 0, 0, 0, 0])
+        mean = sum(hist) / 5
+        var = sum((c - mean) ** 2 for c in hist) / 5
+        std = math.sqrt(var) if var > 0 else 0.5
+        flagged += (len(items) - mean) / std >= 2.0
+    return flagged
+
+
+def _ms(fn, repeat: int) -> tuple[float, object]:
+    """Best-of-N wall time in ms, with the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    hierarchies = parse_hierarchies(settings.pattern_hierarchies)
+    dims = stored_dimensions(hierarchies)
+    min_recent = settings.pattern_min_recent
+    print(
+        f"{'analyses':>10} {'buckets':>9} {'keys':>8} {'legacy ms':>10} {'fold ms':>8} {'cube ms':>8} "
+        f"{'speedup':>8} {'groups':>8} {'legacy hits':>12} {'cube hits':>10}"
+    )
+    for n in args.sizes:
+        analyses = synthetic_analyses(n)
+        buckets = to_buckets(analyses)
+        legacy_ms, legacy_hits = _ms(lambda: legacy_detect(analyses), args.repeat)
+        fold_ms, rows = _ms(lambda: window_rows(buckets, TODAY, dims), args.repeat)
+        cube_ms, result = _ms(
+            lambda: PatternCube(rows, TODAY).detect(hierarchies, min_recent=min_recent), args.repeat,
+        )
+        print(
+            f"{n:>10} {len(buckets):>9} {len(rows):>8} {legacy_ms:>10.1f} {fold_ms:>8.1f} {cube_ms:>8.1f} "
+            f"{legacy_ms / cube_ms:>7.2f}x {result.groups_checked:>8} {legacy_hits:>12} {len(result.anomalies):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark /api/products/match scoring: per-product loop vs. catalog engine.
+
+Run from api/:
+    python -m benchmarks.bench_product_match [--sizes 500 10000 100000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from routers.products import _chemistry_score, _cure_score, _substrate_score, _temp_score
+from services.product_catalog import ProductCatalog
+
+CHEMISTRIES = ["epoxy", "two-part epoxy", "cyanoacrylate", "polyurethane", "silicone", "mma acrylic", "anaerobic"]
+SUBSTRATES = [
+    "aluminum", "steel", "stainless steel", "abs", "polycarbonate", "glass", "wood",
+    "pp", "pe", "nylon", "carbon fiber", "copper", "brass", "pvc", "rubber", "ceramic",
+]
+CURES = [{"method": "heat cure 80C"}, {"method": "room temperature"}, {"uv": "UV cure"}, {}]
+QUERY = {"chemistry": "epoxy", "substrates": ["aluminum", "abs"], "temp_min": -40, "temp_max": 120, "cure_method": "heat"}
+
+
+def synthetic_rows(n: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        tmin = rng.choice([None, -60, -40, -20, 0])
+        rows.append({
+            "id": f"p-{i:06d}",
+            "product_name": f"Product {i}",
+            "manufacturer": f"Maker {i % 250}",
+            "chemistry_type": rng.choice(CHEMISTRIES),
+            "recommended_substrates": rng.sample(SUBSTRATES, rng.randint(0, 5)),
+            "operating_temp_min_c": tmin,
+            "operating_temp_max_c": None if tmin is None else rng.choice([80, 120, 150, 200]),
+            "cure_schedule": rng.choice(CURES),
+        })
+    return rows
+
+
+def loop_match(rows: list[dict], q: dict) -> list[tuple[int, int]]:
+    req_subs = q["substrates"]
+    scored = []
+    for i, p in enumerate(rows):
+        s, _ = _substrate_score(p.get("recommended_substrates") or [], req_subs)
+        if req_subs and s <= 0:
+            continue
+        c, _ = _chemistry_score(p.get("chemistry_type"), q["chemistry"])
+        t, _ = _temp_score(p.get("operating_temp_min_c"), p.get("operating_temp_max_c"), q["temp_min"], q["temp_max"])
+        cu, _ = _cure_score(p.get("cure_schedule") or {}, q["cure_method"])
+        score = int(round(((s * 0.4) + (c * 0.3) + (t * 0.2) + (cu * 0.1)) * 100))
+        if score > 0:
+            scored.append((i, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:10]
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'build ms':>10} {'loop ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        rows = synthetic_rows(n)
+        started = time.perf_counter()
+        catalog = ProductCatalog(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        engine = [(m.index, m.score) for m in catalog.match(**QUERY)]
+        assert engine == loop_match(rows, QUERY), "engine results diverge from reference loop"
+
+        loop_ms = _time(lambda: loop_match(rows, QUERY), args.repeat)
+        engine_ms = _time(lambda: catalog.match(**QUERY), args.repeat)
+        print(f"{n:>10} {build_ms:>10.1f} {loop_ms:>10.2f} {engine_ms:>10.2f} {loop_ms / engine_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark product typeahead latency on the in-process search index.
+
+Run from api/:
+    python -m benchmarks.bench_product_search [--sizes 500 10000 100000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.bench_product_match import synthetic_rows
+from services.product_catalog import ProductCatalog
+from services.product_search import ProductSearchIndex
+
+BRANDS = ["Loctite", "Scotch-Weld", "Araldite", "Permabond", "Devcon", "Plexus", "Sikaflex", "Dymax"]
+QUERIES = ["lo", "loct", "loctite 40", "araldit", "scotch weld dp", "permabnd", "epoxy", "maker 12"]
+
+
+def _named_rows(n: int) -> list[dict]:
+    rng = random.Random(7)
+    rows = synthetic_rows(n)
+    for row in rows:
+        row["product_name"] = f"{rng.choice(BRANDS)} {rng.choice(['', 'EA ', 'DP'])}{rng.randint(100, 9999)}"
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'build ms':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for n in args.sizes:
+        rows = _named_rows(n)
+        started = time.perf_counter()
+        index = ProductSearchIndex(ProductCatalog(rows))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        for _ in range(args.repeat):
+            for q in QUERIES:
+                started = time.perf_counter()
+                index.search(q, limit=10)
+                samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{n:>10} {build_ms:>10.1f} {statistics.median(samples):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,8 @@ class Settings(BaseSettings):
     # Email
     from_email: str = "noreply@gravix.com"
     resend_api_key: str = ""
+    followup_batch_size: int = 100
+    followup_send_concurrency: int = 4
 
     # Cron
     cron_secret: str = ""
@@ -40,6 +42,10 @@ class Settings(BaseSettings):
     # Database
     database_url: str = ""
 
+    # Audit log spill file (used when investigation_audit_log writes fail).
+    # /tmp is ephemeral on Render; set AUDIT_SPILL_PATH to a persistent disk mount.
+    audit_spill_path: str = "/tmp/gravix/audit_spill.jsonl"
+
     # CORS
     allowed_origins: str = "https://gravix.com,https://www.gravix.com,http://localhost:3000"
 
@@ -53,6 +59,61 @@ class Settings(BaseSettings):
     stripe_price_id_pro: str = ""
     stripe_price_id_team: str = ""
 
+    # Notifications
+    notification_unread_ttl_seconds: int = 300
+
+    # Product catalog snapshot (match scoring / search)
+    product_catalog_ttl_seconds: int = 300
+
+    # report_templates only change with migrations (or POST /admin/templates/refresh)
+    report_template_cache_ttl_seconds: int = 3600
+
+    # Bulk TDS ingestion
+    tds_ingest_concurrency: int = 4
+    tds_ingest_flush_size: int = 25
+    tds_ingest_max_files: int = 500
+    # Total multipart upload per bulk request (files are read into memory)
+    tds_ingest_max_upload_mb: int = 200
+    # Total size of a batch's documents once zips are expanded (also held in memory)
+    tds_ingest_max_expanded_mb: int = 1000
+
+    # Pattern detection: comma-separated rollup hierarchies, coarsest dimension first
+    # (dimensions: failure_mode, substrate, substrate_b, substrate_pair, product, root_cause_category)
+    pattern_hierarchies: str = "failure_mode>substrate>product,root_cause_category>substrate_pair>product"
+    pattern_z_threshold: float = 2.0
+    # Recent (30-day) failures a group needs before it can alert; with a flat history
+    # a single analysis already scores z=2
+    pattern_min_recent: int = 3
+
+    # Guided sessions: older turns fold into a rolling summary past this many (estimated) tokens
+    # or past guided_context_max_messages unsummarized messages
+    guided_context_budget_tokens: int = 6000
+    guided_context_keep_recent: int = 6
+    guided_context_max_messages: int = 60
+    # Per-call limit for guided agent tools (database lookups); generate_5why uses ai_timeout_seconds
+    guided_tool_timeout_seconds: float = 10.0
+    # Guided tool-result cache (product lookups are also dropped on any product write)
+    guided_tool_cache_product_ttl_seconds: int = 900
+    guided_tool_cache_cases_ttl_seconds: int = 120
+    guided_tool_cache_max_entries: int = 2000
+
+    # Usage counters returned by the increment_usage RPC, reused by quota checks
+    usage_quota_cache_ttl_seconds: int = 30
+
+    # Investigation numbers leased per worker from number_sequences (gaps on restart)
+    number_block_size: int = 10
+
+    # Case detail views are counted in memory and written in batches
+    case_view_flush_interval_seconds: float = 30.0
+
+    # Investigation team membership index
+    membership_cache_ttl_seconds: int = 60
+
+    # Server-push event stream
+    event_stream_heartbeat_seconds: int = 15
+    event_stream_queue_size: int = 100
+    event_bus_replay_size: int = 500
+
     # Holdout test auth (preview-only safety valve)
     enable_holdout_test_auth: bool = False
     holdout_test_auth_secret: str = ""
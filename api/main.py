@@ -1,5 +1,6 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -9,9 +10,14 @@ from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from config import settings
-from routers import health, analyze, specify, users, cases, reports, billing, stats, feedback, cron, admin, investigations, comments, notifications, templates, email_inbound, products, guided, patterns, pricing, auth_test, auth_facade
+from routers import health, analyze, specify, users, cases, reports, billing, stats, feedback, cron, admin, investigations, comments, notifications, templates, email_inbound, products, guided, patterns, pricing, auth_test, auth_facade, events
 from middleware.request_logger import RequestLoggerMiddleware
 from middleware.rate_limiter import RateLimitMiddleware
+from middleware.audit_buffer import AuditBufferMiddleware
+from middleware.request_cache import RequestCacheMiddleware
+from services.case_views import case_views
+from services.report_service import precompile_stylesheets
+from services.template_catalog import warm_template_cache
 
 logging.basicConfig(
     level=logging.DEBUG if settings.debug else logging.INFO,
@@ -41,8 +47,12 @@ async def lifespan(app: FastAPI):
     """Application lifespan — startup and shutdown."""
     logger.info(f"Starting Gravix API ({settings.environment})")
     logger.info(f"CORS origins: {settings.cors_origins}")
+    case_views.start()
+    await asyncio.to_thread(warm_template_cache)
+    await asyncio.to_thread(precompile_stylesheets)
     yield
     logger.info("Shutting down Gravix API")
+    await case_views.stop()
 
 
 app = FastAPI(
@@ -69,6 +79,12 @@ app.add_middleware(RequestLoggerMiddleware)
 # Rate limiting middleware (Sprint 10.2)
 app.add_middleware(RateLimitMiddleware)
 
+# Audit events are buffered per request and bulk-written after the response
+app.add_middleware(AuditBufferMiddleware)
+
+# Per-request cache for investigation team access checks
+app.add_middleware(RequestCacheMiddleware)
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -129,6 +145,7 @@ app.include_router(investigations.api_router)
 app.include_router(comments.router)
 app.include_router(comments.api_router)
 app.include_router(notifications.router)
+app.include_router(events.router)
 app.include_router(templates.router)
 app.include_router(email_inbound.router)
 app.include_router(email_inbound.api_router)
@@ -0,0 +1,37 @@
+"""Request-scoped audit buffer middleware.
+
+Collects every audit_service.log_event call made while handling a request
+and writes them in one bulk insert once the response has been sent, so
+mutations no longer pay one audit round trip per event on the hot path.
+"""
+
+import asyncio
+import logging
+
+from services.audit_service import begin_request_buffer, end_request_buffer, flush_events
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBufferMiddleware:
+    """Pure ASGI middleware so the flush runs after the body is fully sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = begin_request_buffer()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            records = end_request_buffer(token)
+            if records:
+                try:
+                    # Supabase client is synchronous — keep it off the event loop
+                    await asyncio.to_thread(flush_events, records)
+                except Exception:
+                    logger.error("Audit buffer flush failed", exc_info=True)
@@ -0,0 +1,25 @@
+"""Request-scoped cache middleware.
+
+Opens a fresh per-request cache for investigation access checks so that
+repeated team-membership lookups within one request cost nothing.
+"""
+
+from services.investigation_access import begin_request_cache, end_request_cache
+
+
+class RequestCacheMiddleware:
+    """Pure ASGI middleware; the cache lives exactly as long as the request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = begin_request_cache()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request_cache(token)
@@ -1,14 +1,19 @@
 """Admin dashboard API endpoints."""
 
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 
 from dependencies import get_current_user
 from database import get_supabase
+from services.case_views import case_views
+from services.guided_tool_cache import tool_cache
+from services.template_catalog import reload_templates, template_version
+from services.usage_service import check_and_reset_usage, invalidate_usage_cache
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +122,10 @@ class EngineHealthStats(BaseModel):
     avg_confidence_raw: Optional[float] = None
     avg_confidence_calibrated: Optional[float] = None
 
+    # Guided tool-result cache (this worker, since start)
+    guided_tool_cache: dict[str, Any] = {}
+    case_views_pending: int = 0
+
 
 # ---------------------------------------------------------------------------
 # Endpoints
@@ -220,7 +229,7 @@ async def admin_list_users(
     db = get_supabase()
     query = db.table("users").select(
         "id, email, name, company, role, plan, "
-        "analyses_this_month, specs_this_month, "
+        "analyses_this_month, specs_this_month, analyses_reset_date, "
         "stripe_customer_id, created_at"
     ).order("created_at", desc=True)
 
@@ -231,6 +240,8 @@ async def admin_list_users(
 
     items: list[AdminUserItem] = []
     for row in result.data or []:
+        # Rows keep last period's counters until the next use; show them reset when due
+        row = check_and_reset_usage(row)
         ca = row.get("created_at")
         items.append(AdminUserItem(
             id=row["id"],
@@ -280,6 +291,7 @@ async def admin_update_user(
 
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_usage_cache(user_id)
 
     # Audit log
     try:
@@ -293,7 +305,7 @@ async def admin_update_user(
     except Exception as e:
         logger.warning(f"Failed to write audit log: {e}")
 
-    row = result.data[0]
+    row = check_and_reset_usage(result.data[0])
     return AdminUserItem(
         id=row["id"],
         email=row.get("email", ""),
@@ -533,9 +545,26 @@ async def admin_engine_health(_admin: dict = Depends(get_admin_user)):
     except Exception as exc:
         logger.warning(f"Failed to query cron_run_log: {exc}")
 
+    stats.guided_tool_cache = tool_cache.stats()
+    stats.case_views_pending = case_views.pending()
+
     return stats
 
 
+@router.post("/templates/refresh")
+async def admin_refresh_templates(_admin: dict = Depends(get_admin_user)):
+    """Reload the report template catalog after editing report_templates directly."""
+    try:
+        count = await asyncio.to_thread(reload_templates)
+    except Exception as e:
+        logger.warning(f"Report template reload failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Report template reload failed; the catalog will retry on the next request",
+        )
+    return {"status": "ok", "version": template_version(), "templates": count}
+
+
 # ---------------------------------------------------------------------------
 # L1 parity metrics endpoints: /api/admin/metrics/*
 # ---------------------------------------------------------------------------
@@ -9,6 +9,7 @@ from dependencies import get_current_user
 from middleware.plan_gate import plan_gate
 from database import get_supabase
 from schemas.case import CaseListItem, CaseDetail
+from services.case_views import case_views
 
 logger = logging.getLogger(__name__)
 
@@ -77,13 +78,8 @@ async def get_case(
     if not result.data:
         raise HTTPException(status_code=404, detail="Case not found")
 
-    # Increment view count
+    # View counts are written behind in batches (services.case_views)
     case = result.data[0]
-    try:
-        db.table("cases").update(
-            {"views": case.get("views", 0) + 1}
-        ).eq("id", case["id"]).execute()
-    except Exception:
-        pass  # Non-critical
+    case_views.record(case["id"])
 
     return CaseDetail(**case)
@@ -16,6 +16,8 @@ from schemas.comments import (
     CommentToggleResponse,
 )
 from services.audit_service import log_event
+from services.event_bus import publish_investigation_event
+from services.investigation_access import check_team_access
 
 logger = logging.getLogger(__name__)
 
@@ -27,39 +29,7 @@ _MENTION_RE = re.compile(r"@([\w.\-]+)")
 
 def _check_team_access(db, investigation_id: str, user_id: str) -> dict:
     """Check if user has access to investigation. Returns investigation record or raises 404."""
-    result = db.table("investigations").select("*").eq("id", investigation_id).execute()
-
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Investigation not found")
-
-    investigation = result.data[0]
-
-    # Check if user is part of the team
-    is_team_member = (
-        investigation["user_id"] == user_id
-        or investigation["champion_user_id"] == user_id
-        or investigation["team_lead_user_id"] == user_id
-        or investigation["approver_user_id"] == user_id
-    )
-
-    if not is_team_member:
-        member_result = (
-            db.table("investigation_members")
-            .select("id")
-            .eq("investigation_id", investigation_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
-        if member_result.data:
-            is_team_member = True
-
-    if not is_team_member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this investigation team",
-        )
-
-    return investigation
+    return check_team_access(db, investigation_id, user_id)
 
 
 def _check_lead_or_champion(investigation: dict, user_id: str) -> bool:
@@ -122,6 +92,8 @@ async def create_comment(
             target_id=comment_id,
         )
 
+        publish_investigation_event(investigation_id, "comment_created", record)
+
         # Create notification for team (inline import to avoid circular)
         try:
             from services.notification_service import notify_new_comment, create_notification
@@ -240,6 +212,7 @@ async def update_comment(
         )
 
         result = db.table("investigation_comments").select("*").eq("id", comment_id).execute()
+        publish_investigation_event(investigation_id, "comment_updated", result.data[0])
         return CommentResponse(**result.data[0])
 
     except Exception as e:
@@ -298,6 +271,10 @@ async def delete_comment(
             target_id=comment_id,
         )
 
+        publish_investigation_event(
+            investigation_id, "comment_deleted", {"id": comment_id, "discipline": comment.get("discipline")}
+        )
+
         return {"success": True, "message": "Comment deleted"}
 
     except HTTPException:
@@ -356,6 +333,12 @@ async def toggle_pin_comment(
             target_id=comment_id,
         )
 
+        publish_investigation_event(
+            investigation_id,
+            "comment_updated",
+            {**comment, "is_pinned": new_value},
+        )
+
         return CommentToggleResponse(
             id=comment_id,
             is_pinned=new_value,
@@ -416,6 +399,12 @@ async def toggle_resolve_comment(
             target_id=comment_id,
         )
 
+        publish_investigation_event(
+            investigation_id,
+            "comment_updated",
+            {**comment, "is_resolution": new_value},
+        )
+
         return CommentToggleResponse(
             id=comment_id,
             is_pinned=comment["is_pinned"],
@@ -1,5 +1,6 @@
 """Cron job endpoints — protected by X-Cron-Secret header."""
 
+import asyncio
 import logging
 import time
 import uuid
@@ -10,6 +11,7 @@ from config import settings
 from database import get_supabase
 from services.feedback_email import send_pending_followups
 from services.knowledge_aggregator import run_knowledge_aggregation, run_metrics_aggregation
+from services.usage_service import reconcile_guided_session_usage
 
 logger = logging.getLogger(__name__)
 
@@ -110,3 +112,21 @@ async def aggregate_metrics(x_cron_secret: str = Header(...)):
     except Exception as exc:
         _log_cron_run("aggregate-metrics", start, {}, str(exc))
         raise
+
+
+@router.post("/reconcile-usage")
+async def reconcile_usage(x_cron_secret: str = Header(...)):
+    """Repair per-user guided session counters.
+
+    Recounts this month's investigation_sessions per user and fixes any
+    guided_sessions_this_month that drifted (failed increments, deleted sessions).
+    """
+    _verify_cron_secret(x_cron_secret)
+    start = time.time()
+    try:
+        result = await asyncio.to_thread(reconcile_guided_session_usage)
+        _log_cron_run("reconcile-usage", start, result)
+        return result
+    except Exception as exc:
+        _log_cron_run("reconcile-usage", start, {}, str(exc))
+        raise
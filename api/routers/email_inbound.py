@@ -16,6 +16,7 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from database import get_supabase
+from services.number_allocator import next_inbound_number
 
 logger = logging.getLogger(__name__)
 
@@ -85,10 +86,7 @@ async def email_inbound(request: Request):
     inv_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
 
-    # Create a simple investigation number (best-effort)
-    count_res = db.table("investigations").select("id", count="exact").execute()
-    seq = (count_res.count or 0) + 1
-    inv_number = f"INV-{seq:05d}"
+    inv_number = next_inbound_number()
 
     record = {
         "id": inv_id,
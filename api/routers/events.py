@@ -0,0 +1,86 @@
+"""Server-push event stream (SSE) — replaces polling for notifications,
+comments, actions and investigation status changes."""
+
+import json
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from config import settings
+from database import get_supabase
+from dependencies import get_current_user
+from services.event_bus import get_event_bus, investigation_topic, user_topic
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/v1/events", tags=["events"])
+
+
+def _format_sse(event_type: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    investigation_id: list[str] = Query(default=[]),
+    since: Optional[str] = Query(None, description="Resume after this event cursor"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream the current user's notifications plus events for the given investigations.
+
+    Events: notification, comment_created, comment_updated, comment_deleted,
+    action_created, action_updated, status_changed, resync.
+    Each event carries an `id` cursor; reconnect with `since` (or the
+    standard Last-Event-ID header) to replay anything missed.
+    """
+    topics = [user_topic(user["id"])]
+    if investigation_id:
+        from routers.investigations import _check_team_access
+
+        db = get_supabase()
+        for inv_id in investigation_id[:20]:
+            _check_team_access(db, inv_id, user["id"])
+            topics.append(investigation_topic(inv_id))
+
+    bus = get_event_bus()
+    sub = bus.subscribe(topics, since=since or last_event_id)
+    heartbeat = settings.event_stream_heartbeat_seconds
+
+    async def _generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if sub.needs_resync:
+                    sub.needs_resync = False
+                    yield _format_sse("resync", {"dropped": sub.dropped})
+                event = await sub.next(timeout=heartbeat)
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _format_sse(
+                    event.event_type,
+                    {"topic": event.topic, "created_at": event.created_at, **event.data},
+                    event_id=event.cursor(bus.epoch),
+                )
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        _generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
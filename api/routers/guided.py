@@ -3,6 +3,7 @@
 Sprint 11: AI-Forward — Conversational investigation with tool use.
 """
 
+import asyncio
 import logging
 import re
 import uuid
@@ -13,6 +14,7 @@ from urllib.parse import urlparse
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from dependencies import get_current_user
 from middleware.plan_gate import plan_gate
@@ -27,7 +29,21 @@ from schemas.guided import (
     GuidedSessionListItem,
 )
 from services.ai_engine import _call_claude
-from services.guided_ai import call_claude_with_tools, GUIDED_SYSTEM_PROMPT
+from services.guided_ai import (
+    GUIDED_SYSTEM_PROMPT,
+    cached_system,
+    call_claude_with_tools,
+    log_guided_usage,
+    plan_compaction,
+    stream_claude_with_tools,
+    summarize_history,
+    with_summary,
+)
+from services.guided_messages import SESSION_COLUMNS, append_messages, list_messages, recent_messages
+from services.guided_tool_cache import tool_cache
+from services.number_allocator import next_investigation_number
+from services.product_catalog import catalog_version
+from services.usage_service import guided_sessions_used, increment_guided_session_usage
 
 def _escape_like(val: str) -> str:
     """Escape SQL LIKE/ILIKE wildcards in user input."""
@@ -71,6 +87,69 @@ def _parse_and_strip_phase(text: str) -> tuple[str, str | None]:
     return display_text, phase
 
 
+_STREAM_TAGS = ("investigation_phase", "suggestions")
+
+
+class _StreamTagFilter:
+    """Drops <investigation_phase> / <suggestions> tags from streamed text.
+
+    Text from a '<' on is held back until it can't be the start of one of
+    those tags, or until the tag's closing counterpart arrives. Whitespace
+    after a removed tag is dropped, as the strip regexes do.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._skip_ws = False
+
+    def feed(self, text: str) -> str:
+        self._buf += text
+        out = []
+        while self._buf:
+            if self._skip_ws:
+                self._buf = self._buf.lstrip()
+                if not self._buf:
+                    break
+                self._skip_ws = False
+            lt = self._buf.find("<")
+            if lt < 0:
+                out.append(self._buf)
+                self._buf = ""
+                break
+            out.append(self._buf[:lt])
+            rest = self._buf[lt:]
+            tag = next((t for t in _STREAM_TAGS if rest.startswith(f"<{t}>")), None)
+            if tag:
+                close = rest.find(f"</{tag}>")
+                if close < 0:
+                    self._buf = rest
+                    break
+                self._buf = rest[close + len(tag) + 3:]
+                self._skip_ws = True
+            elif any(f"<{t}>".startswith(rest) for t in _STREAM_TAGS):
+                self._buf = rest
+                break
+            else:
+                out.append("<")
+                self._buf = rest[1:]
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Release held-back text at the end of the stream (an unclosed tag is dropped)."""
+        rest, self._buf = self._buf, ""
+        if any(rest.startswith(f"<{t}>") or f"<{t}>".startswith(rest) for t in _STREAM_TAGS):
+            return ""
+        return rest
+
+
+def _format_sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Streaming turns run as tasks so a dropped connection doesn't lose the turn
+_running: set[asyncio.Task] = set()
+
+
 def _get_rate_limits(user: dict) -> dict:
     """Get guided rate limits for the user's plan."""
     if user.get("role") == "admin":
@@ -83,25 +162,6 @@ def _get_rate_limits(user: dict) -> dict:
     return features.get("rate_limits", {})
 
 
-def _count_user_sessions_this_month(db, user_id: str) -> int:
-    """Count guided sessions created by this user in the current calendar month."""
-    now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
-    result = (
-        db.table("investigation_sessions")
-        .select("id", count="exact")
-        .eq("user_id", user_id)
-        .gte("created_at", month_start)
-        .execute()
-    )
-    return result.count or 0
-
-
-def _count_user_turns(messages: list) -> int:
-    """Count user-role messages in a session's message list."""
-    return sum(1 for m in messages if isinstance(m, dict) and m.get("role") == "user")
-
-
 # ============================================================================
 # Tool implementations for guided investigation
 # ============================================================================
@@ -230,19 +290,38 @@ async def _tool_generate_5why(root_cause: str, failure_description: str) -> dict
 
 
 async def _execute_tool(db, tool_name: str, tool_input: dict) -> dict:
-    """Execute a guided investigation tool and return the result."""
+    """Execute a guided investigation tool, serving repeat lookups from the tool-result cache."""
+    cached = tool_cache.get(tool_name, tool_input)
+    if cached is not None:
+        return cached
+    # Read before querying, so a product write during the query leaves the entry stale
+    version = catalog_version()
+    result = await _dispatch_tool(db, tool_name, tool_input)
+    tool_cache.put(tool_name, tool_input, result, version=version)
+    return result
+
+
+async def _dispatch_tool(db, tool_name: str, tool_input: dict) -> dict:
+    """Run a guided investigation tool and return the result.
+
+    The database tools are synchronous Supabase queries; they run in worker
+    threads so the agent loop can run a round's tools side by side without
+    blocking the event loop.
+    """
     try:
         if tool_name == "lookup_product_tds":
-            return _tool_lookup_product_tds(db, tool_input.get("product_name", ""))
+            return await asyncio.to_thread(_tool_lookup_product_tds, db, tool_input.get("product_name", ""))
         elif tool_name == "search_similar_cases":
-            return _tool_search_similar_cases(
+            return await asyncio.to_thread(
+                _tool_search_similar_cases,
                 db,
                 substrate_a=tool_input.get("substrate_a"),
                 substrate_b=tool_input.get("substrate_b"),
                 failure_mode=tool_input.get("failure_mode"),
             )
         elif tool_name == "check_specification_compliance":
-            return _tool_check_specification_compliance(
+            return await asyncio.to_thread(
+                _tool_check_specification_compliance,
                 db,
                 product_name=tool_input.get("product_name", ""),
                 conditions=tool_input.get("conditions", {}),
@@ -259,6 +338,55 @@ async def _execute_tool(db, tool_name: str, tool_input: dict) -> dict:
         return {"error": f"Tool '{tool_name}' failed: {str(e)}"}
 
 
+async def _compact_context(
+    db, session_id: str, user_id: str, state: dict, messages: list[dict]
+) -> tuple[str | None, list[dict]]:
+    """Fold older turns into the session's rolling summary once over the token budget.
+
+    Reaching guided_context_max_messages triggers a fold too, so the window is
+    reset behind the summary rather than sliding (and dropping its oldest
+    message uncompacted) every turn. Returns (summary, remaining window). The summary and the id of the last
+    folded message are saved in session_state so later turns start their
+    window after it. If summarizing fails the older turns are just dropped
+    for this turn, as the fixed 20-message window used to do.
+    """
+    from config import settings
+
+    summary = state.get("context_summary")
+    fold = plan_compaction(
+        messages,
+        budget_tokens=settings.guided_context_budget_tokens,
+        keep_recent=settings.guided_context_keep_recent,
+        max_messages=settings.guided_context_max_messages,
+    )
+    if not fold:
+        return summary, messages
+
+    started = datetime.now(timezone.utc)
+    try:
+        summary, usage = await summarize_history(summary, messages[:fold])
+    except Exception as e:
+        logger.warning(f"Guided context summary failed for {session_id}, truncating instead: {e}")
+        return summary, messages[fold:]
+
+    log_guided_usage(
+        db, user_id=user_id, session_id=session_id, usage=usage,
+        latency_ms=int((datetime.now(timezone.utc) - started).total_seconds() * 1000),
+        request_type="guided_summary", meta={"folded_messages": fold},
+    )
+    try:
+        db.table("investigation_sessions").update({
+            "session_state": {
+                **state,
+                "context_summary": summary,
+                "summary_through": messages[fold - 1]["id"],
+            },
+        }).eq("id", session_id).execute()
+    except Exception as e:
+        logger.warning(f"Failed to save guided context summary for {session_id}: {e}")
+    return summary, messages[fold:]
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -276,7 +404,7 @@ async def start_guided_session(
     limits = _get_rate_limits(user)
     session_cap = limits.get("guided_sessions_monthly")
     if session_cap is not None:
-        sessions_used = _count_user_sessions_this_month(db, user["id"])
+        sessions_used = guided_sessions_used(user)
         if sessions_used >= session_cap:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -344,14 +472,11 @@ async def start_guided_session(
     if greeting_phase:
         initial_msg["phase"] = greeting_phase
     
-    initial_messages = [initial_msg]
-    
     record = {
         "id": session_id,
         "user_id": user["id"],
         "analysis_id": data.analysis_id,
         "session_state": initial_context,
-        "messages": initial_messages,
         "status": "active",
         "created_at": now,
         "updated_at": now,
@@ -359,7 +484,9 @@ async def start_guided_session(
     
     try:
         db.table("investigation_sessions").insert(record).execute()
-        return GuidedSessionResponse(**record)
+        append_messages(db, session_id, [initial_msg])
+        increment_guided_session_usage(user["id"])
+        return GuidedSessionResponse(**record, messages=[initial_msg])
     except Exception as e:
         logger.exception(f"Failed to create guided session: {e}")
         raise HTTPException(
@@ -368,24 +495,18 @@ async def start_guided_session(
         )
 
 
-@router.post("/{session_id}/message", response_model=GuidedMessageResponse)
-async def send_guided_message(
-    session_id: str,
-    data: GuidedMessage,
-    user: dict = Depends(get_current_user),
-    _gate: None = Depends(plan_gate("analysis.guided")),
-):
-    """Send a message in a guided session and get AI response with tool use.
-    
-    Uses a proper agentic tool loop: Claude calls tools via native tool_use,
-    we execute them server-side, feed results back, repeat until pure text.
+async def _prepare_turn(
+    db, session_id: str, user: dict, data: GuidedMessage
+) -> tuple[dict, str | None, list[dict]]:
+    """Checks and context shared by the JSON and streaming message endpoints.
+
+    Raises HTTPException (404 / 400 / 403) before any AI work starts. Returns
+    (user_msg_record, rolling summary, context window ending with the new message).
     """
-    db = get_supabase()
-    
-    # Fetch session
+    # Fetch session (counters only; the conversation lives in guided_messages)
     session_result = (
         db.table("investigation_sessions")
-        .select("*")
+        .select(SESSION_COLUMNS)
         .eq("id", session_id)
         .eq("user_id", user["id"])
         .execute()
@@ -415,13 +536,12 @@ async def send_guided_message(
             )
     
     now = datetime.now(timezone.utc).isoformat()
-    messages = session.get("messages", [])
     
     # Check turn limit
     limits = _get_rate_limits(user)
     turn_cap = limits.get("guided_turns")
     if turn_cap is not None:
-        user_turns = _count_user_turns(messages)
+        user_turns = session.get("user_turns") or 0
         if user_turns >= turn_cap:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -443,143 +563,167 @@ async def send_guided_message(
     }
     if data.photo_urls:
         user_msg_record["photo_urls"] = [str(u) for u in data.photo_urls[:3]]
+
+    # Context window: everything after the last message folded into the rolling
+    # summary (role/content only); stored rows are appended at the end of the turn
+    from config import settings
+
+    state = session.get("session_state") or {}
+    messages = recent_messages(
+        db, session_id, limit=settings.guided_context_max_messages,
+        after_id=state.get("summary_through") or 0,
+    )
     messages.append(user_msg_record)
+    summary, messages = await _compact_context(db, session_id, user["id"], state, messages)
+    return user_msg_record, summary, messages
 
-    # -----------------------------------------------------------------
-    # Photo-aware path: if photo_urls provided, build multimodal request
-    # -----------------------------------------------------------------
-    if data.photo_urls:
-        from config import settings
-
-        supabase_host = settings.supabase_url.replace("https://", "").replace("http://", "")
-        image_blocks: list[dict] = []
-
-        for photo_url in data.photo_urls[:3]:
-            try:
-                parsed = urlparse(photo_url)
-                if parsed.scheme != "https" or supabase_host not in parsed.netloc:
-                    logger.warning(f"Blocked non-Supabase guided photo URL: {photo_url}")
-                    continue
-
-                async with httpx.AsyncClient(timeout=30) as img_client:
-                    img_resp = await img_client.get(photo_url)
-                    img_resp.raise_for_status()
-
-                img_b64 = base64.standard_b64encode(img_resp.content).decode("utf-8")
-                content_type = img_resp.headers.get("content-type", "image/jpeg")
-
-                image_blocks.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": content_type,
-                        "data": img_b64,
-                    },
-                })
-            except Exception as e:
-                logger.warning(f"Failed to fetch guided photo {photo_url}: {e}")
-
-        if image_blocks:
-            # Build conversation context from recent messages
-            conv_lines = []
-            for m in messages[-20:]:
-                role_label = "User" if m.get("role") == "user" else "Assistant"
-                conv_lines.append(f"{role_label}: {m.get('content', '')}")
-            conversation_context = "\n\n".join(conv_lines)
-
-            api_headers = {
-                "x-api-key": settings.anthropic_api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
-            payload = {
-                "model": settings.anthropic_model,
-                "max_tokens": 2048,
-                "system": GUIDED_SYSTEM_PROMPT,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            *image_blocks,
-                            {
-                                "type": "text",
-                                "text": (
-                                    f"{conversation_context}\n\n"
-                                    "The user has uploaded a defect photo for analysis. "
-                                    "Analyze the failure surface visible in the image, "
-                                    "classify the failure mode (adhesive, cohesive, mixed, substrate), "
-                                    "describe what you observe, and continue the investigation with follow-up questions."
-                                ),
-                            },
-                        ],
-                    }
-                ],
-            }
 
-            try:
-                async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as ai_client:
-                    ai_resp = await ai_client.post(
-                        "https://api.anthropic.com/v1/messages",
-                        headers=api_headers,
-                        json=payload,
-                    )
-                    ai_resp.raise_for_status()
-                    ai_data = ai_resp.json()
-
-                raw_response_text = ""
-                for block in ai_data.get("content", []):
-                    if block.get("type") == "text":
-                        raw_response_text += block["text"]
-
-                response_text, phase = _parse_and_strip_phase(raw_response_text)
-                response_text, suggestions = _parse_and_strip_suggestions(response_text)
-
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": response_text,
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "tool_calls": [{"tool": "visual_analysis", "input": {"photo_count": len(image_blocks)}}],
+async def _photo_turn(
+    db,
+    session_id: str,
+    user: dict,
+    photo_urls: list,
+    user_msg_record: dict,
+    summary: str | None,
+    messages: list[dict],
+) -> GuidedMessageResponse | None:
+    """Multimodal turn for uploaded defect photos; None means fall back to the text flow."""
+    from config import settings
+
+    if not photo_urls:
+        return None
+
+    supabase_host = settings.supabase_url.replace("https://", "").replace("http://", "")
+    image_blocks: list[dict] = []
+
+    for photo_url in photo_urls[:3]:
+        try:
+            parsed = urlparse(photo_url)
+            if parsed.scheme != "https" or supabase_host not in parsed.netloc:
+                logger.warning(f"Blocked non-Supabase guided photo URL: {photo_url}")
+                continue
+
+            async with httpx.AsyncClient(timeout=30) as img_client:
+                img_resp = await img_client.get(photo_url)
+                img_resp.raise_for_status()
+
+            img_b64 = base64.standard_b64encode(img_resp.content).decode("utf-8")
+            content_type = img_resp.headers.get("content-type", "image/jpeg")
+
+            image_blocks.append({
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": content_type,
+                    "data": img_b64,
+                },
+            })
+        except Exception as e:
+            logger.warning(f"Failed to fetch guided photo {photo_url}: {e}")
+
+    if image_blocks:
+        # Build conversation context from recent messages
+        conv_lines = [summary] if summary else []
+        for m in messages:
+            role_label = "User" if m.get("role") == "user" else "Assistant"
+            conv_lines.append(f"{role_label}: {m.get('content', '')}")
+        conversation_context = "\n\n".join(conv_lines)
+
+        api_headers = {
+            "x-api-key": settings.anthropic_api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+        payload = {
+            "model": settings.anthropic_model,
+            "max_tokens": 2048,
+            "system": cached_system(GUIDED_SYSTEM_PROMPT),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        *image_blocks,
+                        {
+                            "type": "text",
+                            "text": (
+                                f"{conversation_context}\n\n"
+                                "The user has uploaded a defect photo for analysis. "
+                                "Analyze the failure surface visible in the image, "
+                                "classify the failure mode (adhesive, cohesive, mixed, substrate), "
+                                "describe what you observe, and continue the investigation with follow-up questions."
+                            ),
+                        },
+                    ],
                 }
-                if phase:
-                    assistant_msg["phase"] = phase
-                if suggestions:
-                    assistant_msg["suggestions"] = suggestions
-                messages.append(assistant_msg)
-
-                db.table("investigation_sessions").update({
-                    "messages": messages,
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                }).eq("id", session_id).execute()
-
-                return GuidedMessageResponse(
-                    role="assistant",
-                    content=response_text,
-                    tool_calls=[{"tool": "visual_analysis", "input": {"photo_count": len(image_blocks)}}],
-                    tool_results=None,
-                    phase=phase,
-                    suggestions=suggestions,
+            ],
+        }
+
+        try:
+            photo_start = datetime.now(timezone.utc)
+            async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as ai_client:
+                ai_resp = await ai_client.post(
+                    "https://api.anthropic.com/v1/messages",
+                    headers=api_headers,
+                    json=payload,
                 )
-            except Exception as e:
-                logger.warning(f"Multimodal guided call failed, falling through to text: {e}")
-                # Fall through to normal text flow below
+                ai_resp.raise_for_status()
+                ai_data = ai_resp.json()
+            log_guided_usage(
+                db, user_id=user["id"], session_id=session_id,
+                usage=ai_data.get("usage") or {},
+                latency_ms=int((datetime.now(timezone.utc) - photo_start).total_seconds() * 1000),
+                request_type="guided_photo_turn",
+                meta={"photo_count": len(image_blocks)},
+            )
+
+            raw_response_text = ""
+            for block in ai_data.get("content", []):
+                if block.get("type") == "text":
+                    raw_response_text += block["text"]
 
-    # -----------------------------------------------------------------
-    # Standard text-only path
-    # -----------------------------------------------------------------
+            response_text, phase = _parse_and_strip_phase(raw_response_text)
+            response_text, suggestions = _parse_and_strip_suggestions(response_text)
 
-    # Build Claude Messages API conversation from stored history (last 20 msgs)
+            assistant_msg = {
+                "role": "assistant",
+                "content": response_text,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "tool_calls": [{"tool": "visual_analysis", "input": {"photo_count": len(image_blocks)}}],
+            }
+            if phase:
+                assistant_msg["phase"] = phase
+            if suggestions:
+                assistant_msg["suggestions"] = suggestions
+            append_messages(db, session_id, [user_msg_record, assistant_msg])
+
+            return GuidedMessageResponse(
+                role="assistant",
+                content=response_text,
+                tool_calls=[{"tool": "visual_analysis", "input": {"photo_count": len(image_blocks)}}],
+                tool_results=None,
+                phase=phase,
+                suggestions=suggestions,
+            )
+        except Exception as e:
+            logger.warning(f"Multimodal guided call failed, falling through to text: {e}")
+    return None
+
+
+
+def _build_claude_messages(summary: str | None, messages: list[dict]) -> list[dict]:
+    """Claude Messages API conversation: rolling summary + window since it."""
     claude_messages = []
-    for m in messages[-20:]:
+    for m in with_summary(summary, messages):
         role = m.get("role", "user")
         content = m.get("content", "")
         # Only include user and assistant roles; skip tool metadata
         if role in ("user", "assistant") and isinstance(content, str) and content:
             claude_messages.append({"role": role, "content": content})
-    
+
     # Ensure conversation starts with a user message (Claude requirement)
     if claude_messages and claude_messages[0]["role"] != "user":
         claude_messages = claude_messages[1:]
-    
+
     # Ensure no consecutive same-role messages (merge if needed)
     merged = []
     for msg in claude_messages:
@@ -587,12 +731,97 @@ async def send_guided_message(
             merged[-1]["content"] += "\n\n" + msg["content"]
         else:
             merged.append(dict(msg))
-    claude_messages = merged
+    return merged
+
+
+def _finish_text_turn(
+    db,
+    session_id: str,
+    user: dict,
+    user_msg_record: dict,
+    result: dict,
+    context_messages: int,
+) -> GuidedMessageResponse:
+    """Log usage, persist the turn and build the response from a finished tool loop."""
+    raw_text = result["text"]
+    tool_calls = result["tool_calls"]
+    log_guided_usage(
+        db, user_id=user["id"], session_id=session_id,
+        usage=result.get("usage") or {}, latency_ms=result.get("latency_ms") or 0,
+        rounds=result["rounds"],
+        meta={
+            "tool_calls": len(tool_calls),
+            "context_messages": context_messages,
+            "round_timings": result.get("round_timings") or [],
+            "streamed": bool(result.get("streamed")),
+        },
+    )
+
+    # Parse and strip phase tag and suggestions from AI response
+    response_text, phase = _parse_and_strip_phase(raw_text)
+    response_text, suggestions = _parse_and_strip_suggestions(response_text)
+
+    # Add assistant message to stored history
+    assistant_msg = {
+        "role": "assistant",
+        "content": response_text,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    if phase:
+        assistant_msg["phase"] = phase
+    if suggestions:
+        assistant_msg["suggestions"] = suggestions
+    if tool_calls:
+        assistant_msg["tool_calls"] = [
+            {"tool": tc["name"], "input": tc["input"]}
+            for tc in tool_calls
+        ]
+        assistant_msg["tool_results"] = [
+            {"tool": tc["name"], "result": tc["result"]}
+            for tc in tool_calls
+        ]
+
+    # Append this turn; the insert trigger bumps the session counters
+    append_messages(db, session_id, [user_msg_record, assistant_msg])
+
+    return GuidedMessageResponse(
+        role="assistant",
+        content=response_text,
+        tool_calls=[{"tool": tc["name"], "input": tc["input"]} for tc in tool_calls] or None,
+        tool_results=[{"tool": tc["name"], "result": tc["result"]} for tc in tool_calls] or None,
+        phase=phase,
+        suggestions=suggestions,
+    )
+
+
+@router.post("/{session_id}/message", response_model=GuidedMessageResponse)
+async def send_guided_message(
+    session_id: str,
+    data: GuidedMessage,
+    user: dict = Depends(get_current_user),
+    _gate: None = Depends(plan_gate("analysis.guided")),
+):
+    """Send a message in a guided session and get AI response with tool use.
     
+    Uses a proper agentic tool loop: Claude calls tools via native tool_use,
+    we execute them server-side, feed results back, repeat until pure text.
+    """
+    db = get_supabase()
+    user_msg_record, summary, messages = await _prepare_turn(db, session_id, user, data)
+
+    # Photo-aware path: if photo_urls provided, build multimodal request
+    if data.photo_urls:
+        response = await _photo_turn(db, session_id, user, data.photo_urls, user_msg_record, summary, messages)
+        if response is not None:
+            return response
+        # Fall through to normal text flow below
+
+    claude_messages = _build_claude_messages(summary, messages)
+
     # Tool executor bound to current db connection
     async def tool_executor(tool_name: str, tool_input: dict) -> dict:
         return await _execute_tool(db, tool_name, tool_input)
-    
+
     try:
         result = await call_claude_with_tools(
             messages=claude_messages,
@@ -600,51 +829,8 @@ async def send_guided_message(
             system_prompt=GUIDED_SYSTEM_PROMPT,
             max_tokens=2048,
         )
-        
-        raw_text = result["text"]
-        tool_calls = result["tool_calls"]
-        
-        # Parse and strip phase tag and suggestions from AI response
-        response_text, phase = _parse_and_strip_phase(raw_text)
-        response_text, suggestions = _parse_and_strip_suggestions(response_text)
-        
-        # Add assistant message to stored history
-        assistant_msg = {
-            "role": "assistant",
-            "content": response_text,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
-        if phase:
-            assistant_msg["phase"] = phase
-        if suggestions:
-            assistant_msg["suggestions"] = suggestions
-        if tool_calls:
-            assistant_msg["tool_calls"] = [
-                {"tool": tc["name"], "input": tc["input"]}
-                for tc in tool_calls
-            ]
-            assistant_msg["tool_results"] = [
-                {"tool": tc["name"], "result": tc["result"]}
-                for tc in tool_calls
-            ]
-        
-        messages.append(assistant_msg)
-        
-        # Update session
-        db.table("investigation_sessions").update({
-            "messages": messages,
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-        }).eq("id", session_id).execute()
-        
-        return GuidedMessageResponse(
-            role="assistant",
-            content=response_text,
-            tool_calls=[{"tool": tc["name"], "input": tc["input"]} for tc in tool_calls] or None,
-            tool_results=[{"tool": tc["name"], "result": tc["result"]} for tc in tool_calls] or None,
-            phase=phase,
-            suggestions=suggestions,
-        )
-    
+        return _finish_text_turn(db, session_id, user, user_msg_record, result, len(claude_messages))
+
     except Exception as e:
         logger.exception(f"Guided message processing failed: {e}")
         raise HTTPException(
@@ -653,6 +839,91 @@ async def send_guided_message(
         )
 
 
+@router.post("/{session_id}/message/stream")
+async def stream_guided_message(
+    session_id: str,
+    data: GuidedMessage,
+    user: dict = Depends(get_current_user),
+    _gate: None = Depends(plan_gate("analysis.guided")),
+):
+    """Streaming (SSE) variant of send_guided_message.
+
+    Events:
+      text         {"text", "round"}: assistant text as it is generated, with
+                   phase/suggestion tags removed
+      tool_start   {"id", "name", "input", "round"}
+      tool_finish  {"id", "name", "ms", "ok", "round"}
+      message      the GuidedMessageResponse, exactly what send_guided_message
+                   returns; replaces the streamed draft
+      error        {"detail"}
+
+    Session, plan and turn-limit errors are returned as normal HTTP errors
+    before the stream opens. The turn runs in its own task and is persisted
+    even if the client disconnects mid-stream.
+    """
+    db = get_supabase()
+    user_msg_record, summary, messages = await _prepare_turn(db, session_id, user, data)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _run_turn():
+        try:
+            if data.photo_urls:
+                response = await _photo_turn(db, session_id, user, data.photo_urls, user_msg_record, summary, messages)
+                if response is not None:
+                    queue.put_nowait(_format_sse("message", response.model_dump()))
+                    return
+
+            claude_messages = _build_claude_messages(summary, messages)
+
+            async def tool_executor(tool_name: str, tool_input: dict) -> dict:
+                return await _execute_tool(db, tool_name, tool_input)
+
+            tag_filter = _StreamTagFilter()
+            async for event, payload in stream_claude_with_tools(
+                messages=claude_messages,
+                tool_executor=tool_executor,
+                system_prompt=GUIDED_SYSTEM_PROMPT,
+                max_tokens=2048,
+            ):
+                if event == "text":
+                    text = tag_filter.feed(payload["text"])
+                    if text:
+                        queue.put_nowait(_format_sse("text", {"text": text, "round": payload["round"]}))
+                elif event == "done":
+                    tail = tag_filter.flush()
+                    if tail:
+                        queue.put_nowait(_format_sse("text", {"text": tail, "round": payload["rounds"]}))
+                    response = _finish_text_turn(db, session_id, user, user_msg_record, payload, len(claude_messages))
+                    queue.put_nowait(_format_sse("message", response.model_dump()))
+                else:
+                    queue.put_nowait(_format_sse(event, payload))
+        except Exception as e:
+            logger.exception(f"Guided streaming message failed: {e}")
+            queue.put_nowait(_format_sse("error", {"detail": f"AI processing failed: {str(e)[:200]}"}))
+        finally:
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(_run_turn())
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+    async def _generate():
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+
+    return StreamingResponse(
+        _generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @router.get("/{session_id}", response_model=GuidedSessionResponse)
 async def get_guided_session(
     session_id: str,
@@ -664,7 +935,7 @@ async def get_guided_session(
     
     result = (
         db.table("investigation_sessions")
-        .select("*")
+        .select(SESSION_COLUMNS)
         .eq("id", session_id)
         .eq("user_id", user["id"])
         .execute()
@@ -673,7 +944,7 @@ async def get_guided_session(
     if not result.data:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return GuidedSessionResponse(**result.data[0])
+    return GuidedSessionResponse(**result.data[0], messages=list_messages(db, session_id))
 
 
 @router.post("/{session_id}/pause")
@@ -730,7 +1001,7 @@ async def complete_guided_session(
     # Fetch session
     session_result = (
         db.table("investigation_sessions")
-        .select("*")
+        .select(SESSION_COLUMNS)
         .eq("id", session_id)
         .eq("user_id", user["id"])
         .execute()
@@ -742,8 +1013,8 @@ async def complete_guided_session(
     session = session_result.data[0]
     now = datetime.now(timezone.utc).isoformat()
     
-    # Generate summary from conversation
-    messages = session.get("messages", [])
+    # Generate summary from conversation (text only, no tool payloads)
+    messages = list_messages(db, session_id, full=False)
     conversation_text = "\n\n".join([
         f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}"
         for m in messages
@@ -794,7 +1065,7 @@ async def create_investigation_from_guided(
 
     session_result = (
         db.table("investigation_sessions")
-        .select("*")
+        .select(SESSION_COLUMNS)
         .eq("id", session_id)
         .eq("user_id", user["id"])
         .execute()
@@ -812,27 +1083,8 @@ async def create_investigation_from_guided(
     if existing_inv:
         return {"investigation_id": existing_inv, "success": True}
 
-    # Generate investigation number
     now = datetime.now(timezone.utc)
-    year = now.year
-    prefix = f"GQ-{year}-"
-    num_result = (
-        db.table("investigations")
-        .select("investigation_number")
-        .like("investigation_number", f"{prefix}%")
-        .order("investigation_number", desc=True)
-        .limit(1)
-        .execute()
-    )
-    if num_result.data:
-        try:
-            seq = int(num_result.data[0]["investigation_number"].split("-")[-1])
-            next_seq = seq + 1
-        except (ValueError, IndexError):
-            next_seq = 1
-    else:
-        next_seq = 1
-    investigation_number = f"{prefix}{next_seq:04d}"
+    investigation_number = next_investigation_number(now)
 
     # Build title from session context or timestamp
     created_date = (session.get("created_at") or "")[:10]
@@ -856,7 +1108,7 @@ async def create_investigation_from_guided(
         "updated_at": now_iso,
     }
 
-    # Retry loop for investigation_number race condition
+    # Retry on an investigation_number collision
     max_retries = 3
     for attempt in range(max_retries):
         try:
@@ -870,10 +1122,10 @@ async def create_investigation_from_guided(
             return {"investigation_id": inv_id, "success": True}
         except Exception as e:
             err_str = str(e)
-            # Retry on unique constraint violation for investigation_number
+            # Allocated numbers are unique; this only guards against a number
+            # written outside the allocator (e.g. a manual import)
             if "investigation_number" in err_str and attempt < max_retries - 1:
-                next_seq += 1
-                record["investigation_number"] = f"{prefix}{next_seq:04d}"
+                record["investigation_number"] = next_investigation_number(now)
                 continue
             logger.exception(f"Failed to create investigation from guided session: {e}")
             raise HTTPException(
@@ -892,7 +1144,7 @@ async def list_guided_sessions(
 
     result = (
         db.table("investigation_sessions")
-        .select("id, status, created_at, updated_at, session_state, messages")
+        .select("id, status, created_at, updated_at, session_state, message_count, last_phase")
         .eq("user_id", user["id"])
         .order("created_at", desc=True)
         .limit(min(limit, 50))
@@ -903,14 +1155,14 @@ async def list_guided_sessions(
     for row in result.data or []:
         state = row.get("session_state") or {}
         summary = state.get("summary", "")
-        messages = row.get("messages") or []
         items.append(GuidedSessionListItem(
             id=row["id"],
             status=row.get("status", "active"),
             created_at=row.get("created_at"),
             updated_at=row.get("updated_at"),
             summary_preview=summary[:150] if summary else None,
-            message_count=len(messages),
+            message_count=row.get("message_count") or 0,
+            last_phase=row.get("last_phase"),
         ))
 
     return items
@@ -31,6 +31,9 @@ from schemas.investigations import (
     CloseInvestigationRequest,
 )
 from services.audit_service import log_event, log_field_changes
+from services.event_bus import publish_investigation_event
+from services.investigation_access import check_team_access, invalidate_membership, ROLE_FIELDS
+from services.number_allocator import next_investigation_number
 from services.notification_service import (
     notify_team_member_added,
     notify_status_change,
@@ -46,72 +49,9 @@ router = APIRouter(prefix="/v1/investigations", tags=["investigations"])
 api_router = APIRouter(prefix="/api/investigations", tags=["investigations"])
 
 
-def _generate_investigation_number(db) -> str:
-    """Generate sequential investigation number: GQ-YYYY-NNNN."""
-    now = datetime.now(timezone.utc)
-    year = now.year
-    prefix = f"GQ-{year}-"
-    
-    # Get the highest number for this year
-    result = (
-        db.table("investigations")
-        .select("investigation_number")
-        .like("investigation_number", f"{prefix}%")
-        .order("investigation_number", desc=True)
-        .limit(1)
-        .execute()
-    )
-    
-    if result.data:
-        last_num = result.data[0]["investigation_number"]
-        # Extract the NNNN part
-        try:
-            seq = int(last_num.split("-")[-1])
-            next_seq = seq + 1
-        except (ValueError, IndexError):
-            next_seq = 1
-    else:
-        next_seq = 1
-    
-    return f"{prefix}{next_seq:04d}"
-
-
 def _check_team_access(db, investigation_id: str, user_id: str) -> dict:
     """Check if user has access to investigation. Returns investigation record or raises 404."""
-    result = db.table("investigations").select("*").eq("id", investigation_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Investigation not found")
-    
-    investigation = result.data[0]
-    
-    # Check if user is part of the team
-    is_team_member = (
-        investigation["user_id"] == user_id
-        or investigation["champion_user_id"] == user_id
-        or investigation["team_lead_user_id"] == user_id
-        or investigation["approver_user_id"] == user_id
-    )
-    
-    if not is_team_member:
-        # Check investigation_members table
-        member_result = (
-            db.table("investigation_members")
-            .select("id")
-            .eq("investigation_id", investigation_id)
-            .eq("user_id", user_id)
-            .execute()
-        )
-        if member_result.data:
-            is_team_member = True
-    
-    if not is_team_member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this investigation team"
-        )
-    
-    return investigation
+    return check_team_access(db, investigation_id, user_id)
 
 
 def _check_lead_or_champion(investigation: dict, user_id: str) -> bool:
@@ -219,8 +159,7 @@ async def create_investigation(
     investigation_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
     
-    # Generate investigation number
-    investigation_number = _generate_investigation_number(db)
+    investigation_number = next_investigation_number()
     
     # Build record
     payload = data.model_dump(exclude_none=True)
@@ -349,6 +288,8 @@ async def update_investigation(
     
     try:
         db.table("investigations").update(update_data).eq("id", investigation_id).execute()
+        if any(field in update_data for field in ROLE_FIELDS):
+            invalidate_membership(investigation_id)
         
         # Log changes
         log_field_changes(
@@ -402,6 +343,7 @@ async def add_team_member(
     
     try:
         db.table("investigation_members").insert(record).execute()
+        invalidate_membership(investigation_id)
         
         # Log event
         log_event(
@@ -460,6 +402,8 @@ async def remove_team_member(
         if not result.data:
             raise HTTPException(status_code=404, detail="Team member not found")
         
+        invalidate_membership(investigation_id)
+        
         # Log event
         log_event(
             investigation_id=investigation_id,
@@ -534,6 +478,12 @@ async def transition_status(
             diff_data={"old_status": old_status, "new_status": data.new_status, "notes": data.notes},
         )
         
+        publish_investigation_event(
+            investigation_id,
+            "status_changed",
+            {"old_status": old_status, "new_status": data.new_status, "actor_user_id": user["id"]},
+        )
+        
         # Notify team members of status change
         notify_status_change(
             investigation_id=investigation_id,
@@ -609,6 +559,8 @@ async def create_action(
             target_id=action_id,
         )
         
+        publish_investigation_event(investigation_id, "action_created", record)
+        
         return ActionResponse(**record)
     
     except Exception as e:
@@ -700,6 +652,7 @@ async def update_action(
         
         # Fetch updated record
         result = db.table("investigation_actions").select("*").eq("id", action_id).execute()
+        publish_investigation_event(investigation_id, "action_updated", result.data[0])
         return ActionResponse(**result.data[0])
     
     except Exception as e:
@@ -826,8 +779,8 @@ async def analyze_investigation(
         logger.info(f"AI analysis completed for investigation {investigation.get('investigation_number')}")
         
         # Notify team members that AI analysis is complete
-        from services.notification_service import _get_team_member_ids
-        team_ids = _get_team_member_ids(investigation_id, exclude_user_id=user["id"])
+        from services.investigation_access import get_team_member_ids
+        team_ids = get_team_member_ids(db, investigation_id, exclude_user_id=user["id"])
         num_causes = len(result.get("root_causes", []))
         for uid in team_ids:
             create_notification(
@@ -1375,6 +1328,12 @@ async def close_investigation(
             actor_user_id=user["id"],
         )
         
+        publish_investigation_event(
+            investigation_id,
+            "status_changed",
+            {"old_status": investigation.get("status"), "new_status": "closed", "actor_user_id": user["id"]},
+        )
+        
         return {
             "success": True,
             "message": f"Investigation {investigation.get('investigation_number')} closed successfully",
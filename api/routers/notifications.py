@@ -1,10 +1,11 @@
 """Notification system router — in-app notifications and preferences."""
 
+import base64
 import logging
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 
 from dependencies import get_current_user
 from database import get_supabase
@@ -14,38 +15,91 @@ from schemas.notifications import (
     NotificationPreferences,
     NotificationPreferencesResponse,
 )
+from services.notification_cache import (
+    adjust_unread,
+    get_cached_unread,
+    invalidate_unread,
+    seed_unread,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1/notifications", tags=["notifications"])
 
 
+def _encode_cursor(item: dict) -> str:
+    raw = f"{item['created_at']}|{item['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        uuid.UUID(item_id)
+        return created_at, item_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("", response_model=list[NotificationResponse])
 async def list_notifications(
+    response: Response,
     user: dict = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str = Query(None, description="Keyset cursor from the X-Next-Cursor header"),
 ):
-    """List the current user's notifications (paginated, newest first)."""
+    """List the current user's notifications (newest first).
+
+    Prefer `cursor` (keyset) pagination: pass the X-Next-Cursor value from the
+    previous page. `offset` is kept for backwards compatibility.
+    """
     db = get_supabase()
 
-    result = (
+    query = (
         db.table("notifications")
         .select("*")
         .eq("user_id", user["id"])
-        .order("created_at", desc=True)
-        .range(offset, offset + limit - 1)
-        .execute()
     )
 
-    return [NotificationResponse(**item) for item in result.data]
+    if cursor:
+        created_at, item_id = _decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{item_id})'
+        )
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+    else:
+        query = (
+            query.order("created_at", desc=True)
+            .order("id", desc=True)
+            .range(offset, offset + limit - 1)
+        )
+
+    result = query.execute()
+    items = result.data or []
+
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(items[-1])
+
+    return [NotificationResponse(**item) for item in items]
 
 
 @router.get("/unread-count", response_model=UnreadCountResponse)
 async def get_unread_count(
     user: dict = Depends(get_current_user),
 ):
-    """Get count of unread notifications for the current user."""
+    """Get count of unread notifications for the current user.
+
+    Served from the per-user counter cache; the database is only queried
+    to seed the counter on a miss.
+    """
+    cached = get_cached_unread(user["id"])
+    if cached is not None:
+        return UnreadCountResponse(unread_count=cached)
+
     db = get_supabase()
 
     result = (
@@ -56,7 +110,9 @@ async def get_unread_count(
         .execute()
     )
 
-    return UnreadCountResponse(unread_count=result.count or 0)
+    count = result.count or 0
+    seed_unread(user["id"], count)
+    return UnreadCountResponse(unread_count=count)
 
 
 @router.patch("/{notification_id}/read")
@@ -79,7 +135,18 @@ async def mark_notification_read(
         raise HTTPException(status_code=404, detail="Notification not found")
 
     try:
-        db.table("notifications").update({"is_read": True}).eq("id", notification_id).execute()
+        # Conditional update: of two concurrent calls only one changes the row,
+        # so the counter is decremented once
+        updated = (
+            db.table("notifications")
+            .update({"is_read": True})
+            .eq("id", notification_id)
+            .eq("user_id", user["id"])
+            .eq("is_read", False)
+            .execute()
+        )
+        if updated.data:
+            adjust_unread(user["id"], -1)
         return {"success": True, "message": "Notification marked as read"}
     except Exception as e:
         logger.exception(f"Failed to mark notification read: {e}")
@@ -98,8 +165,10 @@ async def mark_all_read(
 
     try:
         db.table("notifications").update({"is_read": True}).eq("user_id", user["id"]).eq("is_read", False).execute()
+        seed_unread(user["id"], 0)
         return {"success": True, "message": "All notifications marked as read"}
     except Exception as e:
+        invalidate_unread(user["id"])
         logger.exception(f"Failed to mark all read: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -3,11 +3,10 @@
 Sprint 11: AI-Forward — Pattern detection cron job, alert management.
 """
 
+import asyncio
 import logging
 import uuid
-import math
-from datetime import datetime, timezone, timedelta
-from collections import defaultdict
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
 
@@ -20,28 +19,21 @@ from schemas.patterns import (
     PatternAlertUpdate,
     PatternDetectionResult,
 )
+from services.pattern_detection import (
+    PatternCube,
+    determine_severity,
+    load_active_alert_keys,
+    load_window_counts,
+    parse_hierarchies,
+    prune_buckets,
+    stored_dimensions,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1/patterns", tags=["patterns"])
 
 
-def _compute_z_score(current_count: int, historical_mean: float, historical_std: float) -> float:
-    """Compute Z-score for anomaly detection."""
-    if historical_std == 0:
-        return 0.0 if current_count == historical_mean else 3.0
-    return (current_count - historical_mean) / historical_std
-
-
-def _determine_severity(z_score: float) -> str:
-    """Map Z-score to severity level."""
-    if z_score >= 3.0:
-        return "critical"
-    elif z_score >= 2.0:
-        return "warning"
-    return "informational"
-
-
 @router.post("/detect", response_model=PatternDetectionResult)
 async def detect_patterns(
     x_cron_secret: str = Header(None),
@@ -49,8 +41,9 @@ async def detect_patterns(
 ):
     """Run pattern detection on recent failure analyses.
     
-    Groups by product/substrate/failure_mode, computes Z-scores
-    against historical averages, flags anomalies.
+    Rolls daily failure counts up along the configured dimension
+    hierarchies, computes Z-scores against historical averages and flags
+    the most specific anomalous groups.
     
     Can be called via cron (with X-Cron-Secret) or by admin users.
     """
@@ -66,104 +59,54 @@ async def detect_patterns(
     
     db = get_supabase()
     now = datetime.now(timezone.utc)
-    
-    # Get recent analyses (last 30 days)
-    recent_cutoff = (now - timedelta(days=30)).isoformat()
-    recent_result = (
-        db.table("failure_analyses")
-        .select("id, failure_mode, substrate_a, substrate_b, material_product, root_cause_category, created_at")
-        .eq("status", "completed")
-        .gte("created_at", recent_cutoff)
-        .execute()
+    today = now.date()
+
+    # Normalized per-key daily buckets are maintained by a trigger as analyses
+    # complete (migrations 020/021) and folded into per-key window counts in
+    # SQL (030); every configured hierarchy is rolled up from them in one pass.
+    hierarchies = parse_hierarchies(settings.pattern_hierarchies)
+    windows = await asyncio.to_thread(load_window_counts, db, today, stored_dimensions(hierarchies))
+    detection = PatternCube(windows, today).detect(
+        hierarchies,
+        threshold=settings.pattern_z_threshold,
+        min_recent=settings.pattern_min_recent,
     )
-    
-    # Get historical analyses (31-180 days ago) for baseline
-    historical_start = (now - timedelta(days=180)).isoformat()
-    historical_end = (now - timedelta(days=31)).isoformat()
-    historical_result = (
-        db.table("failure_analyses")
-        .select("id, failure_mode, substrate_a, substrate_b, material_product, root_cause_category, created_at")
-        .eq("status", "completed")
-        .gte("created_at", historical_start)
-        .lte("created_at", historical_end)
-        .execute()
-    )
-    
-    # Group recent failures by composite key
-    recent_groups: dict[str, list[dict]] = defaultdict(list)
-    for a in recent_result.data:
-        key = f"{a.get('failure_mode', 'unknown')}|{a.get('substrate_a', 'unknown')}|{a.get('material_product', 'unknown')}"
-        recent_groups[key].append(a)
-    
-    # Group historical failures by composite key (per month)
-    # 5 months of history → compute mean and std per month
-    historical_monthly: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0, 0, 0])
-    for a in historical_result.data:
-        key = f"{a.get('failure_mode', 'unknown')}|{a.get('substrate_a', 'unknown')}|{a.get('material_product', 'unknown')}"
-        created = a.get("created_at", "")
-        if created:
-            days_ago = (now - datetime.fromisoformat(created.replace("Z", "+00:00"))).days
-            month_idx = min((days_ago - 31) // 30, 4)
-            historical_monthly[key][month_idx] += 1
-    
+    active_keys = await asyncio.to_thread(load_active_alert_keys, db)
+
     alerts_created = 0
-    patterns_checked = len(recent_groups)
-    
-    for key, recent_items in recent_groups.items():
-        recent_count = len(recent_items)
-        
-        # Compute historical stats
-        hist_counts = historical_monthly.get(key, [0, 0, 0, 0, 0])
-        hist_mean = sum(hist_counts) / max(len(hist_counts), 1)
-        hist_variance = sum((c - hist_mean) ** 2 for c in hist_counts) / max(len(hist_counts), 1)
-        hist_std = math.sqrt(hist_variance) if hist_variance > 0 else 0.5
-        
-        z_score = _compute_z_score(recent_count, hist_mean, hist_std)
-        
-        # Only flag if Z-score >= 2.0 (statistically significant)
-        if z_score < 2.0:
-            continue
-        
-        parts = key.split("|")
-        failure_mode = parts[0] if parts[0] != "unknown" else None
-        substrate = parts[1] if len(parts) > 1 and parts[1] != "unknown" else None
-        product = parts[2] if len(parts) > 2 and parts[2] != "unknown" else None
-        
-        severity = _determine_severity(z_score)
-        
-        # Check if similar alert already exists (avoid duplicates)
-        # Check for duplicates — handle NULLs properly
-        dup_query = db.table("pattern_alerts").select("id").eq("status", "active")
-        if failure_mode:
-            dup_query = dup_query.eq("failure_mode", failure_mode)
-        else:
-            dup_query = dup_query.is_("failure_mode", "null")
-        if substrate:
-            dup_query = dup_query.eq("affected_substrate", substrate)
-        else:
-            dup_query = dup_query.is_("affected_substrate", "null")
-        if product:
-            dup_query = dup_query.eq("affected_product", product)
-        else:
-            dup_query = dup_query.is_("affected_product", "null")
-        existing = dup_query.execute()
-        
-        if existing.data:
+    patterns_checked = detection.groups_checked
+
+    for stat in detection.anomalies:
+        # Skip nodes that already have an active alert
+        if stat.key in active_keys:
             continue
-        
+
+        dims = stat.dimensions
+        failure_mode = dims.get("failure_mode")
+        root_cause = dims.get("root_cause_category")
+        substrate = dims.get("substrate") or dims.get("substrate_pair") or dims.get("substrate_b")
+        product = dims.get("product")
+        z_score = stat.z_score
+        severity = determine_severity(z_score)
+        scope = ", ".join(f"{d.replace('_', ' ')}: {v or 'unspecified'}" for d, v in dims.items())
+
         # Create alert
         alert_id = str(uuid.uuid4())
         alert_record = {
             "id": alert_id,
             "alert_type": "time_cluster",
             "severity": severity,
-            "title": f"Spike in {failure_mode or 'failures'}" + (f" on {substrate}" if substrate else ""),
-            "description": f"{recent_count} failures in the last 30 days vs historical average of {hist_mean:.1f}/month (Z-score: {z_score:.2f})",
+            "title": f"Spike in {failure_mode or root_cause or 'failures'}"
+            + (f" on {substrate}" if substrate else "")
+            + (f" ({product})" if product else ""),
+            "description": f"{stat.recent_count} failures in the last 30 days vs historical average of {stat.hist_mean:.1f}/month (Z-score: {z_score:.2f}) for {scope}",
             "affected_product": product,
             "affected_substrate": substrate,
             "failure_mode": failure_mode,
+            "pattern_key": stat.key,
+            "dimensions": dims,
             "statistical_confidence": min(z_score / 5.0, 1.0),
-            "affected_investigation_ids": [item["id"] for item in recent_items[:20]],
+            "affected_investigation_ids": stat.recent_ids,
             "status": "active",
             "created_at": now.isoformat(),
         }
@@ -171,6 +114,7 @@ async def detect_patterns(
         try:
             db.table("pattern_alerts").insert(alert_record).execute()
             alerts_created += 1
+            active_keys.add(stat.key)
             logger.info(f"Pattern alert created: {alert_record['title']} (severity={severity}, z={z_score:.2f})")
             
             # Notify team/enterprise users who have intelligence.alerts access
@@ -196,6 +140,8 @@ async def detect_patterns(
         except Exception as e:
             logger.warning(f"Failed to create pattern alert: {e}")
     
+    await asyncio.to_thread(prune_buckets, db, today)
+
     # Generate AI explanations for new critical alerts
     if alerts_created > 0:
         try:
@@ -3,28 +3,40 @@
 Sprint 11: AI-Forward — TDS extraction pipeline, product management.
 """
 
+import asyncio
 import logging
-import re
 import uuid
-import base64
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
 from pydantic import BaseModel
 
 from dependencies import get_current_user, get_optional_user
 from middleware.plan_gate import plan_gate
+from config import settings
 from database import get_supabase
 from schemas.products import (
+    ProductAutocompleteItem,
     ProductSpecificationCreate,
     ProductSpecificationUpdate,
     ProductSpecificationResponse,
+    TDSBulkIngestResponse,
     TDSExtractionResponse,
 )
 from services.ai_engine import _call_claude
-from prompts.tds_extraction import (
-    get_tds_extraction_system_prompt,
-    build_tds_extraction_user_prompt,
+from services.product_catalog import get_catalog, invalidate_catalog, product_slugs, slugify
+from services.product_search import get_search_index
+from services.tds_ingest import BatchTooLarge, claim_batch, collect_documents, get_batch_status, start_ingest
+from services.tds_extraction import (
+    MAX_PDF_SIZE,
+    build_product_record,
+    content_hash,
+    extract_fields,
+    extraction_cache_row,
+    get_cached_extraction,
+    save_extractions,
+    upload_tds,
+    validate_pdf,
 )
 
 def _escape_like(val: str) -> str:
@@ -47,10 +59,6 @@ class ProductMatchItem(BaseModel):
     reasons: list[str] = []
 
 
-def _slugify(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "-", (value or "").strip().lower()).strip("-")
-
-
 def _normalize_token(value: str) -> str:
     return (value or "").strip().lower()
 
@@ -119,6 +127,15 @@ def _cure_score(cure_schedule: dict | None, requested_cure: str | None) -> tuple
     return 0.0, []
 
 
+def _fetch_products_by_ids(db, ids: list[str]) -> list[dict]:
+    """Full rows for ids resolved by the search index, in the given order."""
+    if not ids:
+        return []
+    rows = db.table("product_specifications").select("*").in_("id", ids).execute().data or []
+    by_id = {str(r.get("id")): r for r in rows}
+    return [by_id[pid] for pid in ids if pid in by_id]
+
+
 def _is_quality_plus(user: dict | None) -> bool:
     if not user:
         return False
@@ -134,163 +151,97 @@ def _redact_field_performance(item: dict) -> dict:
     return redacted
 
 
+def _check_refresh_allowed(user: dict, force_refresh: bool) -> None:
+    """Re-extraction overwrites shared catalog rows (including manual corrections)."""
+    if force_refresh and user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="force_refresh requires admin access")
+
+
 @router.post("/extract-tds", response_model=TDSExtractionResponse)
 async def extract_tds(
     file: UploadFile = File(...),
+    force_refresh: bool = Query(False, description="Re-run extraction even if this PDF was seen before"),
     user: dict = Depends(get_current_user),
     _gate: None = Depends(plan_gate("products.extract_tds")),
 ):
     """Upload a TDS PDF and extract structured product specification data via Claude.
     
-    1. Upload PDF to tds-documents Supabase storage bucket
-    2. Send PDF content to Claude for structured extraction
-    3. Save extracted data to product_specifications table
+    1. Look up the PDF's SHA-256 in the extraction cache (skipped with force_refresh)
+    2. Upload PDF to tds-documents Supabase storage bucket (one object per hash)
+    3. Send PDF content to Claude for structured extraction
+    4. Save extracted data to product_specifications table
+
+    force_refresh overwrites a shared catalog row, so it is admin-only.
     """
+    _check_refresh_allowed(user, force_refresh)
     db = get_supabase()
     
-    # Validate file type
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are accepted for TDS extraction",
-        )
-    
-    # Read file content (max 10MB)
-    MAX_SIZE = 10 * 1024 * 1024
+    # Validate file type and size (max 10MB)
     file_content = await file.read()
-    if len(file_content) > MAX_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File size exceeds 10MB limit",
-        )
-    
-    # Upload to Supabase storage
-    # Sanitize filename to prevent path traversal
-    import re as _re
-    safe_filename = _re.sub(r'[^a-zA-Z0-9._-]', '_', file.filename or "upload.pdf")
-    storage_path = f"tds/{user['id']}/{uuid.uuid4().hex}_{safe_filename}"
     try:
-        db.storage.from_("tds-documents").upload(
-            storage_path,
-            file_content,
-            file_options={"content-type": "application/pdf"},
+        validate_pdf(file.filename, file_content)
+    except ValueError as e:
+        too_large = len(file_content) > MAX_PDF_SIZE
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if too_large else status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
-        tds_file_url = f"{db.storage.from_('tds-documents').get_public_url(storage_path)}"
-    except Exception as e:
-        logger.warning(f"Storage upload failed (non-fatal): {e}")
-        tds_file_url = None
-    
-    # Send PDF content to Claude for extraction
-    # Use base64 encoded PDF as document content
-    pdf_b64 = base64.standard_b64encode(file_content).decode("utf-8")
     
-    system_prompt = get_tds_extraction_system_prompt()
-    user_prompt = "Extract structured product specification data from this TDS PDF document. Provide confidence scores for each extracted field."
+    digest = content_hash(file_content)
+    cached = get_cached_extraction(db, digest)
     
-    try:
-        # Call Claude with PDF document block
-        import httpx
-        from config import settings
-        
-        headers = {
-            "x-api-key": settings.anthropic_api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json",
-        }
-        
-        payload = {
-            "model": settings.anthropic_model,
-            "max_tokens": 4096,
-            "system": system_prompt,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "document",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "application/pdf",
-                                "data": pdf_b64,
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": user_prompt,
-                        },
-                    ],
-                }
-            ],
-        }
-        
-        import json
-        async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload,
+    # Repeat upload: return the product created from this exact PDF
+    if cached and not force_refresh and cached.get("product_id"):
+        existing = (
+            db.table("product_specifications").select("*").eq("id", cached["product_id"]).execute()
+        ).data or []
+        if existing:
+            product = existing[0]
+            return TDSExtractionResponse(
+                product=ProductSpecificationResponse(**product),
+                extraction_confidence=product.get("extraction_confidence") or {},
+                message=f"TDS already extracted for {product.get('product_name')}",
+                cached=True,
             )
-            response.raise_for_status()
-            data = response.json()
-        
-        # Parse Claude response
-        content = data.get("content", [])
-        extracted = {}
-        if content and content[0].get("type") == "text":
-            text = content[0]["text"]
-            try:
-                extracted = json.loads(text)
-            except json.JSONDecodeError:
-                if "```json" in text:
-                    json_str = text.split("```json")[1].split("```")[0].strip()
-                    extracted = json.loads(json_str)
-                elif "```" in text:
-                    json_str = text.split("```")[1].split("```")[0].strip()
-                    extracted = json.loads(json_str)
-    
-    except Exception as e:
-        logger.exception(f"TDS extraction AI call failed: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"TDS extraction failed: {str(e)[:200]}",
-        )
     
-    # Save to product_specifications table
-    product_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
+    # Upload to Supabase storage
+    tds_file_url = (cached or {}).get("tds_file_url") if not force_refresh else None
+    if not tds_file_url:
+        tds_file_url = upload_tds(db, digest, file_content)
     
-    extraction_confidence = extracted.get("extraction_confidence", {})
+    if cached and cached.get("extracted") and not force_refresh:
+        # Product was deleted since; rebuild it from the cached extraction
+        extracted = cached["extracted"]
+    else:
+        # Send PDF content to Claude for extraction
+        try:
+            extracted = await extract_fields(file_content)
+        except Exception as e:
+            logger.exception(f"TDS extraction AI call failed: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"TDS extraction failed: {str(e)[:200]}",
+            )
     
-    record = {
-        "id": product_id,
-        "product_name": extracted.get("product_name", file.filename or "Unknown Product"),
-        "manufacturer": extracted.get("manufacturer"),
-        "chemistry_type": extracted.get("chemistry_type"),
-        "recommended_substrates": extracted.get("recommended_substrates", []),
-        "surface_prep_requirements": extracted.get("surface_prep_requirements"),
-        "cure_schedule": extracted.get("cure_schedule", {}),
-        "operating_temp_min_c": extracted.get("operating_temp_min_c"),
-        "operating_temp_max_c": extracted.get("operating_temp_max_c"),
-        "mechanical_properties": extracted.get("mechanical_properties", {}),
-        "shelf_life_months": extracted.get("shelf_life_months"),
-        "mix_ratio": extracted.get("mix_ratio"),
-        "pot_life_minutes": extracted.get("pot_life_minutes"),
-        "fixture_time_minutes": extracted.get("fixture_time_minutes"),
-        "tds_file_url": tds_file_url,
-        "extraction_confidence": extraction_confidence,
-        "manufacturer_claimed": False,
-        "created_at": now,
-        "updated_at": now,
-    }
+    # Save to product_specifications table; a forced refresh updates the same product
+    refresh_id = cached.get("product_id") if (cached and force_refresh) else None
+    record = build_product_record(extracted, file.filename, tds_file_url, product_id=refresh_id)
+    extraction_confidence = record["extraction_confidence"]
     
     try:
-        db.table("product_specifications").insert(record).execute()
+        db.table("product_specifications").upsert(record, on_conflict="id").execute()
+        invalidate_catalog()
     except Exception as e:
         logger.exception(f"Failed to save product specification: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)[:200]}",
         )
+    save_extractions(db, [extraction_cache_row(digest, record, extracted)])
+    if refresh_id:
+        # Return the stored row (created_at, claimed status) rather than the partial update
+        stored = db.table("product_specifications").select("*").eq("id", refresh_id).execute().data or []
+        record = stored[0] if stored else record
     
     return TDSExtractionResponse(
         product=ProductSpecificationResponse(**record),
@@ -299,19 +250,103 @@ async def extract_tds(
     )
 
 
+async def _read_uploads(files: list[UploadFile], max_bytes: int) -> list[tuple[str, bytes]]:
+    """Read uploads in chunks, rejecting the request once the total passes max_bytes."""
+    uploads: list[tuple[str, bytes]] = []
+    total = 0
+    for f in files:
+        parts: list[bytes] = []
+        while chunk := await f.read(1024 * 1024):
+            total += len(chunk)
+            if total > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Upload exceeds {max_bytes // (1024 * 1024)}MB limit",
+                )
+            parts.append(chunk)
+        uploads.append((f.filename or "upload.pdf", b"".join(parts)))
+    return uploads
+
+
+@router.post(
+    "/extract-tds/bulk",
+    response_model=TDSBulkIngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def extract_tds_bulk(
+    files: list[UploadFile] = File(...),
+    batch_id: str | None = Form(None),
+    force_refresh: bool = Form(False),
+    user: dict = Depends(get_current_user),
+    _gate: None = Depends(plan_gate("products.extract_tds")),
+):
+    """Queue a batch of TDS PDFs (and/or .zip archives of PDFs) for extraction.
+
+    Identical PDFs are extracted once, and PDFs seen in earlier uploads map to
+    their existing product unless force_refresh is set. Pass a previous batch_id (one of your
+    own batches) to resume an interrupted batch; documents already ingested in it are skipped.
+    Poll GET /v1/products/extract-tds/bulk/{batch_id} for progress and the report.
+    force_refresh is admin-only.
+    """
+    _check_refresh_allowed(user, force_refresh)
+    if batch_id:
+        try:
+            batch_id = str(uuid.UUID(batch_id))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="batch_id must be a UUID")
+
+    uploads = await _read_uploads(files, settings.tds_ingest_max_upload_mb * 1024 * 1024)
+    try:
+        batch = collect_documents(uploads)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if not batch.documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "No valid PDF documents in upload", "rejected": batch.rejected},
+        )
+
+    db = get_supabase()
+    batch_id = batch_id or str(uuid.uuid4())
+    # Resuming is only allowed on the caller's own batch; other users' ids look absent
+    if not await asyncio.to_thread(claim_batch, db, batch_id, user["id"]):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch_id = start_ingest(db, user["id"], batch, batch_id=batch_id, force_refresh=force_refresh)
+    return TDSBulkIngestResponse(
+        batch_id=batch_id,
+        received=batch.received,
+        unique=len(batch.documents),
+        duplicates=len(batch.duplicates),
+        rejected=batch.rejected,
+    )
+
+
+@router.get("/extract-tds/bulk/{batch_id}")
+async def get_extract_tds_bulk(
+    batch_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """Progress and throughput/error report for a bulk TDS batch."""
+    db = get_supabase()
+    result = get_batch_status(db, batch_id, user["id"])
+    if result is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return result
+
+
 @router.get("", response_model=list[ProductSpecificationResponse])
 async def list_products(
     search: str = Query(None, description="Search by product name"),
 ):
     """List product specifications. Optionally search by name."""
     db = get_supabase()
-    
-    query = db.table("product_specifications").select("*")
-    
+
     if search:
-        query = query.ilike("product_name", f"%{_escape_like(search)}%")
-    
-    result = query.order("product_name", desc=False).limit(100).execute()
+        index = await asyncio.to_thread(get_search_index)
+        ids = [index.catalog.ids[h.index] for h in index.search(search, limit=100)]
+        return [ProductSpecificationResponse(**item) for item in _fetch_products_by_ids(db, ids)]
+
+    result = db.table("product_specifications").select("*").order("product_name", desc=False).limit(100).execute()
     
     return [ProductSpecificationResponse(**item) for item in result.data]
 
@@ -343,21 +378,33 @@ async def list_products_public(
     chemistry_type: str | None = Query(None),
     manufacturer: str | None = Query(None),
 ):
-    """Public product catalog list endpoint (L1 parity)."""
-    db = get_supabase()
-    query = db.table("product_specifications").select("*")
-
-    if search:
-        query = query.ilike("product_name", f"%{_escape_like(search)}%")
-    if chemistry_type:
-        query = query.ilike("chemistry_type", f"%{_escape_like(chemistry_type)}%")
-    if manufacturer:
-        query = query.ilike("manufacturer", f"%{_escape_like(manufacturer)}%")
+    """Public product catalog list endpoint (L1 parity).
 
+    `search` is ranked (prefix + fuzzy) via the in-process search index;
+    filters keep their substring semantics.
+    """
+    db = get_supabase()
     page_size = 25
     start = (page - 1) * page_size
     end = start + page_size - 1
-    result = query.order("product_name", desc=False).range(start, end).execute()
+
+    if search or chemistry_type or manufacturer:
+        index = await asyncio.to_thread(get_search_index)
+        mask = index.filter_mask(manufacturer=manufacturer, chemistry_type=chemistry_type)
+        if search:
+            ranked = [h.index for h in index.search(search, limit=end + 1, mask=mask)]
+        else:
+            ranked = index.name_order[mask[index.name_order]][: end + 1].tolist()
+        ids = [index.catalog.ids[i] for i in ranked[start:end + 1]]
+        return [ProductSpecificationResponse(**item) for item in _fetch_products_by_ids(db, ids)]
+
+    result = (
+        db.table("product_specifications")
+        .select("*")
+        .order("product_name", desc=False)
+        .range(start, end)
+        .execute()
+    )
     return [ProductSpecificationResponse(**item) for item in (result.data or [])]
 
 
@@ -373,50 +420,52 @@ async def get_product_public(
     - Quality/Enterprise (and legacy team alias): full response
     - Unauthenticated / Free / Pro: field performance fields omitted
     """
-    db = get_supabase()
-    # Narrow by manufacturer first, then slugify product_name for match
-    rows = (
-        db.table("product_specifications")
-        .select("*")
-        .ilike("manufacturer", manufacturer.replace("-", " "))
-        .limit(200)
-        .execute()
-    ).data or []
+    key = (slugify(manufacturer), slug)
+    tier = "full" if _is_quality_plus(user) else "redacted"
 
-    target_m = _slugify(manufacturer)
-    quality_plus = _is_quality_plus(user)
+    catalog = await asyncio.to_thread(get_catalog)
+    index = catalog.slug_index.get(key)
+    product_id = catalog.ids[index] if index is not None else None
 
-    for item in rows:
-        m_slug = _slugify(item.get("manufacturer") or "")
-        p_slug = _slugify(item.get("product_name") or "")
-        if m_slug == target_m and p_slug == slug:
-            payload = item if quality_plus else _redact_field_performance(item)
-            return ProductSpecificationResponse(**payload)
+    cached = catalog.detail_cache.get((product_id, tier)) if product_id else None
+    if cached is not None:
+        return cached
 
-    # fallback broader scan when manufacturer normalization differs
-    rows2 = db.table("product_specifications").select("*").limit(1000).execute().data or []
-    for item in rows2:
-        if _slugify(item.get("manufacturer") or "") == target_m and _slugify(item.get("product_name") or "") == slug:
-            payload = item if quality_plus else _redact_field_performance(item)
-            return ProductSpecificationResponse(**payload)
+    db = get_supabase()
+    query = db.table("product_specifications").select("*")
+    if product_id:
+        query = query.eq("id", product_id)
+    else:
+        # Written after the snapshot was built (e.g. on another worker)
+        query = query.eq("manufacturer_slug", key[0]).eq("product_slug", key[1]).order("id", desc=False)
+    rows = query.limit(1).execute().data or []
+    if not rows:
+        raise HTTPException(status_code=404, detail="Product not found")
 
-    raise HTTPException(status_code=404, detail="Product not found")
+    item = rows[0]
+    full = ProductSpecificationResponse(**item)
+    redacted = ProductSpecificationResponse(**_redact_field_performance(item))
+    if product_id:
+        catalog.detail_cache[(product_id, "full")] = full
+        catalog.detail_cache[(product_id, "redacted")] = redacted
+    return full if tier == "full" else redacted
 
 
-@public_router.get("/autocomplete", response_model=list[ProductSpecificationResponse])
+@public_router.get("/autocomplete", response_model=list[ProductAutocompleteItem])
 async def product_autocomplete(q: str = Query(..., min_length=2)):
-    """Autocomplete product names (top 10)."""
-    db = get_supabase()
-    q_esc = _escape_like(q)
-    result = (
-        db.table("product_specifications")
-        .select("*")
-        .or_(f"product_name.ilike.%{q_esc}%,manufacturer.ilike.%{q_esc}%")
-        .order("product_name", desc=False)
-        .limit(10)
-        .execute()
-    )
-    return [ProductSpecificationResponse(**item) for item in (result.data or [])]
+    """Autocomplete product names (top 10), served from the in-process search index."""
+    index = await asyncio.to_thread(get_search_index)
+    rows = index.catalog.rows
+    return [
+        ProductAutocompleteItem(
+            id=str(rows[h.index].get("id")),
+            product_name=rows[h.index].get("product_name") or "",
+            manufacturer=rows[h.index].get("manufacturer"),
+            chemistry_type=rows[h.index].get("chemistry_type"),
+            tds_file_url=rows[h.index].get("tds_file_url"),
+        )
+        for h in index.search(q, limit=10)
+    ]
 
 
 @public_router.get("/match", response_model=list[ProductMatchItem])
@@ -431,45 +480,43 @@ async def match_products(
 
     substrate 40%, chemistry 30%, temp range 20%, cure method 10%.
     """
-    db = get_supabase()
-
-    candidates = db.table("product_specifications").select("*").limit(500).execute().data or []
-    scored: list[ProductMatchItem] = []
-
+    catalog = await asyncio.to_thread(get_catalog)
     req_subs = [s for s in substrates if (s or "").strip()]
 
-    for p in candidates:
-        s_score, s_reasons = _substrate_score(p.get("recommended_substrates") or [], req_subs)
-        # L1 validation: 0 substrate overlap should not appear
-        if req_subs and s_score <= 0:
-            continue
-
-        c_score, c_reasons = _chemistry_score(p.get("chemistry_type"), chemistry)
-        t_score, t_reasons = _temp_score(p.get("operating_temp_min_c"), p.get("operating_temp_max_c"), temp_min, temp_max)
-        cu_score, cu_reasons = _cure_score(p.get("cure_schedule") or {}, cure_method)
+    matches = catalog.match(
+        chemistry=chemistry,
+        substrates=req_subs,
+        temp_min=temp_min,
+        temp_max=temp_max,
+        cure_method=cure_method,
+        top_k=10,
+    )
 
-        weighted = (s_score * 0.4) + (c_score * 0.3) + (t_score * 0.2) + (cu_score * 0.1)
-        score = int(round(weighted * 100))
-        if score <= 0:
-            continue
+    scored: list[ProductMatchItem] = []
+    for m in matches:
+        p = catalog.rows[m.index]
+        # Reasons are only built for the returned top-k
+        _, s_reasons = _substrate_score(p.get("recommended_substrates") or [], req_subs)
+        _, c_reasons = _chemistry_score(p.get("chemistry_type"), chemistry)
+        _, t_reasons = _temp_score(p.get("operating_temp_min_c"), p.get("operating_temp_max_c"), temp_min, temp_max)
+        _, cu_reasons = _cure_score(p.get("cure_schedule") or {}, cure_method)
 
         scored.append(ProductMatchItem(
             product_id=str(p.get("id")),
             product_name=p.get("product_name") or "",
             manufacturer=p.get("manufacturer"),
             chemistry_type=p.get("chemistry_type"),
-            score=score,
+            score=m.score,
             score_breakdown={
-                "substrate": round(s_score * 40, 2),
-                "chemistry": round(c_score * 30, 2),
-                "temp_range": round(t_score * 20, 2),
-                "cure_method": round(cu_score * 10, 2),
+                "substrate": round(m.substrate * 40, 2),
+                "chemistry": round(m.chemistry * 30, 2),
+                "temp_range": round(m.temp_range * 20, 2),
+                "cure_method": round(m.cure_method * 10, 2),
             },
             reasons=[*s_reasons, *c_reasons, *t_reasons, *cu_reasons],
         ))
 
-    scored.sort(key=lambda x: x.score, reverse=True)
-    return scored[:10]
+    return scored
 
 
 @router.put("/{product_id}", response_model=ProductSpecificationResponse)
@@ -484,7 +531,7 @@ async def update_product(
     # Check exists
     existing = (
         db.table("product_specifications")
-        .select("id")
+        .select("id, product_name, manufacturer")
         .eq("id", product_id)
         .execute()
     )
@@ -498,9 +545,16 @@ async def update_product(
         return ProductSpecificationResponse(**result.data[0])
     
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    if "product_name" in update_data or "manufacturer" in update_data:
+        current = existing.data[0]
+        update_data.update(product_slugs(
+            update_data.get("manufacturer", current.get("manufacturer")),
+            update_data.get("product_name", current.get("product_name")),
+        ))
     
     try:
         db.table("product_specifications").update(update_data).eq("id", product_id).execute()
+        invalidate_catalog()
         result = db.table("product_specifications").select("*").eq("id", product_id).execute()
         return ProductSpecificationResponse(**result.data[0])
     except Exception as e:
@@ -16,6 +16,7 @@ from schemas.specify import (
 from services.ai_engine import generate_spec
 from services.product_matching import find_matching_products
 from services.usage_service import can_use_spec, increment_spec_usage
+from utils.normalizer import normalize_substrate
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +56,8 @@ async def create_spec(
         "created_at": now,
         "updated_at": now,
         **data_dict,
+        "substrate_a_normalized": normalize_substrate(data.substrate_a),
+        "substrate_b_normalized": normalize_substrate(data.substrate_b),
     }
 
     # Insert initial record — wrap in try/except so DB errors don't 500
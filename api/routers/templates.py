@@ -1,12 +1,16 @@
-"""Report templates router — list OEM report templates."""
+"""Report templates router — list OEM report templates.
 
+Served from the in-memory catalog in services.template_catalog.
+"""
+
+import asyncio
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
 
 from dependencies import get_current_user
-from database import get_supabase
 from schemas.templates import TemplateResponse, TemplateListItem
+from services import template_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +22,8 @@ async def list_templates(
     user: dict = Depends(get_current_user),
 ):
     """List available report templates."""
-    db = get_supabase()
-
-    result = (
-        db.table("report_templates")
-        .select("id, name, slug, description, oem_standard, is_active")
-        .eq("is_active", True)
-        .order("name", desc=False)
-        .execute()
-    )
-
-    return [TemplateListItem(**item) for item in result.data]
+    rows = await asyncio.to_thread(template_catalog.list_active_templates)
+    return [TemplateListItem(**item) for item in rows]
 
 
 @router.get("/{template_id}", response_model=TemplateResponse)
@@ -37,16 +32,8 @@ async def get_template(
     user: dict = Depends(get_current_user),
 ):
     """Get a single report template by ID."""
-    db = get_supabase()
-
-    result = (
-        db.table("report_templates")
-        .select("*")
-        .eq("id", template_id)
-        .execute()
-    )
-
-    if not result.data:
+    template = await asyncio.to_thread(template_catalog.get_template, template_id)
+    if not template:
         raise HTTPException(status_code=404, detail="Template not found")
 
-    return TemplateResponse(**result.data[0])
+    return TemplateResponse(**template)
@@ -30,6 +30,8 @@ class GuidedSessionResponse(BaseModel):
     analysis_id: Optional[str] = None
     session_state: Dict[str, Any] = {}
     messages: List[Dict[str, Any]] = []
+    message_count: int = 0
+    last_phase: Optional[str] = None
     status: str = "active"
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -49,3 +51,4 @@ class GuidedSessionListItem(BaseModel):
     updated_at: Optional[datetime] = None
     summary_preview: Optional[str] = None
     message_count: int = 0
+    last_phase: Optional[str] = None
@@ -14,6 +14,7 @@ class PatternAlertResponse(BaseModel):
     affected_product: Optional[str] = None
     affected_substrate: Optional[str] = None
     failure_mode: Optional[str] = None
+    dimensions: Optional[Dict[str, Optional[str]]] = None
     statistical_confidence: Optional[float] = None
     affected_investigation_ids: List[str] = []
     ai_explanation: Optional[str] = None
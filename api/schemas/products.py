@@ -69,7 +69,26 @@ class ProductSpecificationResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+class ProductAutocompleteItem(BaseModel):
+    """Projection returned by the typeahead endpoint."""
+    id: str
+    product_name: str
+    manufacturer: Optional[str] = None
+    chemistry_type: Optional[str] = None
+    tds_file_url: Optional[str] = None
+
+
 class TDSExtractionResponse(BaseModel):
     product: ProductSpecificationResponse
     extraction_confidence: Dict[str, Any] = {}
     message: str = "TDS extraction complete"
+    cached: bool = False
+
+
+class TDSBulkIngestResponse(BaseModel):
+    batch_id: str
+    status: str = "running"
+    received: int
+    unique: int
+    duplicates: int
+    rejected: List[Dict[str, Any]] = []
@@ -0,0 +1,80 @@
+"""Re-normalize substrate_*_normalized on historical rows.
+
+Run from api/:
+    python -m scripts.backfill_substrates [--table NAME ...] [--dry-run] [--chunk-size N]
+        [--rows-per-second N] [--max-rows N] [--checkpoint PATH] [--restart]
+
+Progress (last id per table before any failed update) is written to the
+checkpoint file after every chunk; re-running the same command resumes from
+there and retries failed rows. --dry-run reports the key transitions that
+would be written without updating anything and does not touch the checkpoint.
+After failure_analyses has been processed, pattern_daily_counts is rebuilt so
+pattern buckets follow the new keys.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from database import get_supabase
+from services.substrate_backfill import TABLES, TableReport, backfill_table, rebuild_pattern_counts
+
+DEFAULT_CHECKPOINT = Path(".substrate_backfill.json")
+
+
+def _load_checkpoint(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Substrate key backfill")
+    parser.add_argument("--table", action="append", choices=TABLES, help="Limit to a table (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per keyset page (default 500)")
+    parser.add_argument("--rows-per-second", type=float, default=2000, help="Scan rate cap; 0 disables (default 2000)")
+    parser.add_argument("--max-rows", type=int, help="Stop each table after this many rows")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT, help="Resume state file")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
+    args = parser.parse_args()
+
+    checkpoint = {} if args.restart else _load_checkpoint(args.checkpoint)
+    db = get_supabase()
+    reports = []
+
+    for table in args.table or TABLES:
+        def _progress(report: TableReport, table=table) -> None:
+            print(
+                f"\r{table}: {report.scanned} scanned, {report.changed} changed",
+                end="", file=sys.stderr, flush=True,
+            )
+            if not args.dry_run:
+                checkpoint[table] = report.checkpoint_id
+                args.checkpoint.write_text(json.dumps(checkpoint))
+
+        report = backfill_table(
+            db,
+            table,
+            after_id=checkpoint.get(table),
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            rows_per_second=args.rows_per_second or None,
+            max_rows=args.max_rows,
+            on_chunk=_progress,
+        )
+        print(file=sys.stderr)
+        reports.append(report.as_dict())
+
+    output = {"dry_run": args.dry_run, "tables": reports}
+    if not args.dry_run and "failure_analyses" in (args.table or TABLES):
+        output["pattern_buckets_rebuilt"] = rebuild_pattern_counts(db)
+
+    print(json.dumps(output, indent=2))
+    return 1 if any(r["failed"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Bulk-ingest a supplier's TDS sheets from the command line.
+
+Run from api/:
+    python -m scripts.ingest_tds PATH [PATH ...] --user-id UUID [--batch-id UUID] [--concurrency N] [--force-refresh]
+
+PATH may be a PDF, a .zip of PDFs, or a directory (searched recursively for
+both). Re-run with the printed --batch-id to resume an interrupted batch.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from database import get_supabase
+from services.tds_ingest import BatchTooLarge, collect_documents, ingest_tds_batch
+
+
+def _iter_uploads(paths: list[str]):
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files = sorted(p for p in path.rglob("*") if p.suffix.lower() in {".pdf", ".zip"})
+        else:
+            files = [path]
+        for file in files:
+            yield file.name, file.read_bytes()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk TDS ingestion")
+    parser.add_argument("paths", nargs="+", help="PDF files, .zip archives or directories")
+    parser.add_argument("--user-id", required=True, help="User recorded as the batch owner (only they can resume it)")
+    parser.add_argument("--batch-id", help="Resume an existing batch")
+    parser.add_argument("--concurrency", type=int, help="Concurrent extractions (default: settings)")
+    parser.add_argument("--force-refresh", action="store_true", help="Re-extract PDFs already in the cache")
+    args = parser.parse_args()
+
+    try:
+        batch = collect_documents(_iter_uploads(args.paths))
+    except BatchTooLarge as e:
+        print(f"{e}; split the input into smaller batches", file=sys.stderr)
+        return 1
+    print(
+        f"{batch.received} files: {len(batch.documents)} unique, "
+        f"{len(batch.duplicates)} duplicates, {len(batch.rejected)} rejected",
+        file=sys.stderr,
+    )
+    if not batch.documents:
+        return 1
+
+    def _progress(done: int, total: int) -> None:
+        print(f"\r{done}/{total} extracted", end="", file=sys.stderr, flush=True)
+
+    report = asyncio.run(ingest_tds_batch(
+        get_supabase(),
+        args.user_id,
+        batch,
+        batch_id=args.batch_id,
+        concurrency=args.concurrency,
+        on_progress=_progress,
+        force_refresh=args.force_refresh,
+    ))
+    print(file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,198 @@
 """Audit logging service for investigation activity.
 
 All investigation mutations must call log_event to maintain compliance audit trail.
+
+Inside an HTTP request (see middleware.audit_buffer) events are collected in
+a request-scoped buffer and written in one bulk insert after the response
+has been sent. Outside a request they are written immediately. If the
+database rejects a write, the batch is appended to a local spill file and
+replayed, oldest first, before the next batch — so the trail stays
+append-only even across outages. Writers only take the (cross-worker) spill
+lock while a spill file exists or to append to it; normal inserts run
+unlocked and concurrently.
+
+The spill is only as durable as the disk behind `audit_spill_path`. The
+default under /tmp does not survive a redeploy or restart on Render; point
+AUDIT_SPILL_PATH at a persistent disk mount to keep spilled events.
 """
 
+import contextvars
+import fcntl
+import json
 import logging
+import os
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Optional
 
+from config import settings
 from database import get_supabase
 
 logger = logging.getLogger(__name__)
 
+_SPILL_REPLAY_CHUNK = 500
+
+_audit_buffer: contextvars.ContextVar[Optional[list[dict]]] = contextvars.ContextVar(
+    "audit_buffer", default=None
+)
+
+
+class AuditWriter:
+    """Bulk writer for investigation_audit_log with ordered spill-to-disk fallback."""
+
+    def __init__(self, spill_path: str):
+        self.spill_path = spill_path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialise spill replay/append across threads and worker processes."""
+        with self._lock:
+            lock_file = None
+            try:
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                lock_file = open(f"{self.spill_path}.lock", "a")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except OSError as e:
+                logger.warning(f"Audit spill lock unavailable, continuing unlocked: {e}")
+            try:
+                yield
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def write(self, records: list[dict]) -> bool:
+        """Persist records in order. Returns False if they had to be spilled."""
+        if not records:
+            return True
+        if not os.path.exists(self.spill_path):
+            # Nothing to replay: insert without taking the spill lock
+            if self._try_insert(records):
+                return True
+            with self._exclusive():
+                self._spill(records)
+            return False
+        with self._exclusive():
+            if self._replay_spill() and self._try_insert(records):
+                return True
+            self._spill(records)
+            return False
+
+    def _try_insert(self, records: list[dict]) -> bool:
+        try:
+            self._insert(records)
+            return True
+        except Exception as e:
+            logger.error(
+                f"Audit log bulk insert failed ({len(records)} events); spilling to disk: {e}",
+                exc_info=True,
+            )
+            return False
+
+    def pending_spill_count(self) -> int:
+        try:
+            with open(self.spill_path) as f:
+                return sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def _insert(self, records: list[dict]) -> None:
+        db = get_supabase()
+        # ON CONFLICT DO NOTHING keeps replays idempotent without ever updating a row
+        db.table("investigation_audit_log").upsert(
+            records, on_conflict="id", ignore_duplicates=True
+        ).execute()
+
+    def _spill(self, records: list[dict]) -> None:
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            logger.critical(
+                f"Audit spill failed; {len(records)} events lost: "
+                + json.dumps(records, default=str)[:2000],
+                exc_info=True,
+            )
+
+    def _replay_spill(self) -> bool:
+        """Drain the spill file in order. Returns False if the database is still unavailable."""
+        try:
+            with open(self.spill_path, encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.error(f"Audit spill file unreadable, appending behind it: {e}")
+            return False
+        if not lines:
+            return True
+
+        sent = 0
+        try:
+            for i in range(0, len(lines), _SPILL_REPLAY_CHUNK):
+                chunk = [_parse_spill_line(line) for line in lines[i:i + _SPILL_REPLAY_CHUNK]]
+                self._insert([r for r in chunk if r is not None])
+                sent += len(chunk)
+        except Exception as e:
+            logger.warning(f"Audit spill replay stopped after {sent}/{len(lines)} events: {e}")
+            self._rewrite_spill(lines[sent:])
+            return False
+
+        os.remove(self.spill_path)
+        logger.info(f"Replayed {sent} spilled audit events")
+        return True
+
+    def _rewrite_spill(self, remaining: list[str]) -> None:
+        tmp_path = f"{self.spill_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.spill_path)
+        except OSError:
+            # Leaving the original file in place only risks duplicates, which replay ignores
+            logger.error("Audit spill rewrite failed", exc_info=True)
+
+
+def _parse_spill_line(line: str) -> Optional[dict]:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        logger.error(f"Skipping corrupt audit spill line: {line[:200]!r}")
+        return None
+
+
+_writer = AuditWriter(settings.audit_spill_path)
+
+
+def get_audit_writer() -> AuditWriter:
+    return _writer
+
+
+def begin_request_buffer() -> contextvars.Token:
+    """Start collecting audit events for the current request."""
+    return _audit_buffer.set([])
+
+
+def end_request_buffer(token: contextvars.Token) -> list[dict]:
+    """Stop collecting and return the buffered events in the order they were logged."""
+    records = _audit_buffer.get() or []
+    _audit_buffer.reset(token)
+    return records
+
+
+def flush_events(records: list[dict]) -> None:
+    """Write buffered events in a single bulk insert."""
+    if records and _writer.write(records):
+        logger.info(f"Audit log flushed: {len(records)} event(s)")
+
 
 def log_event(
     investigation_id: str,
@@ -39,7 +220,6 @@ def log_event(
     Returns:
         The UUID of the created audit log entry
     """
-    db = get_supabase()
     log_id = str(uuid.uuid4())
     
     record = {
@@ -55,25 +235,18 @@ def log_event(
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
     
-    try:
-        db.table("investigation_audit_log").insert(record).execute()
+    buffer = _audit_buffer.get()
+    if buffer is not None:
+        buffer.append(record)
+        return log_id
+
+    # Outside a request (cron, scripts): write through immediately.
+    # Failures are spilled to disk and must never block the operation.
+    if _writer.write([record]):
         logger.info(
             f"Audit log created: {event_type} for investigation {investigation_id} by user {actor_user_id}"
         )
-        return log_id
-    except Exception as e:
-        # Audit logging failure should not block the operation, but must be logged
-        logger.error(
-            f"Failed to create audit log for investigation {investigation_id}: {e}",
-            exc_info=True,
-            extra={
-                "investigation_id": investigation_id,
-                "event_type": event_type,
-                "actor_user_id": actor_user_id,
-            }
-        )
-        # Return a placeholder UUID so calling code doesn't break
-        return log_id
+    return log_id
 
 
 def log_field_changes(
@@ -0,0 +1,86 @@
+"""Write-behind case view counts.
+
+Case detail views are counted in memory per case and flushed every
+``case_view_flush_interval_seconds`` as one increment_case_views call
+(migration 027), which adds each case's count atomically. The detail endpoint
+therefore never writes. Counts that fail to flush are merged back and retried
+on the next flush; the lifespan in main.py flushes once more on shutdown, so
+only a hard crash loses the last interval's views.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from config import settings
+from database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+INCREMENT_RPC = "increment_case_views"
+
+
+class CaseViewCounter:
+    """Thread-safe per-process view aggregator."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, case_id: str, n: int = 1) -> None:
+        with self._lock:
+            self._pending[case_id] = self._pending.get(case_id, 0) + n
+
+    def pending(self) -> int:
+        """Views counted but not yet written."""
+        with self._lock:
+            return sum(self._pending.values())
+
+    def flush(self) -> int:
+        """Write pending views in one RPC. Returns the number of views flushed."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            db = get_supabase()
+            db.rpc(INCREMENT_RPC, {"p_counts": batch}).execute()
+        except Exception as e:
+            self._restore(batch)
+            logger.warning(f"Case view flush failed ({sum(batch.values())} views kept): {e}")
+            return 0
+        total = sum(batch.values())
+        logger.debug(f"Flushed {total} case view(s) across {len(batch)} case(s)")
+        return total
+
+    def _restore(self, batch: dict[str, int]) -> None:
+        with self._lock:
+            for case_id, n in batch.items():
+                self._pending[case_id] = self._pending.get(case_id, 0) + n
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            # Supabase client is synchronous — keep it off the event loop
+            await asyncio.to_thread(self.flush)
+
+    def start(self, interval: float = settings.case_view_flush_interval_seconds) -> None:
+        """Start the periodic flush on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+case_views = CaseViewCounter()
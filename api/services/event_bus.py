@@ -0,0 +1,216 @@
+"""In-process pub/sub bus feeding the server-push event stream.
+
+Publishers (notification_service, comments, investigations) call
+publish_user_event / publish_investigation_event; the /v1/events/stream
+endpoint subscribes per user and per investigation.
+
+Each published event gets a cursor of the form "<epoch>-<seq>". The last
+`event_bus_replay_size` events per topic are retained so a reconnecting
+client can replay everything after its last cursor. When the cursor is from
+a previous process (epoch mismatch) or older than the retained window, the
+subscriber receives a single "resync" event and should refetch state.
+
+Subscribers have bounded queues. A slow consumer loses its oldest queued
+events and is sent "resync" rather than stalling publishers.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Event:
+    seq: int
+    topic: str
+    event_type: str
+    data: dict
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def cursor(self, epoch: str) -> str:
+        return f"{epoch}-{self.seq}"
+
+
+class Subscription:
+    """A consumer's bounded view of one or more topics."""
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics = frozenset(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.loop = asyncio.get_running_loop()
+        self.needs_resync = False
+        self.dropped = 0
+
+    def _offer(self, event: Optional[Event]) -> None:
+        """Enqueue on the subscriber's loop; drop oldest on overflow."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+            self.needs_resync = True
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: Event) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # Loop already closed — the stream is gone
+            pass
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        """Wait for the next event; None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """Topic-based fan-out with a per-topic replay buffer."""
+
+    def __init__(self, replay_size: int = 500, queue_size: int = 100, max_topics: int = 10_000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._replay_size = replay_size
+        self._queue_size = queue_size
+        self._max_topics = max_topics
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._history: dict[str, deque[Event]] = {}
+        # Highest seq evicted from each topic's buffer; replays older than this are incomplete
+        self._evicted: dict[str, int] = {}
+        # Highest seq of any topic dropped entirely (bounds memory across many topics)
+        self._dropped_floor = 0
+        self._subs: dict[str, set[Subscription]] = {}
+
+    def publish(self, topic: str, event_type: str, data: dict) -> Event:
+        with self._lock:
+            event = Event(seq=next(self._seq), topic=topic, event_type=event_type, data=data)
+            history = self._history.get(topic)
+            if history is None:
+                if len(self._history) >= self._max_topics:
+                    self._drop_oldest_topic_locked()
+                history = self._history[topic] = deque(maxlen=self._replay_size)
+            elif len(history) == history.maxlen:
+                self._evicted[topic] = history[0].seq
+            history.append(event)
+            subscribers = list(self._subs.get(topic, ()))
+        for sub in subscribers:
+            sub.deliver(event)
+        return event
+
+    def parse_cursor(self, cursor: Optional[str]) -> Optional[int]:
+        """Return the sequence number for a cursor from this process, else None."""
+        if not cursor:
+            return None
+        epoch, _, seq = cursor.rpartition("-")
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(seq)
+        except ValueError:
+            return None
+
+    def subscribe(self, topics: Iterable[str], since: Optional[str] = None) -> Subscription:
+        """Register a subscriber; replay retained events after `since` first."""
+        sub = Subscription(topics, self._queue_size)
+        since_seq = self.parse_cursor(since)
+        with self._lock:
+            for topic in sub.topics:
+                self._subs.setdefault(topic, set()).add(sub)
+            if since:
+                if since_seq is None:
+                    sub.needs_resync = True
+                    backlog = []
+                else:
+                    backlog = self._replay_locked(sub.topics, since_seq)
+                    if backlog is None:
+                        sub.needs_resync = True
+                        backlog = []
+            else:
+                backlog = []
+        for event in backlog[-self._queue_size:]:
+            sub._offer(event)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._subs.get(topic)
+                if subs is None:
+                    continue
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[topic]
+
+    def _replay_locked(self, topics: Iterable[str], since_seq: int) -> Optional[list[Event]]:
+        """Events with seq > since_seq, or None if the buffer no longer covers it."""
+        events: list[Event] = []
+        for topic in topics:
+            history = self._history.get(topic)
+            if not history:
+                if since_seq < self._dropped_floor:
+                    return None
+                continue
+            if self._evicted.get(topic, 0) > since_seq:
+                return None
+            events.extend(e for e in history if e.seq > since_seq)
+        events.sort(key=lambda e: e.seq)
+        return events
+
+    def _drop_oldest_topic_locked(self) -> None:
+        topic = next(iter(self._history))
+        history = self._history.pop(topic)
+        self._evicted.pop(topic, None)
+        if history:
+            self._dropped_floor = max(self._dropped_floor, history[-1].seq)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subs in self._subs.values() for s in subs})
+
+
+_bus = EventBus(
+    replay_size=settings.event_bus_replay_size,
+    queue_size=settings.event_stream_queue_size,
+)
+
+
+def get_event_bus() -> EventBus:
+    return _bus
+
+
+def user_topic(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def investigation_topic(investigation_id: str) -> str:
+    return f"investigation:{investigation_id}"
+
+
+def _publish(topic: str, event_type: str, data: dict[str, Any]) -> None:
+    try:
+        _bus.publish(topic, event_type, data)
+    except Exception:
+        logger.debug("Event publish failed for %s", topic, exc_info=True)
+
+
+def publish_user_event(user_id: str, event_type: str, data: dict[str, Any]) -> None:
+    """Best-effort push to a single user's stream."""
+    _publish(user_topic(user_id), event_type, data)
+
+
+def publish_investigation_event(investigation_id: str, event_type: str, data: dict[str, Any]) -> None:
+    """Best-effort push to everyone watching an investigation."""
+    _publish(investigation_topic(investigation_id), event_type, data)
@@ -1,6 +1,20 @@
-"""Follow-up email service for pending feedback."""
+"""Follow-up email service for pending feedback.
+
+Emails go out through Resend's batch API in chunks of up to 100, with a
+bounded number of chunks in flight. Before a chunk is sent, each analysis
+is claimed with a 'pending' row in followup_email_ledger (migration 028);
+only analyses whose claim was inserted by this run are emailed, and the
+rows are marked 'sent' afterwards. Analyses with any ledger row are
+skipped, so overlapping 6-8 day windows, concurrent runs and re-runs after
+a partial failure never email an analysis twice. Claims are released only
+when Resend rejected the request outright; if the outcome is unknown (e.g. a
+timeout) they stay pending, trading a possibly missed follow-up for never
+double-sending.
+"""
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 
 import resend
@@ -44,11 +58,106 @@ Thanks for helping build better materials intelligence.
 """
 
 
+LEDGER = "followup_email_ledger"
+
+
+def _already_sent_ids(db, analysis_ids: list[str]) -> set[str]:
+    """Analyses with a ledger row, whether sent or claimed by an earlier run."""
+    result = (
+        db.table(LEDGER)
+        .select("analysis_id")
+        .in_("analysis_id", analysis_ids)
+        .execute()
+    )
+    return {r["analysis_id"] for r in result.data}
+
+
+def _claim(db, chunk: list[dict]) -> list[dict]:
+    """Insert 'pending' ledger rows; returns the chunk items this run claimed."""
+    rows = [
+        {
+            "analysis_id": item["analysis"]["id"],
+            "user_id": item["analysis"]["user_id"],
+            "status": "pending",
+        }
+        for item in chunk
+    ]
+    # ON CONFLICT DO NOTHING returns only the rows actually inserted
+    result = db.table(LEDGER).upsert(rows, on_conflict="analysis_id", ignore_duplicates=True).execute()
+    claimed = {r["analysis_id"] for r in result.data or []}
+    return [item for item in chunk if item["analysis"]["id"] in claimed]
+
+
+def _release(db, analysis_ids: list[str]) -> None:
+    """Drop pending claims for a chunk Resend rejected, so the next run retries it."""
+    db.table(LEDGER).delete().in_("analysis_id", analysis_ids).eq("status", "pending").execute()
+
+
+def _record_sent(db, chunk: list[dict], response) -> None:
+    """Mark a delivered chunk's claims as sent."""
+    provider_ids = []
+    if isinstance(response, dict):
+        provider_ids = [d.get("id") for d in response.get("data") or []]
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [
+        {
+            "analysis_id": item["analysis"]["id"],
+            "user_id": item["analysis"]["user_id"],
+            "status": "sent",
+            "provider_message_id": provider_ids[i] if i < len(provider_ids) else None,
+            "sent_at": now,
+        }
+        for i, item in enumerate(chunk)
+    ]
+    db.table(LEDGER).upsert(rows, on_conflict="analysis_id").execute()
+
+
+async def _send_chunk(db, chunk: list[dict], semaphore: asyncio.Semaphore) -> tuple[int, int, str | None]:
+    """Claim, send and record one batch.
+
+    Returns (sent_count, skipped_count, error); skipped items were already
+    claimed in the ledger by another run.
+    """
+    async with semaphore:
+        try:
+            claimed = await asyncio.to_thread(_claim, db, chunk)
+        except Exception as e:
+            logger.warning(f"Follow-up ledger claim failed for {len(chunk)} analyses: {e}")
+            return 0, 0, str(e)[:200]
+        skipped = len(chunk) - len(claimed)
+        chunk = claimed
+        if not chunk:
+            return 0, skipped, None
+
+        analysis_ids = [item["analysis"]["id"] for item in chunk]
+        try:
+            response = await asyncio.to_thread(resend.Batch.send, [item["email"] for item in chunk])
+        except resend.exceptions.ResendError as e:
+            logger.warning(f"Follow-up batch of {len(chunk)} rejected: {e}")
+            try:
+                await asyncio.to_thread(_release, db, analysis_ids)
+            except Exception as release_error:
+                logger.error(f"Follow-up claim release failed for {len(chunk)} analyses: {release_error}")
+            return 0, skipped, str(e)[:200]
+        except Exception as e:
+            # Outcome unknown: the claims stay pending so the chunk is never re-sent
+            logger.error(f"Follow-up batch of {len(chunk)} failed with unknown outcome: {e}")
+            return 0, skipped, str(e)[:200]
+
+        try:
+            await asyncio.to_thread(_record_sent, db, chunk, response)
+        except Exception as e:
+            # Delivered but still marked pending, which is enough to prevent a resend
+            logger.error(f"Follow-up ledger update failed for {len(chunk)} analyses: {e}")
+        return len(chunk), skipped, None
+
+
 async def send_pending_followups() -> dict:
     """
     Query completed failure_analyses from 6-8 days ago with no feedback
-    and send follow-up emails via Resend.
+    and no previous follow-up, and send follow-up emails via Resend.
     """
+    started = time.perf_counter()
     db = get_supabase()
     now = datetime.now(timezone.utc)
     window_start = (now - timedelta(days=8)).isoformat()
@@ -67,7 +176,7 @@ async def send_pending_followups() -> dict:
     if not analyses_result.data:
         return {"sent": 0, "pending": 0}
 
-    # Filter out analyses that already have feedback
+    # Filter out analyses that already have feedback or were already emailed
     analysis_ids = [a["id"] for a in analyses_result.data]
     feedback_result = (
         db.table("analysis_feedback")
@@ -76,12 +185,16 @@ async def send_pending_followups() -> dict:
         .execute()
     )
     feedback_ids = {f["analysis_id"] for f in feedback_result.data}
+    already_sent = _already_sent_ids(db, analysis_ids)
 
-    pending = [a for a in analyses_result.data if a["id"] not in feedback_ids]
+    pending = [
+        a for a in analyses_result.data
+        if a["id"] not in feedback_ids and a["id"] not in already_sent
+    ]
     total_pending = len(pending)
 
     if not pending:
-        return {"sent": 0, "pending": 0}
+        return {"sent": 0, "pending": 0, "already_sent": len(already_sent)}
 
     # Look up user emails
     user_ids = list({a["user_id"] for a in pending})
@@ -91,23 +204,42 @@ async def send_pending_followups() -> dict:
     # Configure Resend
     resend.api_key = settings.resend_api_key
 
-    sent_count = 0
     frontend_url = settings.frontend_url.rstrip("/")
 
-    for analysis in pending:
+    outgoing = []
+    for analysis in sorted(pending, key=lambda a: a["id"]):
         email = user_email_map.get(analysis["user_id"])
         if not email:
             continue
-
-        try:
-            resend.Emails.send({
+        outgoing.append({
+            "analysis": analysis,
+            "email": {
                 "from": settings.from_email,
                 "to": email,
                 "subject": "How did your Gravix analysis turn out?",
                 "text": _build_email_body(analysis, frontend_url),
-            })
-            sent_count += 1
-        except Exception as e:
-            logger.warning(f"Failed to send follow-up email for analysis {analysis['id']}: {e}")
-
-    return {"sent": sent_count, "pending": total_pending}
+            },
+        })
+
+    batch_size = max(1, min(settings.followup_batch_size, 100))
+    chunks = [outgoing[i:i + batch_size] for i in range(0, len(outgoing), batch_size)]
+    semaphore = asyncio.Semaphore(max(1, settings.followup_send_concurrency))
+    results = await asyncio.gather(*(_send_chunk(db, chunk, semaphore) for chunk in chunks))
+
+    sent_count = sum(sent for sent, _, _ in results)
+    skipped_count = sum(skipped for _, skipped, _ in results)
+    errors = [err for _, _, err in results if err]
+    duration = time.perf_counter() - started
+
+    return {
+        "sent": sent_count,
+        "pending": total_pending,
+        "already_sent": len(already_sent),
+        "skipped": skipped_count,
+        "failed": len(outgoing) - sent_count - skipped_count,
+        "batches": len(chunks),
+        "failed_batches": len(errors),
+        "errors": errors[:5],
+        "duration_ms": int(duration * 1000),
+        "emails_per_second": round(sent_count / duration, 2) if duration > 0 else None,
+    }
@@ -8,9 +8,24 @@ Implements a proper tool-use loop:
 5. Repeat until response is pure text
 6. Return final text to user
 
+Tool calls returned in the same round are independent, so they run
+concurrently (each under its own timeout) and a round costs its slowest tool
+rather than the sum; per-round model/tool timings are returned for logging.
+stream_claude_with_tools runs the same loop over streamed Claude calls and
+yields text deltas and tool start/finish events as they happen.
+
 Max iterations capped at MAX_TOOL_ROUNDS to prevent runaway loops.
+
+Prompt caching: the tool schema, system prompt and conversation prefix carry
+cache_control breakpoints, so tool rounds within a turn (and the next turn,
+while the window start is stable) re-read them from Anthropic's prompt cache
+instead of paying full input price. Long sessions are kept under a token
+budget by folding older turns into a rolling summary (see plan_compaction /
+summarize_history); the router anchors the window on the last folded message
+so the cached prefix only changes when a fold happens.
 """
 
+import asyncio
 import json
 import logging
 import time
@@ -24,6 +39,14 @@ logger = logging.getLogger(__name__)
 
 CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
 MAX_TOOL_ROUNDS = 5  # Max tool call iterations per user message
+EPHEMERAL = {"type": "ephemeral"}
+CONTEXT_SUMMARY_PREFIX = "Summary of the earlier part of this investigation:"
+# Per-tool wall-clock limits; tools not listed use settings.guided_tool_timeout_seconds.
+# generate_5why is itself a Claude call, so it gets the AI timeout.
+TOOL_TIMEOUTS: dict[str, float] = {
+    "generate_5why": float(settings.ai_timeout_seconds),
+}
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
 
 
 # ---------------------------------------------------------------------------
@@ -142,10 +165,418 @@ The suggestions tag must be the very last line of your response.
 Keep responses concise and actionable. Use technical language appropriate for adhesive engineers. When you use a tool, explain what you found and how it relates to the investigation."""
 
 
+# Breakpoint on the last tool caches the whole tool schema
+CACHED_TOOLS = [*GUIDED_TOOLS[:-1], {**GUIDED_TOOLS[-1], "cache_control": EPHEMERAL}]
+
+
+def cached_system(system: str) -> list[dict]:
+    """System prompt as a text block with a cache breakpoint (covers tools + system)."""
+    return [{"type": "text", "text": system, "cache_control": EPHEMERAL}]
+
+
+def _with_message_breakpoint(conv: list[dict]) -> list[dict]:
+    """Copy of conv in block form with a cache breakpoint on the final block.
+
+    String contents are always sent as a single text block so the same message
+    serializes identically whether or not it carries the breakpoint.
+    """
+    out = []
+    for msg in conv:
+        content = msg["content"]
+        blocks = [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+        out.append({"role": msg["role"], "content": blocks})
+    if out and out[-1]["content"]:
+        out[-1]["content"][-1] = {**out[-1]["content"][-1], "cache_control": EPHEMERAL}
+    return out
+
+
+def _add_usage(total: dict, usage: dict | None) -> None:
+    for key in USAGE_KEYS:
+        total[key] = total.get(key, 0) + int((usage or {}).get(key) or 0)
+
+
+# ---------------------------------------------------------------------------
+# Conversation compaction
+# ---------------------------------------------------------------------------
+
+SUMMARY_SYSTEM_PROMPT = """You maintain the running summary of an adhesive failure investigation between an engineer and Gravix AI.
+
+Merge the previous summary (if any) with the new conversation excerpt into one updated summary. Keep every concrete fact: substrates, adhesive products, surface preparation, cure and service conditions, failure mode and observations, tool findings, hypotheses raised or ruled out, the engineer's answers, and the current investigation phase. Drop pleasantries and repeated questions.
+
+Reply with the summary only, as terse bullet points, under 250 words."""
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Rough token count for text messages (4 chars ~= 1 token, plus per-message overhead)."""
+    return sum(len(str(m.get("content") or "")) // 4 + 4 for m in messages)
+
+
+def plan_compaction(
+    messages: list[dict],
+    *,
+    budget_tokens: int,
+    keep_recent: int,
+    max_messages: int | None = None,
+) -> int:
+    """How many leading messages to fold into the summary (0 while within limits).
+
+    Once the window exceeds ``budget_tokens`` (or holds more than
+    ``max_messages``), fold from the front until it is back under half the
+    budget (and half the message cap), always keeping the last ``keep_recent``
+    messages verbatim. Folding to half (rather than just under) means the
+    summary, and with it the cached prompt prefix, changes only every few turns.
+    """
+    over_count = max_messages is not None and len(messages) > max_messages
+    if estimate_tokens(messages) <= budget_tokens and not over_count:
+        return 0
+    max_fold = len(messages) - max(keep_recent, 1)
+    min_fold = len(messages) - max_messages // 2 if max_messages is not None else 0
+    fold = 0
+    remaining = estimate_tokens(messages)
+    while fold < max_fold and (remaining > budget_tokens // 2 or fold < min_fold):
+        remaining -= estimate_tokens(messages[fold:fold + 1])
+        fold += 1
+    return fold
+
+
+async def summarize_history(
+    previous_summary: str | None,
+    messages: list[dict],
+    *,
+    max_tokens: int = 600,
+) -> tuple[str, dict]:
+    """Fold ``messages`` into ``previous_summary`` with one Claude call.
+
+    Returns (summary, usage). Raises on API failure; callers fall back to
+    plain truncation.
+    """
+    excerpt = "\n\n".join(
+        f"{'Engineer' if m.get('role') == 'user' else 'Gravix AI'}: {m.get('content', '')}"
+        for m in messages
+    )
+    prompt = (
+        f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+        f"New conversation excerpt:\n{excerpt}"
+    )
+    headers = {
+        "x-api-key": settings.anthropic_api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+    payload = {
+        "model": settings.anthropic_model,
+        "max_tokens": max_tokens,
+        "system": SUMMARY_SYSTEM_PROMPT,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
+        response = await client.post(CLAUDE_API_URL, headers=headers, json=payload)
+        response.raise_for_status()
+        data = response.json()
+
+    text = "".join(b.get("text", "") for b in data.get("content", []) if b.get("type") == "text").strip()
+    if not text:
+        raise ValueError("Empty conversation summary")
+    usage: dict = {}
+    _add_usage(usage, data.get("usage"))
+    return text, usage
+
+
+def with_summary(summary: str | None, messages: list[dict]) -> list[dict]:
+    """Prepend the rolling summary as a leading user message."""
+    if not summary:
+        return list(messages)
+    return [{"role": "user", "content": f"{CONTEXT_SUMMARY_PREFIX}\n{summary}"}, *messages]
+
+
+# ---------------------------------------------------------------------------
+# Usage logging
+# ---------------------------------------------------------------------------
+
+def log_guided_usage(
+    db,
+    *,
+    user_id: str | None,
+    session_id: str,
+    usage: dict,
+    latency_ms: int,
+    rounds: int = 1,
+    request_type: str = "guided_turn",
+    success: bool = True,
+    error: str | None = None,
+    meta: dict | None = None,
+) -> None:
+    """Write one ai_engine_logs row for a guided turn (best-effort, never raises).
+
+    prompt_tokens is the full prompt size (uncached + cache write + cache read)
+    so it stays comparable with the other engines; the cached share is split
+    out into cache_read_tokens / cache_creation_tokens (migration 023).
+    """
+    try:
+        import uuid
+
+        uncached = int(usage.get("input_tokens") or 0)
+        cache_read = int(usage.get("cache_read_input_tokens") or 0)
+        cache_write = int(usage.get("cache_creation_input_tokens") or 0)
+        db.table("ai_engine_logs").insert({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "engine": "guided",
+            "model": settings.anthropic_model,
+            "prompt_tokens": uncached + cache_read + cache_write,
+            "completion_tokens": int(usage.get("output_tokens") or 0),
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_write,
+            "latency_ms": latency_ms,
+            "success": success,
+            "error": error[:500] if error else None,
+            "meta": {
+                **(meta or {}),
+                "request_type": request_type,
+                "session_id": session_id,
+                "rounds": rounds,
+                "uncached_input_tokens": uncached,
+            },
+        }).execute()
+    except Exception as exc:
+        logger.debug(f"guided ai_engine_log write failed (ignored): {exc}")
+
+
 # ---------------------------------------------------------------------------
 # Agentic loop
 # ---------------------------------------------------------------------------
 
+async def _run_tool(tool_executor, block: dict) -> tuple[dict, int]:
+    """Run one tool_use block under its timeout. Returns (result, elapsed_ms); never raises."""
+    tool_name = block["name"]
+    timeout = TOOL_TIMEOUTS.get(tool_name, settings.guided_tool_timeout_seconds)
+    logger.info(f"Executing tool: {tool_name}({json.dumps(block['input'])[:200]})")
+    start = time.time()
+    try:
+        result = await asyncio.wait_for(tool_executor(tool_name, block["input"]), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool timed out after {timeout}s: {tool_name}")
+        result = {"error": f"Tool '{tool_name}' timed out after {timeout:g}s"}
+    except Exception as e:
+        logger.error(f"Tool execution failed: {tool_name} — {e}")
+        result = {"error": f"Tool '{tool_name}' failed: {str(e)[:200]}"}
+    return result, int((time.time() - start) * 1000)
+
+
+async def _stream_round(client: httpx.AsyncClient, headers: dict, payload: dict):
+    """One streamed Messages API call.
+
+    Yields ("text", delta) as text arrives, then ("message", body) where body
+    has the same content / stop_reason / usage shape as a non-streaming reply.
+    """
+    blocks: dict[int, dict] = {}
+    partial_json: dict[int, str] = {}
+    body: dict = {"content": [], "stop_reason": None, "usage": {}}
+
+    async with client.stream("POST", CLAUDE_API_URL, headers=headers, json={**payload, "stream": True}) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:].strip())
+            event_type = event.get("type")
+            if event_type == "message_start":
+                body["usage"].update(event.get("message", {}).get("usage") or {})
+            elif event_type == "content_block_start":
+                block = dict(event["content_block"])
+                if block.get("type") == "tool_use":
+                    block["input"] = {}
+                    partial_json[event["index"]] = ""
+                elif block.get("type") == "text":
+                    block["text"] = block.get("text") or ""
+                blocks[event["index"]] = block
+            elif event_type == "content_block_delta":
+                delta = event.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    blocks[event["index"]]["text"] += delta["text"]
+                    yield "text", delta["text"]
+                elif delta.get("type") == "input_json_delta":
+                    partial_json[event["index"]] += delta.get("partial_json", "")
+            elif event_type == "content_block_stop":
+                if event["index"] in partial_json:
+                    raw = partial_json.pop(event["index"])
+                    blocks[event["index"]]["input"] = json.loads(raw) if raw else {}
+            elif event_type == "message_delta":
+                body["stop_reason"] = event.get("delta", {}).get("stop_reason") or body["stop_reason"]
+                body["usage"].update(event.get("usage") or {})
+            elif event_type == "error":
+                raise RuntimeError(f"Claude stream error: {event.get('error', {}).get('message', 'unknown')}")
+
+    body["content"] = [blocks[i] for i in sorted(blocks)]
+    yield "message", body
+
+
+async def _agent_loop(
+    messages: list[dict],
+    tool_executor,
+    *,
+    system_prompt: str | None,
+    max_tokens: int,
+    stream: bool,
+):
+    """The tool loop shared by call_claude_with_tools and stream_claude_with_tools.
+
+    Yields (event, data) tuples: "text" deltas (streaming only), "tool_start"
+    for every tool of a round before any runs, "tool_finish" as each one
+    completes, and finally "done" with the result dict.
+    """
+    headers = {
+        "x-api-key": settings.anthropic_api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+
+    system = cached_system(system_prompt or GUIDED_SYSTEM_PROMPT)
+    all_tool_calls = []
+    rounds = 0
+    usage: dict = {}
+    round_timings: list[dict] = []
+    loop_start = time.time()
+
+    # Copy messages to avoid mutating caller's list
+    conv = [_normalize_message(m) for m in messages]
+    text_parts: list[str] = []
+    final_text = None
+
+    # One client for all rounds so follow-up calls reuse the connection
+    async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
+        while rounds < MAX_TOOL_ROUNDS:
+            rounds += 1
+
+            payload = {
+                "model": settings.anthropic_model,
+                "max_tokens": max_tokens,
+                "system": system,
+                "messages": _with_message_breakpoint(conv),
+                "tools": CACHED_TOOLS,
+            }
+
+            start = time.time()
+            try:
+                if stream:
+                    data: dict = {}
+                    async for kind, value in _stream_round(client, headers, payload):
+                        if kind == "text":
+                            yield "text", {"text": value, "round": rounds}
+                        else:
+                            data = value
+                else:
+                    response = await client.post(CLAUDE_API_URL, headers=headers, json=payload)
+                    response.raise_for_status()
+                    data = response.json()
+            except Exception as e:
+                logger.error(f"Claude API error in guided loop (round {rounds}): {e}")
+                raise
+
+            latency_ms = int((time.time() - start) * 1000)
+            round_usage = data.get("usage") or {}
+            _add_usage(usage, round_usage)
+            timing = {"round": rounds, "model_ms": latency_ms, "tools_ms": 0, "tool_ms": {}}
+            round_timings.append(timing)
+            logger.info(
+                f"Guided Claude call round {rounds}: {latency_ms}ms, stop_reason={data.get('stop_reason')}, "
+                f"input={round_usage.get('input_tokens')} cache_read={round_usage.get('cache_read_input_tokens')} "
+                f"cache_write={round_usage.get('cache_creation_input_tokens')}"
+            )
+
+            content_blocks = data.get("content", [])
+            stop_reason = data.get("stop_reason") or "end_turn"
+
+            # Extract text and tool_use blocks
+            text_parts = []
+            tool_use_blocks = []
+            for block in content_blocks:
+                if block.get("type") == "text":
+                    text_parts.append(block["text"])
+                elif block.get("type") == "tool_use":
+                    tool_use_blocks.append(block)
+
+            # Append assistant response to conversation (as-is, with all content blocks)
+            conv.append({"role": "assistant", "content": content_blocks})
+
+            # If no tool calls, we're done
+            if stop_reason != "tool_use" or not tool_use_blocks:
+                final_text = "\n\n".join(text_parts) if text_parts else "(No response)"
+                break
+
+            # Execute this round's tool calls concurrently; results keep block order
+            for tool_block in tool_use_blocks:
+                yield "tool_start", {
+                    "id": tool_block["id"], "name": tool_block["name"],
+                    "input": tool_block["input"], "round": rounds,
+                }
+
+            async def _indexed(i: int, tool_block: dict):
+                return i, await _run_tool(tool_executor, tool_block)
+
+            tools_start = time.time()
+            tasks = [asyncio.create_task(_indexed(i, b)) for i, b in enumerate(tool_use_blocks)]
+            outcomes: list = [None] * len(tasks)
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    i, (result, tool_ms) = await finished
+                    outcomes[i] = (result, tool_ms)
+                    tool_block = tool_use_blocks[i]
+                    yield "tool_finish", {
+                        "id": tool_block["id"], "name": tool_block["name"], "ms": tool_ms,
+                        "ok": not (isinstance(result, dict) and "error" in result), "round": rounds,
+                    }
+            finally:
+                # Consumer went away mid-round (e.g. client disconnect): stop the other tools
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+            timing["tools_ms"] = int((time.time() - tools_start) * 1000)
+
+            tool_result_blocks = []
+            for tool_block, (result, tool_ms) in zip(tool_use_blocks, outcomes):
+                tool_name = tool_block["name"]
+                timing["tool_ms"][tool_name] = max(tool_ms, timing["tool_ms"].get(tool_name, 0))
+
+                all_tool_calls.append({
+                    "name": tool_name,
+                    "input": tool_block["input"],
+                    "result": result,
+                })
+
+                tool_result_blocks.append({
+                    "type": "tool_result",
+                    "tool_use_id": tool_block["id"],
+                    "content": json.dumps(result) if isinstance(result, dict) else str(result),
+                })
+
+            if len(tool_use_blocks) > 1:
+                logger.info(
+                    f"Guided round {rounds}: {len(tool_use_blocks)} tools in {timing['tools_ms']}ms "
+                    f"(sequential would be ~{sum(ms for _, ms in outcomes)}ms)"
+                )
+
+            # Append tool results as a user message (Claude API requirement)
+            conv.append({"role": "user", "content": tool_result_blocks})
+
+    if final_text is None:
+        # Hit max rounds — return whatever text we have
+        logger.warning(f"Guided loop hit MAX_TOOL_ROUNDS ({MAX_TOOL_ROUNDS})")
+        final_text = "\n\n".join(text_parts) if text_parts else "(Analysis complete — max tool iterations reached)"
+
+    yield "done", {
+        "text": final_text,
+        "tool_calls": all_tool_calls,
+        "rounds": rounds,
+        "usage": usage,
+        "latency_ms": int((time.time() - loop_start) * 1000),
+        "round_timings": round_timings,
+        "streamed": stream,
+    }
+
+
 async def call_claude_with_tools(
     messages: list[dict],
     tool_executor,
@@ -158,7 +589,9 @@ async def call_claude_with_tools(
     Args:
         messages: Conversation history in Claude Messages API format
                   [{"role": "user"|"assistant", "content": str|list}, ...]
-        tool_executor: async callable(tool_name, tool_input) -> dict
+        tool_executor: async callable(tool_name, tool_input) -> dict. Called
+                       concurrently for the tools of one round, so it must not
+                       block the event loop.
         system_prompt: Override system prompt (defaults to GUIDED_SYSTEM_PROMPT)
         max_tokens: Max tokens per Claude response
 
@@ -167,105 +600,46 @@ async def call_claude_with_tools(
             "text": str,           # Final assistant text
             "tool_calls": list,    # All tool calls made [{name, input, result}, ...]
             "rounds": int,         # Number of Claude calls made
+            "usage": dict,         # Token usage summed over rounds (incl. cache reads/writes)
+            "latency_ms": int,     # Wall time across all rounds
+            "round_timings": list, # Per round: {round, model_ms, tools_ms, tool_ms: {name: ms}}
+            "streamed": bool,      # True when produced by stream_claude_with_tools
         }
     """
-    headers = {
-        "x-api-key": settings.anthropic_api_key,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
+    async for event, data in _agent_loop(
+        messages, tool_executor, system_prompt=system_prompt, max_tokens=max_tokens, stream=False,
+    ):
+        if event == "done":
+            return data
+    raise RuntimeError("Guided agent loop ended without a result")
 
-    system = system_prompt or GUIDED_SYSTEM_PROMPT
-    all_tool_calls = []
-    rounds = 0
 
-    # Copy messages to avoid mutating caller's list
-    conv = [_normalize_message(m) for m in messages]
-
-    while rounds < MAX_TOOL_ROUNDS:
-        rounds += 1
-
-        payload = {
-            "model": settings.anthropic_model,
-            "max_tokens": max_tokens,
-            "system": system,
-            "messages": conv,
-            "tools": GUIDED_TOOLS,
-        }
-
-        start = time.time()
-        try:
-            async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
-                response = await client.post(CLAUDE_API_URL, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-        except Exception as e:
-            logger.error(f"Claude API error in guided loop (round {rounds}): {e}")
-            raise
-
-        latency_ms = int((time.time() - start) * 1000)
-        logger.info(f"Guided Claude call round {rounds}: {latency_ms}ms, stop_reason={data.get('stop_reason')}")
-
-        content_blocks = data.get("content", [])
-        stop_reason = data.get("stop_reason", "end_turn")
-
-        # Extract text and tool_use blocks
-        text_parts = []
-        tool_use_blocks = []
-        for block in content_blocks:
-            if block.get("type") == "text":
-                text_parts.append(block["text"])
-            elif block.get("type") == "tool_use":
-                tool_use_blocks.append(block)
-
-        # Append assistant response to conversation (as-is, with all content blocks)
-        conv.append({"role": "assistant", "content": content_blocks})
-
-        # If no tool calls, we're done
-        if stop_reason != "tool_use" or not tool_use_blocks:
-            return {
-                "text": "\n\n".join(text_parts) if text_parts else "(No response)",
-                "tool_calls": all_tool_calls,
-                "rounds": rounds,
-            }
+async def stream_claude_with_tools(
+    messages: list[dict],
+    tool_executor,
+    *,
+    system_prompt: str | None = None,
+    max_tokens: int = 2048,
+):
+    """Streaming variant of call_claude_with_tools.
 
-        # Execute tool calls and build tool_result messages
-        tool_result_blocks = []
-        for tool_block in tool_use_blocks:
-            tool_name = tool_block["name"]
-            tool_input = tool_block["input"]
-            tool_use_id = tool_block["id"]
+    Each Claude round is a streamed Messages API call, so text reaches the
+    caller as it is generated: time to first token is that of one call, not
+    of the whole loop. Yields (event, data) tuples:
 
-            logger.info(f"Executing tool: {tool_name}({json.dumps(tool_input)[:200]})")
+        ("text", {"text", "round"})                         assistant text delta
+        ("tool_start", {"id", "name", "input", "round"})    before a round's tools run
+        ("tool_finish", {"id", "name", "ms", "ok", "round"}) as each tool completes
+        ("done", result)                                    same dict as call_claude_with_tools
 
-            try:
-                result = await tool_executor(tool_name, tool_input)
-            except Exception as e:
-                logger.error(f"Tool execution failed: {tool_name} — {e}")
-                result = {"error": f"Tool '{tool_name}' failed: {str(e)[:200]}"}
-
-            all_tool_calls.append({
-                "name": tool_name,
-                "input": tool_input,
-                "result": result,
-            })
-
-            tool_result_blocks.append({
-                "type": "tool_result",
-                "tool_use_id": tool_use_id,
-                "content": json.dumps(result) if isinstance(result, dict) else str(result),
-            })
-
-        # Append tool results as a user message (Claude API requirement)
-        conv.append({"role": "user", "content": tool_result_blocks})
-
-    # Hit max rounds — return whatever text we have
-    logger.warning(f"Guided loop hit MAX_TOOL_ROUNDS ({MAX_TOOL_ROUNDS})")
-    return {
-        "text": "\n\n".join(text_parts) if text_parts else "(Analysis complete — max tool iterations reached)",
-        "tool_calls": all_tool_calls,
-        "rounds": rounds,
-    }
+    Text from a round that ends in tool calls is streamed too (Claude often
+    says what it is about to look up); only the final round's text is in
+    result["text"].
+    """
+    async for item in _agent_loop(
+        messages, tool_executor, system_prompt=system_prompt, max_tokens=max_tokens, stream=True,
+    ):
+        yield item
 
 
 def _normalize_message(msg: dict) -> dict:
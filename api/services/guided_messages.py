@@ -0,0 +1,63 @@
+"""Append-only message store for guided investigation sessions.
+
+One guided_messages row per message (migration 022). role and content are
+columns; everything else the router attaches (timestamp, phase, suggestions,
+tool_calls, tool_results, photo_urls) goes in payload. An insert trigger
+maintains message_count / user_turns / last_phase on investigation_sessions,
+so callers never need the conversation to answer "how long is it".
+"""
+
+from __future__ import annotations
+
+TABLE = "guided_messages"
+
+# Session columns every guided endpoint needs; never the legacy messages array
+SESSION_COLUMNS = (
+    "id, user_id, analysis_id, investigation_id, session_state, status, "
+    "message_count, user_turns, last_phase, last_message_at, created_at, updated_at"
+)
+
+
+def _to_row(session_id: str, message: dict) -> dict:
+    payload = {k: v for k, v in message.items() if k not in ("role", "content")}
+    return {
+        "session_id": session_id,
+        "role": message.get("role", "user"),
+        "content": message.get("content") or "",
+        "payload": payload,
+    }
+
+
+def _from_row(row: dict) -> dict:
+    return {"role": row["role"], "content": row.get("content") or "", **(row.get("payload") or {})}
+
+
+def append_messages(db, session_id: str, messages: list[dict]) -> None:
+    """Insert the turn's messages in one statement (order preserved by id)."""
+    if messages:
+        db.table(TABLE).insert([_to_row(session_id, m) for m in messages]).execute()
+
+
+def recent_messages(db, session_id: str, limit: int = 20, *, after_id: int = 0) -> list[dict]:
+    """Last ``limit`` messages after ``after_id``, oldest first, as id/role/content (no tool payloads).
+
+    ``after_id`` is the last message already folded into the session's rolling
+    summary; anchoring the window there keeps its start stable between turns.
+    """
+    query = db.table(TABLE).select("id, role, content").eq("session_id", session_id)
+    if after_id:
+        query = query.gt("id", after_id)
+    rows = query.order("id", desc=True).limit(limit).execute().data or []
+    return [{"id": r["id"], "role": r["role"], "content": r.get("content") or ""} for r in reversed(rows)]
+
+
+def list_messages(db, session_id: str, *, full: bool = True) -> list[dict]:
+    """Whole conversation in order; ``full=False`` skips payloads (tool results etc.)."""
+    rows = (
+        db.table(TABLE)
+        .select("id, role, content, payload" if full else "id, role, content")
+        .eq("session_id", session_id)
+        .order("id")
+        .execute()
+    ).data or []
+    return [_from_row(r) for r in rows]
@@ -0,0 +1,149 @@
+"""Memoized results for the guided agent's read-only database tools.
+
+Guided sessions keep asking for the same products and substrate pairs, and
+every lookup_product_tds / search_similar_cases call is an ilike scan. Results
+are cached per process, keyed on the tool name plus its normalized input
+(case, surrounding whitespace and empty arguments don't change the query, so
+they don't change the key), with a TTL per tool.
+
+Product-backed tools also record the product catalog version
+(product_catalog.catalog_version) read before the tool queried the database. Every product write already
+calls invalidate_catalog(), which bumps that version, so their entries go
+stale immediately without the write paths knowing about this cache.
+search_similar_cases only reads completed analyses and relies on its short
+TTL. generate_5why is generative and is never cached.
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from config import settings
+from services.product_catalog import catalog_version
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    ttl_seconds: int
+    product_scoped: bool = False
+
+
+TOOL_POLICIES: dict[str, ToolCachePolicy] = {
+    "lookup_product_tds": ToolCachePolicy(settings.guided_tool_cache_product_ttl_seconds, product_scoped=True),
+    "check_specification_compliance": ToolCachePolicy(
+        settings.guided_tool_cache_product_ttl_seconds, product_scoped=True,
+    ),
+    "search_similar_cases": ToolCachePolicy(settings.guided_tool_cache_cases_ttl_seconds),
+}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None and v != ""}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def cache_key(tool_name: str, tool_input: dict) -> str:
+    """Tool name plus canonical JSON of the normalized input."""
+    return f"{tool_name}:{json.dumps(_normalize(tool_input or {}), sort_keys=True, default=str)}"
+
+
+class ToolResultCache:
+    """Thread-safe LRU of tool results with per-tool TTLs and hit/miss counters."""
+
+    def __init__(self, policies: dict[str, ToolCachePolicy], max_entries: int = 2000):
+        self._policies = policies
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # {key: (tool_name, result, expires_at, catalog_version or None)}
+        self._entries: "OrderedDict[str, tuple[str, dict, float, Optional[int]]]" = OrderedDict()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self._policies
+
+    def get(self, tool_name: str, tool_input: dict) -> Optional[dict]:
+        """Cached result (a private copy), or None on a miss. Uncacheable tools are not counted."""
+        policy = self._policies.get(tool_name)
+        if policy is None:
+            return None
+        key = cache_key(tool_name, tool_input)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                _, result, expires_at, version = entry
+                if time.monotonic() < expires_at and (version is None or version == catalog_version()):
+                    self._entries.move_to_end(key)
+                    self._hits[tool_name] = self._hits.get(tool_name, 0) + 1
+                    return copy.deepcopy(result)
+                del self._entries[key]
+            self._misses[tool_name] = self._misses.get(tool_name, 0) + 1
+            return None
+
+    def put(self, tool_name: str, tool_input: dict, result: dict, version: Optional[int] = None) -> None:
+        """Store a successful result; error results are never cached.
+
+        ``version`` is the catalog_version() read before the tool ran. A
+        product write landing between the query and put() then leaves the
+        entry already stale. Without it the current version is used.
+        """
+        policy = self._policies.get(tool_name)
+        if policy is None or not isinstance(result, dict) or "error" in result:
+            return
+        if not policy.product_scoped:
+            version = None
+        elif version is None:
+            version = catalog_version()
+        key = cache_key(tool_name, tool_input)
+        with self._lock:
+            self._entries[key] = (tool_name, copy.deepcopy(result), time.monotonic() + policy.ttl_seconds, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """Drop every entry, or only those of one tool."""
+        with self._lock:
+            if tool_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k, e in self._entries.items() if e[0] == tool_name]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """Hit/miss counts and hit rate, overall and per tool, since process start."""
+        with self._lock:
+            by_tool = {}
+            for tool in sorted(set(self._hits) | set(self._misses)):
+                hits, misses = self._hits.get(tool, 0), self._misses.get(tool, 0)
+                by_tool[tool] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3)}
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return {
+                "entries": len(self._entries),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "by_tool": by_tool,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+tool_cache = ToolResultCache(TOOL_POLICIES, max_entries=settings.guided_tool_cache_max_entries)
@@ -0,0 +1,173 @@
+"""Investigation team membership resolver.
+
+Authorization (is this user on the team?) and notification fan-out (who
+is on the team?) both need the same data: the four role-holder columns on
+`investigations` plus the `investigation_members` rows. This module
+resolves both with at most one round trip:
+
+- an in-memory investigation → members index (TTL, write-through
+  invalidation from add/remove team member and role changes), and
+- a per-request cache so repeated checks within one request are free.
+
+When the index misses, members are fetched by embedding
+`investigation_members` in the investigation select.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ROLE_FIELDS = ("user_id", "champion_user_id", "team_lead_user_id", "approver_user_id")
+
+_MEMBERS_EMBED = "investigation_members(user_id)"
+
+
+@dataclass(frozen=True)
+class TeamMembership:
+    role_holders: frozenset[str]
+    members: frozenset[str]
+
+    def includes(self, user_id: str) -> bool:
+        return user_id in self.role_holders or user_id in self.members
+
+    def user_ids(self) -> set[str]:
+        return set(self.role_holders | self.members)
+
+
+class MembershipIndex:
+    """Thread-safe investigation_id → TeamMembership map with TTL."""
+
+    def __init__(self, ttl_seconds: int = 120, max_entries: int = 20_000):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[TeamMembership, float]] = {}
+
+    def get(self, investigation_id: str) -> Optional[TeamMembership]:
+        with self._lock:
+            entry = self._entries.get(investigation_id)
+            if entry is None:
+                return None
+            membership, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[investigation_id]
+                return None
+            return membership
+
+    def put(self, investigation_id: str, membership: TeamMembership) -> None:
+        with self._lock:
+            if len(self._entries) >= self._max_entries and investigation_id not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[investigation_id] = (membership, time.monotonic() + self._ttl)
+
+    def invalidate(self, investigation_id: str) -> None:
+        with self._lock:
+            self._entries.pop(investigation_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_index = MembershipIndex(ttl_seconds=settings.membership_cache_ttl_seconds)
+
+# {investigation_id: (investigation_row, membership)} for the current request
+_request_cache: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "investigation_access_cache", default=None
+)
+
+
+def begin_request_cache() -> contextvars.Token:
+    return _request_cache.set({})
+
+
+def end_request_cache(token: contextvars.Token) -> None:
+    _request_cache.reset(token)
+
+
+def get_membership_index() -> MembershipIndex:
+    return _index
+
+
+def _role_holders(row: dict) -> frozenset[str]:
+    return frozenset(row[f] for f in ROLE_FIELDS if row.get(f))
+
+
+def _fetch(db, investigation_id: str, columns: str) -> Optional[tuple[dict, TeamMembership]]:
+    """One round trip; members are embedded only when the index misses.
+
+    Role holders always come from the freshly read row, so only the
+    members set can be up to one TTL stale across workers.
+    """
+    cached = _index.get(investigation_id)
+    select = columns if cached is not None else f"{columns}, {_MEMBERS_EMBED}"
+    result = db.table("investigations").select(select).eq("id", investigation_id).execute()
+    if not result.data:
+        return None
+
+    row = result.data[0]
+    embedded = row.pop("investigation_members", None)
+    if cached is None:
+        members = frozenset(m["user_id"] for m in embedded or [] if m.get("user_id"))
+    else:
+        members = cached.members
+    membership = TeamMembership(role_holders=_role_holders(row), members=members)
+    if membership != cached:
+        _index.put(investigation_id, membership)
+    return row, membership
+
+
+def check_team_access(db, investigation_id: str, user_id: str) -> dict:
+    """Return the investigation row if user is on its team; raise 404/403 otherwise."""
+    cache = _request_cache.get()
+    resolved = cache.get(investigation_id) if cache is not None else None
+    if resolved is None:
+        resolved = _fetch(db, investigation_id, "*")
+        if resolved is None:
+            raise HTTPException(status_code=404, detail="Investigation not found")
+        if cache is not None:
+            cache[investigation_id] = resolved
+
+    investigation, membership = resolved
+    if not membership.includes(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this investigation team",
+        )
+    return investigation
+
+
+def get_team_member_ids(db, investigation_id: str, exclude_user_id: Optional[str] = None) -> list[str]:
+    """All user ids on an investigation team (role holders + members)."""
+    cache = _request_cache.get()
+    if cache is not None and investigation_id in cache:
+        membership = cache[investigation_id][1]
+    else:
+        membership = _index.get(investigation_id)
+    if membership is None:
+        resolved = _fetch(db, investigation_id, ", ".join(ROLE_FIELDS))
+        if resolved is None:
+            return []
+        membership = resolved[1]
+
+    user_ids = membership.user_ids()
+    if exclude_user_id:
+        user_ids.discard(exclude_user_id)
+    return list(user_ids)
+
+
+def invalidate_membership(investigation_id: str) -> None:
+    """Write-through invalidation after team or role-holder changes."""
+    _index.invalidate(investigation_id)
+    cache = _request_cache.get()
+    if cache is not None:
+        cache.pop(investigation_id, None)
@@ -18,7 +18,7 @@ from datetime import datetime, timezone, date
 from typing import Optional
 
 from database import get_supabase
-from utils.normalizer import normalize_substrate
+from utils.normalizer import normalize_substrates
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +88,19 @@ async def run_knowledge_aggregation() -> dict:
 
         stats["analyses_processed"] = len(analyses_by_id)
 
+        # Re-derive pair keys from the raw substrates so rows stored under an
+        # older alias table land in the same group as new ones.
+        analyses = list(analyses_by_id.values())
+        norm_a = normalize_substrates(
+            a.get("substrate_a") or a.get("substrate_a_normalized") for a in analyses
+        )
+        norm_b = normalize_substrates(
+            a.get("substrate_b") or a.get("substrate_b_normalized") for a in analyses
+        )
+        pair_by_id = {
+            a["id"]: (na or "", nb or "") for a, na, nb in zip(analyses, norm_a, norm_b)
+        }
+
         # Group feedback by pattern key
         # Key: (substrate_a_norm, substrate_b_norm, root_cause_category)
         groups: dict[tuple, list[dict]] = defaultdict(list)
@@ -98,8 +111,7 @@ async def run_knowledge_aggregation() -> dict:
                 continue
             analysis = analyses_by_id[aid]
 
-            sub_a = (analysis.get("substrate_a_normalized") or "").strip()
-            sub_b = (analysis.get("substrate_b_normalized") or "").strip()
+            sub_a, sub_b = pair_by_id[aid]
             root_cat = (analysis.get("root_cause_category") or "unknown").strip()
 
             # Normalize pair order for consistency (alphabetical)
@@ -323,10 +335,12 @@ async def run_metrics_aggregation() -> dict:
                 .limit(5000)
                 .execute()
             ).data
+            rows = rows or []
+            norm_a = normalize_substrates(r.get("substrate_a_normalized") for r in rows)
+            norm_b = normalize_substrates(r.get("substrate_b_normalized") for r in rows)
             combos = set()
-            for r in rows or []:
-                a = (r.get("substrate_a_normalized") or "").strip()
-                b = (r.get("substrate_b_normalized") or "").strip()
+            for a, b in zip(norm_a, norm_b):
+                a, b = a or "", b or ""
                 if a or b:
                     combos.add((min(a, b), max(a, b)))
             substrate_combinations_count = len(combos)
@@ -0,0 +1,139 @@
+"""Per-user unread notification counters with write-through invalidation.
+
+The frontend polls /v1/notifications/unread-count for every logged-in user.
+Counters are seeded from the database once, then kept current by
+create_notification (increment) and the mark-read endpoints (decrement /
+reset), so steady-state polling never touches the database.
+
+The in-memory backend is per-process; entries expire after a TTL so that
+workers converge even when a write lands on a different process. A shared
+backend (e.g. Redis) can be plugged in with set_unread_backend().
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UnreadCounterBackend(ABC):
+    """Storage interface for unread counters."""
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[int]:
+        """Return the cached count, or None if unknown/expired."""
+
+    @abstractmethod
+    def set(self, user_id: str, value: int) -> None:
+        ...
+
+    @abstractmethod
+    def incr(self, user_id: str, delta: int) -> None:
+        """Adjust a cached count. No-op when the user is not cached."""
+
+    @abstractmethod
+    def invalidate(self, user_id: str) -> None:
+        ...
+
+
+class InMemoryUnreadCounter(UnreadCounterBackend):
+    """Thread-safe in-process counter store with TTL expiry."""
+
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 50_000):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # {user_id: (count, expires_at)}
+        self._counts: dict[str, tuple[int, float]] = {}
+
+    def get(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return None
+            count, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._counts[user_id]
+                return None
+            return count
+
+    def set(self, user_id: str, value: int) -> None:
+        with self._lock:
+            if len(self._counts) >= self._max_entries and user_id not in self._counts:
+                self._evict_expired()
+                if len(self._counts) >= self._max_entries:
+                    # Drop the oldest insertion to stay bounded
+                    self._counts.pop(next(iter(self._counts)))
+            self._counts[user_id] = (max(0, value), time.monotonic() + self._ttl)
+
+    def incr(self, user_id: str, delta: int) -> None:
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return
+            count, expires_at = entry
+            self._counts[user_id] = (max(0, count + delta), expires_at)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._counts.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for uid in [uid for uid, (_, exp) in self._counts.items() if now >= exp]:
+            del self._counts[uid]
+
+
+_backend: UnreadCounterBackend = InMemoryUnreadCounter(
+    ttl_seconds=settings.notification_unread_ttl_seconds,
+)
+
+
+def set_unread_backend(backend: UnreadCounterBackend) -> None:
+    """Swap the counter backend (e.g. a shared Redis store for multi-worker deployments)."""
+    global _backend
+    _backend = backend
+
+
+def get_unread_backend() -> UnreadCounterBackend:
+    return _backend
+
+
+def get_cached_unread(user_id: str) -> Optional[int]:
+    try:
+        return _backend.get(user_id)
+    except Exception:
+        logger.debug("Unread counter read failed", exc_info=True)
+        return None
+
+
+def seed_unread(user_id: str, count: int) -> None:
+    try:
+        _backend.set(user_id, count)
+    except Exception:
+        logger.debug("Unread counter seed failed", exc_info=True)
+
+
+def adjust_unread(user_id: str, delta: int) -> None:
+    """Write-through adjustment; unknown users are left to seed on next read."""
+    try:
+        _backend.incr(user_id, delta)
+    except Exception:
+        logger.debug("Unread counter adjust failed; invalidating", exc_info=True)
+        invalidate_unread(user_id)
+
+
+def invalidate_unread(user_id: str) -> None:
+    try:
+        _backend.invalidate(user_id)
+    except Exception:
+        logger.debug("Unread counter invalidate failed", exc_info=True)
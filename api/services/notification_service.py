@@ -13,6 +13,9 @@ import resend
 
 from config import settings
 from database import get_supabase
+from services.event_bus import publish_user_event
+from services.investigation_access import get_team_member_ids
+from services.notification_cache import adjust_unread
 
 logger = logging.getLogger(__name__)
 
@@ -130,6 +133,8 @@ def create_notification(
 
     try:
         db.table("notifications").insert(record).execute()
+        adjust_unread(user_id, 1)
+        publish_user_event(user_id, "notification", record)
         logger.info(f"Notification created: {notification_type} for user {user_id}")
         try:
             _maybe_email_user(user_id, notification_type, title, message, action_url)
@@ -143,37 +148,7 @@ def create_notification(
 
 def _get_team_member_ids(investigation_id: str, exclude_user_id: Optional[str] = None) -> list[str]:
     """Get all user IDs involved in an investigation."""
-    db = get_supabase()
-
-    # Get investigation to find role-holders
-    inv_result = (
-        db.table("investigations")
-        .select("user_id, champion_user_id, team_lead_user_id, approver_user_id")
-        .eq("id", investigation_id)
-        .execute()
-    )
-
-    user_ids: set[str] = set()
-    if inv_result.data:
-        inv = inv_result.data[0]
-        for field in ["user_id", "champion_user_id", "team_lead_user_id", "approver_user_id"]:
-            if inv.get(field):
-                user_ids.add(inv[field])
-
-    # Also get members table
-    members_result = (
-        db.table("investigation_members")
-        .select("user_id")
-        .eq("investigation_id", investigation_id)
-        .execute()
-    )
-    for m in members_result.data:
-        user_ids.add(m["user_id"])
-
-    if exclude_user_id:
-        user_ids.discard(exclude_user_id)
-
-    return list(user_ids)
+    return get_team_member_ids(get_supabase(), investigation_id, exclude_user_id=exclude_user_id)
 
 
 def notify_team_member_added(
@@ -0,0 +1,76 @@
+"""Collision-free investigation numbers from block-leased counters.
+
+Each number series (GQ-<year>, INV) is a row in number_sequences (migration
+026). A worker leases a block of ``number_block_size`` values with one atomic
+lease_number_block call and hands them out from memory, so allocating a
+number is O(1) and usually costs no query at all. Two workers can never hold
+overlapping blocks. The trade-off is ordering: numbers are unique but only
+roughly chronological across workers, and the unused rest of a block is lost
+when a worker restarts.
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from config import settings
+from database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+LEASE_RPC = "lease_number_block"
+
+
+def _lease_block(name: str, size: int) -> int:
+    """Reserve ``size`` numbers of series ``name``; returns the first one."""
+    db = get_supabase()
+    data = db.rpc(LEASE_RPC, {"p_name": name, "p_size": size}).execute().data
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if isinstance(data, dict):
+        data = next(iter(data.values()), None)
+    if data is None:
+        raise RuntimeError(f"lease_number_block returned nothing for {name}")
+    return int(data)
+
+
+class NumberAllocator:
+    """Thread-safe per-process allocator over leased blocks."""
+
+    def __init__(self, block_size: int, lease: Callable[[str, int], int] = _lease_block):
+        self._block_size = max(1, block_size)
+        self._lease = lease
+        self._lock = threading.Lock()
+        # {series: [next_value, end_exclusive]}
+        self._blocks: dict[str, list[int]] = {}
+
+    def next(self, series: str) -> int:
+        with self._lock:
+            block = self._blocks.get(series)
+            if block is None or block[0] >= block[1]:
+                start = self._lease(series, self._block_size)
+                block = self._blocks[series] = [start, start + self._block_size]
+                logger.info(f"Leased {series} numbers {start}..{start + self._block_size - 1}")
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def reset(self) -> None:
+        """Forget leased blocks (their remaining numbers are skipped)."""
+        with self._lock:
+            self._blocks.clear()
+
+
+_allocator = NumberAllocator(settings.number_block_size)
+
+
+def next_investigation_number(now: Optional[datetime] = None) -> str:
+    """GQ-YYYY-NNNN, numbered per calendar year (UTC)."""
+    year = (now or datetime.now(timezone.utc)).year
+    return f"GQ-{year}-{_allocator.next(f'GQ-{year}'):04d}"
+
+
+def next_inbound_number() -> str:
+    """INV-NNNNN for investigations opened by inbound email."""
+    return f"INV-{_allocator.next('INV'):05d}"
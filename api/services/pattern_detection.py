@@ -0,0 +1,377 @@
+"""Incremental, multi-dimensional failure-pattern anomaly detection.
+
+pattern_daily_counts (migrations 020/021) holds one row per day for the
+normalized finest-grain key
+(failure_mode, substrate, substrate_b, product, root_cause_category),
+bumped by a trigger whenever a failure_analyses row reaches 'completed'.
+
+The detector never reads those day rows. pattern_window_counts (migration 030)
+folds them in SQL into one row per key with six window counts: the last 30
+days, then five 30-day history buckets covering days 31-180. It also returns
+the key's most recent analysis ids. Dimensions no configured hierarchy uses
+are dropped before grouping, so the API handles one row per distinct key.
+window_rows() is the same fold in Python, for tests and the benchmark.
+
+PatternCube encodes the key rows once into integer columns and rolls them up
+along configurable dimension hierarchies, e.g. failure_mode > substrate >
+product, the way SQL ROLLUP would: each level's groups are derived from the
+parent level's group ids, so every level is a bincount per window. From the
+windows it gets the history mean, std and a z-score.
+
+Drill-down: an anomalous group is reported only when none of its children is
+also anomalous, so a spike concentrated on one product surfaces at the
+product level, while one spread thinly across many products surfaces at their
+common parent. Duplicate suppression checks candidates against a single
+preloaded set of active alert keys.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import chain
+from typing import Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RECENT_DAYS = 30
+HISTORY_START_DAYS = 31
+HISTORY_MONTHS = 5
+LOOKBACK_DAYS = HISTORY_START_DAYS + HISTORY_MONTHS * 30 - 1  # 180
+_BINS = 1 + HISTORY_MONTHS
+
+MAX_RECENT_IDS = 20
+
+# Std used when the history is flat, so a first burst on a quiet key still scores
+# (a single analysis then scores z=2, hence settings.pattern_min_recent)
+FLAT_HISTORY_STD = 0.5
+
+# Stored bucket columns, plus the derived unordered substrate pair
+DIMENSIONS = ("failure_mode", "substrate", "substrate_b", "substrate_pair", "product", "root_cause_category")
+
+# Stored columns each dimension is derived from
+_SOURCE_COLUMNS = {
+    "failure_mode": ("failure_mode",),
+    "substrate": ("substrate",),
+    "substrate_b": ("substrate_b",),
+    "substrate_pair": ("substrate", "substrate_b"),
+    "product": ("product",),
+    "root_cause_category": ("root_cause_category",),
+}
+_STORED = ("failure_mode", "substrate", "substrate_b", "product", "root_cause_category")
+
+_PAGE = 1000
+
+
+def parse_hierarchies(spec: str) -> list[tuple[str, ...]]:
+    """"a>b>c,d>e" -> [("a", "b", "c"), ("d", "e")]; raises ValueError on unknown dimensions."""
+    hierarchies = []
+    for part in spec.split(","):
+        dims = tuple(d.strip() for d in part.split(">") if d.strip())
+        if not dims:
+            continue
+        unknown = [d for d in dims if d not in DIMENSIONS]
+        if unknown or len(set(dims)) != len(dims):
+            raise ValueError(f"Invalid pattern hierarchy {part.strip()!r}")
+        hierarchies.append(dims)
+    return hierarchies
+
+
+def stored_dimensions(hierarchies: list[tuple[str, ...]]) -> list[str]:
+    """Stored bucket columns the hierarchies read; the rest can be dropped before grouping."""
+    used = {c for h in hierarchies for d in h for c in _SOURCE_COLUMNS[d]}
+    return [c for c in _STORED if c in used]
+
+
+def _window(days_ago: int) -> int:
+    """0 for the recent window, 1..HISTORY_MONTHS for the history buckets."""
+    if days_ago <= RECENT_DAYS:
+        return 0
+    return 1 + min((days_ago - HISTORY_START_DAYS) // 30, HISTORY_MONTHS - 1)
+
+
+def window_rows(buckets: Iterable[dict], today: date, dims: Optional[list[str]] = None) -> list[dict]:
+    """Fold daily buckets into per-key window rows, as pattern_window_counts does in SQL."""
+    dims = list(_STORED) if dims is None else dims
+    keys: dict[tuple, dict] = {}
+    recent: dict[tuple, list[tuple[int, list]]] = {}
+    for b in buckets:
+        day = b["bucket_date"]
+        if isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        days_ago = (today - day).days
+        if days_ago < 0 or days_ago > LOOKBACK_DAYS:
+            continue
+        values = tuple((b.get(c) or None) if c in dims else None for c in _STORED)
+        row = keys.get(values)
+        if row is None:
+            row = keys[values] = {
+                **dict(zip(_STORED, values)),
+                "window_counts": [0] * _BINS,
+                "last_recent": None,
+                "recent_ids": [],
+            }
+        bin_ = _window(days_ago)
+        row["window_counts"][bin_] += int(b.get("count") or 0)
+        if bin_ == 0:
+            if row["last_recent"] is None or day > row["last_recent"]:
+                row["last_recent"] = day
+            recent.setdefault(values, []).append((days_ago, b.get("analysis_ids") or []))
+    for values, days in recent.items():
+        ids = [str(i) for _, bucket_ids in sorted(days, key=lambda d: d[0]) for i in bucket_ids]
+        keys[values]["recent_ids"] = ids[:MAX_RECENT_IDS]
+        keys[values]["last_recent"] = keys[values]["last_recent"].isoformat()
+    return list(keys.values())
+
+
+def pattern_key(dimensions: dict[str, Optional[str]]) -> str:
+    """Stable id of a rollup node, e.g. "failure_mode=adhesive|substrate=aluminum"."""
+    return "|".join(f"{d}={v or ''}" for d, v in dimensions.items())
+
+
+def determine_severity(z_score: float) -> str:
+    """Map Z-score to severity level."""
+    if z_score >= 3.0:
+        return "critical"
+    elif z_score >= 2.0:
+        return "warning"
+    return "informational"
+
+
+@dataclass
+class PatternStat:
+    dimensions: dict[str, Optional[str]]
+    recent_count: int
+    history: list[int]
+    hist_mean: float
+    hist_std: float
+    z_score: float
+    parent_key: Optional[str] = None
+    recent_ids: list[str] = field(default_factory=list)
+    key: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.key = pattern_key(self.dimensions)
+
+    @property
+    def level(self) -> int:
+        return len(self.dimensions)
+
+
+@dataclass
+class DetectionResult:
+    anomalies: list[PatternStat]
+    groups_checked: int
+
+
+@dataclass
+class _Level:
+    dims: tuple[str, ...]
+    gid: np.ndarray          # group id per bucket row
+    first_row: np.ndarray    # a representative bucket row per group
+    parent: np.ndarray       # parent-level group id per group (-1 at the root level)
+    counts: np.ndarray       # (groups, _BINS) window counts
+
+
+def _pair(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    sides = sorted(s for s in (a, b) if s)
+    return " + ".join(sides) or None
+
+
+class PatternCube:
+    """Per-key window counts encoded once for repeated rollups."""
+
+    def __init__(self, rows: Iterable[dict], today: date):
+        rows = list(rows)
+        self.rows = rows
+        self.windows = np.fromiter(
+            chain.from_iterable(r["window_counts"] for r in rows), dtype=np.float64, count=len(rows) * _BINS,
+        ).reshape(len(rows), _BINS)
+        self.recent_rows = np.nonzero(self.windows[:, 0] > 0)[0]
+        # Days since each key's newest recent bucket, so alert ids come newest first
+        last_recent = np.array([rows[i].get("last_recent") for i in self.recent_rows], dtype="datetime64[D]")
+        self.recency = np.full(len(rows), LOOKBACK_DAYS + 1, dtype=np.int64)
+        self.recency[self.recent_rows] = np.where(
+            np.isnat(last_recent), RECENT_DAYS, (np.datetime64(today, "D") - last_recent).astype(np.int64),
+        )
+
+        # Vocabulary-encode every stored dimension; code 0 is "missing". Both
+        # substrate sides share one vocabulary so the unordered pair can be
+        # derived from the codes without touching the strings again.
+        self.vocab: dict[str, list[Optional[str]]] = {}
+        self.codes: dict[str, np.ndarray] = {}
+        columns = {dim: [r.get(dim) or None for r in rows] for dim in _STORED}
+        names = list(dict.fromkeys(chain([None], columns["substrate"], columns["substrate_b"])))
+        for dim, values in columns.items():
+            vocab = names if dim in ("substrate", "substrate_b") else list(dict.fromkeys(chain([None], values)))
+            lookup = {v: i for i, v in enumerate(vocab)}
+            self.codes[dim] = np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(rows))
+            self.vocab[dim] = vocab
+
+        a, b = self.codes["substrate"], self.codes["substrate_b"]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        combined = lo * len(names) + hi
+        _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+        self.codes["substrate_pair"] = np.where(combined == 0, 0, inverse.reshape(-1) + 1)
+        self.vocab["substrate_pair"] = [None] + [_pair(names[lo[f]], names[hi[f]]) for f in first]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def rollup(self, hierarchy: tuple[str, ...]) -> list[_Level]:
+        """One _Level per prefix of the hierarchy, coarsest first."""
+        levels: list[_Level] = []
+        parent_gid = np.zeros(len(self.rows), dtype=np.int64)
+        for depth, dim in enumerate(hierarchy):
+            combined = parent_gid * len(self.vocab[dim]) + self.codes[dim]
+            _, first_row, gid = np.unique(combined, return_index=True, return_inverse=True)
+            gid = gid.reshape(-1)
+            n_groups = len(first_row)
+            counts = np.stack(
+                [np.bincount(gid, weights=self.windows[:, k], minlength=n_groups) for k in range(_BINS)],
+                axis=1,
+            )
+            parent = parent_gid[first_row] if depth else np.full(n_groups, -1, dtype=np.int64)
+            levels.append(_Level(hierarchy[: depth + 1], gid, first_row, parent, counts))
+            parent_gid = gid
+        return levels
+
+    def _dimensions(self, level: _Level, group: int) -> dict[str, Optional[str]]:
+        row = level.first_row[group]
+        return {d: self.vocab[d][self.codes[d][row]] for d in level.dims}
+
+    def _recent_index(self, level: _Level) -> tuple[np.ndarray, np.ndarray]:
+        """Key rows with recent counts ordered by (group, newest first), with their group ids."""
+        order = self.recent_rows[np.lexsort((self.recency[self.recent_rows], level.gid[self.recent_rows]))]
+        return order, level.gid[order]
+
+    def _recent_ids(self, index: tuple[np.ndarray, np.ndarray], group: int) -> list[str]:
+        order, sorted_gid = index
+        lo, hi = np.searchsorted(sorted_gid, [group, group + 1])
+        ids: list[str] = []
+        for r in order[lo:hi]:
+            ids.extend(str(i) for i in (self.rows[r].get("recent_ids") or [])[: MAX_RECENT_IDS - len(ids)])
+            if len(ids) >= MAX_RECENT_IDS:
+                break
+        return ids
+
+    def detect(
+        self,
+        hierarchies: list[tuple[str, ...]],
+        threshold: float = 2.0,
+        min_recent: int = 1,
+    ) -> DetectionResult:
+        """Most specific anomalous groups across all hierarchies (deduplicated by key)."""
+        anomalies: dict[str, PatternStat] = {}
+        checked = 0
+        seen_levels: set[tuple[str, ...]] = set()
+        if not self.rows:
+            return DetectionResult([], 0)
+
+        for hierarchy in hierarchies:
+            levels = self.rollup(hierarchy)
+            stats = []
+            for level in levels:
+                recent = level.counts[:, 0]
+                history = level.counts[:, 1:]
+                mean = history.mean(axis=1)
+                var = history.var(axis=1)
+                std = np.where(var > 0, np.sqrt(var), FLAT_HISTORY_STD)
+                z = (recent - mean) / std
+                active = recent > 0
+                stats.append((mean, std, z, active & (recent >= min_recent) & (z >= threshold)))
+                if level.dims not in seen_levels:
+                    seen_levels.add(level.dims)
+                    checked += int(active.sum())
+
+            # Deepest first: a group is covered when it, or any descendant, is anomalous
+            covered = np.zeros(len(levels[-1].first_row), dtype=bool)
+            for depth in range(len(levels) - 1, -1, -1):
+                level = levels[depth]
+                mean, std, z, flagged = stats[depth]
+                emit = np.nonzero(flagged & ~covered)[0]
+                index = self._recent_index(level) if len(emit) else None
+                for g in emit:
+                    dims = self._dimensions(level, g)
+                    key = pattern_key(dims)
+                    if key in anomalies:
+                        continue
+                    parent_key = (
+                        pattern_key(self._dimensions(levels[depth - 1], level.parent[g])) if depth else None
+                    )
+                    anomalies[key] = PatternStat(
+                        dimensions=dims,
+                        recent_count=int(level.counts[g, 0]),
+                        history=[int(c) for c in level.counts[g, 1:]],
+                        hist_mean=float(mean[g]),
+                        hist_std=float(std[g]),
+                        z_score=float(z[g]),
+                        parent_key=parent_key,
+                        recent_ids=self._recent_ids(index, g),
+                    )
+                if depth:
+                    parent_covered = np.zeros(len(levels[depth - 1].first_row), dtype=bool)
+                    parent_covered[level.parent[flagged | covered]] = True
+                    covered = parent_covered
+
+        ordered = sorted(anomalies.values(), key=lambda s: (-s.z_score, s.key))
+        return DetectionResult(ordered, checked)
+
+
+def load_window_counts(db, today: date, dims: Optional[list[str]] = None) -> list[dict]:
+    """Per-key window rows for the look-back window, paged past PostgREST's row cap.
+
+    dims limits grouping to the stored columns the hierarchies use (see
+    stored_dimensions); the others come back null.
+    """
+    params = {"p_today": today.isoformat(), "p_dims": list(_STORED) if dims is None else dims}
+    rows: list[dict] = []
+    start = 0
+    while True:
+        page = (
+            db.rpc("pattern_window_counts", params)
+            .order("pattern_key")
+            .range(start, start + _PAGE - 1)
+            .execute()
+        ).data or []
+        rows.extend(page)
+        if len(page) < _PAGE:
+            return rows
+        start += _PAGE
+
+
+def load_active_alert_keys(db) -> set[str]:
+    """pattern_key of every active alert, for duplicate suppression.
+
+    Alerts raised before rollup detection carry no pattern_key; they map to
+    the failure_mode > substrate > product node they were created for.
+    """
+    rows = (
+        db.table("pattern_alerts")
+        .select("pattern_key, failure_mode, affected_substrate, affected_product")
+        .eq("status", "active")
+        .execute()
+    ).data or []
+    keys = set()
+    for r in rows:
+        if r.get("pattern_key"):
+            keys.add(r["pattern_key"])
+        else:
+            keys.add(pattern_key({
+                "failure_mode": r.get("failure_mode"),
+                "substrate": r.get("affected_substrate"),
+                "product": r.get("affected_product"),
+            }))
+    return keys
+
+
+def prune_buckets(db, today: date) -> None:
+    """Drop buckets that have aged out of the look-back window (best-effort)."""
+    cutoff = (today - timedelta(days=LOOKBACK_DAYS + 1)).isoformat()
+    try:
+        db.table("pattern_daily_counts").delete().lt("bucket_date", cutoff).execute()
+    except Exception as e:
+        logger.warning(f"Pattern bucket pruning failed (non-fatal): {e}")
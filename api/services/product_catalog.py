@@ -0,0 +1,342 @@
+"""In-memory product catalog snapshot with vectorized match scoring.
+
+The catalog is loaded from `product_specifications` in pages (no row cap),
+held as columnar arrays, and rebuilt on product writes (invalidate_catalog)
+or after `product_catalog_ttl_seconds` so other workers' writes show up.
+
+Scoring keeps the /api/products/match semantics exactly (substrate 40%,
+chemistry 30%, temperature 20%, cure 10%) but evaluates each *distinct*
+chemistry / substrate / cure string once and gathers the results per
+product through integer codes, so the per-product work is pure NumPy.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+from config import settings
+from database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLUMNS = (
+    "id, product_name, manufacturer, chemistry_type, recommended_substrates, "
+    "operating_temp_min_c, operating_temp_max_c, cure_schedule, manufacturer_slug, product_slug, "
+    "mechanical_properties, tds_file_url, fixture_time_minutes"
+)
+
+# Chemistry family tags precomputed per distinct chemistry_type (substring match)
+CHEMISTRY_FAMILIES = (
+    "cyanoacrylate",
+    "epoxy",
+    "polyurethane",
+    "silicone",
+    "acrylic",
+    "methacrylate",
+    "anaerobic",
+    "phenolic",
+    "polysulfide",
+    "ms polymer",
+    "uv cure",
+    "hot melt",
+    "contact cement",
+    "rubber",
+)
+
+_PAGE_SIZE = 1000
+
+WEIGHTS = {"substrate": 0.4, "chemistry": 0.3, "temp_range": 0.2, "cure_method": 0.1}
+
+
+def normalize_token(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def slugify(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (value or "").strip().lower()).strip("-")
+
+
+def product_slugs(manufacturer: Optional[str], product_name: Optional[str]) -> dict[str, str]:
+    """Persisted slug columns for a product row (computed at write time)."""
+    return {
+        "manufacturer_slug": slugify(manufacturer or ""),
+        "product_slug": slugify(product_name or ""),
+    }
+
+
+def _cure_text(cure_schedule: Any) -> str:
+    if not isinstance(cure_schedule, dict):
+        return ""
+    return normalize_token(" ".join(str(v) for v in cure_schedule.values()))
+
+
+def _encode(values: list[str]) -> tuple[list[str], np.ndarray]:
+    """Map strings to integer codes. Returns (vocabulary, codes)."""
+    vocab: dict[str, int] = {}
+    codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in values), dtype=np.int32, count=len(values))
+    return list(vocab), codes
+
+
+def _chemistry_similarity(product_chem: str, requested: str) -> float:
+    if not requested or not product_chem:
+        return 0.0
+    if requested in product_chem or product_chem in requested:
+        return 1.0
+    req_tokens = set(requested.split())
+    overlap = len(req_tokens & set(product_chem.split()))
+    if overlap:
+        return min(1.0, overlap / max(1, len(req_tokens)))
+    return 0.0
+
+
+@dataclass
+class MatchResult:
+    index: int
+    score: int
+    substrate: float
+    chemistry: float
+    temp_range: float
+    cure_method: float
+
+
+class ProductCatalog:
+    """Columnar, immutable snapshot of the product catalog."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.size = len(rows)
+        self.ids = [str(r.get("id")) for r in rows]
+        self.id_to_index = {pid: i for i, pid in enumerate(self.ids)}
+
+        # (manufacturer_slug, product_slug) -> index; first row in id order wins
+        self.slug_index: dict[tuple[str, str], int] = {}
+        for i, r in enumerate(rows):
+            key = (
+                r.get("manufacturer_slug") or slugify(r.get("manufacturer") or ""),
+                r.get("product_slug") or slugify(r.get("product_name") or ""),
+            )
+            self.slug_index.setdefault(key, i)
+        # Rendered public detail payloads keyed by (product_id, plan tier);
+        # dropped with the snapshot on the next product write or TTL refresh
+        self.detail_cache: dict[tuple[str, str], Any] = {}
+
+        self.temp_min = np.array(
+            [r.get("operating_temp_min_c") for r in rows], dtype=np.float64
+        ) if rows else np.empty(0)
+        self.temp_max = np.array(
+            [r.get("operating_temp_max_c") for r in rows], dtype=np.float64
+        ) if rows else np.empty(0)
+
+        self.chem_vocab, self.chem_codes = _encode(
+            [normalize_token(r.get("chemistry_type") or "") for r in rows]
+        )
+        self.cure_vocab, self.cure_codes = _encode([_cure_text(r.get("cure_schedule")) for r in rows])
+
+        # family -> chemistry vocab codes carrying that tag
+        self.family_codes: dict[str, np.ndarray] = {
+            family: np.asarray(
+                [code for code, chem in enumerate(self.chem_vocab) if family in chem], dtype=np.int32
+            )
+            for family in CHEMISTRY_FAMILIES
+        }
+
+        # Substrates flattened over a shared vocabulary; sub_row maps each entry to its product
+        per_row = [
+            [normalize_token(x) for x in (r.get("recommended_substrates") or []) if x]
+            for r in rows
+        ]
+        lengths = np.fromiter((len(s) for s in per_row), dtype=np.int64, count=len(per_row))
+        flat = [s for subs in per_row for s in subs]
+        self.sub_vocab, self.sub_codes = _encode(flat)
+        self.sub_row = np.repeat(np.arange(len(per_row), dtype=np.int64), lengths)
+
+    # -- component scores --------------------------------------------------
+
+    def substrate_scores(self, requested: list[str]) -> np.ndarray:
+        """Fraction of requested substrates matched (substring either way)."""
+        requested = [normalize_token(r) for r in requested if r]
+        if not requested or self.size == 0:
+            return np.zeros(self.size)
+        hits = np.zeros(self.size, dtype=np.int64)
+        for req_t in requested:
+            if not req_t:
+                continue
+            vocab_hit = np.fromiter(
+                ((req_t in ps or ps in req_t) for ps in self.sub_vocab),
+                dtype=bool,
+                count=len(self.sub_vocab),
+            )
+            if not vocab_hit.any():
+                continue
+            row_hit = np.zeros(self.size, dtype=bool)
+            row_hit[self.sub_row[vocab_hit[self.sub_codes]]] = True
+            hits += row_hit
+        return hits / len(requested)
+
+    def chemistry_scores(self, requested: str) -> np.ndarray:
+        req = normalize_token(requested)
+        per_vocab = np.fromiter(
+            (_chemistry_similarity(v, req) for v in self.chem_vocab),
+            dtype=np.float64,
+            count=len(self.chem_vocab),
+        )
+        return per_vocab[self.chem_codes] if self.size else np.zeros(0)
+
+    def temp_scores(self, req_min: Optional[float], req_max: Optional[float]) -> np.ndarray:
+        if (req_min is None and req_max is None) or self.size == 0:
+            return np.zeros(self.size)
+        pmin, pmax = self.temp_min, self.temp_max
+        known = ~(np.isnan(pmin) | np.isnan(pmax))
+        ok_min = np.ones(self.size, dtype=bool) if req_min is None else pmin <= req_min
+        ok_max = np.ones(self.size, dtype=bool) if req_max is None else pmax >= req_max
+        scores = np.where(known & ok_min & ok_max, 1.0, 0.0)
+        if req_min is not None and req_max is not None:
+            with np.errstate(invalid="ignore"):
+                overlap = np.maximum(0.0, np.minimum(pmax, req_max) - np.maximum(pmin, req_min))
+            partial = np.minimum(1.0, overlap / max(1.0, req_max - req_min))
+            use_partial = known & (scores == 0.0) & (overlap > 0)
+            scores = np.where(use_partial, partial, scores)
+        return scores
+
+    def cure_scores(self, requested: Optional[str]) -> np.ndarray:
+        req = normalize_token(requested or "")
+        if not req or self.size == 0:
+            return np.zeros(self.size)
+        per_vocab = np.fromiter(
+            ((bool(v) and req in v) for v in self.cure_vocab),
+            dtype=np.float64,
+            count=len(self.cure_vocab),
+        )
+        return per_vocab[self.cure_codes]
+
+    # -- retrieval -------------------------------------------------------------
+
+    def chemistry_candidates(self, keywords: list[str]) -> np.ndarray:
+        """Indices of products whose chemistry_type contains any keyword.
+
+        Family keywords use the precomputed tags; anything else is a
+        substring test over the distinct chemistry values.
+        """
+        if self.size == 0 or not keywords:
+            return np.empty(0, dtype=np.int64)
+        vocab_hit = np.zeros(len(self.chem_vocab), dtype=bool)
+        for keyword in keywords:
+            kw = normalize_token(keyword)
+            if not kw:
+                continue
+            if kw in self.family_codes:
+                vocab_hit[self.family_codes[kw]] = True
+            else:
+                vocab_hit |= np.fromiter((kw in v for v in self.chem_vocab), dtype=bool, count=len(self.chem_vocab))
+        return np.flatnonzero(vocab_hit[self.chem_codes])
+
+    # -- ranking -------------------------------------------------------------
+
+    def match(
+        self,
+        chemistry: str,
+        substrates: list[str],
+        temp_min: Optional[float] = None,
+        temp_max: Optional[float] = None,
+        cure_method: Optional[str] = None,
+        top_k: int = 10,
+    ) -> list[MatchResult]:
+        """Score the whole catalog in one pass and return the top_k matches."""
+        if self.size == 0:
+            return []
+        req_subs = [s for s in substrates if (s or "").strip()]
+
+        s = self.substrate_scores(req_subs)
+        c = self.chemistry_scores(chemistry)
+        t = self.temp_scores(temp_min, temp_max)
+        cu = self.cure_scores(cure_method)
+
+        weighted = (s * 0.4) + (c * 0.3) + (t * 0.2) + (cu * 0.1)
+        scores = np.round(weighted * 100).astype(np.int64)
+
+        eligible = scores > 0
+        if req_subs:
+            eligible &= s > 0
+        candidates = np.flatnonzero(eligible)
+        if candidates.size == 0:
+            return []
+
+        # Highest score first; catalog order breaks ties deterministically
+        rank_key = scores[candidates] * (self.size + 1) + (self.size - candidates)
+        if candidates.size > top_k:
+            part = np.argpartition(-rank_key, top_k - 1)[:top_k]
+            candidates, rank_key = candidates[part], rank_key[part]
+        top = candidates[np.argsort(-rank_key, kind="stable")]
+
+        return [
+            MatchResult(
+                index=int(i),
+                score=int(scores[i]),
+                substrate=float(s[i]),
+                chemistry=float(c[i]),
+                temp_range=float(t[i]),
+                cure_method=float(cu[i]),
+            )
+            for i in top
+        ]
+
+
+def _load_rows(db) -> list[dict]:
+    rows: list[dict] = []
+    start = 0
+    while True:
+        page = (
+            db.table("product_specifications")
+            .select(CATALOG_COLUMNS)
+            .order("id", desc=False)
+            .range(start, start + _PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        start += _PAGE_SIZE
+
+
+_lock = threading.Lock()
+_state: dict[str, Any] = {"catalog": None, "loaded_at": 0.0, "version": 0}
+
+
+def get_catalog() -> ProductCatalog:
+    """Return the current snapshot, (re)building it if stale or invalidated."""
+    now = time.monotonic()
+    catalog = _state["catalog"]
+    if catalog is not None and now - _state["loaded_at"] < settings.product_catalog_ttl_seconds:
+        return catalog
+
+    with _lock:
+        catalog = _state["catalog"]
+        if catalog is not None and time.monotonic() - _state["loaded_at"] < settings.product_catalog_ttl_seconds:
+            return catalog
+        version = _state["version"]
+        started = time.perf_counter()
+        catalog = ProductCatalog(_load_rows(get_supabase()))
+        # A write during the load leaves the snapshot marked stale for the next caller
+        if _state["version"] == version:
+            _state.update({"catalog": catalog, "loaded_at": time.monotonic()})
+        logger.info(
+            f"Product catalog loaded: {catalog.size} products in "
+            f"{(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return catalog
+
+
+def invalidate_catalog() -> None:
+    """Drop the snapshot after a product write; the next read rebuilds it."""
+    _state["version"] += 1
+    _state["catalog"] = None
+
+
+def catalog_version() -> int:
+    """Counter bumped by every invalidate_catalog(); lets other caches detect product writes."""
+    return _state["version"]
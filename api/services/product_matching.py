@@ -1,34 +1,23 @@
-"""Product matching service — finds products in the database that match a generated spec.
+"""Product matching service — finds products in the catalog that match a generated spec.
 
-Queries `product_specifications` by chemistry keywords extracted from the AI result,
-scores candidates against the spec requirements, and returns the top 3.
+Retrieves candidates from the in-memory product catalog by chemistry keywords
+extracted from the AI result, scores them against the spec requirements, and
+returns the top 3.
 """
 
+import asyncio
+import heapq
 import logging
 import re
 from typing import Any
 
-from database import get_supabase
+from services.product_catalog import CHEMISTRY_FAMILIES, ProductCatalog, get_catalog
 
 logger = logging.getLogger(__name__)
 
-# Common chemistry keywords to search for (order matters — more specific first)
-_CHEMISTRY_KEYWORDS = [
-    "cyanoacrylate",
-    "epoxy",
-    "polyurethane",
-    "silicone",
-    "acrylic",
-    "methacrylate",
-    "anaerobic",
-    "phenolic",
-    "polysulfide",
-    "ms polymer",
-    "uv cure",
-    "hot melt",
-    "contact cement",
-    "rubber",
-]
+# Chemistry families recognised in the AI chemistry string; each maps to the
+# catalog's precomputed family_codes for candidate lookup
+_CHEMISTRY_KEYWORDS = CHEMISTRY_FAMILIES
 
 
 def _extract_chemistry_keywords(chemistry: str) -> list[str]:
@@ -74,11 +63,133 @@ def _parse_temp_number(val: str | None) -> float | None:
     return float(match.group()) if match else None
 
 
+def _spec_score(
+    product: dict[str, Any],
+    req_min: float | None,
+    req_max: float | None,
+    substrates: list[str],
+) -> tuple[int, list[str]]:
+    """Score one candidate: temperature (2), each substrate (2), datasheet (1), TDS (1)."""
+    score = 0
+    reasons: list[str] = []
+
+    # Temperature range coverage
+    prod_min = product.get("operating_temp_min_c")
+    prod_max = product.get("operating_temp_max_c")
+    if prod_min is not None and prod_max is not None:
+        temp_match = True
+        if req_min is not None and prod_min > req_min:
+            temp_match = False
+        if req_max is not None and prod_max < req_max:
+            temp_match = False
+        if temp_match and (req_min is not None or req_max is not None):
+            score += 2
+            reasons.append("Temperature range covers requirement")
+
+    # Substrate compatibility
+    recommended_subs = product.get("recommended_substrates") or []
+    if recommended_subs and isinstance(recommended_subs, list):
+        sub_text = " ".join(str(s).lower() for s in recommended_subs)
+        for substrate in substrates:
+            if substrate:
+                # Check first word (e.g., "Aluminum" from "Aluminum 6061-T6")
+                first_word = substrate.lower().split()[0] if substrate.split() else ""
+                if first_word and first_word in sub_text:
+                    score += 2
+                    reasons.append(f"Recommended for {substrate}")
+
+    # Mechanical properties available
+    mech = product.get("mechanical_properties") or {}
+    if isinstance(mech, dict) and mech:
+        score += 1
+        reasons.append("Datasheet properties available")
+
+    # Has TDS file
+    if product.get("tds_file_url"):
+        score += 1
+
+    return score, reasons
+
+
+def _match_payload(product: dict[str, Any], score: int, reasons: list[str]) -> dict[str, Any]:
+    """Display fields for a selected match (only built for the top results)."""
+    prod_min = product.get("operating_temp_min_c")
+    prod_max = product.get("operating_temp_max_c")
+
+    # Build operating temp string
+    operating_temp = None
+    if prod_min is not None and prod_max is not None:
+        operating_temp = f"{prod_min}°C to {prod_max}°C"
+    elif prod_min is not None:
+        operating_temp = f"{prod_min}°C min"
+    elif prod_max is not None:
+        operating_temp = f"{prod_max}°C max"
+
+    # Extract shear strength from mechanical properties
+    mech = product.get("mechanical_properties") or {}
+    shear_strength = None
+    if isinstance(mech, dict):
+        shear_strength = (
+            mech.get("shear_strength")
+            or mech.get("lap_shear_strength")
+            or mech.get("tensile_lap_shear")
+        )
+
+    # Extract cure time
+    cure_schedule = product.get("cure_schedule") or {}
+    cure_time = None
+    if isinstance(cure_schedule, dict):
+        cure_time = (
+            cure_schedule.get("full_cure")
+            or cure_schedule.get("full_cure_time")
+        )
+    if not cure_time and product.get("fixture_time_minutes"):
+        cure_time = f"{product['fixture_time_minutes']} min (fixture)"
+
+    return {
+        "product_name": product.get("product_name", "Unknown"),
+        "manufacturer": product.get("manufacturer"),
+        "chemistry_type": product.get("chemistry_type"),
+        "score": score,
+        "reasons": reasons,
+        "operating_temp": operating_temp,
+        "shear_strength": shear_strength,
+        "cure_time": cure_time,
+        "product_id": product.get("id"),
+        "tds_available": bool(product.get("tds_file_url")),
+    }
+
+
+def rank_spec_candidates(
+    catalog: ProductCatalog,
+    keywords: list[str],
+    spec_data: dict[str, Any],
+    top_k: int = 3,
+) -> list[dict[str, Any]]:
+    """Retrieve chemistry candidates from the catalog and keep the top_k by score."""
+    candidates = catalog.chemistry_candidates(keywords)
+    if candidates.size == 0:
+        return []
+
+    env = spec_data.get("environment", {}) or {}
+    req_min = _parse_temp_number(env.get("temp_min"))
+    req_max = _parse_temp_number(env.get("temp_max"))
+    substrates = [spec_data.get("substrate_a", ""), spec_data.get("substrate_b", "")]
+
+    scored = (
+        (*_spec_score(catalog.rows[i], req_min, req_max, substrates), int(i))
+        for i in candidates
+    )
+    # Highest score first; catalog order breaks ties
+    top = heapq.nsmallest(top_k, scored, key=lambda t: (-t[0], t[2]))
+    return [_match_payload(catalog.rows[i], score, reasons) for score, reasons, i in top]
+
+
 async def find_matching_products(
     spec_result: dict[str, Any],
     spec_data: dict[str, Any],
 ) -> list[dict[str, Any]]:
-    """Query product_specifications for products matching the generated spec.
+    """Find catalog products matching the generated spec.
 
     Args:
         spec_result: The AI-generated spec result dict (recommended_spec, product_characteristics, etc.)
@@ -87,131 +198,17 @@ async def find_matching_products(
     Returns:
         List of up to 3 matching product dicts with scores and match reasons.
     """
-    db = get_supabase()
-
     chemistry = spec_result.get("recommended_spec", {}).get("chemistry", "")
-    substrate_a = spec_data.get("substrate_a", "")
-    substrate_b = spec_data.get("substrate_b", "")
 
-    # 1. Extract chemistry keywords and query
+    # 1. Extract chemistry keywords
     keywords = _extract_chemistry_keywords(chemistry)
     if not keywords:
         logger.info("No chemistry keywords extracted — skipping product matching")
         return []
 
-    candidates: list[dict] = []
-    seen_ids: set[str] = set()
-
-    for keyword in keywords:
-        try:
-            result = (
-                db.table("product_specifications")
-                .select("*")
-                .ilike("chemistry_type", f"%{keyword}%")
-                .limit(15)
-                .execute()
-            )
-            for row in result.data or []:
-                row_id = row.get("id")
-                if row_id and row_id not in seen_ids:
-                    seen_ids.add(row_id)
-                    candidates.append(row)
-        except Exception as exc:
-            logger.warning(f"Product query failed for keyword '{keyword}': {exc}")
-
-    if not candidates:
+    # 2. One catalog lookup for all keywords, then score and keep the top 3
+    catalog = await asyncio.to_thread(get_catalog)
+    matches = rank_spec_candidates(catalog, keywords, spec_data)
+    if not matches:
         logger.info(f"No product candidates found for keywords: {keywords}")
-        return []
-
-    # 2. Score each candidate
-    env = spec_data.get("environment", {}) or {}
-    req_min = _parse_temp_number(env.get("temp_min"))
-    req_max = _parse_temp_number(env.get("temp_max"))
-
-    scored: list[dict[str, Any]] = []
-
-    for product in candidates:
-        score = 0
-        reasons: list[str] = []
-
-        # Temperature range coverage
-        prod_min = product.get("operating_temp_min_c")
-        prod_max = product.get("operating_temp_max_c")
-
-        if prod_min is not None and prod_max is not None:
-            temp_match = True
-            if req_min is not None and prod_min > req_min:
-                temp_match = False
-            if req_max is not None and prod_max < req_max:
-                temp_match = False
-            if temp_match and (req_min is not None or req_max is not None):
-                score += 2
-                reasons.append("Temperature range covers requirement")
-
-        # Substrate compatibility
-        recommended_subs = product.get("recommended_substrates") or []
-        if recommended_subs and isinstance(recommended_subs, list):
-            sub_text = " ".join(str(s).lower() for s in recommended_subs)
-            for substrate, label in [(substrate_a, substrate_a), (substrate_b, substrate_b)]:
-                if substrate:
-                    # Check first word (e.g., "Aluminum" from "Aluminum 6061-T6")
-                    first_word = substrate.lower().split()[0] if substrate else ""
-                    if first_word and first_word in sub_text:
-                        score += 2
-                        reasons.append(f"Recommended for {label}")
-
-        # Mechanical properties available
-        mech = product.get("mechanical_properties") or {}
-        if isinstance(mech, dict) and mech:
-            score += 1
-            reasons.append("Datasheet properties available")
-
-        # Has TDS file
-        if product.get("tds_file_url"):
-            score += 1
-
-        # Build operating temp string
-        operating_temp = None
-        if prod_min is not None and prod_max is not None:
-            operating_temp = f"{prod_min}°C to {prod_max}°C"
-        elif prod_min is not None:
-            operating_temp = f"{prod_min}°C min"
-        elif prod_max is not None:
-            operating_temp = f"{prod_max}°C max"
-
-        # Extract shear strength from mechanical properties
-        shear_strength = None
-        if isinstance(mech, dict):
-            shear_strength = (
-                mech.get("shear_strength")
-                or mech.get("lap_shear_strength")
-                or mech.get("tensile_lap_shear")
-            )
-
-        # Extract cure time
-        cure_schedule = product.get("cure_schedule") or {}
-        cure_time = None
-        if isinstance(cure_schedule, dict):
-            cure_time = (
-                cure_schedule.get("full_cure")
-                or cure_schedule.get("full_cure_time")
-            )
-        if not cure_time and product.get("fixture_time_minutes"):
-            cure_time = f"{product['fixture_time_minutes']} min (fixture)"
-
-        scored.append({
-            "product_name": product.get("product_name", "Unknown"),
-            "manufacturer": product.get("manufacturer"),
-            "chemistry_type": product.get("chemistry_type"),
-            "score": score,
-            "reasons": reasons,
-            "operating_temp": operating_temp,
-            "shear_strength": shear_strength,
-            "cure_time": cure_time,
-            "product_id": product.get("id"),
-            "tds_available": bool(product.get("tds_file_url")),
-        })
-
-    # 3. Sort by score descending, return top 3
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:3]
+    return matches
@@ -0,0 +1,280 @@
+"""In-process search index over product name, manufacturer and chemistry.
+
+Built on top of the product catalog snapshot (services.product_catalog) and
+rebuilt whenever that snapshot changes, so writes are picked up through the
+same invalidate_catalog() path.
+
+Two structures back each query:
+
+- a sorted token list per field for word-prefix lookup (bisect),
+- trigram postings over all three fields for typo-tolerant matching.
+  Query words are padded on the left only, so a prefix of a word scores
+  the same as the full word, and
+- the normalized names (and distinct manufacturers) joined into one string,
+  scanned with str.find for mid-word matches ("420" finds "DP420", "tite"
+  finds "Loctite"), as the old ``ilike '%q%'`` filters did.
+
+Candidates get a cheap vectorized score first; only the best few are
+re-ranked with exact/prefix/substring rules, which keeps typeahead
+latency flat as the catalog grows.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from services.product_catalog import ProductCatalog, _encode, get_catalog
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Minimum share of query trigrams a fuzzy candidate must contain
+MIN_SIMILARITY = 0.6
+
+# Candidates re-ranked in Python per returned result
+_RERANK_FACTOR = 8
+
+
+def normalize_text(value: Optional[str]) -> str:
+    return _NON_ALNUM.sub(" ", (value or "").lower()).strip()
+
+
+def _word_grams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _query_grams(words: list[str]) -> set[str]:
+    grams: set[str] = set()
+    for word in words:
+        padded = f"  {word}"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass
+class SearchHit:
+    index: int
+    score: float
+
+
+class _PrefixIndex:
+    """Sorted tokens → rows, for word-prefix lookups."""
+
+    def __init__(self, token_rows: dict[str, list[int]]):
+        self.tokens = sorted(token_rows)
+        self.rows = [np.asarray(token_rows[t], dtype=np.int32) for t in self.tokens]
+
+    def match(self, prefix: str) -> np.ndarray:
+        """Rows with a token starting with prefix (may contain duplicates)."""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\uffff")
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(self.rows[lo:hi])
+
+
+class _InfixIndex:
+    """Strings joined into one blob, for substring lookups without a per-row loop."""
+
+    def __init__(self, values: list[str]):
+        self.blob = "\n".join(values)
+        self.starts = np.zeros(len(values), dtype=np.int64)
+        if values:
+            self.starts[1:] = np.cumsum([len(v) + 1 for v in values[:-1]])
+
+    def match(self, needle: str) -> np.ndarray:
+        """Indexes of values containing needle."""
+        found = []
+        pos = self.blob.find(needle)
+        while pos != -1:
+            i = int(np.searchsorted(self.starts, pos, side="right")) - 1
+            found.append(i)
+            # Skip the rest of this value; one hit per row is enough
+            nxt = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.blob)
+            pos = self.blob.find(needle, int(nxt))
+        return np.asarray(found, dtype=np.int64)
+
+
+class ProductSearchIndex:
+    """Immutable index over one catalog snapshot."""
+
+    def __init__(self, catalog: ProductCatalog):
+        self.catalog = catalog
+        rows = catalog.rows
+        self.size = len(rows)
+        self.names = [normalize_text(r.get("product_name")) for r in rows]
+        self.manufacturers = [normalize_text(r.get("manufacturer")) for r in rows]
+        self.chemistries = [normalize_text(r.get("chemistry_type")) for r in rows]
+        self._name_lengths = np.fromiter((len(n) for n in self.names), dtype=np.float64, count=self.size)
+
+        name_tokens: dict[str, list[int]] = {}
+        other_tokens: dict[str, list[int]] = {}
+        grams: dict[str, list[int]] = {}
+        for i in range(self.size):
+            row_grams: set[str] = set()
+            for word in set(self.names[i].split()):
+                name_tokens.setdefault(word, []).append(i)
+                row_grams |= _word_grams(word)
+            for word in set(self.manufacturers[i].split()) | set(self.chemistries[i].split()):
+                other_tokens.setdefault(word, []).append(i)
+                row_grams |= _word_grams(word)
+            for gram in row_grams:
+                grams.setdefault(gram, []).append(i)
+
+        self._name_prefix = _PrefixIndex(name_tokens)
+        self._other_prefix = _PrefixIndex(other_tokens)
+        self._grams = {g: np.asarray(ids, dtype=np.int32) for g, ids in grams.items()}
+
+        # Case-insensitive product_name order for filter-only listings
+        self.name_order = np.asarray(
+            sorted(range(self.size), key=lambda i: ((rows[i].get("product_name") or "").lower(), i)),
+            dtype=np.int64,
+        )
+
+        self._manufacturer_vocab, self._manufacturer_codes = _encode(self.manufacturers)
+        self._chemistry_vocab, self._chemistry_codes = _encode(self.chemistries)
+        self._name_infix = _InfixIndex(self.names)
+        self._manufacturer_infix = _InfixIndex(self._manufacturer_vocab)
+
+    # -- lookups -------------------------------------------------------------
+
+    def _all_words_prefix(self, words: list[str], name_only: bool = False) -> np.ndarray:
+        """Boolean mask of rows where every query word prefixes some token."""
+        indexes = (self._name_prefix,) if name_only else (self._name_prefix, self._other_prefix)
+        mask = np.ones(self.size, dtype=bool)
+        for word in words:
+            hit = np.zeros(self.size, dtype=bool)
+            for prefix in indexes:
+                hit[prefix.match(word)] = True
+            mask &= hit
+            if not mask.any():
+                break
+        return mask
+
+    def _infix(self, query: str) -> np.ndarray:
+        """Boolean mask of rows whose name or manufacturer contains query."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._name_infix.match(query)] = True
+        per_vocab = np.zeros(len(self._manufacturer_vocab), dtype=bool)
+        per_vocab[self._manufacturer_infix.match(query)] = True
+        return mask | per_vocab[self._manufacturer_codes]
+
+    def _containment(self, words: list[str]) -> np.ndarray:
+        """Share of query trigrams present in each row (0..1)."""
+        q_grams = _query_grams(words)
+        postings = [self._grams[g] for g in q_grams if g in self._grams]
+        if not postings:
+            return np.zeros(self.size)
+        counts = np.bincount(np.concatenate(postings), minlength=self.size)
+        return counts / len(q_grams)
+
+    def _rerank(self, i: int, query: str, words: list[str], similarity: float) -> float:
+        name = self.names[i]
+        name_words = name.split()
+        other = f"{self.manufacturers[i]} {self.chemistries[i]}".strip()
+        every = f"{name} {other}".split()
+
+        if name == query:
+            return 100.0
+        if name.startswith(query):
+            return 90.0
+        if all(any(t.startswith(w) for t in name_words) for w in words):
+            return 80.0
+        if query in name:
+            return 70.0
+        if all(any(t.startswith(w) for t in every) for w in words):
+            return 60.0
+        if query in other:
+            return 50.0
+        return 40.0 * similarity
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        fuzzy: bool = True,
+        mask: Optional[np.ndarray] = None,
+    ) -> list[SearchHit]:
+        """Rank products for a free-text query, optionally within a row mask.
+
+        Short queries (<3 chars) are prefix-only; longer ones also match
+        anywhere inside the name or manufacturer, and fuzzily.
+        """
+        q = normalize_text(query)
+        words = q.split()
+        if not words or self.size == 0 or limit <= 0:
+            return []
+
+        name_prefix = self._all_words_prefix(words, name_only=True)
+        any_prefix = name_prefix | self._all_words_prefix(words)
+        base = name_prefix * 2.0 + any_prefix * 1.0
+        similarity = np.zeros(self.size)
+        if len(q) >= 3:
+            base = base + self._infix(q) * 1.0
+        if fuzzy and len(q) >= 3:
+            similarity = self._containment(words)
+            base = base + np.where(similarity >= MIN_SIMILARITY, similarity, 0.0)
+
+        eligible = base > 0
+        if mask is not None:
+            eligible &= mask
+        candidates = np.flatnonzero(eligible)
+        if candidates.size == 0:
+            return []
+        shortlist = limit * _RERANK_FACTOR
+        if candidates.size > shortlist:
+            # Prefer shorter names among equal cheap scores so exact names survive the cut
+            cheap = base[candidates] - self._name_lengths[candidates] * 1e-4
+            part = np.argpartition(-cheap, shortlist - 1)[:shortlist]
+            candidates = candidates[part]
+
+        hits = [
+            SearchHit(index=int(i), score=self._rerank(int(i), q, words, float(similarity[i])))
+            for i in candidates
+        ]
+        # Best score first, then shorter names, then catalog order
+        hits.sort(key=lambda h: (-h.score, len(self.names[h.index]), h.index))
+        return hits[:limit]
+
+    def filter_mask(
+        self,
+        manufacturer: Optional[str] = None,
+        chemistry_type: Optional[str] = None,
+    ) -> np.ndarray:
+        """Substring filters, evaluated once per distinct value."""
+        mask = np.ones(self.size, dtype=bool)
+        for needle, vocab, codes in (
+            (manufacturer, self._manufacturer_vocab, self._manufacturer_codes),
+            (chemistry_type, self._chemistry_vocab, self._chemistry_codes),
+        ):
+            needle = normalize_text(needle)
+            if not needle:
+                continue
+            per_vocab = np.fromiter((needle in v for v in vocab), dtype=bool, count=len(vocab))
+            mask &= per_vocab[codes]
+        return mask
+
+
+_lock = threading.Lock()
+_state: dict[str, Optional[ProductSearchIndex]] = {"index": None}
+
+
+def get_search_index() -> ProductSearchIndex:
+    """Index for the current catalog snapshot, rebuilt when the snapshot changes."""
+    catalog = get_catalog()
+    index = _state["index"]
+    if index is not None and index.catalog is catalog:
+        return index
+    with _lock:
+        index = _state["index"]
+        if index is None or index.catalog is not catalog:
+            index = ProductSearchIndex(catalog)
+            _state["index"] = index
+        return index
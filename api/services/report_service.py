@@ -2,12 +2,18 @@
 
 Sprint 8: Uses WeasyPrint to render HTML → PDF for 8D reports.
 Supports multiple templates: Generic 8D and Ford Global 8D.
+
+Each template's stylesheet is static, so it lives in a module constant and is
+parsed into a WeasyPrint CSS object once per process (precompile_stylesheets
+runs at startup) instead of being formatted into and re-parsed from every
+generated document.
 """
 
 import logging
 from datetime import datetime, timezone
+from functools import lru_cache
 from io import BytesIO
-from typing import Optional
+from typing import Callable, Optional
 
 from weasyprint import HTML, CSS
 from database import get_supabase
@@ -15,6 +21,188 @@ from database import get_supabase
 logger = logging.getLogger(__name__)
 
 
+GENERIC_8D_CSS = """
+@page {
+    size: letter;
+    margin: 0.75in;
+    @bottom-right {
+        content: "Page " counter(page) " of " counter(pages);
+        font-size: 9pt;
+        color: #666;
+    }
+    @bottom-left {
+        content: "Generated by Gravix Quality — gravix.com";
+        font-size: 9pt;
+        color: #666;
+    }
+}
+body {
+    font-family: Arial, Helvetica, sans-serif;
+    font-size: 11pt;
+    line-height: 1.4;
+    color: #333;
+}
+h1 {
+    font-size: 20pt;
+    color: #1e40af;
+    border-bottom: 3px solid #1e40af;
+    padding-bottom: 8px;
+    margin-top: 0;
+}
+h2 {
+    font-size: 14pt;
+    color: #1e40af;
+    margin-top: 24px;
+    margin-bottom: 12px;
+    border-bottom: 1px solid #ddd;
+    padding-bottom: 4px;
+}
+.cover-info {
+    margin: 20px 0;
+    padding: 15px;
+    background: #f3f4f6;
+    border-left: 4px solid #1e40af;
+}
+.cover-info div {
+    margin: 8px 0;
+}
+.label {
+    font-weight: bold;
+    display: inline-block;
+    width: 150px;
+}
+.severity-critical { color: #dc2626; font-weight: bold; }
+.severity-major { color: #f59e0b; font-weight: bold; }
+.severity-minor { color: #10b981; font-weight: bold; }
+.action-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 15px 0;
+    font-size: 10pt;
+}
+.action-table th {
+    background: #1e40af;
+    color: white;
+    padding: 8px;
+    text-align: left;
+    font-weight: bold;
+}
+.action-table td {
+    border: 1px solid #ddd;
+    padding: 8px;
+}
+.action-table tr:nth-child(even) {
+    background: #f9fafb;
+}
+.status-complete { color: #10b981; font-weight: bold; }
+.status-in_progress { color: #f59e0b; font-weight: bold; }
+.status-open { color: #6b7280; }
+.root-causes {
+    margin: 15px 0 15px 20px;
+}
+.root-causes li {
+    margin: 12px 0;
+}
+.confidence {
+    color: #6b7280;
+    font-size: 10pt;
+}
+.five-why-table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 15px 0;
+    font-size: 10pt;
+}
+.five-why-table th {
+    background: #1e40af;
+    color: white;
+    padding: 8px;
+    text-align: left;
+}
+.five-why-table td {
+    border: 1px solid #ddd;
+    padding: 8px;
+    vertical-align: top;
+}
+.five-why-table tr:nth-child(even) {
+    background: #f9fafb;
+}
+.section {
+    page-break-inside: avoid;
+}
+.signature-block {
+    margin-top: 30px;
+    padding: 15px;
+    border: 2px solid #1e40af;
+    page-break-inside: avoid;
+}
+"""
+
+VDA_8D_CSS = """
+@page { size:A4; margin:18mm; @bottom-center { content: 'Page ' counter(page) ' / ' counter(pages); font-size:8pt; color:#666; } }
+body { font-family: Arial, sans-serif; font-size:10pt; color:#222; }
+h1 { font-size:18pt; color:#003366; border-bottom:3px solid #003366; padding-bottom:6px; margin:0; }
+h2 { font-size:13pt; color:#003366; border-bottom:1px solid #ccc; padding-bottom:3px; margin-top:18px; }
+.iatf { font-size:8.5pt; color:#888; margin:4px 0 10px; }
+.info-grid { display:grid; grid-template-columns:1fr 1fr; gap:6px 20px; margin:10px 0; }
+.label { font-weight:bold; color:#555; }
+.metrics { background:#f0f4f8; border-left:4px solid #003366; padding:10px; margin:12px 0; }
+table { width:100%; border-collapse:collapse; margin:10px 0; font-size:9.5pt; }
+th { background:#003366; color:#fff; padding:6px 8px; text-align:left; }
+td { border:1px solid #ddd; padding:6px 8px; }
+tr:nth-child(even) { background:#f7f9fc; }
+.section { page-break-inside:avoid; }
+"""
+
+TOYOTA_A3_CSS = """
+@page { size: A3 landscape; margin: 12mm; }
+body { font-family: Arial, sans-serif; font-size:9pt; color:#222; margin:0; }
+h1 { font-size:16pt; color:#cc0000; margin:0 0 6px 0; text-align:center; }
+.meta { font-size:8pt; color:#666; text-align:center; margin-bottom:6px; }
+.grid { display:grid; grid-template-columns: 1fr 1fr 1fr; gap:8px; }
+.cell { border:1px solid #ccc; border-radius:4px; padding:8px; background:#fafafa; }
+.cell h3 { margin:0 0 4px 0; font-size:10pt; color:#cc0000; border-bottom:1px solid #ddd; padding-bottom:2px; }
+.cell p, .cell ul, .cell ol { margin:2px 0; font-size:8.5pt; line-height:1.35; }
+"""
+
+AS9100_CAPA_CSS = """
+@page { size: letter; margin: 0.75in; @bottom-right { content: 'Page ' counter(page) ' of ' counter(pages); font-size:8pt; color:#666; } }
+body { font-family: Arial, sans-serif; font-size:10pt; color:#333; }
+h1 { font-size:18pt; color:#1a237e; border-bottom:3px solid #1a237e; padding-bottom:6px; margin:0; }
+h2 { font-size:13pt; color:#1a237e; margin-top:18px; border-bottom:1px solid #ccc; padding-bottom:3px; }
+.info-grid { display:grid; grid-template-columns:1fr 1fr; gap:4px 20px; margin:10px 0; }
+.label { font-weight:bold; }
+.risk { border:2px solid #e65100; background:#fff3e0; border-radius:4px; padding:10px; margin:10px 0; }
+table { width:100%; border-collapse:collapse; margin:8px 0; font-size:9.5pt; }
+th { background:#1a237e; color:#fff; padding:6px 8px; text-align:left; }
+td { border:1px solid #ddd; padding:6px 8px; }
+tr:nth-child(even) { background:#f5f5f5; }
+.ref { font-size:8pt; color:#888; }
+.section { page-break-inside:avoid; }
+"""
+
+TEMPLATE_CSS = {
+    "generic_8d": GENERIC_8D_CSS,
+    "vda_8d": VDA_8D_CSS,
+    "toyota_a3": TOYOTA_A3_CSS,
+    "as9100_capa": AS9100_CAPA_CSS,
+}
+
+
+@lru_cache(maxsize=None)
+def _stylesheet(css_key: str) -> CSS:
+    return CSS(string=TEMPLATE_CSS[css_key])
+
+
+def precompile_stylesheets() -> None:
+    """Parse every template stylesheet up front (best-effort, called at startup)."""
+    try:
+        for css_key in TEMPLATE_CSS:
+            _stylesheet(css_key)
+    except Exception as e:
+        logger.warning(f"Report stylesheet precompile failed: {e}")
+
+
 def _format_date(dt_str: Optional[str]) -> str:
     """Format ISO datetime string to readable date."""
     if not dt_str:
@@ -95,122 +283,6 @@ def _generate_generic_8d_html(investigation: dict, actions: list[dict]) -> str:
     <head>
         <meta charset="utf-8">
         <title>8D Report - {investigation.get('investigation_number')}</title>
-        <style>
-            @page {{
-                size: letter;
-                margin: 0.75in;
-                @bottom-right {{
-                    content: "Page " counter(page) " of " counter(pages);
-                    font-size: 9pt;
-                    color: #666;
-                }}
-                @bottom-left {{
-                    content: "Generated by Gravix Quality — gravix.com";
-                    font-size: 9pt;
-                    color: #666;
-                }}
-            }}
-            body {{
-                font-family: Arial, Helvetica, sans-serif;
-                font-size: 11pt;
-                line-height: 1.4;
-                color: #333;
-            }}
-            h1 {{
-                font-size: 20pt;
-                color: #1e40af;
-                border-bottom: 3px solid #1e40af;
-                padding-bottom: 8px;
-                margin-top: 0;
-            }}
-            h2 {{
-                font-size: 14pt;
-                color: #1e40af;
-                margin-top: 24px;
-                margin-bottom: 12px;
-                border-bottom: 1px solid #ddd;
-                padding-bottom: 4px;
-            }}
-            .cover-info {{
-                margin: 20px 0;
-                padding: 15px;
-                background: #f3f4f6;
-                border-left: 4px solid #1e40af;
-            }}
-            .cover-info div {{
-                margin: 8px 0;
-            }}
-            .label {{
-                font-weight: bold;
-                display: inline-block;
-                width: 150px;
-            }}
-            .severity-critical {{ color: #dc2626; font-weight: bold; }}
-            .severity-major {{ color: #f59e0b; font-weight: bold; }}
-            .severity-minor {{ color: #10b981; font-weight: bold; }}
-            .action-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 15px 0;
-                font-size: 10pt;
-            }}
-            .action-table th {{
-                background: #1e40af;
-                color: white;
-                padding: 8px;
-                text-align: left;
-                font-weight: bold;
-            }}
-            .action-table td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-            }}
-            .action-table tr:nth-child(even) {{
-                background: #f9fafb;
-            }}
-            .status-complete {{ color: #10b981; font-weight: bold; }}
-            .status-in_progress {{ color: #f59e0b; font-weight: bold; }}
-            .status-open {{ color: #6b7280; }}
-            .root-causes {{
-                margin: 15px 0 15px 20px;
-            }}
-            .root-causes li {{
-                margin: 12px 0;
-            }}
-            .confidence {{
-                color: #6b7280;
-                font-size: 10pt;
-            }}
-            .five-why-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 15px 0;
-                font-size: 10pt;
-            }}
-            .five-why-table th {{
-                background: #1e40af;
-                color: white;
-                padding: 8px;
-                text-align: left;
-            }}
-            .five-why-table td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-                vertical-align: top;
-            }}
-            .five-why-table tr:nth-child(even) {{
-                background: #f9fafb;
-            }}
-            .section {{
-                page-break-inside: avoid;
-            }}
-            .signature-block {{
-                margin-top: 30px;
-                padding: 15px;
-                border: 2px solid #1e40af;
-                page-break-inside: avoid;
-            }}
-        </style>
     </head>
     <body>
         <h1>8D Corrective Action Report</h1>
@@ -360,21 +432,7 @@ def _generate_vda_8d_html(investigation: dict, actions: list[dict]) -> str:
 
     return f"""<!DOCTYPE html><html><head><meta charset='utf-8'>
     <title>VW/VDA 8D — {investigation.get('investigation_number')}</title>
-    <style>
-      @page {{ size:A4; margin:18mm; @bottom-center {{ content: 'Page ' counter(page) ' / ' counter(pages); font-size:8pt; color:#666; }} }}
-      body {{ font-family: Arial, sans-serif; font-size:10pt; color:#222; }}
-      h1 {{ font-size:18pt; color:#003366; border-bottom:3px solid #003366; padding-bottom:6px; margin:0; }}
-      h2 {{ font-size:13pt; color:#003366; border-bottom:1px solid #ccc; padding-bottom:3px; margin-top:18px; }}
-      .iatf {{ font-size:8.5pt; color:#888; margin:4px 0 10px; }}
-      .info-grid {{ display:grid; grid-template-columns:1fr 1fr; gap:6px 20px; margin:10px 0; }}
-      .label {{ font-weight:bold; color:#555; }}
-      .metrics {{ background:#f0f4f8; border-left:4px solid #003366; padding:10px; margin:12px 0; }}
-      table {{ width:100%; border-collapse:collapse; margin:10px 0; font-size:9.5pt; }}
-      th {{ background:#003366; color:#fff; padding:6px 8px; text-align:left; }}
-      td {{ border:1px solid #ddd; padding:6px 8px; }}
-      tr:nth-child(even) {{ background:#f7f9fc; }}
-      .section {{ page-break-inside:avoid; }}
-    </style></head><body>
+    </head><body>
       <h1>VW / VDA 8D — Corrective Action Report</h1>
       <div class='iatf'>Ref: IATF 16949:2016 / VDA 8D Guideline</div>
       <div class='info-grid'>
@@ -443,16 +501,7 @@ def _generate_toyota_a3_html(investigation: dict, actions: list[dict]) -> str:
 
     return f"""<!DOCTYPE html><html><head><meta charset='utf-8'>
     <title>A3 — {investigation.get('investigation_number')}</title>
-    <style>
-      @page {{ size: A3 landscape; margin: 12mm; }}
-      body {{ font-family: Arial, sans-serif; font-size:9pt; color:#222; margin:0; }}
-      h1 {{ font-size:16pt; color:#cc0000; margin:0 0 6px 0; text-align:center; }}
-      .meta {{ font-size:8pt; color:#666; text-align:center; margin-bottom:6px; }}
-      .grid {{ display:grid; grid-template-columns: 1fr 1fr 1fr; gap:8px; }}
-      .cell {{ border:1px solid #ccc; border-radius:4px; padding:8px; background:#fafafa; }}
-      .cell h3 {{ margin:0 0 4px 0; font-size:10pt; color:#cc0000; border-bottom:1px solid #ddd; padding-bottom:2px; }}
-      .cell p, .cell ul, .cell ol {{ margin:2px 0; font-size:8.5pt; line-height:1.35; }}
-    </style></head><body>
+    </head><body>
       <h1>Toyota A3 Problem-Solving Report</h1>
       <div class='meta'>{investigation.get('investigation_number','N/A')} — {investigation.get('title','')} | {investigation.get('customer_oem','N/A')} | {_format_date(investigation.get('created_at'))}</div>
       <div class='grid'>
@@ -513,21 +562,7 @@ def _generate_as9100_capa_html(investigation: dict, actions: list[dict]) -> str:
 
     return f"""<!DOCTYPE html><html><head><meta charset='utf-8'>
     <title>AS9100 CAPA — {investigation.get('investigation_number')}</title>
-    <style>
-      @page {{ size: letter; margin: 0.75in; @bottom-right {{ content: 'Page ' counter(page) ' of ' counter(pages); font-size:8pt; color:#666; }} }}
-      body {{ font-family: Arial, sans-serif; font-size:10pt; color:#333; }}
-      h1 {{ font-size:18pt; color:#1a237e; border-bottom:3px solid #1a237e; padding-bottom:6px; margin:0; }}
-      h2 {{ font-size:13pt; color:#1a237e; margin-top:18px; border-bottom:1px solid #ccc; padding-bottom:3px; }}
-      .info-grid {{ display:grid; grid-template-columns:1fr 1fr; gap:4px 20px; margin:10px 0; }}
-      .label {{ font-weight:bold; }}
-      .risk {{ border:2px solid #e65100; background:#fff3e0; border-radius:4px; padding:10px; margin:10px 0; }}
-      table {{ width:100%; border-collapse:collapse; margin:8px 0; font-size:9.5pt; }}
-      th {{ background:#1a237e; color:#fff; padding:6px 8px; text-align:left; }}
-      td {{ border:1px solid #ddd; padding:6px 8px; }}
-      tr:nth-child(even) {{ background:#f5f5f5; }}
-      .ref {{ font-size:8pt; color:#888; }}
-      .section {{ page-break-inside:avoid; }}
-    </style></head><body>
+    </head><body>
       <h1>AS9100 CAPA Report</h1>
       <p class='ref'>Emphasis: risk assessment, product safety, airworthiness impact, escape analysis, effectiveness verification.</p>
       <div class='info-grid'>
@@ -567,6 +602,18 @@ def _generate_as9100_capa_html(investigation: dict, actions: list[dict]) -> str:
     </body></html>"""
 
 
+# template key -> (HTML generator, stylesheet key)
+TEMPLATES: dict[str, tuple[Callable[[dict, list[dict]], str], str]] = {
+    "generic_8d": (_generate_generic_8d_html, "generic_8d"),
+    "ford_global_8d": (_generate_ford_8d_html, "generic_8d"),
+    "vw_8d": (_generate_vda_8d_html, "vda_8d"),
+    "toyota_a3": (_generate_toyota_a3_html, "toyota_a3"),
+    "as9100_capa": (_generate_as9100_capa_html, "as9100_capa"),
+    # Compatibility: if template_type is 'custom' and config indicates aerospace
+    "custom": (_generate_as9100_capa_html, "as9100_capa"),
+}
+
+
 async def generate_8d_pdf(
     investigation_id: str,
     template_key: str = "generic_8d",
@@ -589,24 +636,15 @@ async def generate_8d_pdf(
     )
     actions = actions_result.data if actions_result.data else []
 
-    template_generators = {
-        "generic_8d": _generate_generic_8d_html,
-        "ford_global_8d": _generate_ford_8d_html,
-        "vw_8d": _generate_vda_8d_html,
-        "toyota_a3": _generate_toyota_a3_html,
-        "as9100_capa": _generate_as9100_capa_html,
-        # Compatibility: if template_type is 'custom' and config indicates aerospace
-        "custom": _generate_as9100_capa_html,
-    }
-
-    generator = template_generators.get(template_key)
-    if not generator:
+    template = TEMPLATES.get(template_key)
+    if not template:
         raise ValueError(f"Unknown template: {template_key}")
 
+    generator, css_key = template
     html_content = generator(investigation, actions)
 
     try:
-        pdf_bytes = HTML(string=html_content).write_pdf()
+        pdf_bytes = HTML(string=html_content).write_pdf(stylesheets=[_stylesheet(css_key)])
         logger.info(
             f"Generated {template_key} PDF for investigation {investigation.get('investigation_number')} "
             f"({len(pdf_bytes)} bytes)"
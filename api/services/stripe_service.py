@@ -6,6 +6,7 @@ import stripe
 
 from config import settings
 from database import get_supabase
+from services.usage_service import invalidate_usage_cache
 
 logger = logging.getLogger(__name__)
 
@@ -163,6 +164,7 @@ def _handle_checkout_completed(db, session: dict):
 
     user_id = result.data[0]["id"]
     db.table("users").update({"plan": "pro"}).eq("id", user_id).execute()
+    invalidate_usage_cache(user_id)
     logger.info(f"Checkout fallback: set user {user_id} to plan: pro")
 
 
@@ -194,4 +196,5 @@ def _handle_subscription_change(db, subscription: dict, active: bool):
                 plan = "pro"  # Default paid plan
 
     db.table("users").update({"plan": plan}).eq("id", user_id).execute()
+    invalidate_usage_cache(user_id)
     logger.info(f"Updated user {user_id} to plan: {plan}")
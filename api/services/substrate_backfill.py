@@ -0,0 +1,167 @@
+"""Re-normalize stored substrate keys after the alias table changes.
+
+failure_analyses and spec_requests keep substrate_a_normalized /
+substrate_b_normalized computed at insert time, so every change to
+utils/normalizer leaves older rows under stale keys. backfill_table walks a
+table in primary-key order (keyset pagination, no OFFSET scans), recomputes
+both keys from the raw substrate columns and writes back only rows whose keys
+changed. Writes are grouped by the new (a, b) pair into one
+UPDATE ... WHERE id IN (...) per group, so each statement is short and only
+row-locks what it touches.
+
+Driven by `python -m scripts.backfill_substrates`, which checkpoints
+report.checkpoint_id per table so an interrupted run resumes where it
+stopped. The checkpoint stops advancing at the first failed update, so a
+rerun retries failed rows (rows already rewritten are unchanged and skipped).
+pattern_daily_counts is keyed on the normalized substrates, so after
+failure_analyses is rewritten the script rebuilds it with
+rebuild_pattern_counts.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from utils.normalizer import normalize_substrates
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("failure_analyses", "spec_requests")
+
+_COLUMNS = "id, substrate_a, substrate_b, substrate_a_normalized, substrate_b_normalized"
+
+_MAX_FAILED_IDS = 100
+
+
+@dataclass
+class TableReport:
+    table: str
+    scanned: int = 0
+    changed: int = 0
+    updated: int = 0
+    last_id: Optional[str] = None
+    # Safe resume point: last id before the first chunk with a failed update
+    checkpoint_id: Optional[str] = None
+    seconds: float = 0.0
+    transitions: Counter = field(default_factory=Counter)
+    failed_ids: list[str] = field(default_factory=list)
+
+    def as_dict(self, top: int = 25) -> dict:
+        return {
+            "table": self.table,
+            "scanned": self.scanned,
+            "changed": self.changed,
+            "updated": self.updated,
+            "failed": len(self.failed_ids),
+            "failed_ids": self.failed_ids[:_MAX_FAILED_IDS],
+            "last_id": self.last_id,
+            "checkpoint_id": self.checkpoint_id,
+            "seconds": round(self.seconds, 2),
+            "rows_per_second": round(self.scanned / self.seconds, 1) if self.seconds else None,
+            "top_transitions": [
+                {"from": old, "to": new, "rows": n}
+                for (old, new), n in self.transitions.most_common(top)
+            ],
+        }
+
+
+def plan_updates(rows: list[dict], report: Optional[TableReport] = None) -> dict[tuple, list[str]]:
+    """Group ids of rows whose normalized keys change by their new (a, b) pair."""
+    norm_a = normalize_substrates(r.get("substrate_a") or r.get("substrate_a_normalized") for r in rows)
+    norm_b = normalize_substrates(r.get("substrate_b") or r.get("substrate_b_normalized") for r in rows)
+
+    groups: dict[tuple, list[str]] = defaultdict(list)
+    for row, new_a, new_b in zip(rows, norm_a, norm_b):
+        old_a, old_b = row.get("substrate_a_normalized"), row.get("substrate_b_normalized")
+        if (old_a, old_b) == (new_a, new_b):
+            continue
+        groups[(new_a, new_b)].append(row["id"])
+        if report is not None:
+            report.changed += 1
+            for old, new in ((old_a, new_a), (old_b, new_b)):
+                if old != new:
+                    report.transitions[(old, new)] += 1
+    return groups
+
+
+def _fetch_chunk(db, table: str, after_id: Optional[str], chunk_size: int) -> list[dict]:
+    query = db.table(table).select(_COLUMNS)
+    if after_id:
+        query = query.gt("id", after_id)
+    return query.order("id").limit(chunk_size).execute().data or []
+
+
+def _apply(db, table: str, groups: dict[tuple, list[str]], report: TableReport) -> None:
+    for (new_a, new_b), ids in groups.items():
+        try:
+            db.table(table).update({
+                "substrate_a_normalized": new_a,
+                "substrate_b_normalized": new_b,
+            }).in_("id", ids).execute()
+            report.updated += len(ids)
+        except Exception as e:
+            logger.warning(f"Substrate backfill update failed on {table} ({len(ids)} rows): {e}")
+            report.failed_ids.extend(ids)
+
+
+def backfill_table(
+    db,
+    table: str,
+    *,
+    after_id: Optional[str] = None,
+    chunk_size: int = 500,
+    dry_run: bool = False,
+    rows_per_second: Optional[float] = None,
+    max_rows: Optional[int] = None,
+    on_chunk: Optional[Callable[[TableReport], None]] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> TableReport:
+    """Re-normalize one table from after_id onwards.
+
+    rows_per_second caps the scan rate (sleeping between chunks) so a 100k+
+    row run does not saturate the database; on_chunk is called after every
+    chunk with the running report, e.g. to persist report.last_id.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unsupported table for substrate backfill: {table}")
+
+    report = TableReport(table=table, last_id=after_id, checkpoint_id=after_id)
+    started = time.monotonic()
+
+    while max_rows is None or report.scanned < max_rows:
+        limit = chunk_size if max_rows is None else min(chunk_size, max_rows - report.scanned)
+        rows = _fetch_chunk(db, table, report.last_id, limit)
+        if not rows:
+            break
+
+        groups = plan_updates(rows, report)
+        if groups and not dry_run:
+            _apply(db, table, groups, report)
+
+        report.scanned += len(rows)
+        report.last_id = rows[-1]["id"]
+        if not report.failed_ids:
+            report.checkpoint_id = report.last_id
+        report.seconds = time.monotonic() - started
+        if on_chunk:
+            on_chunk(report)
+        if len(rows) < limit:
+            break
+
+        if rows_per_second:
+            ahead = report.scanned / rows_per_second - report.seconds
+            if ahead > 0:
+                sleep(ahead)
+
+    report.seconds = time.monotonic() - started
+    return report
+
+
+def rebuild_pattern_counts(db) -> int:
+    """Re-derive pattern_daily_counts from the current normalized keys; returns buckets written."""
+    data = db.rpc("rebuild_pattern_daily_counts", {}).execute().data
+    return int(data or 0)
@@ -0,0 +1,201 @@
+"""TDS (technical data sheet) extraction pipeline for a single PDF.
+
+Shared by the single-upload endpoint (POST /v1/products/extract-tds) and
+bulk ingestion (services.tds_ingest): storage upload, Claude document
+extraction, and mapping the extracted JSON onto a product_specifications row.
+
+Everything is keyed by the SHA-256 of the PDF bytes. The stored object lives
+at tds/sha256/<hash>.pdf, so identical uploads share one object, and
+tds_extractions maps each hash to its extraction JSON and product id so a
+repeat upload skips Claude entirely unless a refresh is forced.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import httpx
+
+from config import settings
+from prompts.tds_extraction import get_tds_extraction_system_prompt
+from services.product_catalog import product_slugs
+
+logger = logging.getLogger(__name__)
+
+MAX_PDF_SIZE = 10 * 1024 * 1024
+
+TDS_BUCKET = "tds-documents"
+
+_USER_PROMPT = (
+    "Extract structured product specification data from this TDS PDF document. "
+    "Provide confidence scores for each extracted field."
+)
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def validate_pdf(filename: Optional[str], content: bytes) -> None:
+    """Raise ValueError for non-PDF names or oversize files."""
+    if not filename or not filename.lower().endswith(".pdf"):
+        raise ValueError("Only PDF files are accepted for TDS extraction")
+    if len(content) > MAX_PDF_SIZE:
+        raise ValueError("File size exceeds 10MB limit")
+
+
+def storage_path_for(digest: str) -> str:
+    return f"tds/sha256/{digest}.pdf"
+
+
+def upload_tds(db, digest: str, content: bytes) -> Optional[str]:
+    """Store the PDF under its content hash; returns its public URL, or None on failure (non-fatal).
+
+    Identical bytes map to the same object, so re-uploads overwrite in place
+    instead of creating a new object.
+    """
+    storage_path = storage_path_for(digest)
+    bucket = db.storage.from_(TDS_BUCKET)
+    try:
+        bucket.upload(
+            storage_path,
+            content,
+            file_options={"content-type": "application/pdf", "upsert": "true"},
+        )
+        return f"{bucket.get_public_url(storage_path)}"
+    except Exception as e:
+        logger.warning(f"Storage upload failed (non-fatal): {e}")
+        return None
+
+
+def get_cached_extraction(db, digest: str) -> Optional[dict]:
+    """tds_extractions row for this content hash, or None."""
+    try:
+        rows = (
+            db.table("tds_extractions")
+            .select("content_hash, product_id, tds_file_url, extracted")
+            .eq("content_hash", digest)
+            .execute()
+        ).data or []
+    except Exception as e:
+        logger.warning(f"TDS extraction cache lookup failed: {e}")
+        return None
+    return rows[0] if rows else None
+
+
+def extraction_cache_row(digest: str, record: dict, extracted: dict) -> dict:
+    return {
+        "content_hash": digest,
+        "product_id": record["id"],
+        "tds_file_url": record.get("tds_file_url"),
+        "extracted": extracted,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save_extractions(db, rows: list[dict]) -> None:
+    """Best-effort cache write; a miss only costs a repeat extraction."""
+    if not rows:
+        return
+    try:
+        db.table("tds_extractions").upsert(rows, on_conflict="content_hash").execute()
+    except Exception as e:
+        logger.warning(f"TDS extraction cache write failed: {e}")
+
+
+def _parse_extraction(data: dict) -> dict:
+    content = data.get("content", [])
+    if not content or content[0].get("type") != "text":
+        return {}
+    text = content[0]["text"]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        if "```json" in text:
+            return json.loads(text.split("```json")[1].split("```")[0].strip())
+        if "```" in text:
+            return json.loads(text.split("```")[1].split("```")[0].strip())
+        return {}
+
+
+async def extract_fields(content: bytes, client: Optional[httpx.AsyncClient] = None) -> dict:
+    """Send the PDF to Claude as a document block and return the parsed JSON."""
+    pdf_b64 = base64.standard_b64encode(content).decode("utf-8")
+    headers = {
+        "x-api-key": settings.anthropic_api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+    payload = {
+        "model": settings.anthropic_model,
+        "max_tokens": 4096,
+        "system": get_tds_extraction_system_prompt(),
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "application/pdf",
+                            "data": pdf_b64,
+                        },
+                    },
+                    {"type": "text", "text": _USER_PROMPT},
+                ],
+            }
+        ],
+    }
+
+    if client is None:
+        async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as own_client:
+            response = await own_client.post("https://api.anthropic.com/v1/messages", headers=headers, json=payload)
+    else:
+        response = await client.post("https://api.anthropic.com/v1/messages", headers=headers, json=payload)
+    response.raise_for_status()
+    return _parse_extraction(response.json())
+
+
+def build_product_record(
+    extracted: dict[str, Any],
+    filename: Optional[str],
+    tds_file_url: Optional[str],
+    product_id: Optional[str] = None,
+) -> dict[str, Any]:
+    """Map Claude's extraction onto a product_specifications row.
+
+    Passing an existing product_id (forced refresh) leaves created_at and
+    manufacturer_claimed alone, so a refresh never unclaims a product.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    record = {
+        "id": product_id or str(uuid.uuid4()),
+        "product_name": extracted.get("product_name", filename or "Unknown Product"),
+        "manufacturer": extracted.get("manufacturer"),
+        "chemistry_type": extracted.get("chemistry_type"),
+        "recommended_substrates": extracted.get("recommended_substrates", []),
+        "surface_prep_requirements": extracted.get("surface_prep_requirements"),
+        "cure_schedule": extracted.get("cure_schedule", {}),
+        "operating_temp_min_c": extracted.get("operating_temp_min_c"),
+        "operating_temp_max_c": extracted.get("operating_temp_max_c"),
+        "mechanical_properties": extracted.get("mechanical_properties", {}),
+        "shelf_life_months": extracted.get("shelf_life_months"),
+        "mix_ratio": extracted.get("mix_ratio"),
+        "pot_life_minutes": extracted.get("pot_life_minutes"),
+        "fixture_time_minutes": extracted.get("fixture_time_minutes"),
+        "tds_file_url": tds_file_url,
+        "extraction_confidence": extracted.get("extraction_confidence", {}),
+        "manufacturer_claimed": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+    record.update(product_slugs(record["manufacturer"], record["product_name"]))
+    if product_id:
+        del record["created_at"]
+        del record["manufacturer_claimed"]
+    return record
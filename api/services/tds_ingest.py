@@ -0,0 +1,479 @@
+"""Bulk TDS ingestion: many PDFs (or zips of PDFs) in one batch.
+
+Documents are deduplicated by SHA-256 of their bytes, extracted by a bounded
+pool of concurrent workers, and written to product_specifications with bulk
+upserts every `tds_ingest_flush_size` completions.
+
+Progress is recorded per document in tds_ingest_items keyed by
+(batch_id, content_hash). Re-submitting the same files with the same
+batch_id resumes the batch: documents already marked done are skipped, so
+an interrupted run never pays for the same extraction twice. A batch belongs
+to the user who created it (claim_batch); only they can resume it. New
+products get an id derived from (batch_id, content_hash), so a document
+re-extracted after a partially failed flush overwrites its own row instead
+of creating a duplicate product.
+
+Across batches, PDFs already in the tds_extractions content-hash cache map
+to their existing product without a Claude call (unless force_refresh).
+"""
+
+import asyncio
+import io
+import logging
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional
+
+import httpx
+
+from config import settings
+from services.product_catalog import invalidate_catalog
+from services.tds_extraction import (
+    MAX_PDF_SIZE,
+    build_product_record,
+    content_hash,
+    extract_fields,
+    extraction_cache_row,
+    upload_tds,
+    validate_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+# Zip members are read into memory; cap the uncompressed total per archive
+# (the whole batch is capped by tds_ingest_max_expanded_mb)
+MAX_ZIP_UNCOMPRESSED = 500 * 1024 * 1024
+
+_LEDGER_CHUNK = 500
+
+
+class BatchTooLarge(ValueError):
+    """The batch's documents expand past tds_ingest_max_expanded_mb."""
+
+
+@dataclass
+class TDSDocument:
+    filename: str
+    content: bytes
+    content_hash: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.content_hash = content_hash(self.content)
+
+
+@dataclass
+class BatchInput:
+    documents: list[TDSDocument] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    rejected: list[dict] = field(default_factory=list)
+    received: int = 0
+
+
+def _expand_zip(filename: str, content: bytes, budget: int) -> Iterable[tuple[str, Optional[bytes]]]:
+    """Yield (member name, bytes); oversize members yield None instead of being read.
+
+    ``budget`` is what is left of the batch-wide expansion cap.
+    """
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        members = [
+            m for m in archive.infolist()
+            if not m.is_dir() and not m.filename.startswith("__MACOSX/")
+        ]
+        readable = sum(m.file_size for m in members if m.file_size <= MAX_PDF_SIZE)
+        if sum(m.file_size for m in members) > MAX_ZIP_UNCOMPRESSED:
+            raise ValueError(f"{filename}: archive expands beyond {MAX_ZIP_UNCOMPRESSED // (1024 * 1024)}MB")
+        if readable > budget:
+            raise BatchTooLarge(f"{filename}: batch expands beyond {settings.tds_ingest_max_expanded_mb}MB")
+        for member in members:
+            if member.file_size > MAX_PDF_SIZE:
+                yield member.filename, None
+                continue
+            yield member.filename, archive.read(member)
+
+
+def collect_documents(
+    uploads: Iterable[tuple[str, bytes]],
+    max_files: Optional[int] = None,
+    max_expanded_bytes: Optional[int] = None,
+) -> BatchInput:
+    """Expand zips, validate PDFs and drop duplicate content.
+
+    Raises BatchTooLarge once the documents read (zip members included) pass
+    max_expanded_bytes, default tds_ingest_max_expanded_mb.
+    """
+    max_files = max_files or settings.tds_ingest_max_files
+    budget = max_expanded_bytes or settings.tds_ingest_max_expanded_mb * 1024 * 1024
+    batch = BatchInput()
+    seen: set[str] = set()
+
+    def _add(name: str, content: Optional[bytes]) -> None:
+        batch.received += 1
+        if content is None:
+            batch.rejected.append({"filename": name, "error": "File size exceeds 10MB limit"})
+            return
+        try:
+            validate_pdf(name, content)
+        except ValueError as e:
+            batch.rejected.append({"filename": name, "error": str(e)})
+            return
+        doc = TDSDocument(filename=name.rsplit("/", 1)[-1], content=content)
+        if doc.content_hash in seen:
+            batch.duplicates.append(name)
+            return
+        if len(batch.documents) >= max_files:
+            batch.rejected.append({"filename": name, "error": f"Batch limit of {max_files} documents reached"})
+            return
+        seen.add(doc.content_hash)
+        batch.documents.append(doc)
+
+    for name, content in uploads:
+        if (name or "").lower().endswith(".zip"):
+            try:
+                for member_name, member_content in _expand_zip(name, content, budget):
+                    budget -= len(member_content or b"")
+                    _add(member_name, member_content)
+            except BatchTooLarge:
+                raise
+            except (zipfile.BadZipFile, ValueError) as e:
+                batch.rejected.append({"filename": name, "error": str(e)})
+            continue
+        budget -= len(content)
+        if budget < 0:
+            raise BatchTooLarge(f"{name}: batch expands beyond {settings.tds_ingest_max_expanded_mb}MB")
+        _add(name, content)
+    return batch
+
+
+def _completed(db, batch_id: str) -> dict[str, Optional[str]]:
+    """content_hash → product_id for documents already ingested in this batch."""
+    done: dict[str, Optional[str]] = {}
+    start = 0
+    while True:
+        rows = (
+            db.table("tds_ingest_items")
+            .select("content_hash, product_id")
+            .eq("batch_id", batch_id)
+            .eq("status", "done")
+            .range(start, start + _LEDGER_CHUNK - 1)
+            .execute()
+        ).data or []
+        done.update({r["content_hash"]: r.get("product_id") for r in rows})
+        if len(rows) < _LEDGER_CHUNK:
+            return done
+        start += _LEDGER_CHUNK
+
+
+def _cached_extractions(db, hashes: list[str]) -> dict[str, dict]:
+    """content_hash → tds_extractions row, limited to rows whose product still exists."""
+    cached: dict[str, dict] = {}
+    for i in range(0, len(hashes), _LEDGER_CHUNK):
+        chunk = hashes[i:i + _LEDGER_CHUNK]
+        try:
+            rows = (
+                db.table("tds_extractions")
+                .select("content_hash, product_id, tds_file_url")
+                .in_("content_hash", chunk)
+                .execute()
+            ).data or []
+        except Exception as e:
+            logger.warning(f"TDS extraction cache lookup failed: {e}")
+            return {}
+        cached.update({r["content_hash"]: r for r in rows if r.get("product_id")})
+    if not cached:
+        return cached
+    product_ids = list({r["product_id"] for r in cached.values()})
+    existing: set[str] = set()
+    for i in range(0, len(product_ids), _LEDGER_CHUNK):
+        rows = (
+            db.table("product_specifications")
+            .select("id")
+            .in_("id", product_ids[i:i + _LEDGER_CHUNK])
+            .execute()
+        ).data or []
+        existing.update(str(r["id"]) for r in rows)
+    return {h: r for h, r in cached.items() if str(r["product_id"]) in existing}
+
+
+def _batch_owner(db, batch_id: str) -> list[dict]:
+    return (
+        db.table("tds_ingest_batches")
+        .select("user_id")
+        .eq("id", batch_id)
+        .execute()
+    ).data or []
+
+
+def claim_batch(db, batch_id: str, user_id: str) -> bool:
+    """Create the batch for user_id, or confirm an existing batch is theirs."""
+    rows = _batch_owner(db, batch_id)
+    if not rows:
+        try:
+            db.table("tds_ingest_batches").insert({
+                "id": batch_id,
+                "user_id": user_id,
+                "status": "running",
+            }).execute()
+            return True
+        except Exception as e:
+            # Most likely a concurrent request created it first
+            logger.info(f"TDS ingest batch {batch_id} insert failed, re-reading owner: {e}")
+            rows = _batch_owner(db, batch_id)
+    return bool(rows) and str(rows[0].get("user_id")) == str(user_id)
+
+
+def product_id_for(batch_id: str, digest: str) -> str:
+    """Stable id for the product a batch creates from one document."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"tds-ingest:{batch_id}:{digest}"))
+
+
+def _save_batch(db, batch_id: str, user_id: str, status: str, report: Optional[dict] = None) -> None:
+    row: dict[str, Any] = {
+        "status": status,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if report is not None:
+        row["report"] = report
+    try:
+        db.table("tds_ingest_batches").update(row).eq("id", batch_id).eq("user_id", user_id).execute()
+    except Exception as e:
+        logger.warning(f"TDS ingest batch {batch_id} status write failed: {e}")
+
+
+def _group_by_columns(records: list[dict]) -> list[list[dict]]:
+    groups: dict[frozenset, list[dict]] = {}
+    for record in records:
+        groups.setdefault(frozenset(record), []).append(record)
+    return list(groups.values())
+
+
+class _Flusher:
+    """Buffers finished documents and writes them in bulk."""
+
+    def __init__(self, db, batch_id: str, flush_size: int):
+        self.db = db
+        self.batch_id = batch_id
+        self.flush_size = flush_size
+        self.records: list[dict] = []
+        self.cache_rows: list[dict] = []
+        self.ledger: list[dict] = []
+        self.succeeded = 0
+        self.cache_hits = 0
+        self.errors: list[dict] = []
+        self._lock = asyncio.Lock()
+
+    async def add_success(self, doc: TDSDocument, record: dict, extracted: dict) -> None:
+        async with self._lock:
+            self.records.append(record)
+            self.cache_rows.append(extraction_cache_row(doc.content_hash, record, extracted))
+            self.ledger.append(self._ledger_row(doc, "done", product_id=record["id"]))
+            if len(self.ledger) >= self.flush_size:
+                await self._flush_locked()
+
+    async def add_cached(self, doc: TDSDocument, product_id: str) -> None:
+        async with self._lock:
+            self.cache_hits += 1
+            self.ledger.append(self._ledger_row(doc, "done", product_id=product_id))
+            if len(self.ledger) >= self.flush_size:
+                await self._flush_locked()
+
+    async def add_failure(self, doc: TDSDocument, error: str) -> None:
+        async with self._lock:
+            self.errors.append({"filename": doc.filename, "error": error})
+            self.ledger.append(self._ledger_row(doc, "failed", error=error))
+            if len(self.ledger) >= self.flush_size:
+                await self._flush_locked()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._flush_locked()
+
+    def _ledger_row(self, doc: TDSDocument, status: str, product_id: Optional[str] = None,
+                    error: Optional[str] = None) -> dict:
+        return {
+            "batch_id": self.batch_id,
+            "content_hash": doc.content_hash,
+            "filename": doc.filename,
+            "status": status,
+            "product_id": product_id,
+            "error": error,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def _flush_locked(self) -> None:
+        if not self.ledger:
+            return
+        records, cache_rows, ledger = self.records, self.cache_rows, self.ledger
+        self.records, self.cache_rows, self.ledger = [], [], []
+        try:
+            await asyncio.to_thread(self._write, records, cache_rows, ledger)
+            self.succeeded += len(records)
+        except Exception as e:
+            logger.exception(f"TDS ingest bulk write failed for batch {self.batch_id}: {e}")
+            error = f"Database error: {str(e)[:200]}"
+            failed_ids = {r["id"] for r in records}
+            # Still record this chunk's outcomes; unwritten products become failures to retry on resume
+            fallback = []
+            for row in ledger:
+                if row["product_id"] in failed_ids:
+                    self.errors.append({"filename": row["filename"], "error": error})
+                    row = {**row, "status": "failed", "product_id": None, "error": error}
+                fallback.append(row)
+            try:
+                await asyncio.to_thread(self._write_ledger, fallback)
+            except Exception as ledger_error:
+                logger.warning(f"TDS ingest ledger write failed for batch {self.batch_id}: {ledger_error}")
+
+    def _write(self, records: list[dict], cache_rows: list[dict], ledger: list[dict]) -> None:
+        # Refreshed rows omit created_at/manufacturer_claimed; postgrest sends the union of
+        # keys and nulls the missing ones, so rows with different columns go in separate calls
+        for group in _group_by_columns(records):
+            self.db.table("product_specifications").upsert(group, on_conflict="id").execute()
+        if cache_rows:
+            self.db.table("tds_extractions").upsert(cache_rows, on_conflict="content_hash").execute()
+        # Ledger last: a document only counts as done once its product row exists
+        self._write_ledger(ledger)
+
+    def _write_ledger(self, ledger: list[dict]) -> None:
+        self.db.table("tds_ingest_items").upsert(ledger, on_conflict="batch_id,content_hash").execute()
+
+
+async def ingest_tds_batch(
+    db,
+    user_id: str,
+    batch: BatchInput,
+    batch_id: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    flush_size: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    force_refresh: bool = False,
+) -> dict:
+    """Extract and store every pending document in the batch; returns the batch report.
+
+    With force_refresh, cached PDFs are re-extracted into their existing products.
+    """
+    batch_id = str(uuid.UUID(batch_id)) if batch_id else str(uuid.uuid4())
+    concurrency = max(1, concurrency or settings.tds_ingest_concurrency)
+    started = time.perf_counter()
+
+    if not await asyncio.to_thread(claim_batch, db, batch_id, user_id):
+        raise PermissionError(f"TDS ingest batch {batch_id} belongs to another user")
+    _save_batch(db, batch_id, user_id, "running")
+    done = await asyncio.to_thread(_completed, db, batch_id)
+    pending = [d for d in batch.documents if d.content_hash not in done]
+    cached = await asyncio.to_thread(_cached_extractions, db, [d.content_hash for d in pending])
+    flusher = _Flusher(db, batch_id, flush_size or settings.tds_ingest_flush_size)
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = 0
+
+    async with httpx.AsyncClient(timeout=settings.ai_timeout_seconds) as client:
+
+        async def _worker(doc: TDSDocument) -> None:
+            nonlocal finished
+            hit = cached.get(doc.content_hash)
+            async with semaphore:
+                try:
+                    if hit and not force_refresh:
+                        await flusher.add_cached(doc, hit["product_id"])
+                    else:
+                        tds_file_url = await asyncio.to_thread(upload_tds, db, doc.content_hash, doc.content)
+                        extracted = await extract_fields(doc.content, client=client)
+                        record = build_product_record(
+                            extracted, doc.filename, tds_file_url,
+                            product_id=hit["product_id"] if hit else None,
+                        )
+                        if not hit:
+                            record["id"] = product_id_for(batch_id, doc.content_hash)
+                        await flusher.add_success(doc, record, extracted)
+                except Exception as e:
+                    logger.warning(f"TDS ingest failed for {doc.filename}: {e}")
+                    await flusher.add_failure(doc, str(e)[:500])
+            finished += 1
+            if on_progress:
+                on_progress(finished, len(pending))
+
+        await asyncio.gather(*(_worker(doc) for doc in pending))
+
+    await flusher.flush()
+    if flusher.succeeded:
+        invalidate_catalog()
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "batch_id": batch_id,
+        "received": batch.received,
+        "unique": len(batch.documents),
+        "duplicates": len(batch.duplicates),
+        "rejected": batch.rejected,
+        "skipped_already_done": len(batch.documents) - len(pending),
+        "succeeded": flusher.succeeded,
+        "cache_hits": flusher.cache_hits,
+        "failed": len(flusher.errors),
+        "errors": flusher.errors,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "docs_per_minute": round(len(pending) / elapsed * 60, 1) if elapsed > 0 and pending else 0.0,
+    }
+    _save_batch(db, batch_id, user_id, "completed_with_errors" if flusher.errors else "completed", report)
+    logger.info(
+        f"TDS ingest {batch_id}: {flusher.succeeded} ok, {len(flusher.errors)} failed, "
+        f"{report['skipped_already_done']} skipped in {elapsed:.1f}s"
+    )
+    return report
+
+
+_running: set[asyncio.Task] = set()
+
+
+def start_ingest(
+    db,
+    user_id: str,
+    batch: BatchInput,
+    batch_id: Optional[str] = None,
+    force_refresh: bool = False,
+) -> str:
+    """Run a batch in the background; progress is readable via get_batch_status."""
+    batch_id = batch_id or str(uuid.uuid4())
+    task = asyncio.create_task(
+        _run_ingest(db, user_id, batch, batch_id=batch_id, force_refresh=force_refresh)
+    )
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return batch_id
+
+
+async def _run_ingest(db, user_id: str, batch: BatchInput, batch_id: str, force_refresh: bool) -> None:
+    """Background wrapper: a batch-level failure is logged and marks the batch failed."""
+    try:
+        await ingest_tds_batch(db, user_id, batch, batch_id=batch_id, force_refresh=force_refresh)
+    except Exception as e:
+        logger.exception(f"TDS ingest batch {batch_id} failed: {e}")
+        await asyncio.to_thread(
+            _save_batch, db, batch_id, user_id, "failed", {"batch_id": batch_id, "error": str(e)[:500]},
+        )
+
+
+def get_batch_status(db, batch_id: str, user_id: str) -> Optional[dict]:
+    """Batch row plus live per-status item counts; None if not found for this user."""
+    rows = (
+        db.table("tds_ingest_batches")
+        .select("id, status, report, created_at, updated_at")
+        .eq("id", batch_id)
+        .eq("user_id", user_id)
+        .execute()
+    ).data or []
+    if not rows:
+        return None
+    status_row = rows[0]
+    items = (
+        db.table("tds_ingest_items")
+        .select("status")
+        .eq("batch_id", batch_id)
+        .execute()
+    ).data or []
+    counts: dict[str, int] = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return {**status_row, "items": counts}
@@ -0,0 +1,84 @@
+"""In-memory snapshot of the report_templates catalog.
+
+Templates only change with migrations, so the whole table is read once and
+served from memory by the templates router. The snapshot is loaded at
+startup (warm_template_cache), rebuilt after `report_template_cache_ttl_seconds`,
+and dropped on demand by invalidate_templates(), which also bumps
+template_version() for anything derived from it. POST /admin/templates/refresh
+reloads the worker that serves it (reload_templates, which reports load
+failures); other workers follow within the TTL.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from config import settings
+from database import get_supabase
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state: dict[str, Any] = {"rows": None, "by_id": {}, "loaded_at": 0.0, "version": 0}
+
+
+def _load_rows(db) -> list[dict]:
+    return db.table("report_templates").select("*").order("name", desc=False).execute().data or []
+
+
+def _snapshot() -> tuple[list[dict], dict[str, dict]]:
+    """Current (rows, rows by id), reloading if stale or invalidated."""
+    rows = _state["rows"]
+    if rows is not None and time.monotonic() - _state["loaded_at"] < settings.report_template_cache_ttl_seconds:
+        return rows, _state["by_id"]
+
+    with _lock:
+        rows = _state["rows"]
+        if rows is not None and time.monotonic() - _state["loaded_at"] < settings.report_template_cache_ttl_seconds:
+            return rows, _state["by_id"]
+        version = _state["version"]
+        rows = _load_rows(get_supabase())
+        by_id = {str(r.get("id")): r for r in rows}
+        # An invalidation during the load leaves the snapshot stale for the next caller
+        if _state["version"] == version:
+            _state.update({"rows": rows, "by_id": by_id, "loaded_at": time.monotonic()})
+        logger.info(f"Report template catalog loaded: {len(rows)} templates")
+        return rows, by_id
+
+
+def list_active_templates() -> list[dict]:
+    """Active templates ordered by name."""
+    rows, _ = _snapshot()
+    return [r for r in rows if r.get("is_active")]
+
+
+def get_template(template_id: str) -> Optional[dict]:
+    _, by_id = _snapshot()
+    return by_id.get(template_id)
+
+
+def invalidate_templates() -> None:
+    """Drop the snapshot; the next read reloads it."""
+    _state["version"] += 1
+    _state["rows"] = None
+
+
+def reload_templates() -> int:
+    """Invalidate and load the snapshot now, raising if the load fails. Returns the template count."""
+    invalidate_templates()
+    rows, _ = _snapshot()
+    return len(rows)
+
+
+def template_version() -> int:
+    """Counter bumped by every invalidate_templates()."""
+    return _state["version"]
+
+
+def warm_template_cache() -> None:
+    """Load the snapshot at startup (best-effort; requests retry the load)."""
+    try:
+        _snapshot()
+    except Exception as e:
+        logger.warning(f"Report template catalog warm-up failed: {e}")
@@ -1,7 +1,27 @@
-"""Monthly usage tracking and plan limit enforcement."""
+"""Monthly usage tracking and plan limit enforcement.
+
+Counting is a single database call: the increment_usage RPC (migration 024)
+applies the monthly reset and the +1 in one atomic UPDATE and returns the new
+counters. Those counters are kept in a short-lived per-process quota cache,
+so quota checks in the following requests see this worker's latest counts
+even if the users row they were handed was read before the increment landed.
+Checks never write: a due reset is applied to the in-memory user only and
+persisted by the next increment, so an idle account keeps last period's
+counters in its users row. Anything showing raw rows (the admin user list)
+passes them through check_and_reset_usage first. Code that edits counters or
+plans outside increment_usage calls invalidate_usage_cache.
+
+Guided sessions are counted the same way (guided_sessions_this_month,
+migration 025); reconcile_guided_session_usage repairs that counter from
+investigation_sessions on a cron schedule.
+"""
 
 import logging
+import threading
+import time
 from datetime import datetime, timezone
+from typing import Optional
+
 from dateutil.relativedelta import relativedelta
 
 from config import settings
@@ -9,6 +29,9 @@ from database import get_supabase
 
 logger = logging.getLogger(__name__)
 
+USAGE_RPC = "increment_usage"
+_COUNTERS = ("analyses_this_month", "specs_this_month", "guided_sessions_this_month")
+
 
 def _get_reset_date() -> str:
     """Get the first of next month as reset date."""
@@ -17,40 +40,98 @@ def _get_reset_date() -> str:
     return next_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
 
 
-def check_and_reset_usage(user: dict) -> dict:
-    """Check if usage counters need to be reset (monthly). Returns updated user."""
-    if user.get("holdout_test"):
+def _parse_date(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class _QuotaCache:
+    """Per-user counters returned by increment_usage, kept for a few seconds."""
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        # {user_id: (row, expires_at)}
+        self._rows: dict[str, tuple[dict, float]] = {}
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._rows.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                del self._rows[user_id]
+                return None
+            return entry[0]
+
+    def put(self, user_id: str, row: dict) -> None:
+        with self._lock:
+            if len(self._rows) > 10_000:
+                now = time.monotonic()
+                self._rows = {k: v for k, v in self._rows.items() if v[1] > now}
+            self._rows[user_id] = (dict(row), time.monotonic() + self._ttl)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._rows.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+
+_quota_cache = _QuotaCache(settings.usage_quota_cache_ttl_seconds)
+
+
+def invalidate_usage_cache(user_id: str) -> None:
+    """Forget cached counters (e.g. after an admin edits a user's plan)."""
+    _quota_cache.invalidate(user_id)
+
+
+def _with_cached_usage(user: dict) -> dict:
+    """Overlay the freshest known counters onto ``user`` (mutates and returns it).
+
+    Within one billing period counters only grow, so the larger of the cached
+    and row values wins; a cached row from a later period replaces the row's.
+    """
+    cached = _quota_cache.get(user.get("id") or "")
+    if not cached:
         return user
+    cached_reset = _parse_date(cached.get("analyses_reset_date"))
+    row_reset = _parse_date(user.get("analyses_reset_date"))
+    if row_reset is None or (cached_reset is not None and cached_reset > row_reset):
+        user.update({k: cached.get(k, 0) for k in _COUNTERS})
+        user["analyses_reset_date"] = cached.get("analyses_reset_date")
+    elif cached_reset == row_reset:
+        for k in _COUNTERS:
+            user[k] = max(user.get(k) or 0, cached.get(k) or 0)
+    return user
 
-    now = datetime.now(timezone.utc)
 
-    analyses_reset = user.get("analyses_reset_date")
-    needs_reset = False
+def check_and_reset_usage(user: dict) -> dict:
+    """Apply the monthly reset to ``user`` in memory when it is due. Returns the user.
 
-    if analyses_reset:
-        try:
-            reset_dt = datetime.fromisoformat(analyses_reset.replace("Z", "+00:00"))
-            if now >= reset_dt:
-                needs_reset = True
-        except (ValueError, TypeError):
-            needs_reset = True
-    else:
-        needs_reset = True
+    Nothing is written here; increment_usage performs the same reset
+    atomically with the next counted use.
+    """
+    if user.get("holdout_test"):
+        return user
 
-    if needs_reset:
+    reset_dt = _parse_date(user.get("analyses_reset_date"))
+    if reset_dt is None or datetime.now(timezone.utc) >= reset_dt:
         reset_date = _get_reset_date()
-        update_data = {
+        user.update({
             "analyses_this_month": 0,
             "specs_this_month": 0,
+            "guided_sessions_this_month": 0,
             "analyses_reset_date": reset_date,
             "specs_reset_date": reset_date,
-        }
-        try:
-            db = get_supabase()
-            db.table("users").update(update_data).eq("id", user["id"]).execute()
-            user.update(update_data)
-        except Exception as e:
-            logger.warning("Usage counter reset failed for user %s: %s", user.get("id"), e)
+        })
 
     return user
 
@@ -60,11 +141,17 @@ def _is_admin(user: dict) -> bool:
     return user.get("role") == "admin"
 
 
+def _current_usage(user: dict) -> dict:
+    if user.get("holdout_test"):
+        return user
+    return check_and_reset_usage(_with_cached_usage(user))
+
+
 def can_use_analysis(user: dict) -> bool:
     """Check if the user can run another analysis."""
     if _is_admin(user):
         return True
-    user = check_and_reset_usage(user)
+    user = _current_usage(user)
     plan = user.get("plan", "free")
     limit = settings.plan_limits.get(plan, settings.plan_limits["free"])["analyses"]
     used = user.get("analyses_this_month", 0)
@@ -75,50 +162,62 @@ def can_use_spec(user: dict) -> bool:
     """Check if the user can run another spec."""
     if _is_admin(user):
         return True
-    user = check_and_reset_usage(user)
+    user = _current_usage(user)
     plan = user.get("plan", "free")
     limit = settings.plan_limits.get(plan, settings.plan_limits["free"])["specs"]
     used = user.get("specs_this_month", 0)
     return used < limit
 
 
-def increment_analysis_usage(user_id: str):
-    """Increment the analysis counter for a user."""
+def _increment_usage(user_id: str, kind: str) -> Optional[dict]:
+    """Count one use atomically; returns the new counters (None on failure)."""
     if user_id.startswith("holdout-"):
-        return
+        return None
 
     try:
         db = get_supabase()
-        user = db.table("users").select("analyses_this_month").eq("id", user_id).execute()
-        if user.data:
-            current = user.data[0].get("analyses_this_month", 0)
-            db.table("users").update(
-                {"analyses_this_month": current + 1}
-            ).eq("id", user_id).execute()
+        data = db.rpc(USAGE_RPC, {"p_user_id": user_id, "p_kind": kind}).execute().data
+        row = data[0] if isinstance(data, list) and data else data
+        if isinstance(row, dict):
+            _quota_cache.put(user_id, row)
+            return row
     except Exception as e:
-        logger.warning("Analysis usage increment failed for user %s: %s", user_id, e)
+        logger.warning("%s usage increment failed for user %s: %s", kind.capitalize(), user_id, e)
+    return None
 
 
-def increment_spec_usage(user_id: str):
+def increment_analysis_usage(user_id: str) -> Optional[dict]:
+    """Increment the analysis counter for a user."""
+    return _increment_usage(user_id, "analysis")
+
+
+def increment_spec_usage(user_id: str) -> Optional[dict]:
     """Increment the spec counter for a user."""
-    if user_id.startswith("holdout-"):
-        return
+    return _increment_usage(user_id, "spec")
 
-    try:
-        db = get_supabase()
-        user = db.table("users").select("specs_this_month").eq("id", user_id).execute()
-        if user.data:
-            current = user.data[0].get("specs_this_month", 0)
-            db.table("users").update(
-                {"specs_this_month": current + 1}
-            ).eq("id", user_id).execute()
-    except Exception as e:
-        logger.warning("Spec usage increment failed for user %s: %s", user_id, e)
+
+def increment_guided_session_usage(user_id: str) -> Optional[dict]:
+    """Increment the guided session counter for a user."""
+    return _increment_usage(user_id, "guided_session")
+
+
+def guided_sessions_used(user: dict) -> int:
+    """Guided sessions started this period, from the user row and quota cache (no query)."""
+    return _current_usage(user).get("guided_sessions_this_month") or 0
+
+
+def reconcile_guided_session_usage() -> dict:
+    """Reset guided session counters to the actual count of this month's sessions."""
+    db = get_supabase()
+    repaired = db.rpc("reconcile_guided_session_counts", {}).execute().data
+    # Repairs can lower counters, which the max() overlay of cached rows would hide
+    _quota_cache.clear()
+    return {"users_repaired": int(repaired or 0)}
 
 
 def get_usage(user: dict) -> dict:
     """Get current usage stats for a user."""
-    user = check_and_reset_usage(user)
+    user = _current_usage(user)
     plan = user.get("plan", "free")
     limits = settings.plan_limits.get(plan, settings.plan_limits["free"])
 
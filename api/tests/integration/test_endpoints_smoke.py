@@ -116,6 +116,7 @@ class TestCronEndpoints:
         "/v1/cron/send-followups",
         "/v1/cron/aggregate-knowledge",
         "/v1/cron/aggregate-metrics",
+        "/v1/cron/reconcile-usage",
     ])
     async def test_cron_no_secret_returns_422(self, path, mock_supabase_global, mock_jwks):
         """Without X-Cron-Secret header, FastAPI returns 422 (missing required header)."""
@@ -130,6 +131,7 @@ class TestCronEndpoints:
         "/v1/cron/send-followups",
         "/v1/cron/aggregate-knowledge",
         "/v1/cron/aggregate-metrics",
+        "/v1/cron/reconcile-usage",
     ])
     async def test_cron_wrong_secret_returns_403(self, path, mock_supabase_global, mock_jwks):
         from main import app
@@ -68,6 +68,7 @@ PROTECTED_ENDPOINTS = [
     ("PATCH", "/v1/admin/users/some-fake-id"),
     ("GET", "/v1/admin/activity"),
     ("GET", "/v1/admin/request-logs"),
+    ("POST", "/v1/admin/templates/refresh"),
 ]
 
 # Cron endpoints (require X-Cron-Secret, not Bearer token)
@@ -75,6 +76,7 @@ CRON_ENDPOINTS = [
     ("POST", "/v1/cron/send-followups"),
     ("POST", "/v1/cron/aggregate-knowledge"),
     ("POST", "/v1/cron/aggregate-metrics"),
+    ("POST", "/v1/cron/reconcile-usage"),
 ]
 
 
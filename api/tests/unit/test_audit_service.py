@@ -0,0 +1,81 @@
+"""Unit tests for buffered audit logging and the spill-to-disk fallback."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services import audit_service
+from services.audit_service import (
+    AuditWriter,
+    begin_request_buffer,
+    end_request_buffer,
+    log_event,
+    log_field_changes,
+)
+
+
+def _inserted_batches(db):
+    return [c.args[0] for c in db.table.return_value.upsert.call_args_list]
+
+
+@pytest.fixture()
+def writer(tmp_path):
+    w = AuditWriter(str(tmp_path / "spill.jsonl"))
+    with patch.object(audit_service, "_writer", w):
+        yield w
+
+
+class TestRequestBuffer:
+
+    def test_events_are_buffered_until_flush(self, writer):
+        db = MagicMock()
+        with patch("services.audit_service.get_supabase", return_value=db):
+            token = begin_request_buffer()
+            log_event("inv-1", "status_changed", "a", "u1")
+            log_field_changes("inv-1", "u1", {"title": "x"}, {"title": "y"})
+            db.table.assert_not_called()
+            records = end_request_buffer(token)
+            audit_service.flush_events(records)
+
+        batches = _inserted_batches(db)
+        assert len(batches) == 1
+        assert [r["event_type"] for r in batches[0]] == ["status_changed", "investigation_updated"]
+
+    def test_no_buffer_writes_immediately(self, writer):
+        db = MagicMock()
+        with patch("services.audit_service.get_supabase", return_value=db):
+            log_event("inv-1", "comment_created", "c", "u1")
+        assert len(_inserted_batches(db)) == 1
+
+
+class TestSpill:
+
+    def test_failed_write_spills_and_replays_in_order(self, writer):
+        failing = MagicMock()
+        failing.table.return_value.upsert.return_value.execute.side_effect = Exception("db down")
+        with patch("services.audit_service.get_supabase", return_value=failing):
+            assert writer.write([{"id": "1"}, {"id": "2"}]) is False
+            assert writer.write([{"id": "3"}]) is False
+        assert writer.pending_spill_count() == 3
+
+        db = MagicMock()
+        with patch("services.audit_service.get_supabase", return_value=db):
+            assert writer.write([{"id": "4"}]) is True
+
+        ids = [r["id"] for batch in _inserted_batches(db) for r in batch]
+        assert ids == ["1", "2", "3", "4"]
+        assert writer.pending_spill_count() == 0
+
+    def test_healthy_write_skips_spill_lock(self, writer, tmp_path):
+        db = MagicMock()
+        with patch("services.audit_service.get_supabase", return_value=db):
+            assert writer.write([{"id": "1"}]) is True
+        assert not (tmp_path / "spill.jsonl.lock").exists()
+
+    def test_log_event_never_raises_when_db_down(self, writer):
+        failing = MagicMock()
+        failing.table.return_value.upsert.return_value.execute.side_effect = Exception("db down")
+        with patch("services.audit_service.get_supabase", return_value=failing):
+            log_id = log_event("inv-1", "action_created", "x", "u1")
+        assert log_id
+        assert writer.pending_spill_count() == 1
@@ -0,0 +1,57 @@
+"""Unit tests for write-behind case view counts."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from services import case_views as case_views_module
+from services.case_views import CaseViewCounter
+
+
+def _db(monkeypatch, fail=False):
+    db = MagicMock()
+    if fail:
+        db.rpc.return_value.execute.side_effect = RuntimeError("db down")
+    monkeypatch.setattr(case_views_module, "get_supabase", lambda: db)
+    return db
+
+
+def test_flush_sends_aggregated_counts_in_one_call(monkeypatch):
+    db = _db(monkeypatch)
+    counter = CaseViewCounter()
+    for case_id in ("a", "b", "a", "a"):
+        counter.record(case_id)
+    assert counter.pending() == 4
+
+    assert counter.flush() == 4
+    db.rpc.assert_called_once_with("increment_case_views", {"p_counts": {"a": 3, "b": 1}})
+    assert counter.pending() == 0
+    assert counter.flush() == 0
+    assert db.rpc.call_count == 1
+
+
+def test_failed_flush_keeps_counts_for_next_attempt(monkeypatch):
+    _db(monkeypatch, fail=True)
+    counter = CaseViewCounter()
+    counter.record("a", 2)
+    assert counter.flush() == 0
+    counter.record("a")
+    assert counter.pending() == 3
+
+    db = _db(monkeypatch)
+    assert counter.flush() == 3
+    db.rpc.assert_called_once_with("increment_case_views", {"p_counts": {"a": 3}})
+
+
+async def test_periodic_flush_and_final_flush_on_stop(monkeypatch):
+    db = _db(monkeypatch)
+    counter = CaseViewCounter()
+    counter.start(interval=0.01)
+    counter.record("a")
+    await asyncio.sleep(0.05)
+    assert counter.pending() == 0
+    assert db.rpc.call_count == 1
+
+    counter.record("b")
+    await counter.stop()
+    assert counter.pending() == 0
+    db.rpc.assert_called_with("increment_case_views", {"p_counts": {"b": 1}})
@@ -0,0 +1,67 @@
+"""Unit tests for the in-process event bus behind /v1/events/stream."""
+
+import asyncio
+
+from services.event_bus import EventBus
+
+
+async def _drain(sub, n):
+    events = []
+    for _ in range(n):
+        events.append(await sub.next(timeout=1))
+    return events
+
+
+class TestEventBus:
+
+    async def test_publish_reaches_topic_subscribers_only(self):
+        bus = EventBus()
+        sub = bus.subscribe(["user:a"])
+        bus.publish("user:a", "notification", {"id": "1"})
+        bus.publish("user:b", "notification", {"id": "2"})
+        event = await sub.next(timeout=1)
+        assert event.data == {"id": "1"}
+        assert await sub.next(timeout=0.05) is None
+
+    async def test_replay_since_cursor(self):
+        bus = EventBus()
+        first = bus.publish("investigation:x", "comment_created", {"n": 1})
+        bus.publish("investigation:x", "comment_created", {"n": 2})
+        bus.publish("investigation:x", "status_changed", {"n": 3})
+
+        sub = bus.subscribe(["investigation:x"], since=first.cursor(bus.epoch))
+        events = await _drain(sub, 2)
+        assert [e.data["n"] for e in events] == [2, 3]
+        assert not sub.needs_resync
+
+    async def test_foreign_epoch_cursor_requests_resync(self):
+        bus = EventBus()
+        bus.publish("user:a", "notification", {})
+        sub = bus.subscribe(["user:a"], since="deadbeef-1")
+        assert sub.needs_resync
+
+    async def test_evicted_history_requests_resync(self):
+        bus = EventBus(replay_size=2)
+        first = bus.publish("user:a", "notification", {"n": 1})
+        for n in range(2, 5):
+            bus.publish("user:a", "notification", {"n": n})
+        sub = bus.subscribe(["user:a"], since=first.cursor(bus.epoch))
+        assert sub.needs_resync
+
+    async def test_slow_consumer_drops_oldest(self):
+        bus = EventBus(queue_size=2)
+        sub = bus.subscribe(["user:a"])
+        for n in range(4):
+            bus.publish("user:a", "notification", {"n": n})
+        await asyncio.sleep(0)
+        events = await _drain(sub, 2)
+        assert [e.data["n"] for e in events] == [2, 3]
+        assert sub.needs_resync
+        assert sub.dropped == 2
+
+    async def test_unsubscribe(self):
+        bus = EventBus()
+        sub = bus.subscribe(["user:a", "investigation:x"])
+        assert bus.subscriber_count() == 1
+        bus.unsubscribe(sub)
+        assert bus.subscriber_count() == 0
@@ -0,0 +1,128 @@
+"""Unit tests for the batched follow-up email pipeline."""
+
+from unittest.mock import MagicMock, patch
+
+from resend.exceptions import ResendError
+
+from services.feedback_email import send_pending_followups
+
+
+def _db(analyses, feedback=(), ledger=(), users=(), claimed_elsewhere=()):
+    """Fake client; ``ledger`` holds {analysis_id: status} as the service writes it."""
+    db = MagicMock()
+    db.ledger = {a: "sent" for a in ledger}
+    data = {
+        "failure_analyses": analyses,
+        "analysis_feedback": [{"analysis_id": a} for a in feedback],
+        "users": list(users),
+    }
+
+    def _table(name):
+        chain = MagicMock()
+        for method in ("select", "eq", "gte", "lte", "in_"):
+            getattr(chain, method).return_value = chain
+        if name != "followup_email_ledger":
+            chain.execute.return_value = MagicMock(data=data[name])
+            return chain
+
+        chain.execute.return_value = MagicMock(data=[{"analysis_id": a} for a in db.ledger])
+
+        def _upsert(rows, on_conflict=None, ignore_duplicates=False):
+            inserted = []
+            for row in rows:
+                aid = row["analysis_id"]
+                if ignore_duplicates and (aid in db.ledger or aid in claimed_elsewhere):
+                    continue
+                db.ledger[aid] = row["status"]
+                inserted.append(row)
+            result = MagicMock()
+            result.execute.return_value = MagicMock(data=inserted)
+            return result
+
+        def _delete_pending(column, ids):
+            for aid in ids:
+                if db.ledger.get(aid) == "pending":
+                    del db.ledger[aid]
+            return MagicMock()
+
+        chain.upsert.side_effect = _upsert
+        chain.delete.return_value.in_.side_effect = _delete_pending
+        return chain
+
+    db.table.side_effect = _table
+    return db
+
+
+def _analysis(aid, user="u1"):
+    return {"id": aid, "user_id": user, "material_category": "epoxy", "failure_mode": "adhesive"}
+
+
+async def test_skips_analyses_in_ledger_and_with_feedback():
+    db = _db(
+        [_analysis("a1"), _analysis("a2"), _analysis("a3")],
+        feedback=["a2"],
+        ledger=["a3"],
+        users=[{"id": "u1", "email": "u1@example.com"}],
+    )
+    with patch("services.feedback_email.get_supabase", return_value=db), \
+         patch("services.feedback_email.resend.Batch.send", return_value={"data": [{"id": "m1"}]}) as send:
+        result = await send_pending_followups()
+
+    assert result["sent"] == 1
+    assert result["already_sent"] == 1
+    emails = send.call_args.args[0]
+    assert len(emails) == 1 and emails[0]["to"] == "u1@example.com"
+
+
+async def test_chunks_and_reports_partial_failure(monkeypatch):
+    monkeypatch.setattr("services.feedback_email.settings.followup_batch_size", 2)
+    analyses = [_analysis(f"a{i}") for i in range(5)]
+    db = _db(analyses, users=[{"id": "u1", "email": "u1@example.com"}])
+
+    calls = []
+
+    def _send(emails):
+        calls.append(emails)
+        if len(calls) == 2:
+            raise ResendError(500, "application_error", "provider 500", "retry")
+        return {"data": [{"id": "m"} for _ in emails]}
+
+    with patch("services.feedback_email.get_supabase", return_value=db), \
+         patch("services.feedback_email.resend.Batch.send", side_effect=_send):
+        result = await send_pending_followups()
+
+    assert result["batches"] == 3
+    assert result["failed_batches"] == 1
+    assert result["sent"] == 3 and result["failed"] == 2
+    # The rejected chunk's claims are released; delivered ones are marked sent
+    assert sorted(db.ledger.values()) == ["sent", "sent", "sent"]
+
+
+async def test_unknown_outcome_keeps_claims_so_retry_never_resends():
+    analyses = [_analysis("a1"), _analysis("a2")]
+    db = _db(analyses, users=[{"id": "u1", "email": "u1@example.com"}])
+
+    with patch("services.feedback_email.get_supabase", return_value=db), \
+         patch("services.feedback_email.resend.Batch.send", side_effect=TimeoutError("read timeout")):
+        first = await send_pending_followups()
+    assert first["sent"] == 0
+    assert db.ledger == {"a1": "pending", "a2": "pending"}
+
+    with patch("services.feedback_email.get_supabase", return_value=db), \
+         patch("services.feedback_email.resend.Batch.send") as send:
+        second = await send_pending_followups()
+    send.assert_not_called()
+    assert second["already_sent"] == 2
+
+
+async def test_only_analyses_claimed_by_this_run_are_sent():
+    analyses = [_analysis("a1"), _analysis("a2")]
+    db = _db(analyses, users=[{"id": "u1", "email": "u1@example.com"}], claimed_elsewhere={"a1"})
+
+    with patch("services.feedback_email.get_supabase", return_value=db), \
+         patch("services.feedback_email.resend.Batch.send", return_value={"data": [{"id": "m"}]}) as send:
+        result = await send_pending_followups()
+
+    assert result["sent"] == 1
+    assert result["skipped"] == 1 and result["failed"] == 0
+    assert [e["text"].count("/feedback/a2") > 0 for e in send.call_args.args[0]] == [True]
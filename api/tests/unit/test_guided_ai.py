@@ -0,0 +1,154 @@
+"""Unit tests for guided AI prompt caching, compaction and usage accounting."""
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import httpx
+
+from services import guided_ai
+from services.guided_ai import (
+    CACHED_TOOLS,
+    CONTEXT_SUMMARY_PREFIX,
+    GUIDED_TOOLS,
+    _with_message_breakpoint,
+    call_claude_with_tools,
+    log_guided_usage,
+    plan_compaction,
+    with_summary,
+)
+
+
+def _msg(role, chars):
+    return {"role": role, "content": "x" * chars}
+
+
+def test_within_budget_folds_nothing():
+    assert plan_compaction([_msg("user", 400)] * 4, budget_tokens=1000, keep_recent=2) == 0
+
+
+def test_over_budget_folds_to_half_and_keeps_recent():
+    messages = [_msg("user" if i % 2 == 0 else "assistant", 384) for i in range(10)]  # 100 tokens each
+    assert plan_compaction(messages, budget_tokens=800, keep_recent=2) == 6
+    # keep_recent wins over the half-budget target
+    assert plan_compaction(messages, budget_tokens=200, keep_recent=5) == 5
+
+
+def test_message_cap_triggers_fold_within_token_budget():
+    messages = [_msg("user", 4)] * 11  # well under the token budget
+    assert plan_compaction(messages, budget_tokens=6000, keep_recent=2, max_messages=10) == 6
+    assert plan_compaction(messages[:10], budget_tokens=6000, keep_recent=2, max_messages=10) == 0
+    # keep_recent still wins
+    assert plan_compaction(messages, budget_tokens=6000, keep_recent=8, max_messages=10) == 3
+
+
+def test_breakpoints_on_tools_and_last_message_only():
+    assert "cache_control" in CACHED_TOOLS[-1]
+    assert all("cache_control" not in t for t in CACHED_TOOLS[:-1])
+    assert "cache_control" not in GUIDED_TOOLS[-1]
+
+    conv = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}, {"role": "user", "content": "c"}]
+    out = _with_message_breakpoint(conv)
+    assert out[0]["content"] == [{"type": "text", "text": "a"}]
+    assert out[2]["content"] == [{"type": "text", "text": "c", "cache_control": {"type": "ephemeral"}}]
+    assert conv[2]["content"] == "c"
+
+
+def test_summary_leads_the_conversation():
+    out = with_summary("- aluminum / DP420", [{"role": "assistant", "content": "Next?"}])
+    assert out[0] == {"role": "user", "content": f"{CONTEXT_SUMMARY_PREFIX}\n- aluminum / DP420"}
+    assert with_summary(None, []) == []
+
+
+async def test_tool_loop_sums_cache_usage_across_rounds(monkeypatch):
+    replies = iter([
+        {
+            "stop_reason": "tool_use",
+            "content": [{"type": "tool_use", "id": "t1", "name": "lookup_product_tds", "input": {"product_name": "DP420"}}],
+            "usage": {"input_tokens": 40, "output_tokens": 10, "cache_creation_input_tokens": 1500, "cache_read_input_tokens": 0},
+        },
+        {
+            "stop_reason": "end_turn",
+            "content": [{"type": "text", "text": "Found it."}],
+            "usage": {"input_tokens": 60, "output_tokens": 20, "cache_read_input_tokens": 1500},
+        },
+    ])
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json=next(replies))
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(guided_ai.httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler)))
+
+    async def executor(name, tool_input):
+        return {"found": True}
+
+    result = await call_claude_with_tools([{"role": "user", "content": "It peeled"}], executor)
+
+    assert result["text"] == "Found it."
+    assert result["rounds"] == 2
+    assert result["usage"] == {
+        "input_tokens": 100,
+        "output_tokens": 30,
+        "cache_creation_input_tokens": 1500,
+        "cache_read_input_tokens": 1500,
+    }
+    assert sent[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    # Second round marks the tool_result block, not the original question
+    assert sent[1]["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in sent[1]["messages"][0]["content"][-1]
+
+
+def _mock_claude(monkeypatch, replies):
+    replies = iter(replies)
+    real_client = httpx.AsyncClient
+
+    def handler(request):
+        return httpx.Response(200, json=next(replies))
+
+    monkeypatch.setattr(guided_ai.httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler)))
+
+
+async def test_round_tools_run_concurrently_with_timeouts(monkeypatch):
+    tool_use = [
+        {"type": "tool_use", "id": "t1", "name": "lookup_product_tds", "input": {}},
+        {"type": "tool_use", "id": "t2", "name": "search_similar_cases", "input": {}},
+        {"type": "tool_use", "id": "t3", "name": "generate_5why", "input": {}},
+    ]
+    _mock_claude(monkeypatch, [
+        {"stop_reason": "tool_use", "content": tool_use},
+        {"stop_reason": "end_turn", "content": [{"type": "text", "text": "done"}]},
+    ])
+    monkeypatch.setitem(guided_ai.TOOL_TIMEOUTS, "generate_5why", 0.05)
+
+    async def executor(name, tool_input):
+        await asyncio.sleep(1.0 if name == "generate_5why" else 0.2)
+        return {"tool": name}
+
+    result = await call_claude_with_tools([{"role": "user", "content": "go"}], executor)
+
+    assert [c["result"] for c in result["tool_calls"]] == [
+        {"tool": "lookup_product_tds"},
+        {"tool": "search_similar_cases"},
+        {"error": "Tool 'generate_5why' timed out after 0.05s"},
+    ]
+    first = result["round_timings"][0]
+    assert 200 <= first["tools_ms"] < 380  # slowest tool, not the 400ms sum
+    assert set(first["tool_ms"]) == {"lookup_product_tds", "search_similar_cases", "generate_5why"}
+    assert result["round_timings"][1]["tools_ms"] == 0
+
+
+def test_usage_log_splits_cached_tokens():
+    db = MagicMock()
+    log_guided_usage(
+        db, user_id="u", session_id="s", latency_ms=5, rounds=2,
+        usage={"input_tokens": 100, "output_tokens": 30, "cache_creation_input_tokens": 200, "cache_read_input_tokens": 1500},
+    )
+    row = db.table.return_value.insert.call_args.args[0]
+    assert row["prompt_tokens"] == 1800
+    assert row["cache_read_tokens"] == 1500
+    assert row["cache_creation_tokens"] == 200
+    assert row["meta"]["uncached_input_tokens"] == 100
+    assert row["meta"]["request_type"] == "guided_turn"
@@ -0,0 +1,65 @@
+"""Unit tests for the append-only guided message store."""
+
+from unittest.mock import MagicMock
+
+from services.guided_messages import append_messages, list_messages, recent_messages
+
+
+def _db(rows=()):
+    db = MagicMock()
+    chain = db.table.return_value
+    for method in ("select", "eq", "gt", "order", "limit", "insert"):
+        getattr(chain, method).return_value = chain
+    chain.execute.return_value = MagicMock(data=list(rows))
+    return db, chain
+
+
+def test_append_inserts_one_row_per_message_with_payload():
+    db, chain = _db()
+    append_messages(db, "s-1", [
+        {"role": "user", "content": "It peeled", "timestamp": "t1", "photo_urls": ["u"]},
+        {"role": "assistant", "content": "Which substrate?", "phase": "2", "tool_calls": [{"tool": "x"}]},
+    ])
+
+    db.table.assert_called_with("guided_messages")
+    rows = chain.insert.call_args.args[0]
+    assert rows == [
+        {"session_id": "s-1", "role": "user", "content": "It peeled",
+         "payload": {"timestamp": "t1", "photo_urls": ["u"]}},
+        {"session_id": "s-1", "role": "assistant", "content": "Which substrate?",
+         "payload": {"phase": "2", "tool_calls": [{"tool": "x"}]}},
+    ]
+    assert chain.execute.call_count == 1
+
+
+def test_append_nothing_is_a_no_op():
+    db, chain = _db()
+    append_messages(db, "s-1", [])
+    chain.insert.assert_not_called()
+
+
+def test_recent_window_is_text_only_and_oldest_first():
+    db, chain = _db([
+        {"id": 9, "role": "assistant", "content": "b"},
+        {"id": 8, "role": "user", "content": None},
+    ])
+    assert recent_messages(db, "s-1", limit=2) == [
+        {"id": 8, "role": "user", "content": ""},
+        {"id": 9, "role": "assistant", "content": "b"},
+    ]
+    chain.select.assert_called_with("id, role, content")
+    chain.order.assert_called_with("id", desc=True)
+    chain.limit.assert_called_with(2)
+    chain.gt.assert_not_called()
+
+    recent_messages(db, "s-1", after_id=7)
+    chain.gt.assert_called_once_with("id", 7)
+
+
+def test_list_messages_rebuilds_stored_dicts():
+    db, chain = _db([
+        {"id": 1, "role": "assistant", "content": "hi", "payload": {"phase": "1", "timestamp": "t"}},
+    ])
+    assert list_messages(db, "s-1") == [{"role": "assistant", "content": "hi", "phase": "1", "timestamp": "t"}]
+    list_messages(db, "s-1", full=False)
+    chain.select.assert_called_with("id, role, content")
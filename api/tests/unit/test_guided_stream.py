@@ -0,0 +1,81 @@
+"""Unit tests for streamed guided turns: the streaming tool loop and tag filtering."""
+
+import json
+
+import httpx
+
+from routers.guided import _StreamTagFilter
+from services import guided_ai
+from services.guided_ai import stream_claude_with_tools
+
+
+def _sse(*events):
+    return "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events)
+
+
+ROUND_1 = _sse(
+    {"type": "message_start", "message": {"usage": {"input_tokens": 30, "cache_read_input_tokens": 1200, "output_tokens": 1}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Checking "}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "the TDS."}},
+    {"type": "content_block_stop", "index": 0},
+    {"type": "content_block_start", "index": 1, "content_block": {"type": "tool_use", "id": "t1", "name": "lookup_product_tds", "input": {}}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": '{"product_'}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": 'name": "DP420"}'}},
+    {"type": "content_block_stop", "index": 1},
+    {"type": "message_delta", "delta": {"stop_reason": "tool_use"}, "usage": {"output_tokens": 25}},
+    {"type": "message_stop"},
+)
+
+ROUND_2 = _sse(
+    {"type": "message_start", "message": {"usage": {"input_tokens": 50, "cache_read_input_tokens": 1300}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "DP420 needs abrasion."}},
+    {"type": "content_block_stop", "index": 0},
+    {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 12}},
+)
+
+
+async def test_stream_yields_text_and_tool_events_then_result(monkeypatch):
+    bodies = iter([ROUND_1, ROUND_2])
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, text=next(bodies), headers={"content-type": "text/event-stream"})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(guided_ai.httpx, "AsyncClient", lambda **kw: real_client(transport=httpx.MockTransport(handler)))
+
+    async def executor(name, tool_input):
+        return {"found": True, "query": tool_input["product_name"]}
+
+    events = [e async for e in stream_claude_with_tools([{"role": "user", "content": "peeling"}], executor)]
+
+    assert [name for name, _ in events] == ["text", "text", "tool_start", "tool_finish", "text", "done"]
+    assert events[2][1]["input"] == {"product_name": "DP420"}
+    assert events[3][1]["ok"] is True
+    result = events[-1][1]
+    assert result["text"] == "DP420 needs abrasion."
+    assert result["tool_calls"][0]["result"] == {"found": True, "query": "DP420"}
+    assert result["usage"]["cache_read_input_tokens"] == 2500
+    assert result["usage"]["output_tokens"] == 37
+    assert result["streamed"] is True
+    assert all(body["stream"] is True for body in sent)
+    # The streamed tool_use block is replayed with its parsed input
+    assert sent[1]["messages"][1]["content"][1]["input"] == {"product_name": "DP420"}
+
+
+def _feed_all(chunks):
+    f = _StreamTagFilter()
+    return "".join(f.feed(c) for c in chunks) + f.flush()
+
+
+def test_tag_filter_strips_tags_split_across_chunks():
+    chunks = ["<investi", "gation_phase>3</investigation", "_phase>\n", "Use a primer ", "if T < 5", "0C.\n<sugg", "estions>Yes|No</suggestions>"]
+    assert _feed_all(chunks) == "Use a primer if T < 50C.\n"
+
+
+def test_tag_filter_drops_unclosed_tag_at_end():
+    assert _feed_all(["Done. <suggestions>A|B"]) == "Done. "
+    assert _feed_all(["a <b>bold</b>"]) == "a <b>bold</b>"
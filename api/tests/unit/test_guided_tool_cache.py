@@ -0,0 +1,98 @@
+"""Unit tests for the guided tool-result cache."""
+
+from routers import guided
+from services import guided_tool_cache
+from services.guided_tool_cache import ToolCachePolicy, ToolResultCache, cache_key
+from services.product_catalog import catalog_version, invalidate_catalog
+
+POLICIES = {
+    "lookup_product_tds": ToolCachePolicy(900, product_scoped=True),
+    "search_similar_cases": ToolCachePolicy(120),
+}
+
+
+def test_key_ignores_case_whitespace_and_empty_args():
+    assert cache_key("search_similar_cases", {"substrate_a": " Aluminum ", "substrate_b": None, "failure_mode": ""}) == \
+        cache_key("search_similar_cases", {"substrate_a": "aluminum"})
+    assert cache_key("lookup_product_tds", {"product_name": "DP420"}) != \
+        cache_key("search_similar_cases", {"product_name": "DP420"})
+    assert cache_key("check", {"conditions": {"temperature_c": 80.0}}) == cache_key("check", {"conditions": {"temperature_c": 80}})
+
+
+def test_hit_returns_private_copy_and_counts():
+    cache = ToolResultCache(POLICIES)
+    assert cache.get("lookup_product_tds", {"product_name": "DP420"}) is None
+    cache.put("lookup_product_tds", {"product_name": "DP420"}, {"found": True, "products": [{"name": "DP420"}]})
+
+    hit = cache.get("lookup_product_tds", {"product_name": "dp420 "})
+    assert hit == {"found": True, "products": [{"name": "DP420"}]}
+    hit["products"].clear()
+    assert cache.get("lookup_product_tds", {"product_name": "DP420"})["products"]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.667)
+    assert stats["by_tool"]["lookup_product_tds"]["hits"] == 2
+
+
+def test_errors_and_uncached_tools_are_not_stored():
+    cache = ToolResultCache(POLICIES)
+    cache.put("lookup_product_tds", {"product_name": "x"}, {"error": "boom"})
+    cache.put("generate_5why", {"root_cause": "x"}, {"chain": []})
+    assert cache.get("lookup_product_tds", {"product_name": "x"}) is None
+    assert cache.get("generate_5why", {"root_cause": "x"}) is None
+    assert "generate_5why" not in cache.stats()["by_tool"]
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(guided_tool_cache.time, "monotonic", lambda: clock[0])
+    cache = ToolResultCache(POLICIES)
+    cache.put("search_similar_cases", {"substrate_a": "steel"}, {"total_matches": 0, "cases": []})
+    clock[0] += 119
+    assert cache.get("search_similar_cases", {"substrate_a": "steel"}) is not None
+    clock[0] += 2
+    assert cache.get("search_similar_cases", {"substrate_a": "steel"}) is None
+
+
+def test_product_write_invalidates_product_scoped_entries_only():
+    cache = ToolResultCache(POLICIES)
+    cache.put("lookup_product_tds", {"product_name": "DP420"}, {"found": True})
+    cache.put("search_similar_cases", {"substrate_a": "steel"}, {"total_matches": 0})
+
+    invalidate_catalog()
+
+    assert cache.get("lookup_product_tds", {"product_name": "DP420"}) is None
+    assert cache.get("search_similar_cases", {"substrate_a": "steel"}) == {"total_matches": 0}
+
+
+def test_write_during_the_query_leaves_entry_stale():
+    cache = ToolResultCache(POLICIES)
+    version = catalog_version()
+    invalidate_catalog()  # lands after the read, before put
+    cache.put("lookup_product_tds", {"product_name": "DP420"}, {"found": False}, version=version)
+    assert cache.get("lookup_product_tds", {"product_name": "DP420"}) is None
+
+
+async def test_execute_tool_reads_version_before_dispatch(monkeypatch):
+    cache = ToolResultCache(POLICIES)
+    monkeypatch.setattr(guided, "tool_cache", cache)
+
+    async def dispatch(db, tool_name, tool_input):
+        invalidate_catalog()
+        return {"found": False}
+
+    monkeypatch.setattr(guided, "_dispatch_tool", dispatch)
+    assert await guided._execute_tool(None, "lookup_product_tds", {"product_name": "DP420"}) == {"found": False}
+    assert cache.get("lookup_product_tds", {"product_name": "DP420"}) is None
+
+
+def test_lru_bound_and_explicit_invalidate():
+    cache = ToolResultCache(POLICIES, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put("lookup_product_tds", {"product_name": name}, {"found": True})
+    assert cache.get("lookup_product_tds", {"product_name": "a"}) is None
+    assert cache.stats()["entries"] == 2
+
+    cache.put("search_similar_cases", {"substrate_a": "steel"}, {"total_matches": 0})
+    cache.invalidate("lookup_product_tds")
+    assert cache.stats()["entries"] == 1
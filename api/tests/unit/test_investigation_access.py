@@ -0,0 +1,95 @@
+"""Unit tests for the investigation team membership resolver."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from services import investigation_access
+from services.investigation_access import (
+    begin_request_cache,
+    check_team_access,
+    end_request_cache,
+    get_team_member_ids,
+    invalidate_membership,
+)
+
+
+def _row(**overrides):
+    row = {
+        "id": "inv-1",
+        "user_id": "creator",
+        "champion_user_id": None,
+        "team_lead_user_id": "lead",
+        "approver_user_id": None,
+        "investigation_members": [{"user_id": "member"}],
+    }
+    row.update(overrides)
+    return row
+
+
+def _db(*rows):
+    db = MagicMock()
+    chain = db.table.return_value
+    chain.select.return_value = chain
+    chain.eq.return_value = chain
+    chain.execute.side_effect = [MagicMock(data=[dict(r)]) for r in rows]
+    return db
+
+
+@pytest.fixture(autouse=True)
+def _clear_index():
+    investigation_access.get_membership_index().clear()
+    yield
+    investigation_access.get_membership_index().clear()
+
+
+def test_member_access_uses_single_round_trip():
+    db = _db(_row())
+    inv = check_team_access(db, "inv-1", "member")
+    assert inv["id"] == "inv-1"
+    assert "investigation_members" not in inv
+    assert db.table.call_count == 1
+    assert "investigation_members(user_id)" in db.table.return_value.select.call_args.args[0]
+
+
+def test_non_member_forbidden():
+    db = _db(_row())
+    with pytest.raises(HTTPException) as exc:
+        check_team_access(db, "inv-1", "stranger")
+    assert exc.value.status_code == 403
+
+
+def test_missing_investigation_404():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+    with pytest.raises(HTTPException) as exc:
+        check_team_access(db, "inv-x", "member")
+    assert exc.value.status_code == 404
+
+
+def test_fan_out_served_from_index_after_access_check():
+    db = _db(_row())
+    check_team_access(db, "inv-1", "lead")
+    ids = get_team_member_ids(db, "inv-1", exclude_user_id="lead")
+    assert sorted(ids) == ["creator", "member"]
+    assert db.table.call_count == 1
+
+
+def test_request_cache_avoids_repeat_reads():
+    db = _db(_row())
+    token = begin_request_cache()
+    try:
+        check_team_access(db, "inv-1", "member")
+        check_team_access(db, "inv-1", "member")
+    finally:
+        end_request_cache(token)
+    assert db.table.call_count == 1
+
+
+def test_invalidation_refetches_members():
+    db = _db(_row(), _row(investigation_members=[]))
+    check_team_access(db, "inv-1", "member")
+    invalidate_membership("inv-1")
+    with pytest.raises(HTTPException):
+        check_team_access(db, "inv-1", "member")
@@ -2,7 +2,8 @@
 
 import pytest
 
-from utils.normalizer import normalize_substrate, _COMMON_MAP
+from utils import normalizer
+from utils.normalizer import normalize_substrate, normalize_substrates, _COMMON_MAP
 
 
 # =====================================================================
@@ -239,3 +240,48 @@ class TestNormalizerIdempotent:
         first = normalize_substrate("PC")
         second = normalize_substrate(first)
         assert first == second
+
+
+# =====================================================================
+# 9. Alias table + fuzzy token resolution
+# =====================================================================
+
+class TestNormalizerAliasTable:
+    def test_every_canonical_is_a_fixed_point(self):
+        for canonical in set(normalizer._TABLE.phrases.values()):
+            assert normalize_substrate(canonical) == canonical
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("Anodised Aluminium", "anodized aluminum"),
+        ("Carbon Fibre", "carbon fiber"),
+        ("PA66-GF30", "glass-filled nylon"),
+        ("Cold-Rolled Steel", "mild steel"),
+        ("Plexiglas", "acrylic"),
+    ])
+    def test_data_file_aliases(self, raw, expected):
+        assert normalize_substrate(raw) == expected
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("Aluminuim", "aluminum"),
+        ("Polycarbonat", "polycarbonate"),
+        ("stainles steel", "stainless steel"),
+        ("alumnium 6061-T6", "aluminum 6061-t6"),
+    ])
+    def test_typos_resolve_to_canonical(self, raw, expected):
+        assert normalize_substrate(raw) == expected
+
+    @pytest.mark.parametrize("raw", ["polyester", "glass", "brass", "silicon", "6061-t5", "p c"])
+    def test_fuzzy_leaves_known_and_short_tokens_alone(self, raw):
+        assert normalize_substrate(raw) == raw
+
+    def test_batch_matches_single_and_preserves_order(self):
+        values = ["PC", None, "Aluminium", "", "PC", "steel"]
+        assert normalize_substrates(values) == [normalize_substrate(v) for v in values]
+
+    def test_missing_alias_file_falls_back_to_common_map(self, tmp_path):
+        try:
+            normalizer.reload_aliases(tmp_path / "missing.json")
+            assert normalize_substrate("pmma") == "acrylic"
+            assert normalize_substrate("cold-rolled steel") == "cold-rolled steel"
+        finally:
+            normalizer.reload_aliases()
@@ -0,0 +1,76 @@
+"""Unit tests for the per-user unread notification counter cache."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from routers import notifications
+from services.notification_cache import InMemoryUnreadCounter, UnreadCounterBackend, get_unread_backend
+
+
+class TestInMemoryUnreadCounter:
+
+    def test_unknown_user_returns_none(self):
+        counter = InMemoryUnreadCounter()
+        assert counter.get("u1") is None
+
+    def test_seed_and_adjust(self):
+        counter = InMemoryUnreadCounter()
+        counter.set("u1", 3)
+        counter.incr("u1", 1)
+        counter.incr("u1", -2)
+        assert counter.get("u1") == 2
+
+    def test_incr_unknown_user_is_noop(self):
+        counter = InMemoryUnreadCounter()
+        counter.incr("u1", 1)
+        assert counter.get("u1") is None
+
+    def test_never_negative(self):
+        counter = InMemoryUnreadCounter()
+        counter.set("u1", 0)
+        counter.incr("u1", -1)
+        assert counter.get("u1") == 0
+
+    def test_entries_expire(self):
+        counter = InMemoryUnreadCounter(ttl_seconds=10)
+        with patch("services.notification_cache.time.monotonic", return_value=100.0):
+            counter.set("u1", 4)
+        with patch("services.notification_cache.time.monotonic", return_value=111.0):
+            assert counter.get("u1") is None
+
+    def test_bounded_size(self):
+        counter = InMemoryUnreadCounter(max_entries=2)
+        counter.set("u1", 1)
+        counter.set("u2", 2)
+        counter.set("u3", 3)
+        assert counter.get("u1") is None
+        assert counter.get("u3") == 3
+
+    def test_invalidate(self):
+        counter = InMemoryUnreadCounter()
+        counter.set("u1", 5)
+        counter.invalidate("u1")
+        assert counter.get("u1") is None
+
+
+class TestMarkReadDecrement:
+
+    async def test_repeated_mark_read_decrements_once(self):
+        db = MagicMock()
+        db.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value.data = [{"id": "n1"}]
+        update = db.table.return_value.update.return_value.eq.return_value.eq.return_value.eq.return_value.execute
+        # Only the first conditional update finds the row still unread
+        update.side_effect = [MagicMock(data=[{"id": "n1"}]), MagicMock(data=[])]
+
+        get_unread_backend().set("u1", 3)
+        with patch.object(notifications, "get_supabase", return_value=db):
+            await notifications.mark_notification_read("n1", user={"id": "u1"})
+            await notifications.mark_notification_read("n1", user={"id": "u1"})
+
+        assert get_unread_backend().get("u1") == 2
+        get_unread_backend().invalidate("u1")
+
+    def test_backend_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            UnreadCounterBackend()
@@ -0,0 +1,74 @@
+"""Unit tests for block-leased investigation numbers."""
+
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from services import number_allocator
+from services.number_allocator import NumberAllocator, _lease_block
+
+
+class FakeSequences:
+    """In-memory stand-in for lease_number_block: atomic advance by a block."""
+
+    def __init__(self, start: dict | None = None):
+        self.next_value = dict(start or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, name, size):
+        with self._lock:
+            self.calls.append((name, size))
+            first = self.next_value.get(name, 1)
+            self.next_value[name] = first + size
+            return first
+
+
+def test_numbers_come_from_one_lease_per_block():
+    seq = FakeSequences({"INV": 42})
+    alloc = NumberAllocator(5, lease=seq)
+    assert [alloc.next("INV") for _ in range(7)] == [42, 43, 44, 45, 46, 47, 48]
+    assert seq.calls == [("INV", 5), ("INV", 5)]
+
+
+def test_workers_never_hand_out_the_same_number():
+    seq = FakeSequences()
+    workers = [NumberAllocator(3, lease=seq) for _ in range(4)]
+    out, lock = [], threading.Lock()
+
+    def take(alloc):
+        for _ in range(25):
+            n = alloc.next("GQ-2026")
+            with lock:
+                out.append(n)
+
+    threads = [threading.Thread(target=take, args=(w,)) for w in workers for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(out) == 200
+    assert len(set(out)) == 200
+
+
+def test_series_are_independent_and_reset_skips_rest_of_block():
+    seq = FakeSequences()
+    alloc = NumberAllocator(10, lease=seq)
+    assert alloc.next("GQ-2026") == 1
+    assert alloc.next("GQ-2027") == 1
+    alloc.reset()
+    assert alloc.next("GQ-2026") == 11
+
+
+def test_formatting(monkeypatch):
+    monkeypatch.setattr(number_allocator, "_allocator", NumberAllocator(10, lease=FakeSequences({"GQ-2027": 7, "INV": 123})))
+    assert number_allocator.next_investigation_number(datetime(2027, 1, 1, tzinfo=timezone.utc)) == "GQ-2027-0007"
+    assert number_allocator.next_inbound_number() == "INV-00123"
+
+
+def test_lease_block_reads_scalar_rpc_result(monkeypatch):
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value.data = 31
+    monkeypatch.setattr(number_allocator, "get_supabase", lambda: db)
+    assert _lease_block("INV", 10) == 31
+    db.rpc.assert_called_once_with("lease_number_block", {"p_name": "INV", "p_size": 10})
@@ -0,0 +1,176 @@
+"""Unit tests for bucket-based, multi-dimensional pattern anomaly detection."""
+
+import math
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.pattern_detection import (
+    FLAT_HISTORY_STD,
+    PatternCube,
+    determine_severity,
+    load_active_alert_keys,
+    load_window_counts,
+    parse_hierarchies,
+    pattern_key,
+    stored_dimensions,
+    window_rows,
+)
+
+TODAY = date(2026, 6, 30)
+
+FM_SUB_PROD = ("failure_mode", "substrate", "product")
+
+
+def _bucket(days_ago, count, ids=(), failure_mode="adhesive", substrate="aluminum",
+            substrate_b="steel", product="dp420", root_cause_category="surface_prep"):
+    return {
+        "pattern_key": "|".join(x or "" for x in (failure_mode, substrate, substrate_b, product, root_cause_category)),
+        "bucket_date": (TODAY - timedelta(days=days_ago)).isoformat(),
+        "failure_mode": failure_mode,
+        "substrate": substrate,
+        "substrate_b": substrate_b,
+        "product": product,
+        "root_cause_category": root_cause_category,
+        "count": count,
+        "analysis_ids": list(ids),
+    }
+
+
+def test_parse_hierarchies():
+    assert parse_hierarchies("failure_mode>substrate, root_cause_category>substrate_pair>product") == [
+        ("failure_mode", "substrate"),
+        ("root_cause_category", "substrate_pair", "product"),
+    ]
+    with pytest.raises(ValueError):
+        parse_hierarchies("failure_mode>colour")
+    with pytest.raises(ValueError):
+        parse_hierarchies("product>product")
+
+
+def test_windows_and_stats_match_original_monthly_baseline():
+    buckets = [
+        _bucket(0, 5, ids=["a5", "a4"]),
+        _bucket(10, 4, ids=["a3"]),
+        _bucket(30, 1),        # still "recent"
+        _bucket(31, 2),        # history month 0
+        _bucket(95, 1),        # month 2
+        _bucket(180, 2),       # month 4
+        _bucket(181, 50),      # outside look-back
+    ]
+    result = PatternCube(window_rows(buckets, TODAY), TODAY).detect([FM_SUB_PROD])
+
+    [stat] = result.anomalies
+    assert stat.dimensions == {"failure_mode": "adhesive", "substrate": "aluminum", "product": "dp420"}
+    assert stat.recent_count == 10
+    assert stat.history == [2, 0, 1, 0, 2]
+    assert stat.hist_mean == pytest.approx(1.0)
+    assert stat.hist_std == pytest.approx(math.sqrt(0.8))
+    assert stat.z_score == pytest.approx((10 - 1.0) / math.sqrt(0.8))
+    assert stat.recent_ids == ["a5", "a4", "a3"]
+    assert stat.parent_key == "failure_mode=adhesive|substrate=aluminum"
+    assert result.groups_checked == 3
+
+
+def test_spike_concentrated_on_one_product_is_reported_at_product_level():
+    buckets = [_bucket(d, 1, product=p) for d in (40, 70, 100, 130, 160) for p in ("p1", "p2", "p3")]
+    buckets += [_bucket(2, 6, product="p1"), _bucket(3, 1, product="p2")]
+
+    [stat] = PatternCube(window_rows(buckets, TODAY), TODAY).detect([FM_SUB_PROD]).anomalies
+
+    assert stat.dimensions["product"] == "p1"
+    assert stat.level == 3
+
+
+def test_spike_spread_across_products_is_reported_at_parent():
+    # Each product is bursty month to month, but the products together are steady
+    products = [f"p{i}" for i in range(5)]
+    buckets = [_bucket(36 + 30 * i, 5, product=p) for i, p in enumerate(products)]
+    buckets += [_bucket(2, 2, product=p) for p in products]
+
+    anomalies = PatternCube(window_rows(buckets, TODAY), TODAY).detect([FM_SUB_PROD]).anomalies
+
+    assert [a.key for a in anomalies] == ["failure_mode=adhesive|substrate=aluminum"]
+
+
+def test_substrate_pair_merges_both_orders_and_hierarchies_dedupe():
+    buckets = [
+        _bucket(1, 2, substrate="aluminum", substrate_b="steel"),
+        _bucket(1, 2, substrate="steel", substrate_b="aluminum"),
+    ]
+    cube = PatternCube(window_rows(buckets, TODAY), TODAY)
+    result = cube.detect([
+        ("root_cause_category", "substrate_pair"),
+        ("root_cause_category", "substrate_pair"),
+    ])
+
+    [stat] = result.anomalies
+    assert stat.dimensions == {"root_cause_category": "surface_prep", "substrate_pair": "aluminum + steel"}
+    assert stat.recent_count == 4
+    assert stat.hist_std == FLAT_HISTORY_STD
+    assert result.groups_checked == 2
+
+
+def test_min_recent_suppresses_single_analysis_groups():
+    buckets = [_bucket(1, 1), _bucket(2, 2, product="p2")]
+    cube = PatternCube(window_rows(buckets, TODAY), TODAY)
+
+    assert len(cube.detect([FM_SUB_PROD]).anomalies) == 2
+    [stat] = cube.detect([FM_SUB_PROD], min_recent=2).anomalies
+    assert stat.dimensions["product"] == "p2"
+
+
+def test_window_rows_fold_days_per_key_and_drop_unused_dimensions():
+    buckets = [_bucket(1, 2, ids=["n1"]), _bucket(5, 1, ids=["o1"]), _bucket(40, 3),
+               _bucket(1, 1, ids=["x"], root_cause_category="cure")]
+
+    rows = window_rows(buckets, TODAY)
+    assert len(rows) == 2
+    assert rows[0]["window_counts"] == [3, 3, 0, 0, 0, 0]
+    assert rows[0]["recent_ids"] == ["n1", "o1"]
+
+    dims = stored_dimensions([FM_SUB_PROD])
+    assert dims == ["failure_mode", "substrate", "product"]
+    [row] = window_rows(buckets, TODAY, dims)
+    assert row["window_counts"] == [4, 3, 0, 0, 0, 0]
+    assert row["root_cause_category"] is None and row["substrate_b"] is None
+    assert stored_dimensions([("substrate_pair",)]) == ["substrate", "substrate_b"]
+
+
+def test_load_window_counts_pages_rpc():
+    db = MagicMock()
+    chain = db.rpc.return_value
+    chain.order.return_value = chain
+    chain.range.return_value = chain
+    chain.execute.side_effect = [MagicMock(data=[{}] * 1000), MagicMock(data=[{}] * 3)]
+
+    assert len(load_window_counts(db, TODAY, ["product"])) == 1003
+    db.rpc.assert_called_with("pattern_window_counts", {"p_today": "2026-06-30", "p_dims": ["product"]})
+    chain.range.assert_called_with(1000, 1999)
+
+
+def test_empty_cube():
+    result = PatternCube([], TODAY).detect([FM_SUB_PROD])
+    assert result.anomalies == [] and result.groups_checked == 0
+
+
+def test_severity_levels():
+    assert determine_severity(3.1) == "critical"
+    assert determine_severity(2.0) == "warning"
+    assert determine_severity(1.0) == "informational"
+
+
+def test_active_alert_keys_cover_legacy_alerts():
+    db = MagicMock()
+    chain = db.table.return_value
+    chain.select.return_value = chain
+    chain.eq.return_value = chain
+    chain.execute.return_value = MagicMock(data=[
+        {"pattern_key": "root_cause_category=x", "failure_mode": None},
+        {"pattern_key": None, "failure_mode": "adhesive", "affected_substrate": "aluminum", "affected_product": None},
+    ])
+    assert load_active_alert_keys(db) == {
+        "root_cause_category=x",
+        pattern_key({"failure_mode": "adhesive", "substrate": "aluminum", "product": None}),
+    }
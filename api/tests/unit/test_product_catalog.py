@@ -0,0 +1,176 @@
+"""Unit tests for the in-memory product catalog and vectorized match scoring."""
+
+import random
+
+import pytest
+
+from routers.products import _chemistry_score, _cure_score, _substrate_score, _temp_score
+from services import product_catalog
+from services.product_catalog import ProductCatalog, get_catalog, invalidate_catalog, product_slugs
+
+CHEMISTRIES = ["Epoxy", "two-part epoxy", "Cyanoacrylate", "Polyurethane", "Silicone", "MMA acrylic", None]
+SUBSTRATES = ["aluminum", "steel", "stainless steel", "abs", "polycarbonate", "glass", "wood", "pp"]
+CURES = [{"method": "heat cure 80C"}, {"method": "room temperature"}, {"uv": "UV cure"}, {}, None]
+
+
+def _synthetic_rows(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        tmin = rng.choice([None, -60, -40, -20, 0])
+        rows.append({
+            "id": f"p-{i:05d}",
+            "product_name": f"Product {i}",
+            "manufacturer": rng.choice(["Henkel", "3M", "Permabond"]),
+            "chemistry_type": rng.choice(CHEMISTRIES),
+            "recommended_substrates": rng.sample(SUBSTRATES, rng.randint(0, 3)),
+            "operating_temp_min_c": tmin,
+            "operating_temp_max_c": None if tmin is None else rng.choice([80, 120, 150, 200]),
+            "cure_schedule": rng.choice(CURES),
+        })
+    return rows
+
+
+def _reference(rows, chemistry, substrates, temp_min, temp_max, cure_method):
+    """The original per-product loop from the match endpoint."""
+    req_subs = [s for s in substrates if (s or "").strip()]
+    scored = []
+    for i, p in enumerate(rows):
+        s, _ = _substrate_score(p.get("recommended_substrates") or [], req_subs)
+        if req_subs and s <= 0:
+            continue
+        c, _ = _chemistry_score(p.get("chemistry_type"), chemistry)
+        t, _ = _temp_score(p.get("operating_temp_min_c"), p.get("operating_temp_max_c"), temp_min, temp_max)
+        cu, _ = _cure_score(p.get("cure_schedule") or {}, cure_method)
+        score = int(round(((s * 0.4) + (c * 0.3) + (t * 0.2) + (cu * 0.1)) * 100))
+        if score > 0:
+            scored.append((i, score, s, c, t, cu))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:10]
+
+
+@pytest.mark.parametrize(
+    "chemistry,substrates,temp_min,temp_max,cure_method",
+    [
+        ("epoxy", ["aluminum", "steel"], -40, 120, "heat"),
+        ("Cyanoacrylate", [], None, None, None),
+        ("acrylic", ["ABS"], None, 150, "uv"),
+        ("polyurethane epoxy", ["stainless", "glass", "  "], -30, 90, None),
+        ("silicone", ["wood"], 10, 10, "room temperature"),
+    ],
+)
+def test_match_parity_with_reference_scoring(chemistry, substrates, temp_min, temp_max, cure_method):
+    rows = _synthetic_rows(400)
+    catalog = ProductCatalog(rows)
+
+    expected = _reference(rows, chemistry, substrates, temp_min, temp_max, cure_method)
+    got = catalog.match(chemistry, substrates, temp_min, temp_max, cure_method, top_k=10)
+
+    assert [(m.index, m.score) for m in got] == [(e[0], e[1]) for e in expected]
+    for m, e in zip(got, expected):
+        assert (m.substrate, m.chemistry, m.temp_range, m.cure_method) == pytest.approx(e[2:])
+
+
+def test_component_scores_match_reference_for_every_product():
+    rows = _synthetic_rows(200, seed=11)
+    catalog = ProductCatalog(rows)
+
+    subs = catalog.substrate_scores(["steel", "abs"])
+    chem = catalog.chemistry_scores("epoxy")
+    temp = catalog.temp_scores(-30, 100)
+    cure = catalog.cure_scores("cure")
+
+    for i, p in enumerate(rows):
+        assert subs[i] == pytest.approx(_substrate_score(p["recommended_substrates"], ["steel", "abs"])[0])
+        assert chem[i] == pytest.approx(_chemistry_score(p["chemistry_type"], "epoxy")[0])
+        assert temp[i] == pytest.approx(
+            _temp_score(p["operating_temp_min_c"], p["operating_temp_max_c"], -30, 100)[0]
+        )
+        assert cure[i] == pytest.approx(_cure_score(p["cure_schedule"] or {}, "cure")[0])
+
+
+def test_empty_catalog_returns_no_matches():
+    assert ProductCatalog([]).match("epoxy", ["steel"]) == []
+
+
+def test_ties_are_broken_by_catalog_order():
+    rows = [
+        {"id": f"p-{i}", "chemistry_type": "epoxy", "recommended_substrates": ["steel"]}
+        for i in range(20)
+    ]
+    got = ProductCatalog(rows).match("epoxy", ["steel"], top_k=5)
+    assert [m.index for m in got] == [0, 1, 2, 3, 4]
+    assert all(m.score == 70 for m in got)
+
+
+def test_get_catalog_caches_until_invalidated(monkeypatch):
+    loads = []
+
+    def fake_load(db):
+        loads.append(1)
+        return _synthetic_rows(5)
+
+    monkeypatch.setattr(product_catalog, "_load_rows", fake_load)
+    monkeypatch.setattr(product_catalog, "get_supabase", lambda: None)
+    invalidate_catalog()
+
+    first = get_catalog()
+    assert get_catalog() is first
+    assert len(loads) == 1
+
+    invalidate_catalog()
+    second = get_catalog()
+    assert second is not first
+    assert len(loads) == 2
+    invalidate_catalog()
+
+
+def test_product_slugs_and_slug_index():
+    assert product_slugs("Henkel Corp.", "Loctite EA 9466") == {
+        "manufacturer_slug": "henkel-corp",
+        "product_slug": "loctite-ea-9466",
+    }
+    rows = [
+        {"id": "a", "manufacturer": "3M", "product_name": "DP 420"},
+        {"id": "b", "manufacturer_slug": "3m", "product_slug": "dp-420", "product_name": "DP-420"},
+        {"id": "c", "manufacturer_slug": "henkel", "product_slug": "loctite-401"},
+    ]
+    catalog = ProductCatalog(rows)
+    assert catalog.slug_index[("3m", "dp-420")] == 0
+    assert catalog.slug_index[("henkel", "loctite-401")] == 2
+
+
+async def test_public_detail_is_served_from_slug_index_and_cached(monkeypatch):
+    from unittest.mock import MagicMock
+
+    from routers import products
+
+    row = {
+        "id": "p-1",
+        "product_name": "Loctite 401",
+        "manufacturer": "Henkel",
+        "field_failure_rate": 0.02,
+        "common_failure_modes": ["adhesive"],
+    }
+    catalog = ProductCatalog([dict(row)])
+    db = MagicMock()
+    chain = db.table.return_value
+    chain.select.return_value = chain
+    chain.eq.return_value = chain
+    chain.order.return_value = chain
+    chain.limit.return_value = chain
+    chain.execute.return_value = MagicMock(data=[row])
+    monkeypatch.setattr(products, "get_catalog", lambda: catalog)
+    monkeypatch.setattr(products, "get_supabase", lambda: db)
+
+    free = await products.get_product_public("henkel", "loctite-401", user=None)
+    assert free.field_failure_rate is None
+    chain.eq.assert_called_once_with("id", "p-1")
+
+    full = await products.get_product_public("Henkel", "loctite-401", user={"plan": "quality"})
+    assert full.field_failure_rate == 0.02
+    assert chain.execute.call_count == 1
+
+    chain.execute.return_value = MagicMock(data=[])
+    with pytest.raises(products.HTTPException):
+        await products.get_product_public("henkel", "missing", user=None)
@@ -0,0 +1,72 @@
+"""Unit tests for spec → product matching on the in-memory catalog."""
+
+from services.product_catalog import ProductCatalog
+from services.product_matching import _extract_chemistry_keywords, rank_spec_candidates
+
+ROWS = [
+    {
+        "id": "p1", "product_name": "Loctite 401", "chemistry_type": "Cyanoacrylate",
+        "recommended_substrates": ["Steel", "ABS"], "operating_temp_min_c": -40, "operating_temp_max_c": 120,
+        "mechanical_properties": {"shear_strength": "20 MPa"}, "tds_file_url": "https://x/401.pdf",
+    },
+    {
+        "id": "p2", "product_name": "DP420", "chemistry_type": "Toughened Epoxy",
+        "recommended_substrates": ["Aluminum", "Steel"], "operating_temp_min_c": -55, "operating_temp_max_c": 120,
+        "mechanical_properties": {}, "cure_schedule": {"full_cure": "24 h"},
+    },
+    {
+        "id": "p3", "product_name": "EA 9466", "chemistry_type": "two-part epoxy",
+        "recommended_substrates": ["Aluminum"], "operating_temp_min_c": -55, "operating_temp_max_c": 80,
+        "fixture_time_minutes": 60,
+    },
+    {"id": "p4", "product_name": "Sikaflex 221", "chemistry_type": "Polyurethane"},
+    {"id": "p5", "product_name": "Mystery bond", "chemistry_type": "Hybrid elastomeric"},
+]
+
+SPEC = {
+    "substrate_a": "Aluminum 6061-T6",
+    "substrate_b": "Steel",
+    "environment": {"temp_min": "-40°C", "temp_max": "100"},
+}
+
+
+def test_extract_keywords_prefers_families():
+    assert _extract_chemistry_keywords("Toughened two-part epoxy") == ["epoxy"]
+    assert _extract_chemistry_keywords("") == []
+
+
+def test_family_keywords_use_precomputed_tags():
+    catalog = ProductCatalog(ROWS)
+    assert catalog.chemistry_candidates(["epoxy"]).tolist() == [1, 2]
+    assert catalog.chemistry_candidates(["epoxy", "polyurethane"]).tolist() == [1, 2, 3]
+
+
+def test_free_word_keywords_fall_back_to_substring():
+    catalog = ProductCatalog(ROWS)
+    assert catalog.chemistry_candidates(["elastomeric"]).tolist() == [4]
+    assert catalog.chemistry_candidates(["nothing"]).size == 0
+
+
+def test_rank_spec_candidates_scores_and_builds_payload():
+    catalog = ProductCatalog(ROWS)
+    matches = rank_spec_candidates(catalog, ["epoxy"], SPEC)
+
+    assert [m["product_id"] for m in matches] == ["p2", "p3"]
+    best = matches[0]
+    assert best["score"] == 6
+    assert best["reasons"] == [
+        "Temperature range covers requirement",
+        "Recommended for Aluminum 6061-T6",
+        "Recommended for Steel",
+    ]
+    assert best["operating_temp"] == "-55°C to 120°C"
+    assert best["cure_time"] == "24 h"
+    assert matches[1]["cure_time"] == "60 min (fixture)"
+    assert matches[1]["score"] == 2
+
+
+def test_rank_spec_candidates_keeps_top_k_with_catalog_order_ties():
+    rows = [{"id": f"p{i}", "chemistry_type": "epoxy"} for i in range(10)]
+    matches = rank_spec_candidates(ProductCatalog(rows), ["epoxy"], {}, top_k=3)
+    assert [m["product_id"] for m in matches] == ["p0", "p1", "p2"]
+    assert all(m["score"] == 0 for m in matches)
@@ -0,0 +1,101 @@
+"""Unit tests for the in-process product search index."""
+
+from routers import products
+from services.product_catalog import ProductCatalog
+from services.product_search import ProductSearchIndex, normalize_text
+
+ROWS = [
+    {"id": "p1", "product_name": "Loctite 401", "manufacturer": "Henkel", "chemistry_type": "Cyanoacrylate"},
+    {"id": "p2", "product_name": "Loctite EA 9466", "manufacturer": "Henkel", "chemistry_type": "Epoxy"},
+    {"id": "p3", "product_name": "Scotch-Weld DP420", "manufacturer": "3M", "chemistry_type": "Epoxy",
+     "tds_file_url": "https://example.com/dp420.pdf"},
+    {"id": "p4", "product_name": "Permabond 910", "manufacturer": "Permabond", "chemistry_type": "Cyanoacrylate"},
+    {"id": "p5", "product_name": "Loctite", "manufacturer": "Henkel", "chemistry_type": None},
+    {"id": "p6", "product_name": "Araldite 2014", "manufacturer": "Huntsman", "chemistry_type": "Two-part epoxy"},
+]
+
+
+def _index(rows=ROWS):
+    return ProductSearchIndex(ProductCatalog(rows))
+
+
+def _ids(index, hits):
+    return [index.catalog.ids[h.index] for h in hits]
+
+
+def test_normalize_text_collapses_punctuation():
+    assert normalize_text("  Scotch-Weld  DP420 ") == "scotch weld dp420"
+    assert normalize_text(None) == ""
+
+
+def test_exact_name_ranks_first_then_prefix():
+    index = _index()
+    ids = _ids(index, index.search("loctite"))
+    assert ids[0] == "p5"
+    assert set(ids[:3]) == {"p1", "p2", "p5"}
+
+
+def test_short_prefix_query():
+    index = _index()
+    assert _ids(index, index.search("lo"))[:1] == ["p5"]
+    assert "p3" in _ids(index, index.search("dp"))
+
+
+def test_multi_word_query_across_fields():
+    index = _index()
+    assert _ids(index, index.search("henkel 401"))[0] == "p1"
+
+
+def test_typo_tolerant_match():
+    index = _index()
+    assert "p6" in _ids(index, index.search("araldit"))
+    assert "p4" in _ids(index, index.search("permabnd"))
+
+
+def test_mid_word_query_matches_like_substring():
+    index = _index()
+    assert _ids(index, index.search("420")) == ["p3"]
+    assert set(_ids(index, index.search("tite"))) == {"p1", "p2", "p5"}
+    assert _ids(index, index.search("tite", fuzzy=False))[0] == "p5"
+    assert _ids(index, index.search("ntsm")) == ["p6"]  # manufacturer
+    assert set(_ids(index, index.search("ite 4"))) == {"p1"}
+
+
+def test_no_match_returns_empty():
+    index = _index()
+    assert index.search("zzzz") == []
+    assert index.search("   ") == []
+
+
+def test_limit_and_mask():
+    index = _index()
+    assert len(index.search("e", limit=2)) <= 2
+
+    mask = index.filter_mask(chemistry_type="epoxy")
+    ids = _ids(index, index.search("loctite", mask=mask))
+    assert ids == ["p2"]
+
+
+def test_filter_mask_is_substring_and_case_insensitive():
+    index = _index()
+    mask = index.filter_mask(manufacturer="HENK")
+    assert [index.catalog.ids[i] for i in mask.nonzero()[0]] == ["p1", "p2", "p5"]
+    assert index.filter_mask().all()
+
+
+def test_name_order_is_case_insensitive():
+    index = _index()
+    names = [ROWS[i]["product_name"].lower() for i in index.name_order]
+    assert names == sorted(names)
+
+
+def test_empty_catalog():
+    assert _index([]).search("loctite") == []
+
+
+async def test_autocomplete_includes_tds_url(monkeypatch):
+    index = _index()
+    monkeypatch.setattr(products, "get_search_index", lambda: index)
+    items = await products.product_autocomplete(q="dp420")
+    assert items[0].id == "p3"
+    assert items[0].tds_file_url == "https://example.com/dp420.pdf"
@@ -0,0 +1,142 @@
+"""Unit tests for the substrate key backfill."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.substrate_backfill import backfill_table, plan_updates, rebuild_pattern_counts
+
+ROWS = [
+    {"id": "01", "substrate_a": "Aluminium", "substrate_b": "PC",
+     "substrate_a_normalized": "aluminium", "substrate_b_normalized": "polycarbonate"},
+    {"id": "02", "substrate_a": "Steel", "substrate_b": "ABS",
+     "substrate_a_normalized": "steel", "substrate_b_normalized": "abs"},
+    {"id": "03", "substrate_a": "Anodised Aluminium", "substrate_b": "Polycarbonat",
+     "substrate_a_normalized": "anodised aluminium", "substrate_b_normalized": "polycarbonat"},
+    {"id": "04", "substrate_a": None, "substrate_b": None,
+     "substrate_a_normalized": "aluminium", "substrate_b_normalized": "lexan"},
+    {"id": "05", "substrate_a": "Glass", "substrate_b": None,
+     "substrate_a_normalized": None, "substrate_b_normalized": None},
+]
+
+
+def _db(rows):
+    """Fake PostgREST table honouring gt/order/limit so keyset paging is exercised."""
+    db = MagicMock()
+    state = {}
+    updates = []
+
+    def table(name):
+        chain = MagicMock()
+        state.clear()
+
+        def gt(col, value):
+            state["after"] = value
+            return chain
+
+        def limit(n):
+            state["limit"] = n
+            return chain
+
+        def execute():
+            page = [r for r in rows if r["id"] > state.get("after", "")][: state.get("limit", len(rows))]
+            return MagicMock(data=page)
+
+        def update(payload):
+            updates.append(payload)
+            return chain
+
+        for method in ("select", "order", "in_"):
+            getattr(chain, method).return_value = chain
+        chain.update.side_effect = update
+        chain.gt.side_effect = gt
+        chain.limit.side_effect = limit
+        chain.execute.side_effect = execute
+        return chain
+
+    db.table.side_effect = table
+    return db, updates
+
+
+def test_plan_updates_groups_changed_rows_by_new_keys():
+    groups = plan_updates(ROWS)
+    assert groups == {
+        ("aluminum", "polycarbonate"): ["01", "04"],
+        ("anodized aluminum", "polycarbonate"): ["03"],
+        ("glass", None): ["05"],
+    }
+
+
+def test_backfill_pages_by_id_and_updates_in_bulk():
+    db, updates = _db(ROWS)
+    seen = []
+
+    report = backfill_table(db, "failure_analyses", chunk_size=2, on_chunk=lambda r: seen.append(r.last_id))
+
+    assert report.scanned == 5
+    assert report.changed == 4
+    assert report.updated == 4
+    assert seen == ["02", "04", "05"]
+    assert {"substrate_a_normalized": "aluminum", "substrate_b_normalized": "polycarbonate"} in updates
+    assert report.transitions[("aluminium", "aluminum")] == 2
+    assert report.as_dict()["top_transitions"][0] == {"from": "aluminium", "to": "aluminum", "rows": 2}
+
+
+def test_backfill_resumes_after_checkpoint_and_respects_max_rows():
+    db, _ = _db(ROWS)
+    report = backfill_table(db, "spec_requests", after_id="02", max_rows=1, dry_run=True)
+    assert report.scanned == 1
+    assert report.last_id == "03"
+    assert report.changed == 1
+    assert report.updated == 0
+
+
+def test_checkpoint_stays_before_first_failed_chunk():
+    db, updates = _db(ROWS)
+    real_table = db.table.side_effect
+
+    def table(name):
+        chain = real_table(name)
+        apply = chain.update.side_effect
+
+        def update(payload):
+            if payload["substrate_a_normalized"] == "anodized aluminum":
+                raise RuntimeError("statement timeout")
+            return apply(payload)
+
+        chain.update.side_effect = update
+        return chain
+
+    db.table.side_effect = table
+    seen = []
+    report = backfill_table(db, "failure_analyses", chunk_size=2, on_chunk=lambda r: seen.append(r.checkpoint_id))
+
+    assert report.failed_ids == ["03"]
+    assert report.last_id == "05"
+    assert seen == ["02", "02", "02"]
+    assert report.as_dict()["checkpoint_id"] == "02"
+
+
+def test_rebuild_pattern_counts_calls_rpc():
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value.data = 12
+    assert rebuild_pattern_counts(db) == 12
+    db.rpc.assert_called_once_with("rebuild_pattern_daily_counts", {})
+
+
+def test_dry_run_never_writes():
+    db, updates = _db(ROWS)
+    backfill_table(db, "failure_analyses", dry_run=True)
+    assert updates == []
+
+
+def test_throttle_sleeps_to_hold_target_rate():
+    naps = []
+    backfill_table(_db(ROWS)[0], "failure_analyses", chunk_size=2, dry_run=True, rows_per_second=1, sleep=naps.append)
+    assert len(naps) == 2
+    assert naps[0] == pytest.approx(2, abs=0.5)
+
+
+def test_rejects_unknown_table():
+    with pytest.raises(ValueError):
+        backfill_table(MagicMock(), "users")
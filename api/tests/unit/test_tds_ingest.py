@@ -0,0 +1,275 @@
+"""Unit tests for bulk TDS ingestion."""
+
+import asyncio
+import io
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from routers import products
+from services import tds_ingest
+from services.tds_ingest import collect_documents, ingest_tds_batch
+
+PDF_A = b"%PDF-1.4 product A"
+PDF_B = b"%PDF-1.4 product B"
+PDF_C = b"%PDF-1.4 product C"
+BATCH_ID = "5f0c6a52-3f1e-4e55-9a43-7f3f2b8e9d10"
+
+
+def _zip(**members: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buf.getvalue()
+
+
+def test_collect_documents_dedupes_and_expands_zips():
+    batch = collect_documents([
+        ("a.pdf", PDF_A),
+        ("catalog.zip", _zip(**{"sheets/b.pdf": PDF_B, "sheets/a-copy.pdf": PDF_A, "readme.txt": b"hi"})),
+        ("broken.zip", b"not a zip"),
+    ])
+
+    assert [d.filename for d in batch.documents] == ["a.pdf", "b.pdf"]
+    assert batch.duplicates == ["sheets/a-copy.pdf"]
+    assert {r["filename"] for r in batch.rejected} == {"readme.txt", "broken.zip"}
+    assert batch.received == 4
+
+
+def test_collect_documents_enforces_batch_limit():
+    batch = collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B)], max_files=1)
+    assert len(batch.documents) == 1
+    assert "Batch limit" in batch.rejected[0]["error"]
+
+
+def test_collect_documents_caps_expanded_total_across_zips():
+    archives = [(f"part{i}.zip", _zip(**{f"{i}.pdf": PDF_A + bytes([i]) * 400})) for i in range(3)]
+
+    assert len(collect_documents(archives, max_expanded_bytes=2000).documents) == 3
+    with pytest.raises(tds_ingest.BatchTooLarge):
+        collect_documents(archives, max_expanded_bytes=1000)
+    with pytest.raises(tds_ingest.BatchTooLarge):
+        collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B)], max_expanded_bytes=len(PDF_A) + 1)
+
+
+def _db(done_hashes=(), cached=(), batch_owner=None):
+    db = MagicMock()
+    tables: dict[str, MagicMock] = {}
+
+    def table(name):
+        if name not in tables:
+            chain = MagicMock()
+            for method in ("select", "eq", "in_", "range", "upsert", "insert", "update"):
+                getattr(chain, method).return_value = chain
+            data = {
+                "tds_ingest_items": [{"content_hash": h, "product_id": "old"} for h in done_hashes],
+                "tds_extractions": [{"content_hash": h, "product_id": pid} for h, pid in cached],
+                "product_specifications": [{"id": pid} for _, pid in cached],
+                "tds_ingest_batches": [{"user_id": batch_owner}] if batch_owner else [],
+            }.get(name, [])
+            chain.execute.return_value = MagicMock(data=data)
+            tables[name] = chain
+        return tables[name]
+
+    db.table.side_effect = table
+    return db, tables
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    calls = []
+
+    async def fake_extract(content, client=None):
+        calls.append(content)
+        if content == PDF_C:
+            raise RuntimeError("Claude timeout")
+        return {"product_name": content.decode()[-9:], "manufacturer": "Acme"}
+
+    monkeypatch.setattr(tds_ingest, "extract_fields", fake_extract)
+    monkeypatch.setattr(tds_ingest, "upload_tds", lambda db, digest, content: f"https://cdn/{digest}.pdf")
+    monkeypatch.setattr(tds_ingest, "invalidate_catalog", lambda: None)
+    return calls
+
+
+async def test_ingest_bulk_upserts_and_reports(fake_pipeline):
+    db, tables = _db()
+    batch = collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B), ("c.pdf", PDF_C), ("a2.pdf", PDF_A)])
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID, concurrency=2, flush_size=10)
+
+    assert report["succeeded"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["filename"] == "c.pdf"
+    assert report["duplicates"] == 1
+    assert report["skipped_already_done"] == 0
+
+    products = tables["product_specifications"].upsert.call_args_list
+    assert len(products) == 1
+    assert {r["product_name"] for r in products[0].args[0]} == {"product A", "product B"}
+    assert all(r["manufacturer_slug"] == "acme" for r in products[0].args[0])
+
+    ledger = tables["tds_ingest_items"].upsert.call_args.args[0]
+    assert sorted(r["status"] for r in ledger) == ["done", "done", "failed"]
+
+    cache_rows = tables["tds_extractions"].upsert.call_args.args[0]
+    assert {r["content_hash"] for r in cache_rows} == {d.content_hash for d in batch.documents[:2]}
+
+
+async def test_ingest_resumes_skipping_done_documents(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B)])
+    db, _ = _db(done_hashes=[batch.documents[0].content_hash])
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    assert fake_pipeline == [PDF_B]
+    assert report["skipped_already_done"] == 1
+    assert report["succeeded"] == 1
+
+
+async def test_ingest_maps_cached_pdfs_to_existing_products(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B)])
+    db, tables = _db(cached=[(batch.documents[0].content_hash, "prod-a")])
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    assert fake_pipeline == [PDF_B]
+    assert report["cache_hits"] == 1
+    assert report["succeeded"] == 1
+    ledger = tables["tds_ingest_items"].upsert.call_args.args[0]
+    assert {r["product_id"] for r in ledger if r["content_hash"] == batch.documents[0].content_hash} == {"prod-a"}
+
+
+async def test_force_refresh_reextracts_into_existing_product(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A)])
+    db, tables = _db(cached=[(batch.documents[0].content_hash, "prod-a")])
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID, force_refresh=True)
+
+    assert fake_pipeline == [PDF_A]
+    assert report["cache_hits"] == 0
+    record = tables["product_specifications"].upsert.call_args.args[0][0]
+    assert record["id"] == "prod-a"
+    assert "created_at" not in record
+    assert "manufacturer_claimed" not in record
+
+
+async def test_force_refresh_mixed_batch_upserts_refreshed_and_new_rows_separately(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A), ("b.pdf", PDF_B)])
+    db, tables = _db(cached=[(batch.documents[0].content_hash, "prod-a")])
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID, force_refresh=True)
+
+    assert report["succeeded"] == 2
+    calls = tables["product_specifications"].upsert.call_args_list
+    assert len(calls) == 2
+    # Every upsert call has one column set, so postgrest never nulls created_at
+    for call in calls:
+        assert len({frozenset(r) for r in call.args[0]}) == 1
+    by_id = {r["id"]: r for call in calls for r in call.args[0]}
+    assert "created_at" not in by_id["prod-a"]
+    new = next(r for pid, r in by_id.items() if pid != "prod-a")
+    assert new["created_at"] and new["manufacturer_claimed"] is False
+
+
+async def test_batch_owned_by_another_user_is_refused(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A)])
+    db, tables = _db(batch_owner="user-2")
+
+    with pytest.raises(PermissionError):
+        await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    assert fake_pipeline == []
+    tables["tds_ingest_batches"].insert.assert_not_called()
+    tables["tds_ingest_batches"].upsert.assert_not_called()
+
+
+async def test_new_batch_is_created_for_caller(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A)])
+    db, tables = _db()
+
+    await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    created = tables["tds_ingest_batches"].insert.call_args.args[0]
+    assert created == {"id": BATCH_ID, "user_id": "user-1", "status": "running"}
+
+
+async def test_malformed_batch_id_is_rejected(fake_pipeline):
+    db, _ = _db()
+    with pytest.raises(ValueError):
+        await ingest_tds_batch(db, "user-1", collect_documents([("a.pdf", PDF_A)]), batch_id="batch-1")
+
+
+async def test_new_products_get_stable_ids_per_batch_document(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A)])
+    db, tables = _db()
+
+    await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    record = tables["product_specifications"].upsert.call_args.args[0][0]
+    assert record["id"] == tds_ingest.product_id_for(BATCH_ID, batch.documents[0].content_hash)
+
+
+async def test_failed_flush_still_records_ledger_outcomes(fake_pipeline):
+    batch = collect_documents([("a.pdf", PDF_A), ("c.pdf", PDF_C)])
+    db, tables = _db()
+    db.table("product_specifications").execute.side_effect = RuntimeError("db down")
+
+    report = await ingest_tds_batch(db, "user-1", batch, batch_id=BATCH_ID)
+
+    assert report["succeeded"] == 0
+    assert report["failed"] == 2
+    ledger = tables["tds_ingest_items"].upsert.call_args.args[0]
+    assert sorted(r["status"] for r in ledger) == ["failed", "failed"]
+    assert all(r["product_id"] is None for r in ledger)
+
+
+async def test_background_failure_marks_batch_failed(monkeypatch):
+    db, tables = _db()
+
+    async def boom(*args, **kwargs):
+        raise RuntimeError("catalog upsert exploded")
+
+    monkeypatch.setattr(tds_ingest, "ingest_tds_batch", boom)
+    tds_ingest.start_ingest(db, "user-1", collect_documents([("a.pdf", PDF_A)]), batch_id=BATCH_ID)
+    await asyncio.gather(*tds_ingest._running)
+
+    saved = tables["tds_ingest_batches"].update.call_args.args[0]
+    assert saved["status"] == "failed"
+    assert saved["report"] == {"batch_id": BATCH_ID, "error": "catalog upsert exploded"}
+
+
+def _upload(name: str, content: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=name)
+
+
+async def test_bulk_endpoint_rejects_bad_or_foreign_batch_ids(monkeypatch):
+    db, _ = _db(batch_owner="user-2")
+    monkeypatch.setattr(products, "get_supabase", lambda: db)
+    monkeypatch.setattr(products, "start_ingest", MagicMock())
+
+    with pytest.raises(HTTPException) as bad:
+        await products.extract_tds_bulk(files=[_upload("a.pdf", PDF_A)], batch_id="nope", force_refresh=False, user={"id": "user-1"})
+    assert bad.value.status_code == 400
+
+    with pytest.raises(HTTPException) as foreign:
+        await products.extract_tds_bulk(files=[_upload("a.pdf", PDF_A)], batch_id=BATCH_ID, force_refresh=False, user={"id": "user-1"})
+    assert foreign.value.status_code == 404
+    products.start_ingest.assert_not_called()
+
+
+async def test_force_refresh_is_admin_only():
+    with pytest.raises(HTTPException) as exc:
+        await products.extract_tds_bulk(
+            files=[_upload("a.pdf", PDF_A)], batch_id=None, force_refresh=True, user={"id": "user-1", "role": "user"},
+        )
+    assert exc.value.status_code == 403
+    products._check_refresh_allowed({"id": "admin-1", "role": "admin"}, True)
+
+
+async def test_bulk_upload_total_is_capped():
+    with pytest.raises(HTTPException) as exc:
+        await products._read_uploads([_upload("a.pdf", b"x" * 600), _upload("b.pdf", b"x" * 600)], max_bytes=1000)
+    assert exc.value.status_code == 413
@@ -0,0 +1,89 @@
+"""Unit tests for the in-memory report template catalog."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from routers import admin
+from services import template_catalog
+
+ROWS = [
+    {"id": "t1", "name": "Ford Global 8D", "slug": "ford", "is_active": True},
+    {"id": "t2", "name": "Generic 8D", "slug": "generic", "is_active": True},
+    {"id": "t3", "name": "Legacy", "slug": "legacy", "is_active": False},
+]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = MagicMock()
+    db.table.return_value.select.return_value.order.return_value.execute.return_value.data = ROWS
+    monkeypatch.setattr(template_catalog, "get_supabase", lambda: db)
+    template_catalog.invalidate_templates()
+    yield db
+    template_catalog.invalidate_templates()
+
+
+def _loads(db) -> int:
+    return db.table.return_value.select.return_value.order.return_value.execute.call_count
+
+
+def test_reads_are_served_from_one_load(db):
+    assert [t["id"] for t in template_catalog.list_active_templates()] == ["t1", "t2"]
+    assert template_catalog.get_template("t3")["slug"] == "legacy"
+    assert template_catalog.get_template("missing") is None
+    assert _loads(db) == 1
+
+
+def test_invalidate_bumps_version_and_reloads(db):
+    template_catalog.warm_template_cache()
+    version = template_catalog.template_version()
+    template_catalog.invalidate_templates()
+    assert template_catalog.template_version() == version + 1
+    template_catalog.list_active_templates()
+    assert _loads(db) == 2
+
+
+def test_ttl_expiry_reloads(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(template_catalog.time, "monotonic", lambda: clock[0])
+    template_catalog.list_active_templates()
+    clock[0] += template_catalog.settings.report_template_cache_ttl_seconds + 1
+    template_catalog.list_active_templates()
+    assert _loads(db) == 2
+
+
+def test_warm_up_failure_is_swallowed(monkeypatch):
+    template_catalog.invalidate_templates()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(template_catalog, "get_supabase", boom)
+    template_catalog.warm_template_cache()
+    with pytest.raises(RuntimeError):
+        template_catalog.list_active_templates()
+
+
+def test_reload_raises_on_failure_and_counts_rows(db, monkeypatch):
+    assert template_catalog.reload_templates() == 3
+    assert _loads(db) == 1
+
+    def boom():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(template_catalog, "get_supabase", boom)
+    with pytest.raises(RuntimeError):
+        template_catalog.reload_templates()
+
+
+async def test_admin_refresh_returns_503_when_reload_fails(monkeypatch):
+    def boom():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(template_catalog, "get_supabase", boom)
+    with pytest.raises(HTTPException) as exc:
+        await admin.admin_refresh_templates(_admin={"role": "admin"})
+    assert exc.value.status_code == 503
+    template_catalog.invalidate_templates()
@@ -2,11 +2,16 @@
 
 from unittest.mock import MagicMock, patch
 
+from routers import admin
 from services.usage_service import (
     can_use_analysis,
     check_and_reset_usage,
+    guided_sessions_used,
     increment_analysis_usage,
+    increment_guided_session_usage,
     increment_spec_usage,
+    invalidate_usage_cache,
+    reconcile_guided_session_usage,
 )
 
 
@@ -60,3 +65,119 @@ def test_usage_increment_failure_is_noop():
     with patch("services.usage_service.get_supabase", return_value=db):
         increment_analysis_usage("11111111-1111-1111-1111-111111111111")
         increment_spec_usage("11111111-1111-1111-1111-111111111111")
+
+
+def _free_user(**overrides):
+    user = {
+        "id": "22222222-2222-2222-2222-222222222222",
+        "plan": "free",
+        "role": "user",
+        "analyses_this_month": 3,
+        "specs_this_month": 0,
+        "analyses_reset_date": "2999-01-01T00:00:00+00:00",
+    }
+    user.update(overrides)
+    return user
+
+
+def test_increment_is_one_rpc_call():
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=[
+        {"analyses_this_month": 4, "specs_this_month": 0, "analyses_reset_date": "2999-01-01T00:00:00+00:00"},
+    ])
+
+    with patch("services.usage_service.get_supabase", return_value=db):
+        row = increment_analysis_usage("22222222-2222-2222-2222-222222222222")
+
+    db.rpc.assert_called_once_with(
+        "increment_usage", {"p_user_id": "22222222-2222-2222-2222-222222222222", "p_kind": "analysis"},
+    )
+    db.table.assert_not_called()
+    assert row["analyses_this_month"] == 4
+    invalidate_usage_cache("22222222-2222-2222-2222-222222222222")
+
+
+def test_quota_check_uses_counters_from_the_last_increment():
+    user_id = "22222222-2222-2222-2222-222222222222"
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=[
+        {"analyses_this_month": 5, "specs_this_month": 0, "analyses_reset_date": "2999-01-01T00:00:00+00:00"},
+    ])
+    with patch("services.usage_service.get_supabase", return_value=db):
+        increment_analysis_usage(user_id)
+
+    # The row this request was handed predates the increment
+    assert can_use_analysis(_free_user(analyses_this_month=4)) is False
+    invalidate_usage_cache(user_id)
+    assert can_use_analysis(_free_user(analyses_this_month=4)) is True
+
+
+def test_due_reset_is_applied_without_a_write():
+    user = _free_user(analyses_this_month=5, specs_this_month=5, analyses_reset_date="2000-01-01T00:00:00Z")
+
+    with patch("services.usage_service.get_supabase") as get_supabase:
+        assert can_use_analysis(user) is True
+
+    get_supabase.assert_not_called()
+    assert user["analyses_this_month"] == 0 and user["specs_this_month"] == 0
+    assert user["analyses_reset_date"] > "2000-01-01"
+
+
+def test_guided_sessions_used_reads_the_user_row_and_cache():
+    user_id = "22222222-2222-2222-2222-222222222222"
+    with patch("services.usage_service.get_supabase") as get_supabase:
+        assert guided_sessions_used(_free_user(guided_sessions_this_month=2)) == 2
+        get_supabase.assert_not_called()
+
+        get_supabase.return_value.rpc.return_value.execute.return_value = MagicMock(data=[{
+            "analyses_this_month": 3, "specs_this_month": 0, "guided_sessions_this_month": 3,
+            "analyses_reset_date": "2999-01-01T00:00:00+00:00",
+        }])
+        increment_guided_session_usage(user_id)
+        get_supabase.return_value.rpc.assert_called_once_with(
+            "increment_usage", {"p_user_id": user_id, "p_kind": "guided_session"},
+        )
+
+    assert guided_sessions_used(_free_user(guided_sessions_this_month=2)) == 3
+    invalidate_usage_cache(user_id)
+    # A stale period counts as zero until the next increment resets the row
+    assert guided_sessions_used(_free_user(guided_sessions_this_month=2, analyses_reset_date="2000-01-01")) == 0
+
+
+def test_reconcile_reports_repaired_users():
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=4)
+    with patch("services.usage_service.get_supabase", return_value=db):
+        assert reconcile_guided_session_usage() == {"users_repaired": 4}
+    db.rpc.assert_called_once_with("reconcile_guided_session_counts", {})
+
+
+def test_reconcile_drops_cached_counters():
+    user_id = "22222222-2222-2222-2222-222222222222"
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=[{
+        "analyses_this_month": 0, "specs_this_month": 0, "guided_sessions_this_month": 5,
+        "analyses_reset_date": "2999-01-01T00:00:00+00:00",
+    }])
+    with patch("services.usage_service.get_supabase", return_value=db):
+        increment_guided_session_usage(user_id)
+        db.rpc.return_value.execute.return_value = MagicMock(data=1)
+        reconcile_guided_session_usage()
+
+    # The repaired (lower) row value is no longer masked by the cached count
+    assert guided_sessions_used(_free_user(guided_sessions_this_month=2)) == 2
+
+
+async def test_admin_user_list_shows_due_resets():
+    db = MagicMock()
+    chain = db.table.return_value.select.return_value.order.return_value
+    chain.execute.return_value = MagicMock(data=[
+        {"id": "u1", "email": "a@x.com", "analyses_this_month": 7, "specs_this_month": 2,
+         "analyses_reset_date": "2000-01-01T00:00:00Z"},
+        {"id": "u2", "email": "b@x.com", "analyses_this_month": 3, "specs_this_month": 1,
+         "analyses_reset_date": "2999-01-01T00:00:00Z"},
+    ])
+    with patch("routers.admin.get_supabase", return_value=db):
+        items = await admin.admin_list_users(search=None, _admin={"role": "admin"})
+
+    assert [(i.analyses_this_month, i.specs_this_month) for i in items] == [(0, 0), (3, 1)]
@@ -1,17 +1,41 @@
 """Normalization utilities.
 
 Keep deterministic + lightweight. Used to populate normalized columns for search/aggregation.
+
+Resolution order for a cleaned value:
+1. exact phrase alias (_COMMON_MAP, then data/substrate_aliases.json)
+2. token rewrite: spelling variants from the alias table, then conservative
+   edit-distance correction of unknown alphabetic tokens against the
+   material vocabulary
+3. phrase alias lookup again on the rewritten string
+
+The alias table is loaded once at import; results are memoized in a bounded LRU.
 """
 
 from __future__ import annotations
 
+import json
+import logging
 import re
-from typing import Optional
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
 
+logger = logging.getLogger(__name__)
 
 _WS_RE = re.compile(r"\s+")
 _NON_ALNUM_RE = re.compile(r"[^a-z0-9\s\-]", re.IGNORECASE)
 
+_ALIAS_PATH = Path(__file__).parent / "data" / "substrate_aliases.json"
+
+_CACHE_SIZE = 8192
+
+# Fuzzy correction only touches purely alphabetic tokens at least this long;
+# shorter tokens are mostly grades and abbreviations where one edit changes meaning.
+_FUZZY_MIN_LEN = 5
+_FUZZY_WIDE_LEN = 10  # tokens this long may be two edits away
+
 
 _COMMON_MAP = {
     # metals
@@ -85,6 +109,137 @@ _COMMON_MAP = {
 }
 
 
+def _clean(value: str) -> str:
+    s = value.strip().lower()
+    # Normalize separators
+    s = s.replace("_", " ")
+    # Remove punctuation except spaces/hyphens
+    s = _NON_ALNUM_RE.sub(" ", s)
+    # Collapse whitespace
+    return _WS_RE.sub(" ", s).strip()
+
+
+@dataclass
+class _AliasTable:
+    phrases: dict[str, str] = field(default_factory=dict)
+    tokens: dict[str, str] = field(default_factory=dict)
+    vocabulary: dict[int, set[str]] = field(default_factory=dict)  # token length -> tokens
+
+    def known(self, token: str) -> bool:
+        return token in self.tokens or token in self.vocabulary.get(len(token), ())
+
+
+def _build_table(data: dict) -> _AliasTable:
+    table = _AliasTable()
+    words: set[str] = set()
+
+    for canonical, aliases in (data.get("materials") or {}).items():
+        canonical = _clean(canonical)
+        table.phrases.setdefault(canonical, canonical)
+        words.update(canonical.split())
+        for alias in aliases or []:
+            key = _clean(alias)
+            if key:
+                table.phrases.setdefault(key, canonical)
+                words.update(key.split())
+    # Hand-maintained abbreviations win over the data file
+    table.phrases.update(_COMMON_MAP)
+    for key, value in _COMMON_MAP.items():
+        words.update(key.split())
+        words.update(value.split())
+
+    for variant, target in (data.get("token_aliases") or {}).items():
+        table.tokens[_clean(variant)] = _clean(target)
+    words.update(_clean(w) for w in data.get("words") or [])
+
+    for w in words:
+        if w.isalpha():
+            table.vocabulary.setdefault(len(w), set()).add(w)
+    return table
+
+
+def _load_table(path: Path) -> _AliasTable:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Substrate alias table unavailable ({path}): {e}")
+        data = {}
+    return _build_table(data)
+
+
+_TABLE = _load_table(_ALIAS_PATH)
+
+
+def reload_aliases(path: Optional[Path] = None) -> None:
+    """Re-read the alias table (tests / after editing the JSON) and drop memoized results."""
+    global _TABLE
+    _TABLE = _load_table(path or _ALIAS_PATH)
+    _normalize_cached.cache_clear()
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance, giving up once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _closest_token(token: str, table: _AliasTable) -> Optional[str]:
+    """Unique vocabulary token within the edit budget, or None when absent/ambiguous."""
+    limit = 2 if len(token) >= _FUZZY_WIDE_LEN else 1
+    best = limit + 1
+    found: set[str] = set()
+    for length in range(len(token) - limit, len(token) + limit + 1):
+        for candidate in table.vocabulary.get(length, ()):
+            d = _edit_distance(token, candidate, limit)
+            if d < best:
+                best, found = d, {table.tokens.get(candidate, candidate)}
+            elif d == best and d <= limit:
+                found.add(table.tokens.get(candidate, candidate))
+    for variant, target in table.tokens.items():
+        if abs(len(variant) - len(token)) <= limit:
+            d = _edit_distance(token, variant, limit)
+            if d < best:
+                best, found = d, {target}
+            elif d == best and d <= limit:
+                found.add(target)
+    return found.pop() if len(found) == 1 else None
+
+
+def _rewrite_token(token: str, table: _AliasTable) -> str:
+    if token in table.tokens:
+        return table.tokens[token]
+    if len(token) < _FUZZY_MIN_LEN or not token.isalpha() or table.known(token):
+        return token
+    return _closest_token(token, table) or token
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_cached(value: str) -> Optional[str]:
+    s = _clean(value)
+    if not s:
+        return None
+
+    table = _TABLE
+    if s in table.phrases:
+        return table.phrases[s]
+
+    rewritten = " ".join(_rewrite_token(t, table) for t in s.split(" "))
+    return table.phrases.get(rewritten, rewritten)
+
+
 def normalize_substrate(value: Optional[str]) -> Optional[str]:
     """Normalize a substrate/material string.
 
@@ -93,26 +248,19 @@ def normalize_substrate(value: Optional[str]) -> Optional[str]:
     - lowercase
     - remove punctuation (keep spaces and hyphens)
     - collapse whitespace
-    - map a few common abbreviations
+    - map common abbreviations and aliases to a canonical material
+    - fix spelling variants and near-miss typos token by token
 
-    This is intentionally simple; we can iterate later.
+    Canonical outputs are fixed points, so re-normalizing stored values is safe.
     """
 
     if value is None:
         return None
+    return _normalize_cached(value)
 
-    s = value.strip().lower()
-    if not s:
-        return None
-
-    # Normalize separators
-    s = s.replace("_", " ")
-
-    # Remove punctuation except spaces/hyphens
-    s = _NON_ALNUM_RE.sub(" ", s)
-
-    # Collapse whitespace
-    s = _WS_RE.sub(" ", s).strip()
 
-    # Map exact abbreviations
-    return _COMMON_MAP.get(s, s)
+def normalize_substrates(values: Iterable[Optional[str]]) -> list[Optional[str]]:
+    """Batch form of normalize_substrate; each distinct input is resolved once."""
+    values = list(values)
+    resolved = {v: normalize_substrate(v) for v in set(values)}
+    return [resolved[v] for v in values]
@@ -0,0 +1,9 @@
+-- Migration 015: Keyset pagination + unread count indexes for notifications
+-- list_notifications pages by (created_at, id) cursor; unread-count seeds
+-- its in-memory counter from a partial index instead of scanning read rows.
+
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created_id
+  ON public.notifications(user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread
+  ON public.notifications(user_id) WHERE is_read = false;
@@ -0,0 +1,28 @@
+-- Migration 016: Follow-up email ledger
+-- One row per analysis that received a feedback follow-up email.
+-- send_pending_followups skips analyses present here, so overlapping
+-- 6-8 day windows and retried cron runs never email twice.
+
+CREATE TABLE IF NOT EXISTS public.followup_email_ledger (
+  analysis_id uuid PRIMARY KEY REFERENCES public.failure_analyses(id) ON DELETE CASCADE,
+  user_id uuid,
+  provider_message_id text,
+  sent_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_followup_email_ledger_sent_at
+  ON public.followup_email_ledger(sent_at DESC);
+
+ALTER TABLE public.followup_email_ledger ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_policies
+    WHERE schemaname='public' AND tablename='followup_email_ledger' AND policyname='followup_email_ledger_admin'
+  ) THEN
+    CREATE POLICY followup_email_ledger_admin ON public.followup_email_ledger
+      FOR SELECT TO authenticated
+      USING (public.is_admin(auth.uid()));
+  END IF;
+END $$;
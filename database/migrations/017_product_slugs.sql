@@ -0,0 +1,19 @@
+-- Migration 017: Persisted slug index for public product detail pages
+-- get_product_public resolves /api/products/{manufacturer}/{slug} with a
+-- keyed read on (manufacturer_slug, product_slug) instead of slugifying
+-- candidate rows in Python. The API computes both columns on insert/update
+-- (services.product_catalog.product_slugs); this backfills existing rows
+-- with the same rule: lowercase, non-alphanumeric runs -> "-", trimmed.
+
+ALTER TABLE public.product_specifications
+ADD COLUMN IF NOT EXISTS manufacturer_slug TEXT,
+ADD COLUMN IF NOT EXISTS product_slug TEXT;
+
+UPDATE public.product_specifications
+SET
+  manufacturer_slug = trim(both '-' from regexp_replace(lower(trim(coalesce(manufacturer, ''))), '[^a-z0-9]+', '-', 'g')),
+  product_slug = trim(both '-' from regexp_replace(lower(trim(coalesce(product_name, ''))), '[^a-z0-9]+', '-', 'g'))
+WHERE manufacturer_slug IS NULL OR product_slug IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_product_specs_slugs
+  ON public.product_specifications(manufacturer_slug, product_slug);
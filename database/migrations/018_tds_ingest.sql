@@ -0,0 +1,42 @@
+-- Migration 018: Bulk TDS ingestion batches and per-document progress
+-- POST /v1/products/extract-tds/bulk and `python -m scripts.ingest_tds`
+-- record one row per document keyed by (batch_id, content_hash). Re-running
+-- a batch skips documents already marked done, so interrupted batches resume.
+
+CREATE TABLE IF NOT EXISTS public.tds_ingest_batches (
+  id uuid PRIMARY KEY,
+  user_id uuid,
+  status text NOT NULL DEFAULT 'running',
+  report jsonb,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.tds_ingest_items (
+  batch_id uuid NOT NULL REFERENCES public.tds_ingest_batches(id) ON DELETE CASCADE,
+  content_hash text NOT NULL,
+  filename text,
+  status text NOT NULL,
+  product_id uuid REFERENCES public.product_specifications(id) ON DELETE SET NULL,
+  error text,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (batch_id, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tds_ingest_batches_user
+  ON public.tds_ingest_batches(user_id, created_at DESC);
+
+ALTER TABLE public.tds_ingest_batches ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.tds_ingest_items ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_policies
+    WHERE schemaname='public' AND tablename='tds_ingest_batches' AND policyname='tds_ingest_batches_owner'
+  ) THEN
+    CREATE POLICY tds_ingest_batches_owner ON public.tds_ingest_batches
+      FOR SELECT TO authenticated
+      USING (user_id = auth.uid() OR public.is_admin(auth.uid()));
+  END IF;
+END $$;
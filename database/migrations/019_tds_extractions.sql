@@ -0,0 +1,19 @@
+-- Migration 019: Content-hash cache for TDS extraction results
+-- One row per distinct PDF (SHA-256 of its bytes). extract_tds and bulk
+-- ingestion return the existing product for a repeat upload instead of
+-- calling Claude again; force_refresh re-extracts into the same product.
+-- The PDF itself is stored once at tds-documents/tds/sha256/<hash>.pdf.
+
+CREATE TABLE IF NOT EXISTS public.tds_extractions (
+  content_hash text PRIMARY KEY,
+  product_id uuid REFERENCES public.product_specifications(id) ON DELETE SET NULL,
+  tds_file_url text,
+  extracted jsonb NOT NULL DEFAULT '{}'::jsonb,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_tds_extractions_product
+  ON public.tds_extractions(product_id);
+
+ALTER TABLE public.tds_extractions ENABLE ROW LEVEL SECURITY;
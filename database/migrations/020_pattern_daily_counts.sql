@@ -0,0 +1,74 @@
+-- Migration 020: Per-key daily failure counts for incremental pattern detection
+-- One row per (failure_mode, substrate, product) key and day, maintained by a
+-- trigger as failure_analyses reach status 'completed'. POST /v1/patterns/detect
+-- reads these buckets (one row per key-day) instead of re-reading 180 days of
+-- analyses. analysis_ids keeps the most recent 20 ids per bucket for alerts.
+
+CREATE TABLE IF NOT EXISTS public.pattern_daily_counts (
+  pattern_key text NOT NULL,
+  bucket_date date NOT NULL,
+  failure_mode text,
+  substrate text,
+  product text,
+  count int NOT NULL DEFAULT 0,
+  analysis_ids uuid[] NOT NULL DEFAULT '{}',
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (pattern_key, bucket_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pattern_daily_counts_date
+  ON public.pattern_daily_counts(bucket_date);
+
+ALTER TABLE public.pattern_daily_counts ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.pattern_key(fm text, sub text, prod text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT coalesce(fm, '') || '|' || coalesce(sub, '') || '|' || coalesce(prod, '');
+$$;
+
+CREATE OR REPLACE FUNCTION public.bump_pattern_daily_count()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.status = 'completed'
+     AND (TG_OP = 'INSERT' OR OLD.status IS DISTINCT FROM 'completed') THEN
+    INSERT INTO public.pattern_daily_counts AS c
+      (pattern_key, bucket_date, failure_mode, substrate, product, count, analysis_ids)
+    VALUES (
+      public.pattern_key(NEW.failure_mode, NEW.substrate_a, NEW.material_product),
+      (coalesce(NEW.created_at, now()) AT TIME ZONE 'UTC')::date,
+      NEW.failure_mode, NEW.substrate_a, NEW.material_product,
+      1, ARRAY[NEW.id]
+    )
+    ON CONFLICT (pattern_key, bucket_date) DO UPDATE
+      SET count = c.count + 1,
+          analysis_ids = (ARRAY[NEW.id] || c.analysis_ids)[1:20],
+          updated_at = now();
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_failure_analyses_pattern_counts ON public.failure_analyses;
+CREATE TRIGGER trg_failure_analyses_pattern_counts
+  AFTER INSERT OR UPDATE OF status ON public.failure_analyses
+  FOR EACH ROW EXECUTE FUNCTION public.bump_pattern_daily_count();
+
+-- Seed from existing completed analyses (detection looks back 180 days)
+INSERT INTO public.pattern_daily_counts
+  (pattern_key, bucket_date, failure_mode, substrate, product, count, analysis_ids)
+SELECT
+  public.pattern_key(failure_mode, substrate_a, material_product),
+  (created_at AT TIME ZONE 'UTC')::date,
+  failure_mode, substrate_a, material_product,
+  count(*),
+  (array_agg(id ORDER BY created_at DESC))[1:20]
+FROM public.failure_analyses
+WHERE status = 'completed'
+  AND created_at >= now() - interval '181 days'
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (pattern_key, bucket_date) DO NOTHING;
@@ -0,0 +1,92 @@
+-- Migration 021: Multi-dimensional pattern buckets over normalized fields
+-- pattern_daily_counts (020) was keyed by raw failure_mode|substrate_a|product.
+-- Buckets are now keyed by the normalized finest grain
+-- (failure_mode, substrate_a, substrate_b, product, root_cause_category) so
+-- the detector can roll them up along any configured dimension hierarchy;
+-- spelling variants of one material land in the same bucket.
+-- pattern_alerts records which rollup node an alert was raised for.
+
+ALTER TABLE public.pattern_daily_counts
+  ADD COLUMN IF NOT EXISTS substrate_b text,
+  ADD COLUMN IF NOT EXISTS root_cause_category text;
+
+ALTER TABLE public.pattern_alerts
+  ADD COLUMN IF NOT EXISTS pattern_key text,
+  ADD COLUMN IF NOT EXISTS dimensions jsonb;
+
+CREATE INDEX IF NOT EXISTS idx_pattern_alerts_active_key
+  ON public.pattern_alerts(pattern_key) WHERE status = 'active';
+
+CREATE OR REPLACE FUNCTION public.pattern_norm(v text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT nullif(regexp_replace(lower(trim(v)), '\s+', ' ', 'g'), '');
+$$;
+
+CREATE OR REPLACE FUNCTION public.pattern_key(fm text, sub_a text, sub_b text, prod text, rc text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT coalesce(fm, '') || '|' || coalesce(sub_a, '') || '|' || coalesce(sub_b, '')
+      || '|' || coalesce(prod, '') || '|' || coalesce(rc, '');
+$$;
+
+CREATE OR REPLACE FUNCTION public.bump_pattern_daily_count()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  fm text := public.pattern_norm(NEW.failure_mode);
+  sub_a text := coalesce(NEW.substrate_a_normalized, public.pattern_norm(NEW.substrate_a));
+  sub_b text := coalesce(NEW.substrate_b_normalized, public.pattern_norm(NEW.substrate_b));
+  prod text := public.pattern_norm(NEW.material_product);
+  rc text := public.pattern_norm(NEW.root_cause_category);
+BEGIN
+  IF NEW.status = 'completed'
+     AND (TG_OP = 'INSERT' OR OLD.status IS DISTINCT FROM 'completed') THEN
+    INSERT INTO public.pattern_daily_counts AS c
+      (pattern_key, bucket_date, failure_mode, substrate, substrate_b, product,
+       root_cause_category, count, analysis_ids)
+    VALUES (
+      public.pattern_key(fm, sub_a, sub_b, prod, rc),
+      (coalesce(NEW.created_at, now()) AT TIME ZONE 'UTC')::date,
+      fm, sub_a, sub_b, prod, rc,
+      1, ARRAY[NEW.id]
+    )
+    ON CONFLICT (pattern_key, bucket_date) DO UPDATE
+      SET count = c.count + 1,
+          analysis_ids = (ARRAY[NEW.id] || c.analysis_ids)[1:20],
+          updated_at = now();
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+-- Buckets are derived data: rebuild them under the new key
+DELETE FROM public.pattern_daily_counts;
+
+INSERT INTO public.pattern_daily_counts
+  (pattern_key, bucket_date, failure_mode, substrate, substrate_b, product,
+   root_cause_category, count, analysis_ids)
+SELECT
+  public.pattern_key(fm, sub_a, sub_b, prod, rc), day, fm, sub_a, sub_b, prod, rc,
+  count(*),
+  (array_agg(id ORDER BY created_at DESC))[1:20]
+FROM (
+  SELECT
+    id,
+    created_at,
+    (created_at AT TIME ZONE 'UTC')::date AS day,
+    public.pattern_norm(failure_mode) AS fm,
+    coalesce(substrate_a_normalized, public.pattern_norm(substrate_a)) AS sub_a,
+    coalesce(substrate_b_normalized, public.pattern_norm(substrate_b)) AS sub_b,
+    public.pattern_norm(material_product) AS prod,
+    public.pattern_norm(root_cause_category) AS rc
+  FROM public.failure_analyses
+  WHERE status = 'completed'
+    AND created_at >= now() - interval '181 days'
+) a
+GROUP BY 1, 2, 3, 4, 5, 6, 7;
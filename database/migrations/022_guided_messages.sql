@@ -0,0 +1,99 @@
+-- Migration 022: Append-only message store for guided sessions
+-- Guided turns used to read and rewrite the whole investigation_sessions.messages
+-- array. Messages now live one row each in guided_messages; a turn inserts
+-- its rows and reads back only the recent role/content window. An insert
+-- trigger keeps message_count, user_turns, last_phase and last_message_at on
+-- the session row, so listing sessions and the turn-limit check never touch
+-- the conversation. The legacy messages column is backfilled below and no
+-- longer written.
+
+CREATE TABLE IF NOT EXISTS public.guided_messages (
+  id bigserial PRIMARY KEY,
+  session_id uuid NOT NULL REFERENCES public.investigation_sessions(id) ON DELETE CASCADE,
+  role text NOT NULL,
+  content text NOT NULL DEFAULT '',
+  payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_guided_messages_session
+  ON public.guided_messages(session_id, id DESC);
+
+ALTER TABLE public.investigation_sessions
+  ADD COLUMN IF NOT EXISTS message_count int NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS user_turns int NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS last_phase text,
+  ADD COLUMN IF NOT EXISTS last_message_at timestamptz,
+  -- already written by create-investigation; declared so endpoints can select it explicitly
+  ADD COLUMN IF NOT EXISTS investigation_id uuid REFERENCES public.investigations(id) ON DELETE SET NULL;
+
+ALTER TABLE public.guided_messages ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_policies
+    WHERE schemaname='public' AND tablename='guided_messages' AND policyname='guided_messages_owner'
+  ) THEN
+    CREATE POLICY guided_messages_owner ON public.guided_messages
+      FOR SELECT TO authenticated
+      USING (EXISTS (
+        SELECT 1 FROM public.investigation_sessions s
+        WHERE s.id = session_id AND s.user_id = auth.uid()
+      ));
+  END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION public.bump_guided_session_counters()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE public.investigation_sessions
+     SET message_count = message_count + 1,
+         user_turns = user_turns + CASE WHEN NEW.role = 'user' THEN 1 ELSE 0 END,
+         last_phase = coalesce(NEW.payload->>'phase', last_phase),
+         last_message_at = NEW.created_at,
+         updated_at = now()
+   WHERE id = NEW.session_id;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_guided_messages_counters ON public.guided_messages;
+
+-- Backfill existing conversations (before the trigger exists, counters set below)
+INSERT INTO public.guided_messages (session_id, role, content, payload, created_at)
+SELECT
+  s.id,
+  coalesce(m.value->>'role', 'user'),
+  coalesce(m.value->>'content', ''),
+  m.value - 'role' - 'content',
+  coalesce((m.value->>'timestamp')::timestamptz, s.created_at)
+FROM public.investigation_sessions s
+CROSS JOIN LATERAL jsonb_array_elements(
+  CASE WHEN jsonb_typeof(s.messages) = 'array' THEN s.messages ELSE '[]'::jsonb END
+) WITH ORDINALITY AS m(value, ord)
+WHERE NOT EXISTS (SELECT 1 FROM public.guided_messages g WHERE g.session_id = s.id)
+ORDER BY s.id, m.ord;
+
+UPDATE public.investigation_sessions s
+   SET message_count = c.n,
+       user_turns = c.user_n,
+       last_phase = c.phase,
+       last_message_at = c.last_at
+  FROM (
+    SELECT
+      session_id,
+      count(*) AS n,
+      count(*) FILTER (WHERE role = 'user') AS user_n,
+      (array_agg(payload->>'phase' ORDER BY id DESC) FILTER (WHERE payload ? 'phase'))[1] AS phase,
+      max(created_at) AS last_at
+    FROM public.guided_messages
+    GROUP BY session_id
+  ) c
+ WHERE c.session_id = s.id;
+
+CREATE TRIGGER trg_guided_messages_counters
+  AFTER INSERT ON public.guided_messages
+  FOR EACH ROW EXECUTE FUNCTION public.bump_guided_session_counters();
@@ -0,0 +1,13 @@
+-- Migration 023: Prompt-cache token counts on ai_engine_logs
+-- Guided sessions send the system prompt, tool schema and conversation prefix
+-- with Anthropic prompt-caching breakpoints. prompt_tokens keeps the full
+-- prompt size; these columns record how much of it was read from the cache
+-- and how much was written to it, so uncached input is
+-- prompt_tokens - cache_read_tokens - cache_creation_tokens.
+
+ALTER TABLE public.ai_engine_logs
+  ADD COLUMN IF NOT EXISTS cache_read_tokens int,
+  ADD COLUMN IF NOT EXISTS cache_creation_tokens int;
+
+CREATE INDEX IF NOT EXISTS idx_ai_engine_logs_engine_created_at
+  ON public.ai_engine_logs(engine, created_at DESC);
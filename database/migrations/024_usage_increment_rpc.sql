@@ -0,0 +1,37 @@
+-- Migration 024: Atomic monthly usage counters
+-- usage_service used to read users.analyses_this_month and write back +1, so
+-- concurrent requests from one account lost increments, and the monthly reset
+-- was a separate write on the request path. increment_usage does both in a
+-- single UPDATE: when the reset date has passed it zeroes both counters and
+-- moves both reset dates to the first of next month (UTC), then counts the
+-- use. The reset test references the row being updated, so a concurrent call
+-- waiting on the row lock re-evaluates it against the already-reset row.
+
+CREATE OR REPLACE FUNCTION public.increment_usage(p_user_id uuid, p_kind text)
+RETURNS TABLE (analyses_this_month int, specs_this_month int, analyses_reset_date timestamptz)
+LANGUAGE sql
+AS $$
+  UPDATE public.users AS u
+     SET analyses_this_month =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN 0 ELSE coalesce(u.analyses_this_month, 0) END
+           + CASE WHEN p_kind = 'analysis' THEN 1 ELSE 0 END,
+         specs_this_month =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN 0 ELSE coalesce(u.specs_this_month, 0) END
+           + CASE WHEN p_kind = 'spec' THEN 1 ELSE 0 END,
+         analyses_reset_date =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC'
+                ELSE u.analyses_reset_date END,
+         specs_reset_date =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC'
+                ELSE u.specs_reset_date END
+   WHERE u.id = p_user_id
+  RETURNING u.analyses_this_month, u.specs_this_month, u.analyses_reset_date;
+$$;
+
+-- Only the API (service role) counts usage
+REVOKE ALL ON FUNCTION public.increment_usage(uuid, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.increment_usage(uuid, text) TO service_role;
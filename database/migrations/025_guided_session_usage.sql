@@ -0,0 +1,81 @@
+-- Migration 025: Monthly guided-session counter on users
+-- start_guided_session used to count this month's investigation_sessions rows
+-- on every call to enforce guided_sessions_monthly. The count now lives on the
+-- user row next to analyses_this_month / specs_this_month, shares their reset
+-- date, and is bumped by increment_usage(user, 'guided_session'), so the check
+-- reads the users row already loaded for auth. reconcile_guided_session_counts
+-- (POST /reconcile-usage cron) repairs drift from failed increments or
+-- deleted sessions.
+
+ALTER TABLE public.users
+  ADD COLUMN IF NOT EXISTS guided_sessions_this_month int NOT NULL DEFAULT 0;
+
+-- increment_usage gains a counter, so its result type changes
+DROP FUNCTION IF EXISTS public.increment_usage(uuid, text);
+
+CREATE FUNCTION public.increment_usage(p_user_id uuid, p_kind text)
+RETURNS TABLE (
+  analyses_this_month int,
+  specs_this_month int,
+  guided_sessions_this_month int,
+  analyses_reset_date timestamptz
+)
+LANGUAGE sql
+AS $$
+  UPDATE public.users AS u
+     SET analyses_this_month =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN 0 ELSE coalesce(u.analyses_this_month, 0) END
+           + CASE WHEN p_kind = 'analysis' THEN 1 ELSE 0 END,
+         specs_this_month =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN 0 ELSE coalesce(u.specs_this_month, 0) END
+           + CASE WHEN p_kind = 'spec' THEN 1 ELSE 0 END,
+         guided_sessions_this_month =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN 0 ELSE coalesce(u.guided_sessions_this_month, 0) END
+           + CASE WHEN p_kind = 'guided_session' THEN 1 ELSE 0 END,
+         analyses_reset_date =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC'
+                ELSE u.analyses_reset_date END,
+         specs_reset_date =
+           CASE WHEN u.analyses_reset_date IS NULL OR now() >= u.analyses_reset_date
+                THEN (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC'
+                ELSE u.specs_reset_date END
+   WHERE u.id = p_user_id
+  RETURNING u.analyses_this_month, u.specs_this_month, u.guided_sessions_this_month, u.analyses_reset_date;
+$$;
+
+-- Set every current-period counter to this month's actual session count.
+-- Users whose reset date has passed are skipped: their next increment resets them.
+CREATE OR REPLACE FUNCTION public.reconcile_guided_session_counts()
+RETURNS int
+LANGUAGE sql
+AS $$
+  WITH actual AS (
+    SELECT s.user_id, count(*)::int AS n
+      FROM public.investigation_sessions s
+     WHERE s.created_at >= date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+     GROUP BY s.user_id
+  ),
+  repaired AS (
+    UPDATE public.users AS u
+       SET guided_sessions_this_month = coalesce(a.n, 0)
+      FROM public.users AS cur
+      LEFT JOIN actual a ON a.user_id = cur.id
+     WHERE u.id = cur.id
+       AND u.analyses_reset_date > now()
+       AND u.guided_sessions_this_month IS DISTINCT FROM coalesce(a.n, 0)
+    RETURNING 1
+  )
+  SELECT count(*)::int FROM repaired;
+$$;
+
+-- Seed the new column for the running month
+SELECT public.reconcile_guided_session_counts();
+
+REVOKE ALL ON FUNCTION public.increment_usage(uuid, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.increment_usage(uuid, text) TO service_role;
+REVOKE ALL ON FUNCTION public.reconcile_guided_session_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reconcile_guided_session_counts() TO service_role;
@@ -0,0 +1,50 @@
+-- Migration 026: Block-leased counters for human-readable numbers
+-- Investigation numbers used to be derived per request: GQ-YYYY-NNNN from the
+-- highest existing number (concurrent creates could pick the same one) and
+-- INV-NNNNN from a count of every investigation (a full-table count per
+-- inbound email). Each number series now has a row here. lease_number_block
+-- atomically advances it by a block and returns the first number of the
+-- block; API workers hand out numbers from their block in memory and lease
+-- the next one when it runs out. Unused numbers from a worker's last block
+-- are skipped, so series can have gaps but never duplicates.
+
+CREATE TABLE IF NOT EXISTS public.number_sequences (
+  name text PRIMARY KEY,
+  next_value bigint NOT NULL DEFAULT 1,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.number_sequences ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.lease_number_block(p_name text, p_size int)
+RETURNS bigint
+LANGUAGE sql
+AS $$
+  INSERT INTO public.number_sequences AS s (name, next_value)
+  VALUES (p_name, 1 + greatest(p_size, 1))
+  ON CONFLICT (name) DO UPDATE
+    SET next_value = s.next_value + greatest(p_size, 1),
+        updated_at = now()
+  RETURNING next_value - greatest(p_size, 1);
+$$;
+
+REVOKE ALL ON FUNCTION public.lease_number_block(text, int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.lease_number_block(text, int) TO service_role;
+
+-- Continue the existing series: GQ-<year> per year, INV across all years
+INSERT INTO public.number_sequences (name, next_value)
+SELECT 'GQ-' || split_part(investigation_number, '-', 2),
+       max(split_part(investigation_number, '-', 3)::bigint) + 1
+  FROM public.investigations
+ WHERE investigation_number ~ '^GQ-[0-9]{4}-[0-9]+$'
+ GROUP BY split_part(investigation_number, '-', 2)
+ON CONFLICT (name) DO UPDATE
+  SET next_value = greatest(public.number_sequences.next_value, EXCLUDED.next_value);
+
+INSERT INTO public.number_sequences (name, next_value)
+SELECT 'INV', max(substr(investigation_number, 5)::bigint) + 1
+  FROM public.investigations
+ WHERE investigation_number ~ '^INV-[0-9]+$'
+HAVING count(*) > 0
+ON CONFLICT (name) DO UPDATE
+  SET next_value = greatest(public.number_sequences.next_value, EXCLUDED.next_value);
@@ -0,0 +1,50 @@
+-- Migration 027: Bulk case view increments
+-- GET /cases/{id} used to read cases.views and write back views + 1 on every
+-- detail view, losing concurrent increments and putting a write on a read
+-- endpoint. The API now aggregates views per case in memory and periodically
+-- calls increment_case_views with {case_id: count}; each row gets a single
+-- atomic views = views + n. Returns the number of cases updated.
+-- cases predates the migration history, so the type of cases.id is not known
+-- here (GET /cases/{id} tries the path value as an id before its slug, which
+-- suggests text). The function is created with the key cast to the column's
+-- actual type, so the match goes through the primary key index (casting
+-- c.id to text instead would force a scan) and works for text and uuid ids.
+-- The API only records ids read back from cases, so every key casts cleanly.
+
+DO $$
+DECLARE
+  id_type text;
+  id_match text;
+BEGIN
+  SELECT format_type(a.atttypid, a.atttypmod)
+    INTO id_type
+    FROM pg_attribute a
+   WHERE a.attrelid = 'public.cases'::regclass
+     AND a.attname = 'id'
+     AND NOT a.attisdropped;
+
+  id_match := CASE
+    WHEN id_type = 'text' THEN 'c.id = v.case_id'
+    ELSE format('c.id = v.case_id::%s', id_type)
+  END;
+
+  EXECUTE format($fn$
+    CREATE OR REPLACE FUNCTION public.increment_case_views(p_counts jsonb)
+    RETURNS int
+    LANGUAGE sql
+    AS $body$
+      WITH updated AS (
+        UPDATE public.cases AS c
+           SET views = coalesce(c.views, 0) + v.n
+          FROM (SELECT key AS case_id, value::int AS n FROM jsonb_each_text(p_counts)) AS v
+         WHERE %s
+        RETURNING 1
+      )
+      SELECT count(*)::int FROM updated;
+    $body$
+  $fn$, id_match);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.increment_case_views(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.increment_case_views(jsonb) TO service_role;
@@ -0,0 +1,23 @@
+-- Migration 028: Claim follow-up emails before sending
+-- send_pending_followups now inserts a 'pending' ledger row for each analysis
+-- before its batch goes to Resend and marks it 'sent' afterwards. A pending
+-- row blocks any further follow-up for that analysis, so a batch that was
+-- delivered but not recorded (or whose outcome is unknown) is never re-sent.
+-- Existing rows were all written after delivery.
+
+ALTER TABLE public.followup_email_ledger
+  ADD COLUMN IF NOT EXISTS status text NOT NULL DEFAULT 'sent';
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint WHERE conname = 'followup_email_ledger_status_check'
+  ) THEN
+    ALTER TABLE public.followup_email_ledger
+      ADD CONSTRAINT followup_email_ledger_status_check CHECK (status IN ('pending', 'sent'));
+  END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_followup_email_ledger_pending
+  ON public.followup_email_ledger(sent_at)
+  WHERE status = 'pending';
@@ -0,0 +1,50 @@
+-- Migration 029: Rebuild pattern buckets after substrate re-normalization
+-- pattern_daily_counts (020/021) is keyed on substrate_*_normalized as it was
+-- when each analysis completed. scripts.backfill_substrates rewrites those
+-- keys on historical rows, which would leave buckets split under the old
+-- keys; it calls rebuild_pattern_daily_counts() afterwards to re-derive the
+-- 181-day window the detector reads. The table lock holds back trigger bumps
+-- from analyses completing mid-rebuild; they apply on top once it commits.
+-- Returns the number of buckets written.
+
+CREATE OR REPLACE FUNCTION public.rebuild_pattern_daily_counts()
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  written int;
+BEGIN
+  LOCK TABLE public.pattern_daily_counts IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM public.pattern_daily_counts;
+
+  INSERT INTO public.pattern_daily_counts
+    (pattern_key, bucket_date, failure_mode, substrate, substrate_b, product,
+     root_cause_category, count, analysis_ids)
+  SELECT
+    public.pattern_key(fm, sub_a, sub_b, prod, rc), day, fm, sub_a, sub_b, prod, rc,
+    count(*),
+    (array_agg(id ORDER BY created_at DESC))[1:20]
+  FROM (
+    SELECT
+      id,
+      created_at,
+      (created_at AT TIME ZONE 'UTC')::date AS day,
+      public.pattern_norm(failure_mode) AS fm,
+      coalesce(substrate_a_normalized, public.pattern_norm(substrate_a)) AS sub_a,
+      coalesce(substrate_b_normalized, public.pattern_norm(substrate_b)) AS sub_b,
+      public.pattern_norm(material_product) AS prod,
+      public.pattern_norm(root_cause_category) AS rc
+    FROM public.failure_analyses
+    WHERE status = 'completed'
+      AND created_at >= now() - interval '181 days'
+  ) a
+  GROUP BY 1, 2, 3, 4, 5, 6, 7;
+
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.rebuild_pattern_daily_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_pattern_daily_counts() TO service_role;
@@ -0,0 +1,68 @@
+-- Migration 030: Per-key window counts for pattern detection
+-- The detector used to page every pattern_daily_counts row in the 181-day
+-- look-back into the API. The finest grain is five dimensions x day, so a
+-- key seen once every few days costs a row per day and the buckets barely
+-- compress. pattern_window_counts folds the day rows in SQL into one row per
+-- key with the six windows the detector scores:
+--   [0] days 0-30, [1..5] 30-day history buckets covering days 31-180.
+-- It also returns the key's newest recent bucket date and its most recent
+-- 20 analysis ids. p_dims lists the stored columns the configured
+-- hierarchies use; the others are nulled before grouping so unused
+-- dimensions do not split keys.
+
+CREATE OR REPLACE FUNCTION public.pattern_window_counts(p_today date, p_dims text[])
+RETURNS TABLE (
+  pattern_key text,
+  failure_mode text,
+  substrate text,
+  substrate_b text,
+  product text,
+  root_cause_category text,
+  window_counts int[],
+  last_recent date,
+  recent_ids uuid[]
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH b AS (
+    SELECT
+      CASE WHEN 'failure_mode' = ANY(p_dims) THEN c.failure_mode END AS fm,
+      CASE WHEN 'substrate' = ANY(p_dims) THEN c.substrate END AS sub_a,
+      CASE WHEN 'substrate_b' = ANY(p_dims) THEN c.substrate_b END AS sub_b,
+      CASE WHEN 'product' = ANY(p_dims) THEN c.product END AS prod,
+      CASE WHEN 'root_cause_category' = ANY(p_dims) THEN c.root_cause_category END AS rc,
+      CASE WHEN p_today - c.bucket_date <= 30 THEN 0
+           ELSE 1 + least((p_today - c.bucket_date - 31) / 30, 4) END AS bin,
+      c.bucket_date,
+      c.count,
+      c.analysis_ids
+    FROM public.pattern_daily_counts c
+    WHERE c.bucket_date BETWEEN p_today - 180 AND p_today
+  )
+  SELECT
+    public.pattern_key(fm, sub_a, sub_b, prod, rc),
+    fm, sub_a, sub_b, prod, rc,
+    ARRAY[
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 0 AND coalesce(u.n, 1) = 1), 0)::int,
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 1 AND coalesce(u.n, 1) = 1), 0)::int,
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 2 AND coalesce(u.n, 1) = 1), 0)::int,
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 3 AND coalesce(u.n, 1) = 1), 0)::int,
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 4 AND coalesce(u.n, 1) = 1), 0)::int,
+      coalesce(sum(b.count) FILTER (WHERE b.bin = 5 AND coalesce(u.n, 1) = 1), 0)::int
+    ],
+    max(b.bucket_date) FILTER (WHERE b.bin = 0),
+    coalesce(
+      (array_agg(u.id ORDER BY b.bucket_date DESC, u.n) FILTER (WHERE u.id IS NOT NULL))[1:20],
+      '{}'
+    )
+  FROM b
+  -- Recent buckets expand to one row per analysis id; counts are taken from
+  -- the first of them (n = 1) so the expansion does not inflate the sums
+  LEFT JOIN LATERAL unnest(CASE WHEN b.bin = 0 THEN b.analysis_ids END)
+    WITH ORDINALITY AS u(id, n) ON true
+  GROUP BY fm, sub_a, sub_b, prod, rc;
+$$;
+
+REVOKE ALL ON FUNCTION public.pattern_window_counts(date, text[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.pattern_window_counts(date, text[]) TO service_role;